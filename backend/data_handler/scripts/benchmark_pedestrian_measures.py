@@ -0,0 +1,135 @@
+# ruff: noqa: INP001, T201
+"""
+Benchmark of the pedestrian counter measures upsert.
+
+Compares the COPY-based upsert used by ``process_pedestrian_measures_data``
+with the previous implementation, which ran one INSERT ... ON CONFLICT per
+row. Both load the same synthetic 15-minute export for channels already in
+the database, each in a transaction that is rolled back afterwards:
+
+    python scripts/benchmark_pedestrian_measures.py --days 30 --channels 4
+"""
+
+import argparse
+import csv
+import io
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from data_handler.bulk_load import copy_rows
+from data_handler.db import SessionLocal
+from data_handler.pedestrians.live_data_handler import (
+    _MEASURE_CONFLICT,
+    _MEASURE_UPDATE_COLS,
+    _parse_measure_row,
+)
+from data_handler.pedestrians.models import PedestrianChannel, PedestrianCounterMeasure
+
+_MEASURES_HEADER = "channel_id,counter_id,start_datetime,end_datetime,count\n"
+
+
+def synthetic_export(channel_ids: list[int], days: int) -> str:
+    """A 15-minute export of ``channel_ids`` over ``days`` days, as CSV text."""
+    start = datetime(2000, 1, 1, tzinfo=UTC)
+    lines = [_MEASURES_HEADER]
+    for i in range(days * 96):
+        begin = start + timedelta(minutes=15 * i)
+        end = begin + timedelta(minutes=15)
+        lines.extend(
+            f"{channel_id},BENCHMARK,{begin:%Y-%m-%dT%H:%M:%SZ},"
+            f"{end:%Y-%m-%dT%H:%M:%SZ},{i % 50}\n"
+            for channel_id in channel_ids
+        )
+    return "".join(lines)
+
+
+# ── Previous implementation (one upsert per row) ──────────────────
+
+
+def legacy_upsert(session: Session, csv_text: str) -> int:
+    count = 0
+    for row in csv.DictReader(io.StringIO(csv_text)):
+        stmt = pg_insert(PedestrianCounterMeasure).values(**_parse_measure_row(row))
+        session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["channel_id", "start_datetime", "end_datetime"],
+                set_={
+                    "counter_id": stmt.excluded.counter_id,
+                    "count": stmt.excluded.count,
+                },
+            )
+        )
+        count += 1
+    return count
+
+
+def copy_upsert(session: Session, csv_text: str) -> int:
+    return copy_rows(
+        session,
+        PedestrianCounterMeasure,
+        (_parse_measure_row(row) for row in csv.DictReader(io.StringIO(csv_text))),
+        _MEASURE_CONFLICT,
+        _MEASURE_UPDATE_COLS,
+    )
+
+
+# ── Benchmark ─────────────────────────────────────────────────────
+
+
+def _time(upsert: Callable[[Session, str], int], csv_text: str) -> float:
+    """Run ``upsert`` twice (insert, then update on conflict) and roll back."""
+    with SessionLocal() as session:
+        try:
+            started = time.perf_counter()
+            upsert(session, csv_text)
+            upsert(session, csv_text)
+            elapsed = time.perf_counter() - started
+            stored = session.scalar(
+                select(func.count()).where(
+                    PedestrianCounterMeasure.counter_id == "BENCHMARK"
+                )
+            )
+        finally:
+            session.rollback()
+    assert stored == csv_text.count("\n") - 1, stored
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--channels", type=int, default=4)
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        channel_ids = list(
+            session.scalars(
+                select(PedestrianChannel.channel_id)
+                .order_by(PedestrianChannel.channel_id)
+                .limit(args.channels)
+            )
+        )
+    if not channel_ids:
+        parser.error("no pedestrian counter channels in the database")
+
+    csv_text = synthetic_export(channel_ids, args.days)
+    n_rows = args.days * 96 * len(channel_ids)
+    print(f"{n_rows:,} measures for {len(channel_ids)} channels, each upserted twice")
+
+    legacy_s = _time(legacy_upsert, csv_text)
+    copy_s = _time(copy_upsert, csv_text)
+
+    print(
+        f"row by row (previous): {legacy_s:8.2f} s ({2 * n_rows / legacy_s:,.0f} rows/s)"
+    )
+    print(f"COPY:                  {copy_s:8.2f} s ({2 * n_rows / copy_s:,.0f} rows/s)")
+    print(f"speed-up:              {legacy_s / copy_s:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
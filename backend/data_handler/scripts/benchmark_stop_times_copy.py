@@ -0,0 +1,122 @@
+# ruff: noqa: INP001, T201
+"""
+Benchmark of loading GTFS stop_times with COPY.
+
+Compares ``copy_rows``, which the static GTFS imports stream stop_times
+through, with the previous implementation, which sent them as multi-row
+INSERT ... VALUES statements of up to 65,535 bound parameters each. Both load
+the same rows into a fresh shadow copy of bus_stop_times, as a full reload
+does, in a transaction that is rolled back afterwards. The rows reference
+trips and stops already in the database:
+
+    python scripts/benchmark_stop_times_copy.py --trips 5000 --stops-per-trip 40
+"""
+
+import argparse
+import time
+from collections.abc import Callable, Sequence
+from datetime import time as time_of_day
+
+from sqlalchemy import Table, func, insert, select
+from sqlalchemy.orm import Session
+
+from data_handler.bulk_load import copy_rows
+from data_handler.bus.models import BusStop, BusStopTime, BusTrip
+from data_handler.common.gtfs_parsing_utils import SECONDS_PER_DAY
+from data_handler.db import SessionLocal
+from data_handler.shadow_tables import ShadowTables
+
+_FIRST_DEPARTURE = 5 * 3600  # seconds, 05:00
+_STOP_SPACING = 90  # seconds between consecutive stops of a trip
+
+
+def stop_time_rows(
+    trip_ids: Sequence[str], stop_ids: Sequence[str], stops_per_trip: int
+) -> list[dict[str, object]]:
+    """``stops_per_trip`` stop_times for each trip, cycling through ``stop_ids``."""
+    rows = []
+    for t, trip_id in enumerate(trip_ids):
+        start = _FIRST_DEPARTURE + (t * 60) % (18 * 3600)
+        for sequence in range(1, stops_per_trip + 1):
+            seconds = start + sequence * _STOP_SPACING
+            wrapped = seconds % SECONDS_PER_DAY
+            at = time_of_day(wrapped // 3600, wrapped // 60 % 60, wrapped % 60)
+            rows.append(
+                {
+                    "trip_id": trip_id,
+                    "stop_id": stop_ids[(t + sequence) % len(stop_ids)],
+                    "arrival_time": at,
+                    "departure_time": at,
+                    "arrival_seconds": seconds,
+                    "departure_seconds": seconds,
+                    "sequence": sequence,
+                    "headsign": None,
+                }
+            )
+    return rows
+
+
+# ── Previous implementation (multi-row VALUES batches) ────────────
+
+
+def legacy_insert(session: Session, table: Table, rows: list[dict]) -> int:
+    chunk_size = max(1, 65535 // len(rows[0]))
+    for i in range(0, len(rows), chunk_size):
+        session.execute(insert(table).values(rows[i : i + chunk_size]))
+    return len(rows)
+
+
+def copy_insert(session: Session, table: Table, rows: list[dict]) -> int:
+    return copy_rows(session, table, rows)
+
+
+# ── Benchmark ─────────────────────────────────────────────────────
+
+
+def _time(load: Callable[[Session, Table, list[dict]], int], rows: list[dict]) -> float:
+    """Load ``rows`` into a new shadow stop_times table and roll back."""
+    shadow = ShadowTables([BusStopTime])
+    with SessionLocal() as session:
+        try:
+            shadow.create(session)
+            started = time.perf_counter()
+            load(session, shadow[BusStopTime], rows)
+            elapsed = time.perf_counter() - started
+            stored = session.scalar(
+                select(func.count()).select_from(shadow[BusStopTime])
+            )
+        finally:
+            session.rollback()
+    assert stored == len(rows), stored
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trips", type=int, default=5000)
+    parser.add_argument("--stops-per-trip", type=int, default=40)
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        trip_ids = list(session.scalars(select(BusTrip.id).limit(args.trips)))
+        stop_ids = list(session.scalars(select(BusStop.id).limit(args.stops_per_trip)))
+    if not trip_ids or not stop_ids:
+        parser.error("load the bus GTFS feed first; no bus trips or stops found")
+
+    rows = stop_time_rows(trip_ids, stop_ids, args.stops_per_trip)
+    print(f"{len(rows):,} stop_times for {len(trip_ids):,} trips")
+
+    legacy_s = _time(legacy_insert, rows)
+    copy_s = _time(copy_insert, rows)
+
+    print(
+        f"multi-row INSERT (previous): {legacy_s:8.2f} s ({len(rows) / legacy_s:,.0f} rows/s)"
+    )
+    print(
+        f"COPY:                        {copy_s:8.2f} s ({len(rows) / copy_s:,.0f} rows/s)"
+    )
+    print(f"speed-up:                    {legacy_s / copy_s:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -43,9 +43,9 @@ from data_handler.tram.forecast_handler import (
 from data_handler.tram.static_data_handler import process_tram_static_data
 from data_handler.urls import (
     delete_static_data,
-    download_and_extract_zip,
     download_file,
     download_google_drive_folder,
+    open_remote_zip,
 )
 
 if TYPE_CHECKING:
@@ -146,10 +146,11 @@ def _run_bus_static(settings: DataSourcesSettings, logger: logging.Logger) -> No
     if not settings.enable_bus_data:
         logger.info("Skipping bus static data...")
         return
-    bus_dir = str(settings.base_static_data_dir / "bus")
-    download_and_extract_zip(settings.bus_gtfs_static_zip_url, bus_dir)
-    process_bus_static_data(settings.base_static_data_dir / "bus")
-    delete_static_data(bus_dir)
+    with open_remote_zip(settings.bus_gtfs_static_zip_url) as gtfs:
+        if gtfs is None:
+            logger.info("Bus GTFS feed not modified, skipping.")
+            return
+        process_bus_static_data(gtfs)
 
 
 def _run_car_static(settings: DataSourcesSettings, logger: logging.Logger) -> None:
@@ -166,10 +167,11 @@ def _run_train_static(settings: DataSourcesSettings, logger: logging.Logger) ->
     if not settings.enable_train_data:
         logger.info("Skipping train static data...")
         return
-    train_dir = str(settings.base_static_data_dir / "train")
-    download_and_extract_zip(settings.train_gtfs_zip_url, train_dir)
-    process_train_static_data(settings.base_static_data_dir / "train")
-    delete_static_data(train_dir)
+    with open_remote_zip(settings.train_gtfs_zip_url) as gtfs:
+        if gtfs is None:
+            logger.info("Train GTFS feed not modified, skipping.")
+        else:
+            process_train_static_data(gtfs)
 
     if settings.train_ridership_gdrive_folder_id:
         ridership_dir = str(settings.base_static_data_dir / "train_ridership")
@@ -188,18 +190,19 @@ def _run_tram_static(settings: DataSourcesSettings, logger: logging.Logger) -> N
     if not settings.enable_tram_data:
         logger.info("Skipping tram static data...")
         return
-    tram_dir = settings.base_static_data_dir / "tram"
-    tram_dir_str = str(tram_dir)
-    download_and_extract_zip(settings.tram_gtfs_zip_url, tram_dir_str)
+    cso_dir = settings.base_static_data_dir / "tram_cso"
     for filename, url in [
         ("TII03.csv", settings.tram_cso_tii03_url),
         ("TOA11.csv", settings.tram_cso_toa11_url),
         ("TOA09.csv", settings.tram_cso_toa09_url),
         ("TOA02.csv", settings.tram_cso_toa02_url),
     ]:
-        download_file(url, str(tram_dir / filename))
-    process_tram_static_data(tram_dir, tram_dir)
-    delete_static_data(tram_dir_str)
+        download_file(url, str(cso_dir / filename))
+    # Not conditional: the CSO files can change while the GTFS feed doesn't,
+    # and unchanged GTFS files are skipped by the import anyway.
+    with open_remote_zip(settings.tram_gtfs_zip_url, conditional=False) as gtfs:
+        process_tram_static_data(gtfs, cso_dir)
+    delete_static_data(str(cso_dir))
 
 
 def _run_public_spaces(settings: DataSourcesSettings, logger: logging.Logger) -> None:
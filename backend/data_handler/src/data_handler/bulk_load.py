@@ -0,0 +1,377 @@
+"""
+COPY-based bulk loading into Postgres.
+
+Rows are streamed to the server with ``COPY ... FROM STDIN`` rather than
+bound as statement parameters. When a conflict target is given the rows are
+copied into a temporary staging table first and merged into the target with
+a single ``INSERT ... SELECT ... ON CONFLICT`` statement.
+
+``stage_rows``, ``merge_staged`` and ``delete_unstaged`` diff a full new
+version of a table against the current one by key, so that only inserted,
+changed and removed rows are written.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from itertools import chain
+from typing import TYPE_CHECKING, Any
+
+from psycopg import sql
+from sqlalchemy import Table, column, exists, inspect
+from sqlalchemy import table as table_clause
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Mapping
+
+    from psycopg import Cursor
+    from sqlalchemy import ColumnElement
+    from sqlalchemy.orm import DeclarativeBase, Session
+
+logger = logging.getLogger(__name__)
+
+# Copy order of the rows in a merge's staging table
+_STAGE_ORDER = "_stage_order"
+
+
+def model_to_row(obj: DeclarativeBase) -> dict[str, object]:
+    """Return the column values that were explicitly set on an ORM instance."""
+    state = inspect(obj)
+    return {
+        attr.key: state.dict[attr.key]
+        for attr in state.mapper.column_attrs
+        if attr.key in state.dict
+    }
+
+
+def _resolve_table(target: type[DeclarativeBase] | Table) -> Table:
+    return target if isinstance(target, Table) else target.__table__
+
+
+def _column_list(columns: Iterable[str]) -> sql.Composed:
+    return sql.SQL(", ").join(map(sql.Identifier, columns))
+
+
+def _table_identifier(table: Table) -> sql.Identifier:
+    if table.schema:
+        return sql.Identifier(table.schema, table.name)
+    return sql.Identifier(table.name)
+
+
+def _row_converters(
+    session: Session, table: Table, columns: list[str]
+) -> list[Callable[[Any], Any] | None]:
+    """Bind processors turning Python values into DB values (e.g. enums → names)."""
+    dialect = session.get_bind().dialect
+    return [table.c[col].type.bind_processor(dialect) for col in columns]
+
+
+def _create_stage(
+    cur: Cursor,
+    stage: sql.Identifier,
+    table_id: sql.Identifier,
+    column_list: sql.Composed,
+) -> None:
+    cur.execute(
+        sql.SQL(
+            "CREATE TEMP TABLE {} ON COMMIT DROP AS SELECT {} FROM {} WITH NO DATA"
+        ).format(stage, column_list, table_id)
+    )
+
+
+def _copy(
+    cur: Cursor,
+    into: sql.Identifier,
+    columns: list[str],
+    converters: list[Callable[[Any], Any] | None],
+    rows: Iterable[Mapping[str, object]],
+) -> int:
+    count = 0
+    copy_stmt = sql.SQL("COPY {} ({}) FROM STDIN").format(into, _column_list(columns))
+    with cur.copy(copy_stmt) as copy:
+        for row in rows:
+            copy.write_row(
+                [
+                    conv(row[col]) if conv is not None else row[col]
+                    for col, conv in zip(columns, converters, strict=True)
+                ]
+            )
+            count += 1
+    return count
+
+
+def _conflict_clause(
+    conflict_target: list[str] | str, update_cols: list[str]
+) -> sql.Composable:
+    if isinstance(conflict_target, str):
+        target = sql.SQL("ON CONSTRAINT {}").format(sql.Identifier(conflict_target))
+    else:
+        target = sql.SQL("({})").format(
+            sql.SQL(", ").join(map(sql.Identifier, conflict_target))
+        )
+    if not update_cols:
+        return sql.SQL("ON CONFLICT {} DO NOTHING").format(target)
+    assignments = sql.SQL(", ").join(
+        sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(col)) for col in update_cols
+    )
+    return sql.SQL("ON CONFLICT {} DO UPDATE SET {}").format(target, assignments)
+
+
+def _conflict_columns(table: Table, conflict_target: list[str] | str) -> list[str]:
+    if not isinstance(conflict_target, str):
+        return conflict_target
+    for constraint in table.constraints:
+        if constraint.name == conflict_target:
+            return [col.name for col in constraint.columns]
+    msg = f"{table.fullname} has no constraint named {conflict_target!r}"
+    raise ValueError(msg)
+
+
+def _merge_select(
+    stage: sql.Identifier, column_list: sql.Composed, key_cols: list[str] | None
+) -> sql.Composed:
+    """Select the staged rows, keeping only the last one copied for each key."""
+    if key_cols is None:
+        return sql.SQL("SELECT {} FROM {}").format(column_list, stage)
+    keys = _column_list(key_cols)
+    return sql.SQL("SELECT DISTINCT ON ({}) {} FROM {} ORDER BY {}, {} DESC").format(
+        keys, column_list, stage, keys, sql.Identifier(_STAGE_ORDER)
+    )
+
+
+def copy_rows(
+    session: Session,
+    target: type[DeclarativeBase] | Table,
+    rows: Iterable[Mapping[str, object]],
+    conflict_target: list[str] | str | None = None,
+    update_cols: list[str] | None = None,
+) -> int:
+    """
+    Stream rows into a table using COPY, within the session's transaction.
+
+    With no ``conflict_target`` the rows are copied straight into the target
+    table. Otherwise they are copied into a temporary staging table and
+    merged with ``INSERT ... ON CONFLICT``: ``conflict_target`` is either a
+    list of index columns or a constraint name, and ``update_cols`` are the
+    columns overwritten on conflict (``DO NOTHING`` when empty). When several
+    rows share a conflict key the last one wins, as if they had been upserted
+    one by one.
+
+    Every row must have the same keys as the first one.
+
+    Args:
+        session: Active SQLAlchemy session (psycopg driver).
+        target: ORM model or table that receives the rows.
+        rows: Row dicts keyed by column name; consumed lazily.
+        conflict_target: Index columns or constraint name, or None for plain insert.
+        update_cols: Columns to update when a conflicting row exists.
+
+    Returns:
+        Number of rows copied.
+    """
+    iterator = iter(rows)
+    first = next(iterator, None)
+    if first is None:
+        return 0
+
+    table = _resolve_table(target)
+    columns = list(first.keys())
+    table_id = _table_identifier(table)
+    column_list = _column_list(columns)
+
+    raw = session.connection().connection.driver_connection
+    with raw.cursor() as cur:
+        if conflict_target is None:
+            copy_into = table_id
+        else:
+            copy_into = sql.Identifier(f"_stage_{table.name}")
+            _create_stage(cur, copy_into, table_id, column_list)
+            cur.execute(
+                sql.SQL(
+                    "ALTER TABLE {} ADD COLUMN {} bigint GENERATED ALWAYS AS IDENTITY"
+                ).format(copy_into, sql.Identifier(_STAGE_ORDER))
+            )
+
+        count = _copy(
+            cur,
+            copy_into,
+            columns,
+            _row_converters(session, table, columns),
+            chain((first,), iterator),
+        )
+
+        if conflict_target is not None:
+            # ON CONFLICT DO UPDATE cannot update the same row twice in one
+            # statement, so duplicate keys are merged once, with their last row
+            key_cols = (
+                _conflict_columns(table, conflict_target) if update_cols else None
+            )
+            cur.execute(
+                sql.SQL("INSERT INTO {} ({}) {} {}").format(
+                    table_id,
+                    column_list,
+                    _merge_select(copy_into, column_list, key_cols),
+                    _conflict_clause(conflict_target, update_cols or []),
+                )
+            )
+            cur.execute(sql.SQL("DROP TABLE {}").format(copy_into))
+
+    logger.debug("Copied %d row(s) into %s.", count, table.fullname)
+    return count
+
+
+# ── Row diffs ───────────────────────────────────────────────────────
+
+
+def _diff_stage_name(table: Table) -> str:
+    return f"_diff_{table.name}"
+
+
+@dataclass(frozen=True)
+class StagedRows:
+    """Rows copied into a temporary table, to be diffed against ``table`` by key."""
+
+    table: Table
+    stage: sql.Identifier
+    columns: list[str]
+    key_cols: list[str]
+    count: int
+
+    def unstaged(self) -> ColumnElement[bool]:
+        """Return a condition matching rows of ``table`` whose key is not staged."""
+        stage = table_clause(_diff_stage_name(self.table), *map(column, self.key_cols))
+        return ~exists().where(
+            *(self.table.c[col] == stage.c[col] for col in self.key_cols)
+        )
+
+
+def _key_match(key_cols: list[str]) -> sql.Composed:
+    return sql.SQL(" AND ").join(
+        sql.SQL("{} = {}").format(sql.Identifier("t", col), sql.Identifier("s", col))
+        for col in key_cols
+    )
+
+
+def stage_rows(
+    session: Session,
+    target: type[DeclarativeBase] | Table,
+    rows: Iterable[Mapping[str, object]],
+    key_cols: list[str],
+) -> StagedRows:
+    """
+    COPY rows into a temporary staging table for ``merge_staged``/``delete_unstaged``.
+
+    The staging table is dropped on commit. Every row must have the same keys
+    as the first one, including all of ``key_cols``.
+
+    Args:
+        session: Active SQLAlchemy session (psycopg driver).
+        target: ORM model or table the rows will be diffed against.
+        rows: Row dicts keyed by column name; consumed lazily.
+        key_cols: Columns identifying a row (the GTFS natural key).
+
+    Returns:
+        Handle on the staged rows.
+    """
+    iterator = iter(rows)
+    first = next(iterator, None)
+    table = _resolve_table(target)
+    columns = list(first.keys()) if first is not None else list(key_cols)
+    stage = sql.Identifier(_diff_stage_name(table))
+
+    raw = session.connection().connection.driver_connection
+    with raw.cursor() as cur:
+        cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(stage))
+        _create_stage(cur, stage, _table_identifier(table), _column_list(columns))
+        count = 0
+        if first is not None:
+            count = _copy(
+                cur,
+                stage,
+                columns,
+                _row_converters(session, table, columns),
+                chain((first,), iterator),
+            )
+        cur.execute(sql.SQL("ANALYZE {}").format(stage))
+
+    return StagedRows(table, stage, columns, list(key_cols), count)
+
+
+def merge_staged(session: Session, staged: StagedRows) -> tuple[int, int]:
+    """
+    Insert staged rows whose key is new and update those whose values changed.
+
+    Rows that are identical to the staged version are not written.
+
+    Returns:
+        Tuple of (inserted, updated) row counts.
+    """
+    if staged.count == 0:
+        return 0, 0
+
+    table_id = _table_identifier(staged.table)
+    match = _key_match(staged.key_cols)
+    value_cols = [c for c in staged.columns if c not in staged.key_cols]
+
+    raw = session.connection().connection.driver_connection
+    with raw.cursor() as cur:
+        updated = 0
+        if value_cols:
+            cur.execute(
+                sql.SQL(
+                    "UPDATE {} AS t SET {} FROM {} AS s "
+                    "WHERE {} AND ({}) IS DISTINCT FROM ({})"
+                ).format(
+                    table_id,
+                    sql.SQL(", ").join(
+                        sql.SQL("{} = {}").format(
+                            sql.Identifier(col), sql.Identifier("s", col)
+                        )
+                        for col in value_cols
+                    ),
+                    staged.stage,
+                    match,
+                    sql.SQL(", ").join(sql.Identifier("t", c) for c in value_cols),
+                    sql.SQL(", ").join(sql.Identifier("s", c) for c in value_cols),
+                )
+            )
+            updated = cur.rowcount
+
+        cur.execute(
+            sql.SQL(
+                "INSERT INTO {} ({}) SELECT {} FROM {} AS s "
+                "WHERE NOT EXISTS (SELECT 1 FROM {} AS t WHERE {})"
+            ).format(
+                table_id,
+                _column_list(staged.columns),
+                sql.SQL(", ").join(sql.Identifier("s", c) for c in staged.columns),
+                staged.stage,
+                table_id,
+                match,
+            )
+        )
+        inserted = cur.rowcount
+
+    return inserted, updated
+
+
+def delete_unstaged(session: Session, staged: StagedRows) -> int:
+    """
+    Delete rows of the target table whose key is not among the staged rows.
+
+    Returns:
+        Number of rows deleted.
+    """
+    raw = session.connection().connection.driver_connection
+    with raw.cursor() as cur:
+        cur.execute(
+            sql.SQL(
+                "DELETE FROM {} AS t WHERE NOT EXISTS (SELECT 1 FROM {} AS s WHERE {})"
+            ).format(
+                _table_identifier(staged.table),
+                staged.stage,
+                _key_match(staged.key_cols),
+            )
+        )
+        return cur.rowcount
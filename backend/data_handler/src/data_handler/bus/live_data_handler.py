@@ -5,16 +5,15 @@ from datetime import datetime
 
 import requests
 from pydantic import BaseModel
-from sqlalchemy import select
 
 from data_handler.bus.models import (
     BusLiveTripStopTimeUpdate,
     BusLiveTripUpdate,
     BusLiveVehicle,
-    BusTrip,
     ScheduleRelationship,
 )
 from data_handler.bus.synthetic_ridership import generate_ridership_for_vehicles
+from data_handler.bus.trip_id_cache import get_trip_id_cache
 from data_handler.common.gtfs_parsing_utils import parse_gtfs_date, parse_gtfs_time
 from data_handler.db import SessionLocal
 from data_handler.settings.api_settings import get_api_settings
@@ -247,7 +246,9 @@ def process_bus_vehicles_live_data(json_string: str) -> None:
 
     with SessionLocal() as session:
         try:
-            known_trip_ids: set[str] = set(session.scalars(select(BusTrip.id)).all())
+            known_trip_ids = get_trip_id_cache().filter_known(
+                session, (r.trip_id for r in rows)
+            )
             filtered = [r for r in rows if r.trip_id in known_trip_ids]
             skipped = len(rows) - len(filtered)
             if skipped:
@@ -294,7 +295,9 @@ def process_bus_trip_updates_live_data(json_string: str) -> None:
 
     with SessionLocal() as session:
         try:
-            known_trip_ids: set[str] = set(session.scalars(select(BusTrip.id)).all())
+            known_trip_ids = get_trip_id_cache().filter_known(
+                session, (r.trip_id for r in rows)
+            )
             filtered = [r for r in rows if r.trip_id in known_trip_ids]
             skipped = len(rows) - len(filtered)
             if skipped:
@@ -176,6 +176,7 @@ class BusStopTime(Base):
         Index("ix_bus_stop_times_trip_id", "trip_id"),
         Index("ix_bus_stop_times_stop_id", "stop_id"),
         Index("ix_bus_stop_times_trip_stop", "trip_id", "stop_id"),
+        Index("ix_bus_stop_times_stop_arrival", "stop_id", "arrival_seconds"),
         {"schema": DB_SCHEMA},
     )
 
@@ -188,6 +189,10 @@ class BusStopTime(Base):
     )
     arrival_time: Mapped[time] = mapped_column(Time, nullable=False)
     departure_time: Mapped[time] = mapped_column(Time, nullable=False)
+    # Seconds since the start of the service day; unlike the times above,
+    # these keep GTFS times past midnight (e.g. 25:10:00) in order
+    arrival_seconds: Mapped[int] = mapped_column(Integer, nullable=False)
+    departure_seconds: Mapped[int] = mapped_column(Integer, nullable=False)
     sequence: Mapped[int] = mapped_column(Integer, nullable=False)
     headsign: Mapped[str | None] = mapped_column(String)
 
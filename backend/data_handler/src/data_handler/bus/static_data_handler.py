@@ -1,10 +1,10 @@
 import logging
-from pathlib import Path
+from collections.abc import Callable, Iterator
+from functools import partial
 
-from sqlalchemy import delete
-from sqlalchemy.dialects.postgresql import insert as pg_insert
-from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.orm import Session
 
+from data_handler.bulk_load import copy_rows
 from data_handler.bus.models import (
     BusAgency,
     BusCalendarSchedule,
@@ -14,14 +14,27 @@ from data_handler.bus.models import (
     BusTrip,
     BusTripShape,
 )
-from data_handler.common.gtfs_parsing_utils import parse_gtfs_date, parse_gtfs_time
-from data_handler.csv_utils import read_csv_file
+from data_handler.bus.trip_id_cache import invalidate_trip_id_cache
+from data_handler.bus.trip_stop_index import invalidate_trip_stop_index
+from data_handler.common.gtfs_incremental import apply_row_diffs
+from data_handler.common.gtfs_parsing_utils import (
+    parse_gtfs_date,
+    parse_gtfs_seconds,
+    parse_gtfs_time,
+)
+from data_handler.common.source_manifests import (
+    changed_files,
+    hash_files,
+    load_manifest,
+    save_manifest,
+)
+from data_handler.csv_utils import DataPath, read_csv_file
 from data_handler.db import SessionLocal
+from data_handler.shadow_tables import ShadowTables
 
 logger = logging.getLogger(__name__)
 
-_CHUNKED_FILES = {"shapes.txt", "stop_times.txt", "trips.txt", "stops.txt"}
-_CHUNK_SIZE = 9_000
+_GTFS_FEED = "bus"
 
 
 def parse_agency_row(row: dict[str, str]) -> dict[str, object]:
@@ -100,53 +113,41 @@ def parse_stop_time_row(row: dict[str, str]) -> dict[str, object]:
         "stop_id": row["stop_id"],
         "arrival_time": parse_gtfs_time(row["arrival_time"]),
         "departure_time": parse_gtfs_time(row["departure_time"]),
+        "arrival_seconds": parse_gtfs_seconds(row["arrival_time"]),
+        "departure_seconds": parse_gtfs_seconds(row["departure_time"]),
         "sequence": int(row["stop_sequence"]),
         "headsign": headsign.strip() if headsign and headsign.strip() else None,
     }
 
 
-def _execute_batch(
-    session: Session,
-    model: type[DeclarativeBase],
-    batch: list[dict[str, object]],
-    conflict_target: list[str] | str | None,
-    update_cols: list[str],
-) -> None:
-    if not batch:
-        return
-    chunk_size = max(1, 65535 // len(batch[0]))
-    for i in range(0, len(batch), chunk_size):
-        chunk = batch[i : i + chunk_size]
-        stmt = pg_insert(model).values(chunk)
-        if conflict_target is not None:
-            set_ = {col: getattr(stmt.excluded, col) for col in update_cols}
-            if isinstance(conflict_target, str):
-                stmt = stmt.on_conflict_do_update(constraint=conflict_target, set_=set_)
-            else:
-                stmt = stmt.on_conflict_do_update(
-                    index_elements=conflict_target, set_=set_
-                )
-        session.execute(stmt)
-
-
-def process_bus_static_data(gtfs_dir: Path) -> None:
+def process_bus_static_data(gtfs_dir: DataPath) -> None:
     """
     Process bus static data from GTFS CSV files.
 
-    Upserts agency, calendar, route, stop, shape, and trip data so that existing
-    live-data FK references (vehicles, trip updates, ridership) are preserved.
-    Stop times are deleted and re-inserted fresh (no live tables reference them).
+    Files are hashed and compared with the manifest of the last import; if
+    none changed, nothing is written. Otherwise:
+    - On the first import, agency, calendar, route, stop, shape, and trip data
+      are upserted so that existing live-data FK references (vehicles, trip
+      updates, ridership) are preserved. Stop times are loaded fresh into a
+      shadow table (no live tables reference them) which is then swapped in
+      for the live one, so readers never see a partially loaded schedule.
+    - Afterwards, only the changed files are diffed against the live tables
+      by natural key, in one transaction (see ``apply_row_diffs``). Rows that
+      left the feed are deleted from stop_times only, for the same reason.
 
     Args:
-        gtfs_dir: Path to the directory containing GTFS CSV files.
+        gtfs_dir: Path to the directory containing GTFS CSV files, on disk or
+                  the root of an opened GTFS ZIP archive.
 
     Raises:
         FileNotFoundError: If any required CSV file is missing
         ValueError: If any CSV file is missing required headers or the row data is invalid
     """
     # (required_headers, parse_row_fn, model, conflict_target, update_cols)
-    # conflict_target=None → plain insert (stop_times pre-deleted at start)
-    # Order matters: stop_times must be last (FKs to trips and stops)
+    # conflict_target=None → plain COPY into the shadow table (stop_times),
+    # otherwise COPY into a staging table and merge with ON CONFLICT
+    # Order matters: parents before the files that reference them, e.g.
+    # routes after agency, trips after routes, stop_times after trips and stops
     csv_files = {
         "agency.txt": (
             ["agency_id", "agency_name", "agency_url", "agency_timezone"],
@@ -247,52 +248,42 @@ def process_bus_static_data(gtfs_dir: Path) -> None:
 
     logger.info("Processing static bus data...")
 
+    hashes = hash_files(gtfs_dir, csv_files)
     session = SessionLocal()
 
     try:
-        # Delete only stop_times — upsert handles all other tables,
-        # preserving live-data FK references to trips and stops.
-        logger.info("Deleting existing stop time data...")
-        session.execute(delete(BusStopTime))
-        session.commit()
-
-        for filename, (
-            required_headers,
-            parse_row,
-            model,
-            conflict_target,
-            update_cols,
-        ) in csv_files.items():
-            logger.info("Processing %s...", filename)
-            file_path = gtfs_dir / filename
-
-            if filename in _CHUNKED_FILES:
-                chunk: list[dict[str, object]] = []
-                chunk_size: int | None = None
-                total = 0
-                for row in read_csv_file(file_path, required_headers):
-                    parsed = parse_row(row)
-                    if chunk_size is None:
-                        chunk_size = max(1, 65535 // len(parsed))
-                    chunk.append(parsed)
-                    if len(chunk) >= chunk_size:
-                        _execute_batch(
-                            session, model, chunk, conflict_target, update_cols
-                        )
-                        total += len(chunk)
-                        chunk = []
-                        logger.info("  Flushed %d rows...", total)
-                if chunk:
-                    _execute_batch(session, model, chunk, conflict_target, update_cols)
-                    total += len(chunk)
-                logger.info("  Total: %d rows from %s", total, filename)
-            else:
-                rows = [
-                    parse_row(row) for row in read_csv_file(file_path, required_headers)
-                ]
-                _execute_batch(session, model, rows, conflict_target, update_cols)
-
-        session.commit()
+        manifest = load_manifest(session, _GTFS_FEED)
+        changed = changed_files(manifest, hashes)
+        if not changed:
+            logger.info("Bus GTFS feed unchanged since last import, skipping.")
+            return
+
+        if manifest:
+            # Diff only the changed files against the live tables, in one
+            # transaction. Rows that left the feed are only deleted from
+            # stop_times; the other tables are referenced by live data.
+            logger.info("Applying changes from %s...", ", ".join(changed))
+            changes = []
+            for filename in changed:
+                required_headers, parse_row, model, _, _ = csv_files[filename]
+                rows = _read_rows(gtfs_dir / filename, required_headers, parse_row)
+                changes.append((filename, model, rows))
+            apply_row_diffs(
+                session,
+                changes,
+                delete_missing={"stop_times.txt"},
+            )
+            save_manifest(session, _GTFS_FEED, hashes)
+            session.commit()
+        else:
+            _reload_all(
+                session,
+                gtfs_dir,
+                csv_files,
+                partial(save_manifest, source=_GTFS_FEED, hashes=hashes),
+            )
+        invalidate_trip_id_cache()
+        invalidate_trip_stop_index()
         logger.info("Static bus data import complete.")
 
     except Exception:
@@ -302,3 +293,51 @@ def process_bus_static_data(gtfs_dir: Path) -> None:
 
     finally:
         session.close()
+
+
+def _read_rows(
+    file_path: DataPath,
+    required_headers: list[str],
+    parse_row: Callable[[dict[str, str]], dict[str, object]],
+) -> Iterator[dict[str, object]]:
+    """Yield a CSV file's parsed rows."""
+    for row in read_csv_file(file_path, required_headers):
+        yield parse_row(row)
+
+
+def _reload_all(
+    session: Session,
+    gtfs_dir: DataPath,
+    csv_files: dict,
+    on_swap: Callable[[Session], None],
+) -> None:
+    """
+    Upsert every file, swapping a freshly loaded stop_times table in.
+
+    ``on_swap`` runs in the swap's transaction, so the manifest is only saved
+    together with the tables it describes.
+    """
+    # Only stop_times is swapped — upsert handles all other tables,
+    # preserving live-data FK references to trips and stops.
+    shadow = ShadowTables([BusStopTime])
+    shadow.create(session)
+
+    for filename, (
+        required_headers,
+        parse_row,
+        model,
+        conflict_target,
+        update_cols,
+    ) in csv_files.items():
+        logger.info("Processing %s...", filename)
+        total = copy_rows(
+            session,
+            model if conflict_target is not None else shadow[model],
+            _read_rows(gtfs_dir / filename, required_headers, parse_row),
+            conflict_target,
+            update_cols,
+        )
+        logger.info("  Total: %d rows from %s", total, filename)
+
+    session.commit()
+    shadow.swap(session, on_swap)
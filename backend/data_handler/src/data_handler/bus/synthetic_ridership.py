@@ -2,10 +2,12 @@ import logging
 import math
 import random
 
-from sqlalchemy import func, select
+import numpy as np
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from data_handler.bus.models import BusLiveVehicle, BusRidership, BusStop, BusStopTime
+from data_handler.bus.models import BusLiveVehicle, BusRidership
+from data_handler.bus.trip_stop_index import get_trip_stop_index
 from data_handler.db import SessionLocal
 
 logger = logging.getLogger(__name__)
@@ -13,20 +15,6 @@ logger = logging.getLogger(__name__)
 DEFAULT_VEHICLE_CAPACITY = 80
 
 
-def _haversine_distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """Approximate distance in km between two lat/lon points using the haversine formula."""
-    r = 6371.0  # Earth radius in km
-    d_lat = math.radians(lat2 - lat1)
-    d_lon = math.radians(lon2 - lon1)
-    a = (
-        math.sin(d_lat / 2) ** 2
-        + math.cos(math.radians(lat1))
-        * math.cos(math.radians(lat2))
-        * math.sin(d_lon / 2) ** 2
-    )
-    return r * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-
 def find_nearest_stop_in_trip(
     session: Session,
     trip_id: str,
@@ -36,8 +24,9 @@ def find_nearest_stop_in_trip(
     """
     Find the nearest stop to the vehicle position, constrained to the trip's stop sequence.
 
-    Looks up the trip's stops from bus_stop_times joined with bus_stops (for lat/lon),
-    computes haversine distance to each, and returns the closest one.
+    Looks up the trip's stops in the shared trip stop index (loading them from
+    bus_stop_times/bus_stops on first use), computes haversine distance to each,
+    and returns the closest one.
 
     Args:
         session: Active SQLAlchemy session.
@@ -51,30 +40,17 @@ def find_nearest_stop_in_trip(
     Raises:
         ValueError: If the trip has no stop times.
     """
-    result = session.execute(
-        select(BusStopTime.stop_id, BusStopTime.sequence, BusStop.lat, BusStop.lon)
-        .join(BusStop, BusStopTime.stop_id == BusStop.id)
-        .where(BusStopTime.trip_id == trip_id)
-        .order_by(BusStopTime.sequence)
+    index = get_trip_stop_index()
+    index.load(session, [trip_id])
+    stop_ids, sequences, totals = index.nearest_stops(
+        [trip_id], np.array([vehicle_lat]), np.array([vehicle_lon])
     )
-    stops = result.fetchall()
 
-    if not stops:
+    if totals[0] == 0:
         msg = f"No stop times found for trip_id={trip_id!r}"
         raise ValueError(msg)
 
-    best_stop_id = stops[0][0]
-    best_sequence = stops[0][1]
-    best_distance = float("inf")
-
-    for stop_id, sequence, stop_lat, stop_lon in stops:
-        dist = _haversine_distance_km(vehicle_lat, vehicle_lon, stop_lat, stop_lon)
-        if dist < best_distance:
-            best_distance = dist
-            best_stop_id = stop_id
-            best_sequence = sequence
-
-    return best_stop_id, best_sequence
+    return stop_ids[0], int(sequences[0])
 
 
 def _time_of_day_multiplier(hour: int) -> float:
@@ -148,6 +124,10 @@ def generate_ridership_for_vehicles(session: Session | None = None) -> None:
     the trip's sequence and generates a synthetic passenger count based on
     time of day and route progress.
 
+    Trip stops come from the shared trip stop index, so a run issues a
+    constant number of queries (latest vehicles, stops for any trips not yet
+    cached, insert) and the nearest-stop search is vectorised over all vehicles.
+
     Args:
         session: Optional SQLAlchemy session. If None, creates a new one.
     """
@@ -174,18 +154,19 @@ def generate_ridership_for_vehicles(session: Session | None = None) -> None:
             logger.info("No live vehicles found, skipping ridership generation.")
             return
 
+        trip_ids = [v.trip_id for v in vehicles]
+        index = get_trip_stop_index()
+        index.load(session, trip_ids)
+        nearest_ids, nearest_seqs, totals = index.nearest_stops(
+            trip_ids,
+            np.array([v.lat for v in vehicles], dtype=np.float64),
+            np.array([v.lon for v in vehicles], dtype=np.float64),
+        )
+
         rows: list[BusRidership] = []
 
-        for vehicle_id, trip_id, lat, lon, ts in vehicles:
-            # Get total stops for this trip
-            total_stops = (
-                session.scalar(
-                    select(func.count())
-                    .select_from(BusStopTime)
-                    .where(BusStopTime.trip_id == trip_id)
-                )
-                or 0
-            )
+        for i, (vehicle_id, trip_id, _lat, _lon, ts) in enumerate(vehicles):
+            total_stops = int(totals[i])
 
             if total_stops == 0:
                 logger.warning(
@@ -195,10 +176,7 @@ def generate_ridership_for_vehicles(session: Session | None = None) -> None:
                 )
                 continue
 
-            nearest_stop_id, stop_seq = find_nearest_stop_in_trip(
-                session, trip_id, lat, lon
-            )
-
+            stop_seq = int(nearest_seqs[i])
             hour = ts.hour if hasattr(ts, "hour") else 12
             boarding, alighting, onboard = _generate_passenger_counts(
                 hour, stop_seq, total_stops, DEFAULT_VEHICLE_CAPACITY
@@ -208,7 +186,7 @@ def generate_ridership_for_vehicles(session: Session | None = None) -> None:
                 BusRidership(
                     vehicle_id=vehicle_id,
                     trip_id=trip_id,
-                    nearest_stop_id=nearest_stop_id,
+                    nearest_stop_id=nearest_ids[i],
                     stop_sequence=stop_seq,
                     timestamp=ts,
                     passengers_boarding=boarding,
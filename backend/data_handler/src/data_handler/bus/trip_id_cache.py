@@ -0,0 +1,86 @@
+"""
+Known-trip-id membership cache for bus live ingestion.
+
+Live vehicle and trip update feeds must drop records whose trip_id is not in
+the static GTFS data. Rather than loading every ``bus_trips.id`` on each feed,
+only the ids present in the feed are looked up, and the answers (known and
+unknown) are remembered until the next static import bumps the version.
+"""
+
+import logging
+import time
+from collections.abc import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from data_handler.bus.models import BusTrip
+
+logger = logging.getLogger(__name__)
+
+_LOOKUP_CHUNK_SIZE = 5_000  # trip ids per IN (...) query
+
+
+class TripIdCache:
+    """
+    Caches which trip ids exist in ``bus_trips``.
+
+    Attributes:
+        version: Incremented each time the cache is invalidated
+    """
+
+    def __init__(self) -> None:
+        self._known: set[str] = set()
+        self._unknown: set[str] = set()
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._known) + len(self._unknown)
+
+    def filter_known(self, session: Session, trip_ids: Iterable[str]) -> set[str]:
+        """
+        Return the subset of ``trip_ids`` that exist in ``bus_trips``.
+
+        Ids not seen since the last invalidation are checked in bulk with
+        ``IN (...)`` queries; everything else is answered from memory.
+        """
+        started = time.perf_counter()
+        wanted = set(trip_ids)
+        missing = sorted(wanted - self._known - self._unknown)
+
+        for i in range(0, len(missing), _LOOKUP_CHUNK_SIZE):
+            chunk = missing[i : i + _LOOKUP_CHUNK_SIZE]
+            found = set(
+                session.scalars(select(BusTrip.id).where(BusTrip.id.in_(chunk)))
+            )
+            self._known.update(found)
+            self._unknown.update(t for t in chunk if t not in found)
+
+        logger.info(
+            "Checked %d trip id(s) (%d queried) in %.1f ms; cache v%d holds %d id(s).",
+            len(wanted),
+            len(missing),
+            (time.perf_counter() - started) * 1000,
+            self.version,
+            len(self),
+        )
+        return wanted & self._known
+
+    def invalidate(self) -> None:
+        self._known.clear()
+        self._unknown.clear()
+        self.version += 1
+
+
+_cache = TripIdCache()
+
+
+def get_trip_id_cache() -> TripIdCache:
+    """Return the process-wide trip id cache shared by the live handlers."""
+    return _cache
+
+
+def invalidate_trip_id_cache() -> None:
+    """Forget all cached trip ids; call after the static GTFS data changes."""
+    _cache.invalidate()
+    logger.info("Trip id cache invalidated (now v%d).", _cache.version)
@@ -0,0 +1,189 @@
+"""
+In-memory trip → stop-sequence index for live bus processing.
+
+The per-minute live jobs need each active trip's ordered stops (ids,
+sequence numbers and coordinates). Instead of querying ``bus_stop_times``
+per vehicle, trips are loaded in bulk into NumPy arrays the first time they
+are seen and kept until the next static GTFS import invalidates the index.
+"""
+
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from data_handler.bus.models import BusStop, BusStopTime
+
+logger = logging.getLogger(__name__)
+
+_EARTH_RADIUS_KM = 6371.0
+_LOAD_CHUNK_SIZE = 5_000  # trip ids per IN (...) query
+
+
+@dataclass(frozen=True)
+class TripStops:
+    """Ordered stops of one trip as parallel arrays."""
+
+    stop_ids: np.ndarray  # object (str)
+    sequences: np.ndarray  # int64
+    lat: np.ndarray  # float64
+    lon: np.ndarray  # float64
+
+    def __len__(self) -> int:
+        return len(self.sequences)
+
+
+def haversine_km(
+    lat1: np.ndarray | float,
+    lon1: np.ndarray | float,
+    lat2: np.ndarray | float,
+    lon2: np.ndarray | float,
+) -> np.ndarray:
+    """Element-wise great-circle distance in km between lat/lon points."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return _EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+class TripStopIndex:
+    """Lazily populated cache of ``TripStops`` keyed by trip id."""
+
+    def __init__(self) -> None:
+        self._trips: dict[str, TripStops] = {}
+        # Trips known to have no stop_times, so they aren't re-queried every run
+        self._empty: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._trips)
+
+    def get(self, trip_id: str) -> TripStops | None:
+        return self._trips.get(trip_id)
+
+    def clear(self) -> None:
+        self._trips.clear()
+        self._empty.clear()
+
+    def load(self, session: Session, trip_ids: Iterable[str]) -> None:
+        """Load any trips not yet in the index, in bulk."""
+        missing = sorted(
+            {t for t in trip_ids if t not in self._trips and t not in self._empty}
+        )
+        if not missing:
+            return
+
+        for i in range(0, len(missing), _LOAD_CHUNK_SIZE):
+            chunk = missing[i : i + _LOAD_CHUNK_SIZE]
+            rows = session.execute(
+                select(
+                    BusStopTime.trip_id,
+                    BusStopTime.stop_id,
+                    BusStopTime.sequence,
+                    BusStop.lat,
+                    BusStop.lon,
+                )
+                .join(BusStop, BusStopTime.stop_id == BusStop.id)
+                .where(BusStopTime.trip_id.in_(chunk))
+                .order_by(BusStopTime.trip_id, BusStopTime.sequence)
+            ).all()
+            self._add_rows(rows)
+            self._empty.update(t for t in chunk if t not in self._trips)
+
+        logger.debug(
+            "Trip stop index: loaded %d trip(s), %d cached.",
+            len(missing),
+            len(self._trips),
+        )
+
+    def _add_rows(self, rows: list) -> None:
+        if not rows:
+            return
+        trip_col, stop_col, seq_col, lat_col, lon_col = zip(*rows, strict=True)
+        trip_ids = np.asarray(trip_col, dtype=object)
+        stop_ids = np.asarray(stop_col, dtype=object)
+        sequences = np.asarray(seq_col, dtype=np.int64)
+        lat = np.asarray(lat_col, dtype=np.float64)
+        lon = np.asarray(lon_col, dtype=np.float64)
+
+        # Rows are ordered by trip_id, so each trip is one contiguous run.
+        boundaries = np.flatnonzero(trip_ids[1:] != trip_ids[:-1]) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(trip_ids)]))
+        for start, end in zip(starts, ends, strict=True):
+            self._trips[trip_ids[start]] = TripStops(
+                stop_ids=stop_ids[start:end],
+                sequences=sequences[start:end],
+                lat=lat[start:end],
+                lon=lon[start:end],
+            )
+
+    def nearest_stops(
+        self, trip_ids: list[str], lats: np.ndarray, lons: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Find the nearest stop in each vehicle's own trip, for all vehicles at once.
+
+        Trips must already be loaded. Vehicles whose trip has no stops get a
+        ``total_stops`` of 0 and ``None``/-1 placeholders.
+
+        Args:
+            trip_ids: Trip id per vehicle.
+            lats: Vehicle latitudes.
+            lons: Vehicle longitudes.
+
+        Returns:
+            Tuple of (nearest stop_id, stop_sequence, total_stops) arrays,
+            one entry per vehicle.
+        """
+        n = len(trip_ids)
+        nearest_ids = np.full(n, None, dtype=object)
+        nearest_seq = np.full(n, -1, dtype=np.int64)
+        totals = np.zeros(n, dtype=np.int64)
+
+        trips = [self._trips.get(t) for t in trip_ids]
+        has_stops = np.array([t is not None for t in trips], dtype=bool)
+        if not has_stops.any():
+            return nearest_ids, nearest_seq, totals
+
+        vehicles = np.flatnonzero(has_stops)
+        present = [trips[v] for v in vehicles]
+        lengths = np.array([len(t) for t in present], dtype=np.int64)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+        stop_ids = np.concatenate([t.stop_ids for t in present])
+        sequences = np.concatenate([t.sequences for t in present])
+        dist = haversine_km(
+            np.repeat(np.asarray(lats, dtype=np.float64)[vehicles], lengths),
+            np.repeat(np.asarray(lons, dtype=np.float64)[vehicles], lengths),
+            np.concatenate([t.lat for t in present]),
+            np.concatenate([t.lon for t in present]),
+        )
+
+        # Segmented argmin: first position in each trip's run equal to its minimum.
+        seg_min = np.minimum.reduceat(dist, starts)
+        hits = np.flatnonzero(dist == np.repeat(seg_min, lengths))
+        best = hits[np.searchsorted(hits, starts)]
+
+        nearest_ids[vehicles] = stop_ids[best]
+        nearest_seq[vehicles] = sequences[best]
+        totals[vehicles] = lengths
+        return nearest_ids, nearest_seq, totals
+
+
+_index = TripStopIndex()
+
+
+def get_trip_stop_index() -> TripStopIndex:
+    """Return the process-wide trip stop index."""
+    return _index
+
+
+def invalidate_trip_stop_index() -> None:
+    """Drop all cached trips; call after the static GTFS data changes."""
+    _index.clear()
+    logger.info("Trip stop index invalidated.")
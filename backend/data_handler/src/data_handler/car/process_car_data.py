@@ -33,6 +33,7 @@ from data_handler.car.models import (
     VehicleRegistrationType,
     VehicleYearly,
 )
+from data_handler.common.source_manifests import hash_files, save_manifest
 from data_handler.csv_utils import read_csv_file
 from data_handler.db import SessionLocal
 
@@ -315,6 +316,9 @@ _EV_CSV_REQUIRED_HEADERS = ["County", "Latitude", "Longitude"]
 _EV_GEOJSON_FILE = "location_data.geojson"
 
 _CHARGING_DEMAND_CSV_FILE = "charging_demand.csv"
+# The import time of these files is the version of the inference engine's
+# cached EV areas response
+_EV_AREAS_SOURCE = "ev_areas"
 _CHARGING_DEMAND_CSV_REQUIRED_HEADERS = [
     "CSO Electoral Divisions 2022",
     "Bed-Sit",
@@ -595,6 +599,11 @@ def process_car_static_data(data_dir: Path) -> None:
         _process_ev_geojson(session, ev_geojson_path)
         _process_charging_demand(session, data_dir / _CHARGING_DEMAND_CSV_FILE)
         _process_traffic_volumes(session, data_dir)
+        save_manifest(
+            session,
+            _EV_AREAS_SOURCE,
+            hash_files(data_dir, [_EV_GEOJSON_FILE, _CHARGING_DEMAND_CSV_FILE]),
+        )
 
         logger.info("Committing changes to database...")
         session.commit()
@@ -0,0 +1,108 @@
+"""
+Incremental GTFS imports.
+
+Files whose hash is unchanged since the feed's last import, as recorded by
+``source_manifests``, are skipped. Changed files are diffed row by row
+against their table by GTFS natural key, so only inserted, changed and
+removed rows are written.
+"""
+
+import logging
+from collections.abc import Collection, Iterable, Mapping, Sequence
+
+from sqlalchemy import ColumnElement, Table, delete, select, tuple_
+from sqlalchemy.orm import DeclarativeBase, Session
+
+from data_handler.bulk_load import (
+    copy_rows,
+    delete_unstaged,
+    merge_staged,
+    stage_rows,
+)
+
+logger = logging.getLogger(__name__)
+
+# Natural key of each GTFS file's rows, by column name on the ORM models.
+# Files without an entry (e.g. CSO datasets) are replaced wholesale when changed.
+GTFS_KEY_COLUMNS: dict[str, list[str]] = {
+    "agency.txt": ["id"],
+    "calendar.txt": ["service_id", "start_date", "end_date"],
+    "calendar_dates.txt": ["service_id", "date"],
+    "routes.txt": ["id"],
+    "stops.txt": ["id"],
+    "shapes.txt": ["shape_id", "pt_sequence"],
+    "trips.txt": ["id"],
+    "stop_times.txt": ["trip_id", "sequence"],
+}
+
+type FileRows = tuple[str, type[DeclarativeBase], Iterable[Mapping[str, object]]]
+
+
+def apply_row_diffs(
+    session: Session,
+    files: Sequence[FileRows],
+    delete_missing: Collection[str] | None = None,
+) -> None:
+    """
+    Bring the tables of changed GTFS files in line with the files' new contents.
+
+    All files are staged first. Inserts and updates are then applied in the
+    given order and deletes in reverse order, so ``files`` must be listed in
+    FK dependency order (parents first). Rows of other tables that reference
+    a deleted row are deleted with it, whether or not their file changed.
+    Files without a natural key in ``GTFS_KEY_COLUMNS`` have their table
+    emptied and reloaded.
+
+    Args:
+        session: Active SQLAlchemy session; the caller commits.
+        files: (filename, model, rows) for each changed file. A missing file
+            is passed with no rows.
+        delete_missing: Keyed files whose rows are deleted when they disappear
+            from the feed. Defaults to all of them; rows of other keyed files
+            are only inserted or updated.
+    """
+    staged = {}
+    for filename, model, rows in files:
+        key_cols = GTFS_KEY_COLUMNS.get(filename)
+        if key_cols is not None:
+            staged[filename] = stage_rows(session, model, rows, key_cols)
+
+    for filename, _, _ in files:
+        if filename in staged:
+            inserted, updated = merge_staged(session, staged[filename])
+            logger.info("  %s: %d inserted, %d updated", filename, inserted, updated)
+
+    for filename, model, _ in reversed(files):
+        if filename not in staged:
+            deleted = session.execute(delete(model)).rowcount
+        elif delete_missing is None or filename in delete_missing:
+            _delete_references(
+                session, staged[filename].table, staged[filename].unstaged()
+            )
+            deleted = delete_unstaged(session, staged[filename])
+        else:
+            continue
+        logger.info("  %s: %d deleted", filename, deleted)
+
+    for filename, model, rows in files:
+        if filename not in staged:
+            inserted = copy_rows(session, model, rows)
+            logger.info("  %s: %d inserted (replaced)", filename, inserted)
+
+
+def _delete_references(
+    session: Session, parent: Table, condition: ColumnElement[bool]
+) -> None:
+    """Delete rows referencing the ``parent`` rows matching ``condition``, leaves first."""
+    for child in parent.metadata.sorted_tables:
+        for fk in child.foreign_key_constraints:
+            if fk.referred_table is not parent:
+                continue
+            referenced = select(*(element.column for element in fk.elements))
+            child_condition = tuple_(*fk.columns).in_(referenced.where(condition))
+            _delete_references(session, child, child_condition)
+            deleted = session.execute(delete(child).where(child_condition)).rowcount
+            if deleted:
+                logger.info(
+                    "  %s: %d deleted (referenced removed rows)", child.name, deleted
+                )
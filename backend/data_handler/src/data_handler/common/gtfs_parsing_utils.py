@@ -1,5 +1,7 @@
 from datetime import date, time
 
+SECONDS_PER_DAY = 24 * 3600
+
 
 def parse_gtfs_date(date_str: str) -> date:
     """
@@ -26,6 +28,11 @@ def parse_gtfs_time(time_str: str) -> time:
     """
     Parse a time string from GTFS format (HH:MM:SS) to a time object.
 
+    GTFS times are measured from the start of the service day, so trips that
+    run past midnight have hours of 24 and over. A time of day cannot hold
+    those, so the hours are taken mod 24; use ``parse_gtfs_seconds`` where the
+    order of times across midnight matters.
+
     Args:
         time_str: Time string in HH:MM:SS format (e.g., "07:20:00")
 
@@ -42,9 +49,29 @@ def parse_gtfs_time(time_str: str) -> time:
         raise ValueError(msg)
 
     return time(
-        # TODO: examine why time entries with hours > 24 are present in the GTFS stop_times data
-        # https://aswegroup10.atlassian.net/browse/AIP-35?atlOrigin=eyJpIjoiOGM0YWIwYWU4Mjk5NGZmYWFiZDMxNGU1MTIwMWU4MjEiLCJwIjoiaiJ9
         int(parts[0]) % 24,
         int(parts[1]),
         int(parts[2]) if len(parts) > 2 else 0,
     )
+
+
+def parse_gtfs_seconds(time_str: str) -> int:
+    """
+    Parse a time string from GTFS format (HH:MM:SS) to seconds since the start
+    of the service day.
+
+    Hours of 24 and over are kept, so "25:10:00" is 90600 and sorts after
+    "23:50:00".
+
+    Args:
+        time_str: Time string in HH:MM:SS format (e.g., "25:10:00")
+
+    Returns:
+        int: Seconds since the start of the service day
+
+    Raises:
+        ValueError: If the time string is not in the expected format
+    """
+    clock = parse_gtfs_time(time_str)
+    days = int(time_str.split(":", maxsplit=1)[0]) // 24
+    return days * SECONDS_PER_DAY + clock.hour * 3600 + clock.minute * 60 + clock.second
@@ -0,0 +1,194 @@
+"""
+Bounded-concurrency HTTP fetcher for per-entity realtime API calls.
+
+Several realtime sources expose one endpoint per station/stop/train, so a
+single run has to issue hundreds of small requests. ``ConcurrentFetcher``
+fans those calls out over a small thread pool that shares one pooled,
+keep-alive ``requests.Session``, throttles each host to a fixed request
+rate and gives the whole batch a hard deadline. Failures are collected per
+key instead of aborting the batch.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable, Hashable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from types import TracebackType
+from typing import Any, Self
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_REQUESTS_PER_SECOND = 20.0
+DEFAULT_CALL_TIMEOUT = 10.0  # seconds, per HTTP call
+DEFAULT_BATCH_DEADLINE = 45.0  # seconds, for a whole ``map`` call
+
+
+@dataclass
+class FetchResult[T]:
+    """Outcome of fetching a single key: either a value or the error raised."""
+
+    key: Hashable
+    value: T | None = None
+    error: BaseException | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class HostRateLimiter:
+    """
+    Thread-safe per-host rate limiter.
+
+    Each host gets evenly spaced request slots ``1 / max_per_second`` apart;
+    ``acquire`` blocks the calling thread until its slot comes up.
+    """
+
+    def __init__(self, max_per_second: float) -> None:
+        if max_per_second <= 0:
+            msg = "max_per_second must be positive"
+            raise ValueError(msg)
+        self._interval = 1.0 / max_per_second
+        self._next_slot: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url: str) -> None:
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self._interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class _RateLimitedSession(requests.Session):
+    """``requests.Session`` that waits for a rate-limiter slot before each call."""
+
+    def __init__(self, limiter: HostRateLimiter) -> None:
+        super().__init__()
+        self._limiter = limiter
+
+    def request(  # type: ignore[override]
+        self, method: str, url: str, *args: object, **kwargs: object
+    ) -> requests.Response:
+        self._limiter.acquire(url)
+        return super().request(method, url, *args, **kwargs)
+
+
+class ConcurrentFetcher:
+    """
+    Runs a fetch function over many keys with bounded concurrency.
+
+    Use as a context manager so the pooled connections are closed afterwards:
+
+        with ConcurrentFetcher(max_workers=8) as fetcher:
+            results = fetcher.map(lambda code: get_data(code, fetcher.session), codes)
+
+    Attributes:
+        session: Pooled, rate-limited session that fetch functions should use
+        call_timeout: Timeout (seconds) fetch functions should pass per HTTP call
+        deadline: Wall-clock budget (seconds) for a whole ``map`` call; None
+            waits for every call, for fetch functions that keep their own deadline
+    """
+
+    def __init__(
+        self,
+        *,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_requests_per_second: float = DEFAULT_MAX_REQUESTS_PER_SECOND,
+        call_timeout: float = DEFAULT_CALL_TIMEOUT,
+        deadline: float | None = DEFAULT_BATCH_DEADLINE,
+    ) -> None:
+        self.max_workers = max_workers
+        self.call_timeout = call_timeout
+        self.deadline = deadline
+
+        self.session = _RateLimitedSession(HostRateLimiter(max_requests_per_second))
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def map[K: Hashable, T](
+        self, fn: Callable[[K], T], keys: Iterable[K]
+    ) -> dict[K, FetchResult[T]]:
+        """
+        Call ``fn(key)`` for every key concurrently.
+
+        Keys still running when the batch deadline expires are reported with a
+        ``TimeoutError``; exceptions raised by ``fn`` are captured per key.
+
+        Returns:
+            Mapping of key → FetchResult, in the order the keys were given
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(keys)),
+            thread_name_prefix="fetch",
+        )
+        try:
+            futures: dict[K, Future[T]] = {k: executor.submit(fn, k) for k in keys}
+            wait(futures.values(), timeout=self.deadline)
+        finally:
+            # Don't block on stragglers; their HTTP timeouts will end them.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        results: dict[K, FetchResult[T]] = {}
+        for key, future in futures.items():
+            if not future.done() or future.cancelled():
+                error = TimeoutError(f"No response within {self.deadline}s deadline")
+                results[key] = FetchResult(key=key, error=error)
+            elif (exc := future.exception()) is not None:
+                results[key] = FetchResult(key=key, error=exc)
+            else:
+                results[key] = FetchResult(key=key, value=future.result())
+        return results
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+def log_failures(
+    results: dict[Any, FetchResult[Any]], what: str, log: logging.Logger
+) -> list[Any]:
+    """
+    Log one warning per failed key plus a summary line.
+
+    Args:
+        results: Output of ``ConcurrentFetcher.map``
+        what: Human-readable name of the fetched data (e.g. "station data")
+        log: Logger of the calling module
+
+    Returns:
+        The keys that failed
+    """
+    failed = [key for key, result in results.items() if not result.ok]
+    for key in failed:
+        log.warning("Failed to fetch %s for %s: %s", what, key, results[key].error)
+    if failed:
+        log.warning(
+            "Failed to fetch %s for %d of %d key(s).", what, len(failed), len(results)
+        )
+    return failed
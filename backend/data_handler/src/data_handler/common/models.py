@@ -0,0 +1,61 @@
+from datetime import date, datetime
+from typing import ClassVar
+
+from sqlalchemy import Date, DateTime, LargeBinary, String, func
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Mapped, mapped_column
+
+from data_handler.db import Base
+from data_handler.settings.database_settings import get_db_settings
+
+DB_SCHEMA = get_db_settings().postgres_schema
+
+
+class SourceFileManifest(Base):
+    """Content hash of each file of a data source as of its last successful import."""
+
+    __tablename__ = "source_file_manifests"
+    __table_args__: ClassVar[dict] = {"schema": DB_SCHEMA}
+
+    source: Mapped[str] = mapped_column(String, primary_key=True)
+    filename: Mapped[str] = mapped_column(String, primary_key=True)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    imported_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+class HttpCacheValidator(Base):
+    """ETag/Last-Modified of the last successfully processed download of a URL."""
+
+    __tablename__ = "http_cache_validators"
+    __table_args__: ClassVar[dict] = {"schema": DB_SCHEMA}
+
+    url: Mapped[str] = mapped_column(String, primary_key=True)
+    etag: Mapped[str | None] = mapped_column(String, nullable=True)
+    last_modified: Mapped[str | None] = mapped_column(String, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+class StopTimetable(Base):
+    """
+    Built ``TimetableIndex`` of a feed for one service day.
+
+    ``arrivals`` and ``offsets`` hold the index's int32 and int64 arrays as
+    raw bytes; see ``data_handler.common.timetable_index``.
+    """
+
+    __tablename__ = "stop_timetables"
+    __table_args__: ClassVar[dict] = {"schema": DB_SCHEMA}
+
+    feed: Mapped[str] = mapped_column(String, primary_key=True)
+    service_date: Mapped[date] = mapped_column(Date, nullable=False)
+    data_version: Mapped[str] = mapped_column(String, nullable=False)
+    stop_ids: Mapped[list[str]] = mapped_column(ARRAY(String), nullable=False)
+    offsets: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    arrivals: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    built_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
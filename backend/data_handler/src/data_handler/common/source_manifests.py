@@ -0,0 +1,81 @@
+"""
+File manifests of imported data sources.
+
+A SHA-256 manifest of the files of each source (a GTFS feed, the EV areas,
+the population census, ...) is kept in ``source_file_manifests`` as of its
+last successful import. Importers compare it with the current files to skip
+unchanged ones, and the latest ``imported_at`` of a source serves as its
+data version for consumers that cache derived results.
+"""
+
+import hashlib
+from collections.abc import Iterable, Mapping
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from data_handler.common.models import SourceFileManifest
+from data_handler.csv_utils import DataPath
+
+_HASH_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+type FileHashes = dict[str, str | None]
+
+
+def hash_file(path: DataPath) -> str:
+    """Return the hex SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(_HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_files(directory: DataPath | None, filenames: Iterable[str]) -> FileHashes:
+    """Hash each named file in ``directory``; missing files map to None."""
+    hashes: FileHashes = {}
+    for filename in filenames:
+        path = directory / filename if directory is not None else None
+        hashes[filename] = hash_file(path) if path and path.exists() else None
+    return hashes
+
+
+def load_manifest(session: Session, source: str) -> dict[str, str]:
+    """Return the file hashes recorded by the last import of ``source``."""
+    rows = session.execute(
+        select(SourceFileManifest.filename, SourceFileManifest.sha256).where(
+            SourceFileManifest.source == source
+        )
+    )
+    return dict(rows.tuples().all())
+
+
+def changed_files(manifest: Mapping[str, str], hashes: FileHashes) -> list[str]:
+    """Return the files whose hash differs from the manifest, in ``hashes`` order."""
+    return [name for name, digest in hashes.items() if manifest.get(name) != digest]
+
+
+def save_manifest(session: Session, source: str, hashes: FileHashes) -> None:
+    """Record ``hashes`` as the source's manifest, within the session's transaction."""
+    present = {name: digest for name, digest in hashes.items() if digest is not None}
+    session.execute(
+        delete(SourceFileManifest).where(
+            SourceFileManifest.source == source,
+            SourceFileManifest.filename.not_in(present),
+        )
+    )
+    if not present:
+        return
+    stmt = pg_insert(SourceFileManifest).values(
+        [
+            {"source": source, "filename": name, "sha256": digest}
+            for name, digest in present.items()
+        ]
+    )
+    session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["source", "filename"],
+            set_={"sha256": stmt.excluded.sha256, "imported_at": func.now()},
+        )
+    )
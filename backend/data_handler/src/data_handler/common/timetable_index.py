@@ -0,0 +1,271 @@
+"""
+Per-stop sorted timetables for "next scheduled arrival" lookups.
+
+A ``TimetableIndex`` holds every stop's scheduled arrivals for one feed and
+service day. Arrivals are the stop times' ``arrival_seconds``, seconds since
+the start of the service day, so GTFS times past 24:00 are kept. The stops'
+sorted arrays are concatenated: stop ``i``'s arrivals are
+``arrivals[offsets[i]:offsets[i + 1]]``, so a lookup is one binary search per
+stop.
+
+Only trips whose service runs that day, according to calendar and
+calendar_dates, are included. Trips of the previous service day that run past
+midnight are included 24 h earlier, so early-morning lookups see them.
+
+Built indexes are stored in stop_timetables, one row per feed. Each row is
+tagged with its service date and the feed's data version: the latest import
+of the feed recorded in source_file_manifests. The per-minute jobs run in a
+fresh process each time, so they load that row. The index is rebuilt only
+after a static import or on a new service day.
+"""
+
+import functools
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import DeclarativeBase, Session
+
+from data_handler.common.gtfs_parsing_utils import SECONDS_PER_DAY
+from data_handler.common.models import SourceFileManifest, StopTimetable
+
+logger = logging.getLogger(__name__)
+
+_UNVERSIONED = "unversioned"  # no import recorded yet
+_WEEKDAYS = (
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+)
+# calendar_dates.exception_type
+_SERVICE_ADDED = 1
+_SERVICE_REMOVED = 2
+
+
+@dataclass(frozen=True)
+class TimetableFeed:
+    """
+    ORM models of one GTFS feed's timetable.
+
+    Attributes:
+        name: Feed name, as recorded in source_file_manifests
+        stop_time: Model of stop_times.txt
+        trip: Model of trips.txt
+        calendar: Model of calendar.txt
+        calendar_date: Model of calendar_dates.txt
+    """
+
+    name: str
+    stop_time: type[DeclarativeBase]
+    trip: type[DeclarativeBase]
+    calendar: type[DeclarativeBase]
+    calendar_date: type[DeclarativeBase]
+
+
+@dataclass(frozen=True)
+class TimetableIndex:
+    """
+    Sorted scheduled arrivals of every stop of a feed on one service day.
+
+    Attributes:
+        feed: Feed name
+        service_date: Service day of the arrivals
+        data_version: Data version of the feed the index was built from
+        stop_ids: Stop id of each run, in ``offsets`` order
+        offsets: int64, start of each stop's run in ``arrivals``, plus the end
+        arrivals: int32 seconds since the start of the service day, ascending
+            within each stop's run
+    """
+
+    feed: str
+    service_date: date
+    data_version: str
+    stop_ids: list[str]
+    offsets: np.ndarray
+    arrivals: np.ndarray
+
+    @functools.cached_property
+    def _positions(self) -> dict[str, int]:
+        return {stop_id: i for i, stop_id in enumerate(self.stop_ids)}
+
+    def stop_arrivals(self, stop_id: str) -> np.ndarray:
+        """Return the sorted arrivals at ``stop_id``; empty for unknown stops."""
+        i = self._positions.get(stop_id)
+        if i is None:
+            return self.arrivals[:0]
+        return self.arrivals[self.offsets[i] : self.offsets[i + 1]]
+
+    def next_arrivals(
+        self, stop_ids: Iterable[str], after: int, k: int = 1
+    ) -> np.ndarray:
+        """
+        Return the ``k`` earliest arrivals at or after ``after`` at any of the stops.
+
+        Args:
+            stop_ids: Stops whose arrivals are merged, e.g. a station's platforms
+            after: Seconds since the start of the service day
+            k: Maximum number of arrivals to return
+
+        Returns:
+            Up to ``k`` arrivals, ascending.
+        """
+        runs = [self.arrivals[:0]]
+        for stop_id in stop_ids:
+            arrivals = self.stop_arrivals(stop_id)
+            start = np.searchsorted(arrivals, after)
+            runs.append(arrivals[start : start + k])
+        return np.sort(np.concatenate(runs))[:k]
+
+    def next_arrival(
+        self, stop_ids: Iterable[str], after: int, until: int | None = None
+    ) -> int | None:
+        """Return the earliest arrival in [after, until] at any of the stops."""
+        arrivals = self.next_arrivals(stop_ids, after)
+        if len(arrivals) == 0 or (until is not None and arrivals[0] > until):
+            return None
+        return int(arrivals[0])
+
+
+# ── Building ─────────────────────────────────────────────────────
+
+
+def data_version(session: Session, feed: TimetableFeed) -> str:
+    """Return the time of the feed's latest recorded import."""
+    imported_at = session.execute(
+        select(func.max(SourceFileManifest.imported_at)).where(
+            SourceFileManifest.source == feed.name
+        )
+    ).scalar()
+    return imported_at.isoformat() if imported_at is not None else _UNVERSIONED
+
+
+def active_service_ids(session: Session, feed: TimetableFeed, day: date) -> set[int]:
+    """Return the services that run on ``day``, per calendar and calendar_dates."""
+    calendar, calendar_date = feed.calendar, feed.calendar_date
+    runs_on_weekday = getattr(calendar, _WEEKDAYS[day.weekday()])
+    services = set(
+        session.scalars(
+            select(calendar.service_id).where(
+                calendar.start_date <= day,
+                calendar.end_date >= day,
+                runs_on_weekday.is_(True),
+            )
+        )
+    )
+    exceptions = session.execute(
+        select(calendar_date.service_id, calendar_date.exception_type).where(
+            calendar_date.date == day
+        )
+    )
+    for service_id, exception_type in exceptions:
+        if exception_type == _SERVICE_ADDED:
+            services.add(service_id)
+        elif exception_type == _SERVICE_REMOVED:
+            services.discard(service_id)
+    return services
+
+
+def _service_day_arrivals(
+    session: Session, feed: TimetableFeed, day: date
+) -> tuple[np.ndarray, np.ndarray]:
+    """(stop ids, seconds since the start of ``day``) of the trips that run on it."""
+    stop_time, trip = feed.stop_time, feed.trip
+    rows = session.execute(
+        select(stop_time.stop_id, stop_time.arrival_seconds)
+        .join(trip, trip.id == stop_time.trip_id)
+        .where(trip.service_id.in_(active_service_ids(session, feed, day)))
+    ).all()
+    if not rows:
+        return np.array([], dtype=object), np.array([], dtype=np.int64)
+    stop_col, seconds_col = zip(*rows, strict=True)
+    return (
+        np.asarray(stop_col, dtype=object),
+        np.asarray(seconds_col, dtype=np.int64),
+    )
+
+
+def build_timetable_index(
+    session: Session, feed: TimetableFeed, service_date: date, version: str
+) -> TimetableIndex:
+    """Build the feed's index for ``service_date`` from its stop times."""
+    stop_parts, second_parts = [], []
+    previous_day = service_date - timedelta(days=1)
+    for day, shift in ((service_date, 0), (previous_day, -SECONDS_PER_DAY)):
+        stop_ids, seconds = _service_day_arrivals(session, feed, day)
+        keep = seconds + shift >= 0
+        stop_parts.append(stop_ids[keep])
+        second_parts.append(seconds[keep] + shift)
+    stop_ids = np.concatenate(stop_parts).astype(str)
+    seconds = np.concatenate(second_parts)
+
+    unique_stops, codes = np.unique(stop_ids, return_inverse=True)
+    order = np.lexsort((seconds, codes))
+    offsets = np.zeros(len(unique_stops) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(codes, minlength=len(unique_stops)))
+    return TimetableIndex(
+        feed=feed.name,
+        service_date=service_date,
+        data_version=version,
+        stop_ids=unique_stops.tolist(),
+        offsets=offsets,
+        arrivals=seconds[order].astype(np.int32),
+    )
+
+
+# ── Storage ──────────────────────────────────────────────────────
+
+
+def _from_row(row: StopTimetable) -> TimetableIndex:
+    return TimetableIndex(
+        feed=row.feed,
+        service_date=row.service_date,
+        data_version=row.data_version,
+        stop_ids=list(row.stop_ids),
+        offsets=np.frombuffer(row.offsets, dtype=np.int64),
+        arrivals=np.frombuffer(row.arrivals, dtype=np.int32),
+    )
+
+
+def get_timetable_index(
+    session: Session, feed: TimetableFeed, service_date: date
+) -> TimetableIndex:
+    """
+    Return the feed's index for ``service_date``, rebuilding it if stale.
+
+    A rebuilt index is stored within the session's transaction; the caller
+    commits it.
+    """
+    version = data_version(session, feed)
+    row = session.get(StopTimetable, feed.name)
+    if (
+        row is not None
+        and row.service_date == service_date
+        and row.data_version == version
+    ):
+        return _from_row(row)
+
+    index = build_timetable_index(session, feed, service_date, version)
+    if row is None:
+        row = StopTimetable(feed=feed.name)
+        session.add(row)
+    row.service_date = index.service_date
+    row.data_version = index.data_version
+    row.stop_ids = index.stop_ids
+    row.offsets = index.offsets.tobytes()
+    row.arrivals = index.arrivals.tobytes()
+    row.built_at = func.now()
+    logger.info(
+        "Built %s timetable index for %s (%d stops, %d arrivals).",
+        feed.name,
+        service_date,
+        len(index.stop_ids),
+        len(index.arrivals),
+    )
+    return index
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 import csv
+import zipfile
+from pathlib import Path
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from collections.abc import Iterator
-    from pathlib import Path
+
+# A file or directory on disk, or inside a ZIP archive opened in memory
+type DataPath = Path | zipfile.Path
 
 
 def validate_csv_headers(
@@ -28,13 +32,14 @@ def validate_csv_headers(
 
 
 def read_csv_file(
-    file_path: Path, required_headers: list[str] | None = None
+    file_path: DataPath, required_headers: list[str] | None = None
 ) -> Iterator[dict[str, str]]:
     """
     Reads a CSV file and yields each row as a dictionary.
 
     Args:
-        file_path (Path): The path to the CSV file to read.
+        file_path (DataPath): The path to the CSV file to read, on disk or
+            inside an opened ZIP archive.
         required_headers (list[str] | None, optional):
             List of required header names. If provided, the function
             will validate that all required headers are present in the file.
@@ -10,8 +10,9 @@ from datetime import date, datetime, timedelta
 
 import requests
 from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator
-from sqlalchemy.dialects.postgresql import insert as pg_insert
 
+from data_handler.bulk_load import copy_rows, model_to_row
+from data_handler.common.http_fetcher import ConcurrentFetcher, log_failures
 from data_handler.csv_utils import validate_csv_headers
 from data_handler.db import SessionLocal
 from data_handler.pedestrians.models import (
@@ -30,6 +31,35 @@ GRANULARITY_VALUES = frozenset(e.value for e in PedestrianGranularity)
 
 _DUBLIN_TZ = zoneinfo.ZoneInfo("Europe/Dublin")
 
+# Upserts are COPYed into a staging table and merged in one statement
+# (see ``copy_rows``): conflict target and columns overwritten per table
+_SITE_CONFLICT = ["id"]
+_SITE_UPDATE_COLS = [
+    "name",
+    "description",
+    "lat",
+    "lon",
+    "first_data",
+    "granularity",
+    "pedestrian_sensor",
+    "bike_sensor",
+    "directional",
+    "has_timestamped_data",
+    "has_weather",
+]
+_CHANNEL_CONFLICT = ["channel_id"]
+_CHANNEL_UPDATE_COLS = ["site_id", "mobility_type", "direction", "time_step"]
+_MEASURE_CONFLICT = "uq_pedestrian_counter_measures_channel_start_end"
+_MEASURE_UPDATE_COLS = ["counter_id", "count"]
+
+# Export jobs are polled concurrently, each with exponential backoff
+_EXPORT_INITIAL_WAIT = 15  # seconds before the first poll
+_EXPORT_POLL_INTERVAL = 5  # seconds, first wait between polls; doubles each time
+_EXPORT_MAX_POLL_INTERVAL = 60  # seconds
+_EXPORT_MAX_WAIT = 300  # seconds a job may take to become ready
+_EXPORT_CALL_TIMEOUT = 30  # seconds, per HTTP call
+_EXPORT_DEADLINE = 600  # seconds by which every job must be ready to process
+
 
 class SiteLocation(BaseModel):
     lat: float | None = None
@@ -139,8 +169,13 @@ def process_pedestrian_sites(json_string: str) -> dict[int, PedestrianGranularit
 
     with SessionLocal() as session:
         try:
-            for site in sites:
-                session.merge(site)
+            copy_rows(
+                session,
+                PedestrianCounterSite,
+                (model_to_row(site) for site in sites),
+                _SITE_CONFLICT,
+                _SITE_UPDATE_COLS,
+            )
             session.commit()
         except Exception:
             session.rollback()
@@ -227,7 +262,7 @@ def process_pedestrian_channel_data(csv_text: io.TextIOWrapper) -> None:
 
     Expects a CSV with headers including channel_id, site_id, mobility_type,
     direction, and time_step. Rows are upserted by channel_id (existing rows
-    are updated).
+    are updated), streamed from ``csv_text`` in a single COPY.
 
     Args:
         csv_text: UTF-8 decoded text stream of the CSV content.
@@ -243,17 +278,17 @@ def process_pedestrian_channel_data(csv_text: io.TextIOWrapper) -> None:
         )
         raise ValueError(msg)
 
-    channels = [_parse_channel_row(row) for row in reader]
-
     with SessionLocal() as session:
         try:
-            for channel in channels:
-                session.merge(channel)
-            session.commit()
-            logger.info(
-                "Upserted %d pedestrian channel record(s).",
-                len(channels),
+            count = copy_rows(
+                session,
+                PedestrianChannel,
+                (model_to_row(_parse_channel_row(row)) for row in reader),
+                _CHANNEL_CONFLICT,
+                _CHANNEL_UPDATE_COLS,
             )
+            session.commit()
+            logger.info("Upserted %d pedestrian channel record(s).", count)
         except Exception:
             session.rollback()
             logger.exception("Failed to persist pedestrian channel data.")
@@ -295,7 +330,8 @@ def process_pedestrian_measures_data(csv_text: io.TextIOWrapper) -> None:
     Expects a CSV with headers channel_id, counter_id, start_datetime,
     end_datetime, and count. Rows are upserted by (channel_id, start_datetime,
     end_datetime): existing rows are updated (counter_id, count), new rows are
-    inserted.
+    inserted. Rows are streamed from ``csv_text`` in a single COPY, so an
+    export of any size is never held in memory.
 
     Args:
         csv_text: UTF-8 decoded text stream of the CSV content.
@@ -311,31 +347,17 @@ def process_pedestrian_measures_data(csv_text: io.TextIOWrapper) -> None:
         )
         raise ValueError(msg)
 
-    rows = [_parse_measure_row(row) for row in reader]
-
     with SessionLocal() as session:
         try:
-            for r in rows:
-                stmt = pg_insert(PedestrianCounterMeasure).values(
-                    channel_id=r["channel_id"],
-                    counter_id=r["counter_id"],
-                    start_datetime=r["start_datetime"],
-                    end_datetime=r["end_datetime"],
-                    count=r["count"],
-                )
-                stmt = stmt.on_conflict_do_update(
-                    index_elements=["channel_id", "start_datetime", "end_datetime"],
-                    set_={
-                        "counter_id": stmt.excluded.counter_id,
-                        "count": stmt.excluded.count,
-                    },
-                )
-                session.execute(stmt)
-            session.commit()
-            logger.info(
-                "Upserted %d pedestrian counter measure record(s).",
-                len(rows),
+            count = copy_rows(
+                session,
+                PedestrianCounterMeasure,
+                (_parse_measure_row(row) for row in reader),
+                _MEASURE_CONFLICT,
+                _MEASURE_UPDATE_COLS,
             )
+            session.commit()
+            logger.info("Upserted %d pedestrian counter measure record(s).", count)
         except Exception:
             session.rollback()
             logger.exception("Failed to persist pedestrian counter measures data.")
@@ -380,83 +402,104 @@ def process_batch_job_result(job_result_content: bytes) -> None:
 def _poll_and_process_batch_result(  # noqa: PLR0913
     job_id: int,
     job_result_url: str,
-    headers: dict[str, str],
+    session: requests.Session,
     *,
-    initial_wait: int = 15,
-    poll_interval: int = 15,
-    max_attempts: int = 20,
+    initial_wait: float = _EXPORT_INITIAL_WAIT,
+    poll_interval: float = _EXPORT_POLL_INTERVAL,
+    max_poll_interval: float = _EXPORT_MAX_POLL_INTERVAL,
+    max_wait: float = _EXPORT_MAX_WAIT,
+    call_timeout: float = _EXPORT_CALL_TIMEOUT,
+    stop_at: float | None = None,
 ) -> None:
     """
     Polls for a completed batch job result and processes the ZIP response.
 
     The Eco Counter export API is asynchronous: the job result endpoint returns
     404 while the job is still processing. This function waits for an initial
-    delay, then polls until the result is available or the attempt limit is
-    reached.
+    delay, then polls until the result is available, doubling the wait between
+    polls up to ``max_poll_interval``, or gives up once it has waited
+    ``max_wait`` seconds in total. With ``stop_at``, it also gives up rather
+    than wait, poll or start processing past that time.
 
     Args:
         job_id: The job ID to poll (used only for logging).
         job_result_url: The full URL to fetch the job result from.
-        headers: Request headers (must include API key).
+        session: Session to poll with (must send the API key header).
         initial_wait: Seconds to wait before the first poll attempt.
-        poll_interval: Seconds to wait between poll attempts.
-        max_attempts: Maximum number of poll attempts (default 20 x 15s = 5 min).
+        poll_interval: Seconds to wait after the first unsuccessful poll.
+        max_poll_interval: Longest wait between two poll attempts.
+        max_wait: Total seconds to wait for the job before giving up.
+        call_timeout: Timeout in seconds of each poll request.
+        stop_at: ``time.monotonic()`` value by which the job must be processed.
 
     Raises:
-        requests.HTTPError: If the server returns a non-404 HTTP error.
-        requests.RequestException: If all retry attempts fail.
+        requests.HTTPError: If the server returns a non-404 HTTP error, or
+            still returns 404 after ``max_wait`` seconds.
+        requests.RequestException: If a poll request fails.
+        TimeoutError: If the job is not ready to process before ``stop_at``.
     """
     logger.info(
         "Waiting %ds for batch job %s to be ready...",
         initial_wait,
         job_id,
     )
+    _check_export_deadline(job_id, stop_at, initial_wait)
     time.sleep(initial_wait)
+    waited = initial_wait
 
-    for attempt in range(max_attempts):
+    attempt = 0
+    while True:
+        attempt += 1
         logger.info(
-            "Fetching batch job result for job ID %s (attempt %d/%d)...",
+            "Fetching batch job result for job ID %s (attempt %d)...",
             job_id,
-            attempt + 1,
-            max_attempts,
+            attempt,
         )
         try:
-            job_result_response = requests.get(
-                job_result_url, headers=headers, timeout=30
-            )
+            job_result_response = session.get(job_result_url, timeout=call_timeout)
             job_result_response.raise_for_status()
         except requests.HTTPError as e:
             if e.response is not None and e.response.status_code == 404:
-                if attempt < max_attempts - 1:
+                if waited < max_wait:
+                    delay = min(poll_interval, max_wait - waited)
                     logger.info(
-                        "Batch job %s not ready yet (attempt %d/%d). Retrying in %ds...",
+                        "Batch job %s not ready yet (attempt %d). Retrying in %ds...",
                         job_id,
-                        attempt + 1,
-                        max_attempts,
-                        poll_interval,
+                        attempt,
+                        delay,
                     )
-                    time.sleep(poll_interval)
+                    _check_export_deadline(job_id, stop_at, delay)
+                    time.sleep(delay)
+                    waited += delay
+                    poll_interval = min(poll_interval * 2, max_poll_interval)
                     continue
                 logger.exception(
                     "Batch job %s not ready after %d attempts (total wait ~%ds).",
                     job_id,
-                    max_attempts,
-                    initial_wait + poll_interval * (max_attempts - 1),
+                    attempt,
+                    waited,
                 )
                 raise
             raise
         except requests.RequestException:
             logger.exception(
-                "Batch job result fetch failed (attempt %d/%d).",
-                attempt + 1,
-                max_attempts,
+                "Batch job result fetch failed (attempt %d).",
+                attempt,
             )
             raise
         else:
+            _check_export_deadline(job_id, stop_at)
             process_batch_job_result(job_result_response.content)
             return
 
 
+def _check_export_deadline(job_id: int, stop_at: float | None, wait: float = 0) -> None:
+    """Raise TimeoutError if waiting ``wait`` more seconds would pass ``stop_at``."""
+    if stop_at is not None and time.monotonic() + wait > stop_at:
+        msg = f"Batch job {job_id} not processed within the export deadline"
+        raise TimeoutError(msg)
+
+
 def process_pedestrian_live_data() -> None:
     """
     Fetches the latest pedestrian counter sites and measures data from the Eco Counter API
@@ -466,15 +509,20 @@ def process_pedestrian_live_data() -> None:
       1. Fetches the list of active pedestrian counter sites from the Eco Counter API.
       2. Parses and upserts site information into the database.
       3. Groups sites by their native granularity.
-      4. For each granularity group, requests a batch export job, polls for completion,
-         and processes the returned ZIP (channels + measures CSV files).
+      4. Requests a batch export job for every granularity group up front.
+      5. Polls all jobs concurrently and processes each returned ZIP (channels +
+         measures CSV files) as soon as it is ready, so the run takes as long as
+         the slowest job.
 
     Raises:
         requests.RequestException: If a network or server error occurs at any stage.
         zipfile.BadZipFile: If the downloaded batch data is not a valid ZIP.
         KeyError: If expected files are missing in the ZIP.
         ValueError: If the CSV or site data are invalid.
+        TimeoutError: If a job is not ready to process within the deadline.
         Exception: If an error occurs processing data or with database operations.
+            When several jobs fail, the first failure is raised after the other
+            jobs have finished.
     """
     api_settings = get_api_settings()
     headers = {"x-api-key": api_settings.eco_counter_api_key}
@@ -489,12 +537,30 @@ def process_pedestrian_live_data() -> None:
     for site_id, granularity in site_granularity_map.items():
         by_granularity[granularity].append(site_id)
 
-    for granularity, site_ids in by_granularity.items():
-        job_id = send_batch_job_request(
-            site_ids, date.today() - timedelta(days=1), granularity
-        )
-        job_result_url = (
-            f"{api_settings.eco_counter_api_base_url}/exports/{job_id}/data"
+    export_date = date.today() - timedelta(days=1)
+    job_ids = {
+        granularity: send_batch_job_request(site_ids, export_date, granularity)
+        for granularity, site_ids in by_granularity.items()
+    }
+
+    # Each job stops itself at the deadline, so the fetcher waits for all of
+    # them: none may still use the session or write once this returns.
+    stop_at = time.monotonic() + _EXPORT_DEADLINE
+    with ConcurrentFetcher(call_timeout=_EXPORT_CALL_TIMEOUT, deadline=None) as fetcher:
+        fetcher.session.headers.update(headers)
+        results = fetcher.map(
+            lambda granularity: _poll_and_process_batch_result(
+                job_ids[granularity],
+                f"{api_settings.eco_counter_api_base_url}/exports/"
+                f"{job_ids[granularity]}/data",
+                fetcher.session,
+                call_timeout=fetcher.call_timeout,
+                stop_at=stop_at,
+            ),
+            job_ids,
         )
-        _poll_and_process_batch_result(job_id, job_result_url, headers)
+
+    failed = log_failures(results, "pedestrian export", logger)
+    if failed:
+        raise results[failed[0]].error
     logger.info("Pedestrian live data import complete.")
@@ -6,11 +6,16 @@ import pandas as pd
 from shapely.geometry import MultiPolygon, Polygon, shape
 from sqlalchemy import delete
 
+from data_handler.common.source_manifests import hash_files, save_manifest
 from data_handler.db import SessionLocal
 from data_handler.population.models import SmallArea
 
 logger = logging.getLogger(__name__)
 
+# The import time of the population files is part of the version of the
+# inference engine's train stop catchments
+_POPULATION_SOURCE = "population"
+
 
 def is_relevant_area(feature: dict) -> bool:
     props = feature.get("properties", {})
@@ -84,6 +89,7 @@ def process_population_static_data(data_dir: Path) -> None:
             raise ValueError(msg)  # noqa: TRY301
 
         session.add_all(small_areas)
+        save_manifest(session, _POPULATION_SOURCE, hash_files(data_dir, required_files))
 
         logger.info("Committing changes to database...")
         session.commit()
@@ -0,0 +1,253 @@
+"""
+Shadow-table swaps for full reloads of a group of tables.
+
+A reload is written into empty copies of the live tables in a shadow schema
+while readers keep using the live tables. Once loaded, the copies are moved
+into the live schema in one short transaction, so readers see either the old
+data or the new data, never a partial load. The replaced tables are moved to
+a "previous" schema and kept until the next swap so they can be restored.
+"""
+
+import logging
+import time
+from collections.abc import Callable, Sequence
+
+from psycopg.errors import LockNotAvailable
+from sqlalchemy import Enum, MetaData, Table, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.schema import (
+    AddConstraint,
+    CreateIndex,
+    CreateTable,
+    ForeignKeyConstraint,
+    sort_tables,
+)
+
+logger = logging.getLogger(__name__)
+
+_SHADOW_SUFFIX = "_shadow"
+_PREVIOUS_SUFFIX = "_previous"
+_SWAP_LOCK_TIMEOUT = "5s"  # give up on the swap rather than queue readers behind it
+_SWAP_ATTEMPTS = 5
+_SWAP_RETRY_DELAY = 2.0  # seconds
+
+
+class ShadowTables:
+    """
+    Shadow copies of a group of tables, swapped into the live schema once loaded.
+
+    Foreign keys between tables in the group point at the shadow copies and
+    move with them. Foreign keys to tables outside the group point at the live
+    tables; they are dropped from the retired copies so that those don't pin
+    rows in the live tables, and are re-created by ``restore_previous``.
+
+    Tables referenced by foreign keys from outside the group must not be part
+    of the group: those references would follow the retired copies.
+
+    Attributes:
+        schema: Live schema of the tables
+        shadow_schema: Schema the copies are created and loaded in
+        previous_schema: Schema the replaced tables are kept in for one cycle
+    """
+
+    def __init__(self, models: Sequence[type[DeclarativeBase]]) -> None:
+        live_tables: list[Table] = [model.__table__ for model in models]
+        self.schema = live_tables[0].schema
+        self.shadow_schema = f"{self.schema}{_SHADOW_SUFFIX}"
+        self.previous_schema = f"{self.schema}{_PREVIOUS_SUFFIX}"
+        self._live = sort_tables(live_tables)
+
+        names = {table.name for table in self._live}
+        metadata = MetaData()
+
+        # Tables referenced from outside the group are copied as-is, only so
+        # that the shadow tables' foreign keys can resolve them.
+        for table in self._live:
+            for fk in table.foreign_keys:
+                if fk.column.table.name not in names:
+                    fk.column.table.to_metadata(metadata)
+
+        self._shadow: dict[str, Table] = {}
+        for table in self._live:
+            shadow = table.to_metadata(
+                metadata,
+                schema=self.shadow_schema,
+                referred_schema_fn=lambda _t, to_schema, fk, referred_schema: (
+                    to_schema if fk.referred_table.name in names else referred_schema
+                ),
+            )
+            for column in shadow.columns:
+                # Keep using the live schema's enum types
+                if isinstance(column.type, Enum):
+                    column.type = table.c[column.key].type
+            # Index names would otherwise be derived from the shadow schema
+            live_index_names = {
+                tuple(c.name for c in index.columns): index.name
+                for index in table.indexes
+            }
+            for index in shadow.indexes:
+                index.name = live_index_names[tuple(c.name for c in index.columns)]
+            self._shadow[table.name] = shadow
+
+    def __getitem__(self, model: type[DeclarativeBase]) -> Table:
+        """Return the shadow copy of a model's table."""
+        return self._shadow[model.__table__.name]
+
+    def _qualified(self, schema: str, table: Table) -> str:
+        return f'"{schema}"."{table.name}"'
+
+    def _drop_tables(self, session: Session, schema: str) -> None:
+        names = ", ".join(self._qualified(schema, t) for t in self._live)
+        session.execute(text(f"DROP TABLE IF EXISTS {names}"))
+
+    def _move_tables(self, session: Session, from_schema: str, to_schema: str) -> None:
+        for table in self._live:
+            session.execute(
+                text(
+                    f"ALTER TABLE {self._qualified(from_schema, table)} "
+                    f'SET SCHEMA "{to_schema}"'
+                )
+            )
+
+    def create(self, session: Session) -> None:
+        """
+        (Re)create empty shadow tables, within the session's transaction.
+
+        Any shadow tables left over from an earlier, failed load are dropped.
+        Privileges granted on the live tables (e.g. SELECT for the API's
+        database user) are granted on the copies too, since default privileges
+        only cover tables created in the live schema.
+        """
+        session.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{self.shadow_schema}"'))
+        self._drop_tables(session, self.shadow_schema)
+        for table in self._live:
+            shadow = self._shadow[table.name]
+            session.execute(CreateTable(shadow))
+            for index in shadow.indexes:
+                session.execute(CreateIndex(index))
+            self._copy_grants(session, table)
+        logger.info(
+            "Created %d shadow table(s) in %s.", len(self._live), self.shadow_schema
+        )
+
+    def swap(
+        self, session: Session, on_swap: Callable[[Session], None] | None = None
+    ) -> None:
+        """
+        Move the loaded shadow tables into the live schema and commit.
+
+        The live tables are moved to the previous schema, replacing whatever
+        was kept there from the last swap. The swap only needs brief exclusive
+        locks; if readers hold the tables for longer than the lock timeout the
+        attempt is rolled back and retried.
+
+        The shadow tables must have been created and loaded, and that work
+        committed, before calling this.
+
+        Args:
+            session: Active SQLAlchemy session.
+            on_swap: Called within the swap's transaction once the tables have
+                moved, e.g. to record what was loaded; rerun on each attempt.
+
+        Raises:
+            OperationalError: If the locks could not be taken after all attempts
+        """
+        for table in self._live:
+            session.execute(
+                text(f"ANALYZE {self._qualified(self.shadow_schema, table)}")
+            )
+        session.commit()
+
+        for attempt in range(1, _SWAP_ATTEMPTS + 1):
+            try:
+                session.execute(
+                    text(f"SET LOCAL lock_timeout = '{_SWAP_LOCK_TIMEOUT}'")
+                )
+                session.execute(
+                    text(f'CREATE SCHEMA IF NOT EXISTS "{self.previous_schema}"')
+                )
+                self._drop_tables(session, self.previous_schema)
+                self._move_tables(session, self.schema, self.previous_schema)
+                self._move_tables(session, self.shadow_schema, self.schema)
+                self._drop_external_foreign_keys(session, self.previous_schema)
+                if on_swap is not None:
+                    on_swap(session)
+                session.commit()
+            except OperationalError as e:
+                session.rollback()
+                if (
+                    not isinstance(e.orig, LockNotAvailable)
+                    or attempt == _SWAP_ATTEMPTS
+                ):
+                    raise
+                logger.warning(
+                    "Swap of %s timed out waiting for locks (attempt %d/%d), retrying...",
+                    ", ".join(t.name for t in self._live),
+                    attempt,
+                    _SWAP_ATTEMPTS,
+                )
+                time.sleep(_SWAP_RETRY_DELAY)
+            else:
+                logger.info(
+                    "Swapped %d table(s) into %s; previous versions kept in %s.",
+                    len(self._live),
+                    self.schema,
+                    self.previous_schema,
+                )
+                return
+
+    def restore_previous(self, session: Session) -> None:
+        """
+        Swap the tables kept from the last swap back into the live schema and commit.
+
+        The current live tables are moved to the shadow schema, so calling
+        this twice undoes the restore.
+        """
+        self._drop_tables(session, self.shadow_schema)
+        self._move_tables(session, self.schema, self.shadow_schema)
+        self._move_tables(session, self.previous_schema, self.schema)
+        self._drop_external_foreign_keys(session, self.shadow_schema)
+        for table in self._live:
+            for constraint in table.foreign_key_constraints:
+                if not self._is_internal(constraint):
+                    session.execute(AddConstraint(constraint))
+        session.commit()
+        logger.info(
+            "Restored %d table(s) in %s from %s.",
+            len(self._live),
+            self.schema,
+            self.previous_schema,
+        )
+
+    def _copy_grants(self, session: Session, table: Table) -> None:
+        grants = session.execute(
+            text(
+                "SELECT grantee, privilege_type FROM information_schema.role_table_grants "
+                "WHERE table_schema = :schema AND table_name = :table "
+                "AND grantee <> current_user"
+            ),
+            {"schema": self.schema, "table": table.name},
+        ).all()
+        shadow = self._qualified(self.shadow_schema, table)
+        for grantee, privilege in grants:
+            role = grantee if grantee == "PUBLIC" else f'"{grantee}"'
+            session.execute(text(f"GRANT {privilege} ON {shadow} TO {role}"))
+
+    def _is_internal(self, constraint: ForeignKeyConstraint) -> bool:
+        return constraint.referred_table.name in self._shadow
+
+    def _drop_external_foreign_keys(self, session: Session, schema: str) -> None:
+        """Drop foreign keys from ``schema``'s copies to tables outside the group."""
+        tables = [f"{schema}.{t.name}" for t in self._live]
+        rows = session.execute(
+            text(
+                "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+                "WHERE contype = 'f' "
+                "AND conrelid = ANY(CAST(:tables AS regclass[])) "
+                "AND NOT confrelid = ANY(CAST(:tables AS regclass[]))"
+            ),
+            {"tables": tables},
+        ).all()
+        for table, constraint in rows:
+            session.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT "{constraint}"'))
@@ -236,6 +236,7 @@ class TrainStopTime(Base):
         Index("ix_train_stop_times_trip_id", "trip_id"),
         Index("ix_train_stop_times_stop_id", "stop_id"),
         Index("ix_train_stop_times_trip_stop", "trip_id", "stop_id"),
+        Index("ix_train_stop_times_stop_arrival", "stop_id", "arrival_seconds"),
         {"schema": DB_SCHEMA},
     )
 
@@ -248,6 +249,10 @@ class TrainStopTime(Base):
     )
     arrival_time: Mapped[time] = mapped_column(Time, nullable=False)
     departure_time: Mapped[time] = mapped_column(Time, nullable=False)
+    # Seconds since the start of the service day; unlike the times above,
+    # these keep GTFS times past midnight (e.g. 25:10:00) in order
+    arrival_seconds: Mapped[int] = mapped_column(Integer, nullable=False)
+    departure_seconds: Mapped[int] = mapped_column(Integer, nullable=False)
     sequence: Mapped[int] = mapped_column(Integer, nullable=False)
     headsign: Mapped[str | None] = mapped_column(String)
 
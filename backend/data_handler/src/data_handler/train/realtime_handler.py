@@ -20,6 +20,7 @@ from sqlalchemy import delete, select, update
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
+from data_handler.common.http_fetcher import ConcurrentFetcher, log_failures
 from data_handler.db import SessionLocal
 from data_handler.settings.api_settings import get_api_settings
 from data_handler.train.models import (
@@ -47,6 +48,24 @@ DUBLIN_LAT_MAX = 53.75
 DUBLIN_LON_MIN = -6.65
 DUBLIN_LON_MAX = -5.90
 
+# ── Per-station / per-train fetch tuning ─────────────────────────────
+# These calls run inside the 1-minute slot, so they are fanned out over a
+# pooled session and the whole batch must finish well before the next tick.
+_REQUEST_TIMEOUT = 30  # seconds, single-shot calls
+_FETCH_WORKERS = 8
+_FETCH_MAX_PER_SECOND = 20.0
+_FETCH_CALL_TIMEOUT = 10.0  # seconds
+_FETCH_BATCH_DEADLINE = 40.0  # seconds
+
+
+def _make_fetcher() -> ConcurrentFetcher:
+    return ConcurrentFetcher(
+        max_workers=_FETCH_WORKERS,
+        max_requests_per_second=_FETCH_MAX_PER_SECOND,
+        call_timeout=_FETCH_CALL_TIMEOUT,
+        deadline=_FETCH_BATCH_DEADLINE,
+    )
+
 
 def _is_dublin_area(lat: float, lon: float) -> bool:
     """Return True if coordinates fall within the Greater Dublin Area bounding box."""
@@ -401,35 +420,51 @@ def irish_rail_current_trains_to_db() -> None:
 # ── Station Data Functions ──────────────────────────────────────────
 
 
-def fetch_station_data(station_code: str, num_mins: int = 90) -> list[dict]:
+def _get_station_data(
+    station_code: str,
+    num_mins: int,
+    http: requests.Session | None = None,
+    timeout: float = _REQUEST_TIMEOUT,
+) -> list[dict]:
+    """Fetch and parse station data, raising on HTTP or XML errors."""
+    num_mins = max(5, min(90, num_mins))
+    url = f"{get_api_settings().irish_rail_base_url}/getStationDataByCodeXML_WithNumMins?StationCode={station_code}&NumMins={num_mins}"
+    logger.debug("Fetching station data from %s", url)
+
+    response = (http or requests).get(url, timeout=timeout)
+    response.raise_for_status()
+
+    doc = xmltodict.parse(response.text)
+    # An empty <ArrayOfObjStationData /> parses to None, not {}
+    data = (doc.get("ArrayOfObjStationData") or {}).get("objStationData", [])
+    return _ensure_list(data)
+
+
+def fetch_station_data_concurrently(
+    station_codes: list[str], num_mins: int = 90
+) -> tuple[dict[str, list[dict]], list[str]]:
     """
-    Fetch arrival/departure data for a station.
+    Fetch arrival/departure data for many stations in parallel.
 
     Args:
-        station_code: Station code (e.g., "BYSDE" for Bayside)
+        station_codes: Station codes to fetch
         num_mins: Number of minutes to look ahead (5-90)
 
     Returns:
-        List of train arrival dicts
+        Tuple of (station code → arrival dicts for successful stations,
+        station codes that failed or timed out)
     """
-    num_mins = max(5, min(90, num_mins))
-    url = f"{get_api_settings().irish_rail_base_url}/getStationDataByCodeXML_WithNumMins?StationCode={station_code}&NumMins={num_mins}"
-    logger.debug("Fetching station data from %s", url)
-
-    try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-    except requests.RequestException:
-        logger.exception("Failed to fetch station data for %s", station_code)
-        return []
+    with _make_fetcher() as fetcher:
+        results = fetcher.map(
+            lambda code: _get_station_data(
+                code, num_mins, fetcher.session, fetcher.call_timeout
+            ),
+            station_codes,
+        )
 
-    try:
-        doc = xmltodict.parse(response.text)
-        data = doc.get("ArrayOfObjStationData", {}).get("objStationData", [])
-        return _ensure_list(data)
-    except Exception:
-        logger.exception("Failed to parse station data XML")
-        return []
+    failed = log_failures(results, "station data", logger)
+    data = {code: r.value for code, r in results.items() if r.ok and r.value}
+    return data, failed
 
 
 def _fetch_all_station_codes(session: Session) -> list[str]:
@@ -439,7 +474,11 @@ def _fetch_all_station_codes(session: Session) -> list[str]:
 
 
 def irish_rail_station_data_to_db() -> None:
-    """Fetch station data for all stations and store to database."""
+    """
+    Fetch station data for all stations and store to database.
+
+    Stations whose fetch failed keep their previous data.
+    """
     logger.info("Loading Irish Rail station data to database...")
 
     session = SessionLocal()
@@ -454,15 +493,25 @@ def irish_rail_station_data_to_db() -> None:
             )
             return
 
-        # Clear old station data
-        session.execute(delete(IrishRailStationData))
-
-        all_data = []
-        for station_code in station_codes:
-            arrivals = fetch_station_data(station_code, num_mins=90)
-            for a in arrivals:
-                data = _parse_station_data_dict(a, station_code, fetched_at)
-                all_data.append(data)
+        arrivals_by_station, failed = fetch_station_data_concurrently(
+            station_codes, num_mins=90
+        )
+        if len(failed) == len(station_codes):
+            logger.warning("No station data fetched; keeping the previous data.")
+            return
+        all_data = [
+            _parse_station_data_dict(a, station_code, fetched_at)
+            for station_code, arrivals in arrivals_by_station.items()
+            for a in arrivals
+        ]
+
+        # Replace the data of every station except those whose fetch failed,
+        # which keep their previous rows
+        session.execute(
+            delete(IrishRailStationData).where(
+                IrishRailStationData.station_code.not_in(failed)
+            )
+        )
 
         if all_data:
             session.add_all(all_data)
@@ -483,34 +532,48 @@ def irish_rail_station_data_to_db() -> None:
 # ── Train Movements Functions ───────────────────────────────────────
 
 
-def fetch_train_movements(train_code: str, train_date: str) -> list[dict]:
+def _get_train_movements(
+    train_code: str,
+    train_date: str,
+    http: requests.Session | None = None,
+    timeout: float = _REQUEST_TIMEOUT,
+) -> list[dict]:
+    """Fetch and parse train movements, raising on HTTP or XML errors."""
+    url = f"{get_api_settings().irish_rail_base_url}/getTrainMovementsXML?TrainId={train_code}&TrainDate={train_date}"
+    logger.debug("Fetching train movements from %s", url)
+
+    response = (http or requests).get(url, timeout=timeout)
+    response.raise_for_status()
+
+    doc = xmltodict.parse(response.text)
+    movements = (doc.get("ArrayOfObjTrainMovements") or {}).get("objTrainMovements", [])
+    return _ensure_list(movements)
+
+
+def fetch_train_movements_concurrently(
+    trains: list[tuple[str, str]],
+) -> tuple[dict[tuple[str, str], list[dict]], list[tuple[str, str]]]:
     """
-    Fetch movement/journey details for a specific train.
+    Fetch movements for many trains in parallel.
 
     Args:
-        train_code: Train code (e.g., "E109")
-        train_date: Date string (e.g., "21 dec 2011")
+        trains: (train_code, train_date) pairs to fetch
 
     Returns:
-        List of movement dicts with stop information
+        Tuple of ((train_code, train_date) → movement dicts for successful
+        trains, pairs that failed or timed out)
     """
-    url = f"{get_api_settings().irish_rail_base_url}/getTrainMovementsXML?TrainId={train_code}&TrainDate={train_date}"
-    logger.debug("Fetching train movements from %s", url)
-
-    try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-    except requests.RequestException:
-        logger.exception("Failed to fetch train movements for %s", train_code)
-        return []
+    with _make_fetcher() as fetcher:
+        results = fetcher.map(
+            lambda train: _get_train_movements(
+                train[0], train[1], fetcher.session, fetcher.call_timeout
+            ),
+            trains,
+        )
 
-    try:
-        doc = xmltodict.parse(response.text)
-        movements = doc.get("ArrayOfObjTrainMovements", {}).get("objTrainMovements", [])
-        return _ensure_list(movements)
-    except Exception:
-        logger.exception("Failed to parse train movements XML")
-        return []
+    failed = log_failures(results, "train movements", logger)
+    data = {train: r.value for train, r in results.items() if r.ok and r.value}
+    return data, failed
 
 
 def _fetch_current_trains_from_db(session: Session) -> list[tuple[str, str]]:
@@ -528,7 +591,11 @@ def _fetch_current_trains_from_db(session: Session) -> list[tuple[str, str]]:
 
 
 def irish_rail_train_movements_to_db() -> None:
-    """Fetch train movements for all current trains and store to database."""
+    """
+    Fetch train movements for all current trains and store to database.
+
+    Trains whose fetch failed keep their previous movements.
+    """
     logger.info("Loading Irish Rail train movements to database...")
 
     session = SessionLocal()
@@ -543,13 +610,14 @@ def irish_rail_train_movements_to_db() -> None:
             )
             return
 
-        # Clear old movement data
-        session.execute(delete(IrishRailTrainMovement))
+        movements_by_train, failed = fetch_train_movements_concurrently(trains)
+        if len(failed) == len(trains):
+            logger.warning("No train movements fetched; keeping the previous data.")
+            return
 
         all_movements = []
         skipped = 0
-        for train_code, train_date in trains:
-            movements = fetch_train_movements(train_code, train_date)
+        for movements in movements_by_train.values():
             for m in movements:
                 movement = _parse_train_movement_dict(m, fetched_at)
                 if movement.location_type is None:
@@ -561,6 +629,16 @@ def irish_rail_train_movements_to_db() -> None:
                 "Skipped %d movement record(s) with null location_type.", skipped
             )
 
+        # Replace the movements of every train except those whose fetch
+        # failed, which keep their previous rows
+        session.execute(
+            delete(IrishRailTrainMovement).where(
+                IrishRailTrainMovement.train_code.not_in(
+                    [train_code for train_code, _ in failed]
+                )
+            )
+        )
+
         if all_movements:
             session.add_all(all_movements)
             session.commit()
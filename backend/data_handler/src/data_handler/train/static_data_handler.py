@@ -1,11 +1,27 @@
 import logging
+from collections.abc import Callable, Iterator
+from functools import partial
 from pathlib import Path
 
 from sqlalchemy import delete
-
-from data_handler.common.gtfs_parsing_utils import parse_gtfs_date, parse_gtfs_time
-from data_handler.csv_utils import read_csv_file
+from sqlalchemy.orm import Session
+
+from data_handler.bulk_load import copy_rows, model_to_row
+from data_handler.common.gtfs_incremental import apply_row_diffs
+from data_handler.common.gtfs_parsing_utils import (
+    parse_gtfs_date,
+    parse_gtfs_seconds,
+    parse_gtfs_time,
+)
+from data_handler.common.source_manifests import (
+    changed_files,
+    hash_files,
+    load_manifest,
+    save_manifest,
+)
+from data_handler.csv_utils import DataPath, read_csv_file
 from data_handler.db import SessionLocal
+from data_handler.shadow_tables import ShadowTables
 from data_handler.train.models import (
     RouteType,
     TrainAgency,
@@ -21,6 +37,9 @@ from data_handler.train.models import (
 
 logger = logging.getLogger(__name__)
 
+_GTFS_FEED = "train"
+_RIDERSHIP_SOURCE = "train_ridership"
+
 
 # ── GTFS Row Parsers ────────────────────────────────────────────────
 
@@ -114,6 +133,8 @@ def parse_stop_time_row(row: dict[str, str]) -> TrainStopTime:
         stop_id=row["stop_id"],
         arrival_time=parse_gtfs_time(row["arrival_time"]),
         departure_time=parse_gtfs_time(row["departure_time"]),
+        arrival_seconds=parse_gtfs_seconds(row["arrival_time"]),
+        departure_seconds=parse_gtfs_seconds(row["departure_time"]),
         sequence=int(row["stop_sequence"]),
         headsign=headsign.strip() if headsign and headsign.strip() else None,
     )
@@ -122,7 +143,7 @@ def parse_stop_time_row(row: dict[str, str]) -> TrainStopTime:
 # ── Main Processor ──────────────────────────────────────────────────
 
 
-def process_train_static_data(gtfs_dir: Path) -> None:
+def process_train_static_data(gtfs_dir: DataPath) -> None:
     """
     Process train static data from GTFS CSV files.
 
@@ -131,14 +152,18 @@ def process_train_static_data(gtfs_dir: Path) -> None:
                 stop_times.txt, stops.txt, trips.txt
       Optional: calendar_dates.txt
 
-    This function:
-    1. Deletes all existing data from relevant tables
-    2. Reads data from GTFS CSV files
-    3. Inserts the data into the database
-    4. All operations happen within a single transaction
+    Files are hashed and compared with the manifest of the last import:
+    - If no file changed, nothing is written.
+    - If a previous import exists, only the changed files are diffed against
+      the live tables by natural key, in one transaction (see
+      ``apply_row_diffs``).
+    - Otherwise all files are streamed with COPY into empty shadow tables,
+      which are then swapped in for the live ones in one short transaction,
+      keeping the replaced tables for one cycle (see ``ShadowTables``).
 
     Args:
-        gtfs_dir: Path to the directory containing GTFS CSV files.
+        gtfs_dir: Path to the directory containing GTFS CSV files, on disk or
+                  the root of an opened GTFS ZIP archive.
 
     Raises:
         FileNotFoundError: If any required CSV file is missing
@@ -146,10 +171,12 @@ def process_train_static_data(gtfs_dir: Path) -> None:
     """
 
     # ── Required GTFS files ──────────────────────────────────────
+    # Loaded in FK dependency order: stop_times must come after trips and stops
     gtfs_csv_files = {
         "agency.txt": (
             ["agency_id", "agency_name", "agency_url", "agency_timezone"],
             parse_agency_row,
+            TrainAgency,
         ),
         "calendar.txt": (
             [
@@ -165,10 +192,17 @@ def process_train_static_data(gtfs_dir: Path) -> None:
                 "end_date",
             ],
             parse_calendar_row,
+            TrainCalendarSchedule,
         ),
         "routes.txt": (
             ["route_id", "agency_id", "route_short_name", "route_long_name"],
             parse_route_row,
+            TrainRoute,
+        ),
+        "stops.txt": (
+            ["stop_id", "stop_code", "stop_name", "stop_lat", "stop_lon"],
+            parse_stop_row,
+            TrainStop,
         ),
         "shapes.txt": (
             [
@@ -179,14 +213,7 @@ def process_train_static_data(gtfs_dir: Path) -> None:
                 "shape_dist_traveled",
             ],
             parse_shape_row,
-        ),
-        "stop_times.txt": (
-            ["trip_id", "arrival_time", "departure_time", "stop_id", "stop_sequence"],
-            parse_stop_time_row,
-        ),
-        "stops.txt": (
-            ["stop_id", "stop_code", "stop_name", "stop_lat", "stop_lon"],
-            parse_stop_row,
+            TrainTripShape,
         ),
         "trips.txt": (
             [
@@ -199,6 +226,12 @@ def process_train_static_data(gtfs_dir: Path) -> None:
                 "shape_id",
             ],
             parse_trip_row,
+            TrainTrip,
+        ),
+        "stop_times.txt": (
+            ["trip_id", "arrival_time", "departure_time", "stop_id", "stop_sequence"],
+            parse_stop_time_row,
+            TrainStopTime,
         ),
     }
 
@@ -207,6 +240,7 @@ def process_train_static_data(gtfs_dir: Path) -> None:
         "calendar_dates.txt": (
             ["service_id", "date", "exception_type"],
             parse_calendar_date_row,
+            TrainCalendarDate,
         ),
     }
 
@@ -218,46 +252,35 @@ def process_train_static_data(gtfs_dir: Path) -> None:
 
     logger.info("Processing static train data from %s ...", gtfs_dir)
 
+    all_files = gtfs_csv_files | optional_gtfs_files
+    hashes = hash_files(gtfs_dir, all_files)
     session = SessionLocal()
 
     try:
-        # Delete existing data in reverse dependency order
-        logger.info("Deleting existing train data...")
-        session.execute(delete(TrainStopTime))
-        session.execute(delete(TrainTrip))
-        session.execute(delete(TrainTripShape))
-        session.execute(delete(TrainRoute))
-        session.execute(delete(TrainStop))
-        session.execute(delete(TrainCalendarDate))
-        session.execute(delete(TrainCalendarSchedule))
-        session.execute(delete(TrainAgency))
-
-        # Process required GTFS files
-        for filename, (required_headers, transform_row) in gtfs_csv_files.items():
-            logger.info("Processing %s...", filename)
-            file_path = gtfs_dir / filename
-            rows = [
-                transform_row(row) for row in read_csv_file(file_path, required_headers)
-            ]
-            session.add_all(rows)
-            logger.info("  → %d rows from %s", len(rows), filename)
-
-        # Process optional GTFS files
-        for filename, (required_headers, transform_row) in optional_gtfs_files.items():
-            file_path = gtfs_dir / filename
-            if file_path.exists():
-                logger.info("Processing optional %s...", filename)
-                rows = [
-                    transform_row(row)
-                    for row in read_csv_file(file_path, required_headers)
-                ]
-                session.add_all(rows)
-                logger.info("  → %d rows from %s", len(rows), filename)
-            else:
-                logger.info("Skipping optional %s (not found).", filename)
-
-        logger.info("Committing changes to database...")
-        session.commit()
+        manifest = load_manifest(session, _GTFS_FEED)
+        changed = changed_files(manifest, hashes)
+        if not changed:
+            logger.info("Train GTFS feed unchanged since last import, skipping.")
+            return
+
+        if manifest:
+            # Diff only the changed files against the live tables, in one transaction
+            logger.info("Applying changes from %s...", ", ".join(changed))
+            changes = []
+            for filename in changed:
+                model = all_files[filename][2]
+                rows = _read_rows(gtfs_dir, filename, all_files[filename])
+                changes.append((filename, model, rows))
+            apply_row_diffs(session, changes)
+            save_manifest(session, _GTFS_FEED, hashes)
+            session.commit()
+        else:
+            _reload_all(
+                session,
+                gtfs_dir,
+                all_files,
+                partial(save_manifest, source=_GTFS_FEED, hashes=hashes),
+            )
         logger.info("Static train data import complete.")
 
     except Exception:
@@ -269,6 +292,49 @@ def process_train_static_data(gtfs_dir: Path) -> None:
         session.close()
 
 
+def _read_rows(
+    gtfs_dir: DataPath, filename: str, file_def: tuple
+) -> Iterator[dict[str, object]]:
+    """Yield a GTFS file's parsed rows as column dicts; nothing if it is missing."""
+    required_headers, transform_row, _ = file_def
+    file_path = gtfs_dir / filename
+    if not file_path.exists():
+        return
+    for row in read_csv_file(file_path, required_headers):
+        yield model_to_row(transform_row(row))
+
+
+def _reload_all(
+    session: Session,
+    gtfs_dir: DataPath,
+    all_files: dict,
+    on_swap: Callable[[Session], None],
+) -> None:
+    """
+    Load every file into shadow tables and swap them in for the live ones.
+
+    ``on_swap`` runs in the swap's transaction, so the manifest is only saved
+    together with the tables it describes.
+    """
+    shadow = ShadowTables([model for _, _, model in all_files.values()])
+
+    # Load into empty shadow tables; readers keep the live ones until the swap
+    shadow.create(session)
+    for filename, file_def in all_files.items():
+        if not (gtfs_dir / filename).exists():
+            logger.info("Skipping optional %s (not found).", filename)
+            continue
+        logger.info("Processing %s...", filename)
+        total = copy_rows(
+            session, shadow[file_def[2]], _read_rows(gtfs_dir, filename, file_def)
+        )
+        logger.info("  → %d rows from %s", total, filename)
+
+    logger.info("Committing changes to database...")
+    session.commit()
+    shadow.swap(session, on_swap)
+
+
 _RIDERSHIP_CSV_FILE = "stations_historical.csv"
 _RIDERSHIP_REQUIRED_HEADERS = [
     "Station",
@@ -306,8 +372,13 @@ def process_train_ridership_data(data_dir: Path) -> None:
 
     logger.info("Processing %s...", _RIDERSHIP_CSV_FILE)
 
+    hashes = hash_files(data_dir, [_RIDERSHIP_CSV_FILE])
     session = SessionLocal()
     try:
+        if not changed_files(load_manifest(session, _RIDERSHIP_SOURCE), hashes):
+            logger.info("Train ridership data unchanged since last import, skipping.")
+            return
+
         session.execute(delete(TrainStationRidership))
 
         rows = []
@@ -331,6 +402,9 @@ def process_train_ridership_data(data_dir: Path) -> None:
             )
 
         session.add_all(rows)
+        # The import time doubles as the data version of the train
+        # utilisation pipeline in the inference engine
+        save_manifest(session, _RIDERSHIP_SOURCE, hashes)
         session.commit()
         logger.info("Inserted %d train station ridership record(s).", len(rows))
 
@@ -1,34 +1,61 @@
-"""Calculate tram delays from DB data and persist to tram_delay_history."""
+"""
+Calculate tram delays from DB data and persist to tram_delay_history.
+
+Luas stops from the forecasting API are matched by name to GTFS stops once
+per import of either stop list, into tram_luas_gtfs_stops (see
+``refresh_luas_gtfs_stops``). For the soonest forecast of each stop and
+direction, a snapshot looks up the next scheduled arrival at the matching
+GTFS stops in the day's timetable index (see
+``data_handler.common.timetable_index``). The job issues the same few
+statements however many stops have forecasts.
+"""
 
 import logging
+from collections.abc import Iterable
 from datetime import UTC, datetime, time
+from zoneinfo import ZoneInfo
 
-from sqlalchemy import select, text
+from sqlalchemy import Row, delete, insert, select, text
 from sqlalchemy.orm import Session
 
+from data_handler.common.timetable_index import (
+    TimetableFeed,
+    TimetableIndex,
+    get_timetable_index,
+)
 from data_handler.db import SessionLocal
 from data_handler.tram.models import (
+    TramCalendarDate,
+    TramCalendarSchedule,
     TramDelayHistory,
     TramLuasForecast,
+    TramLuasGtfsStop,
     TramLuasStop,
     TramStop,
     TramStopTime,
+    TramTrip,
 )
 
 logger = logging.getLogger(__name__)
 
+_DUBLIN = ZoneInfo("Europe/Dublin")
+
+_LOOKAHEAD_MINS = 90
 
-def _get_dublin_time(session: Session) -> time:
-    """Get current Dublin time from the database."""
+
+def _get_dublin_now(session: Session) -> datetime:
+    """Get current Dublin wall-clock time (naive) from the database."""
     row = session.execute(text("SELECT NOW() AT TIME ZONE 'Europe/Dublin'")).scalar()
     if row is None:
-        return datetime.now(tz=UTC).time()
-    return row.time() if isinstance(row, datetime) else row
+        return datetime.now(tz=_DUBLIN).replace(tzinfo=None)
+    return row
 
 
 def _build_name_to_gtfs_ids(session: Session) -> dict[str, list[str]]:
     """Build mapping of lowercase stop name → list of GTFS stop IDs."""
-    gtfs_stops = session.execute(select(TramStop.id, TramStop.name)).all()
+    gtfs_stops = session.execute(
+        select(TramStop.id, TramStop.name).order_by(TramStop.id)
+    ).all()
     mapping: dict[str, list[str]] = {}
     for gtfs_id, gtfs_name in gtfs_stops:
         mapping.setdefault(gtfs_name.lower(), []).append(gtfs_id)
@@ -47,27 +74,113 @@ def _find_gtfs_ids(stop_name: str, name_to_gtfs: dict[str, list[str]]) -> list[s
     return []
 
 
-def _find_next_scheduled(
-    session: Session, gtfs_stop_ids: list[str], now: time
-) -> time | None:
-    """Find the next scheduled arrival within 90 minutes."""
+def refresh_luas_gtfs_stops(session: Session) -> int:
+    """
+    Rebuild tram_luas_gtfs_stops within the session's transaction.
+
+    Call after the GTFS stops or the Luas stops change.
+
+    Returns:
+        The number of Luas stops matched to at least one GTFS stop.
+    """
+    name_to_gtfs = _build_name_to_gtfs_ids(session)
+    luas_stops = session.execute(select(TramLuasStop.stop_id, TramLuasStop.name)).all()
+    rows = [
+        {"luas_stop_id": stop_id, "gtfs_stop_id": gtfs_id}
+        for stop_id, name in luas_stops
+        for gtfs_id in _find_gtfs_ids(name, name_to_gtfs)
+    ]
+    session.execute(delete(TramLuasGtfsStop))
+    if rows:
+        session.execute(insert(TramLuasGtfsStop), rows)
+    matched = len({row["luas_stop_id"] for row in rows})
+    logger.info("Matched %d / %d Luas stops to GTFS stops.", matched, len(luas_stops))
+    return matched
+
+
+# ── Snapshot ─────────────────────────────────────────────────────
+
+TRAM_TIMETABLE = TimetableFeed(
+    name="tram",
+    stop_time=TramStopTime,
+    trip=TramTrip,
+    calendar=TramCalendarSchedule,
+    calendar_date=TramCalendarDate,
+)
+
+# Soonest forecast per stop and direction
+_SOONEST_FORECASTS = (
+    select(
+        TramLuasForecast.stop_id,
+        TramLuasStop.name.label("stop_name"),
+        TramLuasForecast.line,
+        TramLuasForecast.direction,
+        TramLuasForecast.destination,
+        TramLuasForecast.due_mins,
+    )
+    .join(TramLuasStop, TramLuasForecast.stop_id == TramLuasStop.stop_id)
+    .where(TramLuasForecast.due_mins.is_not(None))
+    .distinct(TramLuasForecast.stop_id, TramLuasForecast.direction)
+    .order_by(
+        TramLuasForecast.stop_id,
+        TramLuasForecast.direction,
+        TramLuasForecast.due_mins,
+        TramLuasForecast.id,
+    )
+)
+
+
+def _load_luas_gtfs_ids(session: Session) -> dict[str, list[str]]:
+    """Return the matched GTFS stop ids of each Luas stop."""
+    rows = session.execute(
+        select(TramLuasGtfsStop.luas_stop_id, TramLuasGtfsStop.gtfs_stop_id)
+    )
+    mapping: dict[str, list[str]] = {}
+    for luas_stop_id, gtfs_stop_id in rows:
+        mapping.setdefault(luas_stop_id, []).append(gtfs_stop_id)
+    return mapping
+
+
+def _delay_records(
+    forecasts: Iterable[Row],
+    luas_gtfs_ids: dict[str, list[str]],
+    timetable: TimetableIndex,
+    now: time,
+    recorded_at: datetime,
+) -> list[dict]:
+    """Return a tram_delay_history row for each forecast behind schedule."""
     now_mins = now.hour * 60 + now.minute
-    end_mins = min(now_mins + 90, 23 * 60 + 59)
-    end_time = time(hour=end_mins // 60, minute=end_mins % 60)
-
-    nearest: time | None = None
-    for gtfs_id in gtfs_stop_ids:
-        arr = session.execute(
-            select(TramStopTime.arrival_time)
-            .where(TramStopTime.stop_id == gtfs_id)
-            .where(TramStopTime.arrival_time >= now)
-            .where(TramStopTime.arrival_time <= end_time)
-            .order_by(TramStopTime.arrival_time)
-            .limit(1)
-        ).scalar()
-        if arr is not None and (nearest is None or arr < nearest):
-            nearest = arr
-    return nearest
+    now_secs = now_mins * 60 + now.second
+    until_secs = (now_mins + _LOOKAHEAD_MINS) * 60
+
+    records = []
+    for forecast in forecasts:
+        gtfs_ids = luas_gtfs_ids.get(forecast.stop_id)
+        if not gtfs_ids:
+            continue
+        scheduled = timetable.next_arrival(gtfs_ids, now_secs, until_secs)
+        if scheduled is None:
+            continue
+        delay_mins = now_mins + forecast.due_mins - scheduled // 60
+        if delay_mins <= 0:
+            continue
+        records.append(
+            {
+                "recorded_at": recorded_at,
+                "stop_id": forecast.stop_id,
+                "stop_name": forecast.stop_name,
+                "line": forecast.line,
+                "direction": forecast.direction,
+                "destination": forecast.destination,
+                "scheduled_time": (
+                    f"{scheduled // 3600 % 24:02d}:{scheduled // 60 % 60:02d}"
+                ),
+                "due_mins": forecast.due_mins,
+                "delay_mins": delay_mins,
+                "estimated_affected_passengers": 0.0,
+            }
+        )
+    return records
 
 
 def store_delay_snapshot() -> None:
@@ -75,73 +188,27 @@ def store_delay_snapshot() -> None:
     session = SessionLocal()
 
     try:
-        current_time = _get_dublin_time(session)
-        logger.info("Calculating delays at Dublin time %s", current_time)
-
-        forecasts = session.execute(
-            select(TramLuasForecast, TramLuasStop.name).join(
-                TramLuasStop, TramLuasForecast.stop_id == TramLuasStop.stop_id
-            )
-        ).all()
-
-        if not forecasts:
-            logger.info("No forecasts in DB — nothing to calculate.")
-            return
-
-        # Group by stop+direction, keep soonest
-        soonest: dict[str, tuple] = {}
-        for forecast, stop_name in forecasts:
-            if forecast.due_mins is None:
-                continue
-            key = f"{forecast.stop_id}|{forecast.direction}"
-            if key not in soonest or forecast.due_mins < soonest[key][0].due_mins:
-                soonest[key] = (forecast, stop_name)
-
-        name_to_gtfs = _build_name_to_gtfs_ids(session)
-        now_utc = datetime.now(tz=UTC)
-        delay_count = 0
-
-        for forecast, stop_name in soonest.values():
-            gtfs_ids = _find_gtfs_ids(stop_name, name_to_gtfs)
-            if not gtfs_ids:
-                continue
-
-            predicted_mins = (
-                current_time.hour * 60 + current_time.minute + forecast.due_mins
-            )
-            predicted_time = time(
-                hour=min(predicted_mins // 60, 23), minute=predicted_mins % 60
-            )
-
-            next_scheduled = _find_next_scheduled(session, gtfs_ids, current_time)
-            if next_scheduled is None:
-                continue
-
-            delay_mins = (predicted_time.hour * 60 + predicted_time.minute) - (
-                next_scheduled.hour * 60 + next_scheduled.minute
-            )
-
-            if delay_mins <= 0:
-                continue
-
-            session.add(
-                TramDelayHistory(
-                    recorded_at=now_utc,
-                    stop_id=forecast.stop_id,
-                    stop_name=stop_name,
-                    line=forecast.line,
-                    direction=forecast.direction,
-                    destination=forecast.destination,
-                    scheduled_time=next_scheduled.strftime("%H:%M"),
-                    due_mins=forecast.due_mins,
-                    delay_mins=delay_mins,
-                    estimated_affected_passengers=0.0,
-                )
-            )
-            delay_count += 1
-
+        now = _get_dublin_now(session)
+        logger.info("Calculating delays at Dublin time %s", now.time())
+
+        luas_gtfs_ids = _load_luas_gtfs_ids(session)
+        if not luas_gtfs_ids:
+            # Empty until the first stop list import after an upgrade
+            refresh_luas_gtfs_stops(session)
+            luas_gtfs_ids = _load_luas_gtfs_ids(session)
+
+        timetable = get_timetable_index(session, TRAM_TIMETABLE, now.date())
+        records = _delay_records(
+            session.execute(_SOONEST_FORECASTS).all(),
+            luas_gtfs_ids,
+            timetable,
+            now.time(),
+            datetime.now(tz=UTC),
+        )
+        if records:
+            session.execute(insert(TramDelayHistory), records)
         session.commit()
-        logger.info("Stored %d delay records.", delay_count)
+        logger.info("Stored %d delay records.", len(records))
 
     except Exception:
         session.rollback()
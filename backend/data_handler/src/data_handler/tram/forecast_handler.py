@@ -1,13 +1,16 @@
 import logging
 import xml.parsers.expat
+from datetime import timedelta
 
 import pandas as pd
 import requests
 import xmltodict
-from sqlalchemy import delete, select
+from sqlalchemy import delete, func, insert, or_, select
 
+from data_handler.common.http_fetcher import ConcurrentFetcher, log_failures
 from data_handler.db import SessionLocal
 from data_handler.settings.api_settings import get_api_settings
+from data_handler.tram.delay_history_handler import refresh_luas_gtfs_stops
 from data_handler.tram.models import TramLuasForecast, TramLuasStop
 
 logger = logging.getLogger(__name__)
@@ -17,6 +20,15 @@ LUAS_LINES = {
     "green": "Luas Green Line",
 }
 
+# Per-stop forecast fan-out; the whole sweep has to fit in the 1-minute slot.
+_FORECAST_WORKERS = 12
+_FORECAST_MAX_PER_SECOND = 30.0
+_FORECAST_CALL_TIMEOUT = 10.0  # seconds
+_FORECAST_BATCH_DEADLINE = 30.0  # seconds
+# Forecasts of a stop whose fetch keeps failing are dropped once this old;
+# the due times count down, so older ones no longer mean anything.
+_FORECAST_MAX_AGE = timedelta(minutes=5)
+
 
 def _luas_base_url() -> str:
     return get_api_settings().luas_forecast_base_url
@@ -70,10 +82,12 @@ def fetch_luas_stops(line_name: str) -> pd.DataFrame:
     return pd.DataFrame(rows)
 
 
-def fetch_forecast_for_stop(stop_id: str) -> list[dict]:
+def fetch_forecast_for_stop(
+    stop_id: str, http: requests.Session | None = None, timeout: float = 30
+) -> list[dict]:
     """Fetch live forecast entries for a single Luas stop."""
     url = _luas_forecast_url(stop_id)
-    res = requests.get(url, timeout=30)
+    res = (http or requests).get(url, timeout=timeout)
     res.raise_for_status()
 
     try:
@@ -110,6 +124,37 @@ def fetch_forecast_for_stop(stop_id: str) -> list[dict]:
     return rows
 
 
+def fetch_forecasts_concurrently(
+    stop_ids: list[str],
+) -> tuple[dict[str, list[dict]], list[str]]:
+    """
+    Fetch and parse forecasts for many stops in parallel over one pooled session.
+
+    XML parsing happens in the worker threads alongside the request, so the
+    caller only receives ready-to-insert rows.
+
+    Returns:
+        Tuple of (stop_id → forecast rows for successful stops,
+        stop_ids that failed or timed out)
+    """
+    with ConcurrentFetcher(
+        max_workers=_FORECAST_WORKERS,
+        max_requests_per_second=_FORECAST_MAX_PER_SECOND,
+        call_timeout=_FORECAST_CALL_TIMEOUT,
+        deadline=_FORECAST_BATCH_DEADLINE,
+    ) as fetcher:
+        results = fetcher.map(
+            lambda stop_id: fetch_forecast_for_stop(
+                stop_id, fetcher.session, fetcher.call_timeout
+            ),
+            stop_ids,
+        )
+
+    failed = log_failures(results, "LUAS forecast", logger)
+    forecasts = {stop_id: r.value for stop_id, r in results.items() if r.ok}
+    return forecasts, failed
+
+
 # ── DB writers ───────────────────────────────────────────────────
 
 
@@ -152,6 +197,7 @@ def process_tram_stop_info() -> None:
 
             logger.info("Upserted %d LUAS stop record(s) (%s line).", len(df), line)
 
+        refresh_luas_gtfs_stops(session)
         session.commit()
 
     except Exception:
@@ -164,42 +210,57 @@ def process_tram_stop_info() -> None:
 
 
 def process_tram_live_data() -> None:
-    """Fetch live forecasts for all known stops and insert into DB."""
+    """
+    Fetch live forecasts for all known stops and insert into DB.
+
+    All stops are fetched concurrently before any write happens; the old
+    forecasts of the stops that were fetched are then swapped for the new
+    ones in one short transaction. Stops whose fetch failed keep their
+    previous forecasts until they are older than ``_FORECAST_MAX_AGE``.
+    """
     session = SessionLocal()
 
     try:
         stops = session.execute(
             select(TramLuasStop.stop_id, TramLuasStop.line)
         ).fetchall()
+        session.rollback()  # don't sit idle-in-transaction during the fetch
 
         if not stops:
             logger.warning("No stops in DB. Run process_tram_stop_info() first!")
             return
 
-        # Clear old forecasts before inserting fresh data
-        session.execute(delete(TramLuasForecast))
-
-        forecast_count = 0
-
-        for stop_id, line_name in stops:
-            logger.info("Fetching forecast for %s (%s)...", stop_id, line_name)
-            entries = fetch_forecast_for_stop(stop_id)
-
-            for e in entries:
-                session.add(
-                    TramLuasForecast(
-                        stop_id=stop_id,
-                        line=line_name,
-                        direction=e["direction"],
-                        destination=e["destination"],
-                        due_mins=e["due_mins"],
-                        message=e["message"],
-                    )
+        line_by_stop = dict(stops)
+        logger.info("Fetching forecasts for %d LUAS stop(s)...", len(line_by_stop))
+        forecasts, _ = fetch_forecasts_concurrently(list(line_by_stop))
+
+        rows = [
+            {
+                "stop_id": stop_id,
+                "line": line_by_stop[stop_id],
+                "direction": e["direction"],
+                "destination": e["destination"],
+                "due_mins": e["due_mins"],
+                "message": e["message"],
+            }
+            for stop_id, entries in forecasts.items()
+            for e in entries
+        ]
+
+        # Replace the fetched stops' forecasts and drop expired ones in one
+        # short transaction
+        session.execute(
+            delete(TramLuasForecast).where(
+                or_(
+                    TramLuasForecast.stop_id.in_(list(forecasts)),
+                    TramLuasForecast.fetched_at < func.now() - _FORECAST_MAX_AGE,
                 )
-                forecast_count += 1
-
+            )
+        )
+        if rows:
+            session.execute(insert(TramLuasForecast), rows)
         session.commit()
-        logger.info("Inserted %d LUAS forecast record(s).", forecast_count)
+        logger.info("Inserted %d LUAS forecast record(s).", len(rows))
 
     except Exception:
         session.rollback()
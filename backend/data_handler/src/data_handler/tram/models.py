@@ -199,6 +199,7 @@ class TramStopTime(Base):
         Index("ix_tram_stop_times_trip_id", "trip_id"),
         Index("ix_tram_stop_times_stop_id", "stop_id"),
         Index("ix_tram_stop_times_trip_stop", "trip_id", "stop_id"),
+        Index("ix_tram_stop_times_stop_arrival", "stop_id", "arrival_seconds"),
         {"schema": DB_SCHEMA},
     )
 
@@ -211,6 +212,10 @@ class TramStopTime(Base):
     )
     arrival_time: Mapped[time] = mapped_column(Time, nullable=False)
     departure_time: Mapped[time] = mapped_column(Time, nullable=False)
+    # Seconds since the start of the service day; unlike the times above,
+    # these keep GTFS times past midnight (e.g. 25:10:00) in order
+    arrival_seconds: Mapped[int] = mapped_column(Integer, nullable=False)
+    departure_seconds: Mapped[int] = mapped_column(Integer, nullable=False)
     sequence: Mapped[int] = mapped_column(Integer, nullable=False)
     headsign: Mapped[str | None] = mapped_column(String)
 
@@ -348,11 +353,29 @@ class TramLuasForecast(Base):
     destination: Mapped[str] = mapped_column(String, nullable=False)
     due_mins: Mapped[int | None] = mapped_column(Integer)
     message: Mapped[str] = mapped_column(String, nullable=False, default="")
+    fetched_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
 
     # Relationships
     stop: Mapped["TramLuasStop"] = relationship(back_populates="forecasts")
 
 
+class TramLuasGtfsStop(Base):
+    """
+    GTFS stop matched by name to a Luas stop from the forecasting API.
+
+    Rebuilt whenever either stop list is imported. Has no foreign keys so
+    that the GTFS tables can be swapped in underneath it.
+    """
+
+    __tablename__ = "tram_luas_gtfs_stops"
+    __table_args__: ClassVar[dict] = {"schema": DB_SCHEMA}
+
+    luas_stop_id: Mapped[str] = mapped_column(String, primary_key=True)
+    gtfs_stop_id: Mapped[str] = mapped_column(String, primary_key=True)
+
+
 class TramDelayHistory(Base):
     """Historical record of a detected tram delay, persisted each data handler cycle."""
 
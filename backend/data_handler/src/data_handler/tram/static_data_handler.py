@@ -1,11 +1,28 @@
 import logging
-from pathlib import Path
-
-from sqlalchemy import delete
-
-from data_handler.common.gtfs_parsing_utils import parse_gtfs_date, parse_gtfs_time
-from data_handler.csv_utils import read_csv_file
+from collections.abc import Callable, Iterator
+from functools import partial
+
+from sqlalchemy import Table
+from sqlalchemy.orm import DeclarativeBase, Session
+
+from data_handler.bulk_load import copy_rows, model_to_row
+from data_handler.common.gtfs_incremental import apply_row_diffs
+from data_handler.common.gtfs_parsing_utils import (
+    parse_gtfs_date,
+    parse_gtfs_seconds,
+    parse_gtfs_time,
+)
+from data_handler.common.source_manifests import (
+    FileHashes,
+    changed_files,
+    hash_files,
+    load_manifest,
+    save_manifest,
+)
+from data_handler.csv_utils import DataPath, read_csv_file
 from data_handler.db import SessionLocal
+from data_handler.shadow_tables import ShadowTables
+from data_handler.tram.delay_history_handler import refresh_luas_gtfs_stops
 from data_handler.tram.models import (
     RouteType,
     TramAgency,
@@ -24,6 +41,8 @@ from data_handler.tram.models import (
 
 logger = logging.getLogger(__name__)
 
+_GTFS_FEED = "tram"
+
 
 # ── Helpers ─────────────────────────────────────────────────────────
 
@@ -138,6 +157,8 @@ def parse_stop_time_row(row: dict[str, str]) -> TramStopTime:
         stop_id=row["stop_id"],
         arrival_time=parse_gtfs_time(row["arrival_time"]),
         departure_time=parse_gtfs_time(row["departure_time"]),
+        arrival_seconds=parse_gtfs_seconds(row["arrival_time"]),
+        departure_seconds=parse_gtfs_seconds(row["departure_time"]),
         sequence=int(row["stop_sequence"]),
         headsign=headsign.strip() if headsign and headsign.strip() else None,
     )
@@ -208,11 +229,16 @@ def parse_weekly_flow_row(row: dict[str, str]) -> TramWeeklyFlow:
 
 
 def _get_gtfs_csv_files() -> dict:
-    """Return required GTFS file definitions (filename → headers, parser)."""
+    """
+    Return required GTFS file definitions (filename → headers, parser, model).
+
+    Files are listed in FK dependency order, so stop_times comes after trips and stops.
+    """
     return {
         "agency.txt": (
             ["agency_id", "agency_name", "agency_url", "agency_timezone"],
             parse_agency_row,
+            TramAgency,
         ),
         "calendar.txt": (
             [
@@ -228,10 +254,17 @@ def _get_gtfs_csv_files() -> dict:
                 "end_date",
             ],
             parse_calendar_row,
+            TramCalendarSchedule,
         ),
         "routes.txt": (
             ["route_id", "agency_id", "route_short_name", "route_long_name"],
             parse_route_row,
+            TramRoute,
+        ),
+        "stops.txt": (
+            ["stop_id", "stop_code", "stop_name", "stop_lat", "stop_lon"],
+            parse_stop_row,
+            TramStop,
         ),
         "shapes.txt": (
             [
@@ -242,14 +275,7 @@ def _get_gtfs_csv_files() -> dict:
                 "shape_dist_traveled",
             ],
             parse_shape_row,
-        ),
-        "stop_times.txt": (
-            ["trip_id", "arrival_time", "departure_time", "stop_id", "stop_sequence"],
-            parse_stop_time_row,
-        ),
-        "stops.txt": (
-            ["stop_id", "stop_code", "stop_name", "stop_lat", "stop_lon"],
-            parse_stop_row,
+            TramTripShape,
         ),
         "trips.txt": (
             [
@@ -262,6 +288,12 @@ def _get_gtfs_csv_files() -> dict:
                 "shape_id",
             ],
             parse_trip_row,
+            TramTrip,
+        ),
+        "stop_times.txt": (
+            ["trip_id", "arrival_time", "departure_time", "stop_id", "stop_sequence"],
+            parse_stop_time_row,
+            TramStopTime,
         ),
     }
 
@@ -272,12 +304,13 @@ def _get_optional_gtfs_files() -> dict:
         "calendar_dates.txt": (
             ["service_id", "date", "exception_type"],
             parse_calendar_date_row,
+            TramCalendarDate,
         ),
     }
 
 
 def _get_cso_csv_files() -> dict:
-    """Return CSO dataset file definitions (downloaded from data.gov.ie)."""
+    """Return CSO dataset file definitions (filename → headers, parser, model)."""
     return {
         "TII03.csv": (
             [
@@ -291,6 +324,7 @@ def _get_cso_csv_files() -> dict:
                 "VALUE",
             ],
             parse_passenger_journey_row,
+            TramPassengerJourney,
         ),
         "TOA11.csv": (
             [
@@ -304,6 +338,7 @@ def _get_cso_csv_files() -> dict:
                 "VALUE",
             ],
             parse_passenger_number_row,
+            TramPassengerNumber,
         ),
         "TOA09.csv": (
             [
@@ -319,6 +354,7 @@ def _get_cso_csv_files() -> dict:
                 "VALUE",
             ],
             parse_hourly_distribution_row,
+            TramHourlyDistribution,
         ),
         "TOA02.csv": (
             [
@@ -332,49 +368,58 @@ def _get_cso_csv_files() -> dict:
                 "VALUE",
             ],
             parse_weekly_flow_row,
+            TramWeeklyFlow,
         ),
     }
 
 
-def _delete_all_tram_data(session: object) -> None:
-    """Delete all existing tram data in reverse dependency order."""
-    logger.info("Deleting existing tram data...")
-    # CSO tables (no FK dependencies)
-    session.execute(delete(TramWeeklyFlow))
-    session.execute(delete(TramHourlyDistribution))
-    session.execute(delete(TramPassengerNumber))
-    session.execute(delete(TramPassengerJourney))
-    # GTFS tables (reverse FK order)
-    session.execute(delete(TramStopTime))
-    session.execute(delete(TramTrip))
-    session.execute(delete(TramTripShape))
-    session.execute(delete(TramRoute))
-    session.execute(delete(TramStop))
-    session.execute(delete(TramCalendarDate))
-    session.execute(delete(TramCalendarSchedule))
-    session.execute(delete(TramAgency))
+# ── Main Processor ──────────────────────────────────────────────────
 
 
-# ── Main Processor ──────────────────────────────────────────────────
+def _read_rows(
+    file_path: DataPath | None,
+    required_headers: list[str],
+    transform_row: Callable[[dict[str, str]], DeclarativeBase],
+) -> Iterator[dict[str, object]]:
+    """Yield a CSV file's parsed rows as column dicts; nothing if it is missing."""
+    if file_path is None or not file_path.exists():
+        return
+    for row in read_csv_file(file_path, required_headers):
+        yield model_to_row(transform_row(row))
+
+
+def _copy_csv_file(
+    session: Session,
+    file_path: DataPath,
+    required_headers: list[str],
+    transform_row: Callable[[dict[str, str]], DeclarativeBase],
+    table: Table,
+) -> None:
+    """Stream one CSV file into its (empty) shadow table with COPY."""
+    total = copy_rows(
+        session, table, _read_rows(file_path, required_headers, transform_row)
+    )
+    logger.info("  → %d rows from %s", total, file_path.name)
 
 
 def _process_cso_data(
-    session: object, cso_dir: Path | None, cso_csv_files: dict
+    session: Session,
+    cso_dir: DataPath | None,
+    cso_csv_files: dict,
+    shadow: ShadowTables,
 ) -> None:
     """Process optional CSO dataset files if a directory is provided."""
     if cso_dir is None:
         logger.info("No CSO data directory provided, skipping CSO datasets.")
         return
 
-    for filename, (required_headers, transform_row) in cso_csv_files.items():
+    for filename, (required_headers, transform_row, model) in cso_csv_files.items():
         file_path = cso_dir / filename
         if file_path.exists():
             logger.info("Processing CSO dataset %s...", filename)
-            rows = [
-                transform_row(row) for row in read_csv_file(file_path, required_headers)
-            ]
-            session.add_all(rows)
-            logger.info("Loaded %d rows from %s.", len(rows), filename)
+            _copy_csv_file(
+                session, file_path, required_headers, transform_row, shadow[model]
+            )
         else:
             logger.info(
                 "Skipping optional CSO dataset %s (not found). "
@@ -384,7 +429,9 @@ def _process_cso_data(
             )
 
 
-def process_tram_static_data(gtfs_dir: Path, cso_dir: Path | None = None) -> None:
+def process_tram_static_data(
+    gtfs_dir: DataPath, cso_dir: DataPath | None = None
+) -> None:
     """
     Process tram data from GTFS CSV files and CSO dataset CSV files.
 
@@ -396,14 +443,21 @@ def process_tram_static_data(gtfs_dir: Path, cso_dir: Path | None = None) -> Non
       cso_dir (optional) containing:
         CSO files: TII03.csv, TOA11.csv, TOA09.csv, TOA02.csv
 
-    This function:
-    1. Deletes all existing data from relevant tables
-    2. Reads data from CSV files
-    3. Inserts the data into the database
-    4. All operations happen within a single transaction
+    Files are hashed and compared with the manifest of the last import:
+    - If no file changed, nothing is written.
+    - If a previous import exists, only the changed files are applied, in one
+      transaction: GTFS files are diffed against the live tables by natural
+      key and CSO tables are replaced (see ``apply_row_diffs``).
+    - Otherwise all files are streamed with COPY into empty shadow tables,
+      which are then swapped in for the live ones in one short transaction,
+      keeping the replaced tables for one cycle (see ``ShadowTables``).
+
+    CSO files count as missing when ``cso_dir`` is None, so their tables end
+    up empty.
 
     Args:
-        gtfs_dir: Path to the directory containing GTFS CSV files.
+        gtfs_dir: Path to the directory containing GTFS CSV files, on disk or
+                  the root of an opened GTFS ZIP archive.
         cso_dir: Optional path to the directory containing CSO CSV files.
                  If None, CSO data processing is skipped.
 
@@ -423,38 +477,37 @@ def process_tram_static_data(gtfs_dir: Path, cso_dir: Path | None = None) -> Non
 
     logger.info("Processing static tram data from %s ...", gtfs_dir)
 
+    gtfs_files = gtfs_csv_files | optional_gtfs_files
+    hashes = hash_files(gtfs_dir, gtfs_files) | hash_files(cso_dir, cso_csv_files)
     session = SessionLocal()
 
     try:
-        _delete_all_tram_data(session)
-
-        # Process required GTFS files
-        for filename, (required_headers, transform_row) in gtfs_csv_files.items():
-            logger.info("Processing %s...", filename)
-            file_path = gtfs_dir / filename
-            rows = [
-                transform_row(row) for row in read_csv_file(file_path, required_headers)
-            ]
-            session.add_all(rows)
-
-        # Process optional GTFS files
-        for filename, (required_headers, transform_row) in optional_gtfs_files.items():
-            file_path = gtfs_dir / filename
-            if file_path.exists():
-                logger.info("Processing optional %s...", filename)
-                rows = [
-                    transform_row(row)
-                    for row in read_csv_file(file_path, required_headers)
-                ]
-                session.add_all(rows)
-            else:
-                logger.info("Skipping optional %s (not found).", filename)
-
-        # Process optional CSO dataset files
-        _process_cso_data(session, cso_dir, cso_csv_files)
-
-        logger.info("Committing changes to database...")
-        session.commit()
+        manifest = load_manifest(session, _GTFS_FEED)
+        changed = changed_files(manifest, hashes)
+        if not changed:
+            logger.info(
+                "Tram GTFS and CSO files unchanged since last import, skipping."
+            )
+            return
+
+        if manifest:
+            # Diff only the changed files against the live tables, in one transaction
+            logger.info("Applying changes from %s...", ", ".join(changed))
+            all_files = gtfs_files | cso_csv_files
+            changes = []
+            for filename in changed:
+                required_headers, transform_row, model = all_files[filename]
+                directory = gtfs_dir if filename in gtfs_files else cso_dir
+                file_path = directory / filename if directory is not None else None
+                rows = _read_rows(file_path, required_headers, transform_row)
+                changes.append((filename, model, rows))
+            apply_row_diffs(session, changes)
+            _finish_import(session, hashes)
+            session.commit()
+        else:
+            _reload_all(
+                session, gtfs_dir, cso_dir, partial(_finish_import, hashes=hashes)
+            )
         logger.info("Static tram data import complete.")
 
     except Exception:
@@ -464,3 +517,66 @@ def process_tram_static_data(gtfs_dir: Path, cso_dir: Path | None = None) -> Non
 
     finally:
         session.close()
+
+
+def _finish_import(session: Session, hashes: FileHashes) -> None:
+    """Rematch Luas stops to the new GTFS stops and record the imported files."""
+    refresh_luas_gtfs_stops(session)
+    save_manifest(session, _GTFS_FEED, hashes)
+
+
+def _reload_all(
+    session: Session,
+    gtfs_dir: DataPath,
+    cso_dir: DataPath | None,
+    on_swap: Callable[[Session], None],
+) -> None:
+    """
+    Load every file into shadow tables and swap them in for the live ones.
+
+    ``on_swap`` runs in the swap's transaction, so the manifest is only saved
+    together with the tables it describes.
+    """
+    gtfs_csv_files = _get_gtfs_csv_files()
+    optional_gtfs_files = _get_optional_gtfs_files()
+    cso_csv_files = _get_cso_csv_files()
+    shadow = ShadowTables(
+        [
+            model
+            for files in (gtfs_csv_files, optional_gtfs_files, cso_csv_files)
+            for _, _, model in files.values()
+        ]
+    )
+
+    # Load into empty shadow tables; readers keep the live ones until the swap
+    shadow.create(session)
+
+    # Process required GTFS files
+    for filename, (required_headers, transform_row, model) in gtfs_csv_files.items():
+        logger.info("Processing %s...", filename)
+        file_path = gtfs_dir / filename
+        _copy_csv_file(
+            session, file_path, required_headers, transform_row, shadow[model]
+        )
+
+    # Process optional GTFS files
+    for filename, (
+        required_headers,
+        transform_row,
+        model,
+    ) in optional_gtfs_files.items():
+        file_path = gtfs_dir / filename
+        if file_path.exists():
+            logger.info("Processing optional %s...", filename)
+            _copy_csv_file(
+                session, file_path, required_headers, transform_row, shadow[model]
+            )
+        else:
+            logger.info("Skipping optional %s (not found).", filename)
+
+    # Process optional CSO dataset files
+    _process_cso_data(session, cso_dir, cso_csv_files, shadow)
+
+    logger.info("Committing changes to database...")
+    session.commit()
+    shadow.swap(session, on_swap)
@@ -1,15 +1,25 @@
+import io
 import logging
 import shutil
-import tempfile
 import zipfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http import HTTPStatus
 from pathlib import Path
 
 import gdown
 import requests
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from data_handler.common.models import HttpCacheValidator
+from data_handler.db import SessionLocal
 
 logger = logging.getLogger(__name__)
 
 _DOWNLOAD_TIMEOUT = 300  # seconds
+_ZIP_CHUNK_SIZE = 1 << 20  # 1 MiB
 
 
 def download_file(url: str, dest_path: str) -> None:
@@ -31,36 +41,115 @@ def download_file(url: str, dest_path: str) -> None:
     logger.info("  + %s", dest.name)
 
 
-def download_and_extract_zip(url: str, extract_dir: str) -> str:
+@dataclass(frozen=True)
+class CacheValidators:
+    """HTTP validators identifying the version of a downloaded resource."""
+
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def request_headers(self) -> dict[str, str]:
+        """Return the conditional GET headers for these validators."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def download_zip(
+    url: str, validators: CacheValidators | None = None
+) -> tuple[zipfile.ZipFile, CacheValidators] | None:
     """
-    Downloads a ZIP file from a URL and extracts its contents into a local directory.
+    Downloads a ZIP file into memory, without touching the disk.
 
     Args:
         url: URL of the ZIP file to download
-        extract_dir: Directory to extract the ZIP contents into
+        validators: Validators of the previously downloaded version, if any.
+            They are sent as a conditional GET.
 
     Returns:
-        Path to the extract directory
+        The opened archive and the response's validators, or None if the
+        server reports the file unchanged since ``validators``.
     """
-    Path(extract_dir).mkdir(parents=True, exist_ok=True)
-
+    headers = validators.request_headers() if validators is not None else {}
     logger.info("Downloading %s ...", url)
-    response = requests.get(url, stream=True, timeout=_DOWNLOAD_TIMEOUT)
+    response = requests.get(
+        url, headers=headers, stream=True, timeout=_DOWNLOAD_TIMEOUT
+    )
+    if response.status_code == HTTPStatus.NOT_MODIFIED:
+        logger.info("  %s not modified since last download", url)
+        return None
     response.raise_for_status()
 
-    with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as tmp:
-        tmp.writelines(response.iter_content(chunk_size=8192))
-        tmp_path = tmp.name
+    # ZIP archives are read from the central directory at the end, so the
+    # whole body is needed before any member can be opened.
+    buffer = io.BytesIO()
+    for chunk in response.iter_content(chunk_size=_ZIP_CHUNK_SIZE):
+        buffer.write(chunk)
+    archive = zipfile.ZipFile(buffer)
+    logger.info("  + %d file(s), %.1f MB", len(archive.namelist()), buffer.tell() / 1e6)
+    return archive, CacheValidators(
+        response.headers.get("ETag"), response.headers.get("Last-Modified")
+    )
+
+
+@contextmanager
+def open_remote_zip(
+    url: str, *, conditional: bool = True
+) -> Iterator[zipfile.Path | None]:
+    """
+    Downloads a ZIP file into memory and yields the root of the archive.
 
-    tmp_file = Path(tmp_path)
-    try:
-        with zipfile.ZipFile(tmp_path) as zf:
-            zf.extractall(extract_dir)
-            logger.info("Extracted %d file(s) to %s", len(zf.namelist()), extract_dir)
-    finally:
-        tmp_file.unlink()
+    Members are read straight from memory, e.g. ``read_csv_file(root / "stops.txt")``.
+    With ``conditional``, the validators stored after the last successful
+    download of ``url`` are sent, and None is yielded if the file is
+    unchanged. The new validators are stored only once the ``with`` block
+    exits without an exception, so a failed import is retried next time.
 
-    return extract_dir
+    Args:
+        url: URL of the ZIP file to download
+        conditional: Whether to skip the download if the file is unchanged
+    """
+    validators = _load_validators(url) if conditional else None
+    result = download_zip(url, validators)
+    if result is None:
+        yield None
+        return
+
+    archive, new_validators = result
+    with archive:
+        yield zipfile.Path(archive)
+    _save_validators(url, new_validators)
+
+
+def _load_validators(url: str) -> CacheValidators | None:
+    with SessionLocal() as session:
+        row = session.execute(
+            select(HttpCacheValidator.etag, HttpCacheValidator.last_modified).where(
+                HttpCacheValidator.url == url
+            )
+        ).one_or_none()
+    return CacheValidators(*row) if row is not None else None
+
+
+def _save_validators(url: str, validators: CacheValidators) -> None:
+    stmt = pg_insert(HttpCacheValidator).values(
+        url=url, etag=validators.etag, last_modified=validators.last_modified
+    )
+    with SessionLocal() as session:
+        session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["url"],
+                set_={
+                    "etag": stmt.excluded.etag,
+                    "last_modified": stmt.excluded.last_modified,
+                    "updated_at": func.now(),
+                },
+            )
+        )
+        session.commit()
 
 
 def download_google_drive_folder(folder_id: str, download_dir: str) -> str:
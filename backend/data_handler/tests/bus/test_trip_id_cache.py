@@ -0,0 +1,54 @@
+from unittest.mock import Mock
+
+from data_handler.bus.trip_id_cache import TripIdCache
+
+
+def _session_with_trips(trip_ids: set[str]) -> Mock:
+    """Mock session whose scalars() answers IN (...) lookups from trip_ids."""
+    session = Mock()
+
+    def scalars(stmt: object) -> list[str]:
+        requested = stmt.whereclause.right.value  # type: ignore[attr-defined]
+        return [t for t in requested if t in trip_ids]
+
+    session.scalars.side_effect = scalars
+    return session
+
+
+def test_filter_known_returns_only_existing_trips() -> None:
+    cache = TripIdCache()
+    session = _session_with_trips({"A", "B"})
+
+    assert cache.filter_known(session, ["A", "B", "X"]) == {"A", "B"}
+
+
+def test_repeat_lookups_are_served_from_memory() -> None:
+    cache = TripIdCache()
+    session = _session_with_trips({"A", "B"})
+
+    cache.filter_known(session, ["A", "X"])
+    cache.filter_known(session, ["A", "X"])
+
+    session.scalars.assert_called_once()
+
+
+def test_only_new_ids_are_queried() -> None:
+    cache = TripIdCache()
+    session = _session_with_trips({"A", "B"})
+
+    cache.filter_known(session, ["A"])
+    assert cache.filter_known(session, ["A", "B"]) == {"A", "B"}
+
+    second_call = session.scalars.call_args_list[1].args[0]
+    assert second_call.whereclause.right.value == ["B"]
+
+
+def test_invalidate_forgets_unknown_ids_and_bumps_version() -> None:
+    cache = TripIdCache()
+    cache.filter_known(_session_with_trips(set()), ["NEW"])
+
+    cache.invalidate()
+
+    assert cache.version == 1
+    assert len(cache) == 0
+    assert cache.filter_known(_session_with_trips({"NEW"}), ["NEW"]) == {"NEW"}
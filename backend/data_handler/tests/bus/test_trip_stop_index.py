@@ -0,0 +1,70 @@
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from data_handler.bus.trip_stop_index import TripStopIndex, haversine_km
+
+# (trip_id, stop_id, sequence, lat, lon), ordered by trip_id, sequence
+_ROWS = [
+    ("T1", "S1", 1, 53.34889, -6.25683),
+    ("T1", "S2", 2, 53.35200, -6.25000),
+    ("T1", "S3", 3, 53.36034, -6.23954),
+    ("T2", "S9", 1, 53.30000, -6.30000),
+    ("T2", "S8", 2, 53.31000, -6.29000),
+]
+
+
+def _loaded_index(rows: list[tuple] = _ROWS) -> tuple[TripStopIndex, Mock]:
+    session = Mock()
+    session.execute.return_value.all.return_value = rows
+    index = TripStopIndex()
+    index.load(session, {r[0] for r in rows} | {"EMPTY"})
+    return index, session
+
+
+def test_haversine_matches_known_distance() -> None:
+    # Dublin Spire → Heuston Station is roughly 2.3 km
+    dist = haversine_km(53.34981, -6.26031, 53.34646, -6.29366)
+    assert dist == pytest.approx(2.24, abs=0.05)
+
+
+def test_load_splits_rows_per_trip() -> None:
+    index, _ = _loaded_index()
+
+    assert len(index) == 2
+    t1 = index.get("T1")
+    assert t1 is not None
+    assert list(t1.stop_ids) == ["S1", "S2", "S3"]
+    assert list(t1.sequences) == [1, 2, 3]
+    assert index.get("EMPTY") is None
+
+
+def test_load_skips_cached_and_known_empty_trips() -> None:
+    index, session = _loaded_index()
+
+    index.load(session, ["T1", "T2", "EMPTY"])
+
+    session.execute.assert_called_once()
+
+
+def test_nearest_stops_vectorised_over_vehicles() -> None:
+    index, _ = _loaded_index()
+
+    stop_ids, sequences, totals = index.nearest_stops(
+        ["T1", "T2", "T1", "UNKNOWN"],
+        np.array([53.3635788, 53.3101, 53.34889, 53.0]),
+        np.array([-6.23394823, -6.2899, -6.25683, -6.0]),
+    )
+
+    assert list(stop_ids) == ["S3", "S8", "S1", None]
+    assert list(sequences) == [3, 2, 1, -1]
+    assert list(totals) == [3, 2, 3, 0]
+
+
+def test_clear_empties_index() -> None:
+    index, _ = _loaded_index()
+
+    index.clear()
+
+    assert len(index) == 0
@@ -0,0 +1,145 @@
+from datetime import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from data_handler.bulk_load import copy_rows
+from data_handler.bus.models import BusAgency, BusTripShape
+from data_handler.common.gtfs_incremental import apply_row_diffs
+from data_handler.tram.models import (
+    TramAgency,
+    TramRoute,
+    TramStop,
+    TramStopTime,
+    TramTrip,
+)
+from tests.utils import assert_row_count
+
+
+def _agency(agency_id: int, name: str) -> dict[str, object]:
+    return {
+        "id": agency_id,
+        "name": name,
+        "url": "https://example.com",
+        "timezone": "Europe/Dublin",
+    }
+
+
+def _shape_point(shape_id: str, sequence: int) -> dict[str, object]:
+    return {
+        "shape_id": shape_id,
+        "pt_sequence": sequence,
+        "pt_lat": 53.35,
+        "pt_lon": -6.26,
+        "dist_traveled": float(sequence),
+    }
+
+
+def _trip(trip_id: str) -> dict[str, object]:
+    return {
+        "id": trip_id,
+        "route_id": "R1",
+        "service_id": 1,
+        "headsign": "Broombridge",
+        "short_name": "G",
+        "direction_id": 0,
+        "shape_id": "S1",
+    }
+
+
+def _stop_time(trip_id: str) -> dict[str, object]:
+    return {
+        "trip_id": trip_id,
+        "stop_id": "ST1",
+        "arrival_time": time(8, 0),
+        "departure_time": time(8, 0),
+        "arrival_seconds": 8 * 3600,
+        "departure_seconds": 8 * 3600,
+        "sequence": 1,
+    }
+
+
+class TestApplyRowDiffs:
+    """Integration tests for apply_row_diffs."""
+
+    def test_keyed_file_is_merged_and_pruned(self, db_session: Session) -> None:
+        apply_row_diffs(
+            db_session,
+            [("shapes.txt", BusTripShape, [_shape_point("S1", i) for i in range(3)])],
+        )
+        db_session.commit()
+        ids_before = dict(
+            db_session.execute(
+                select(BusTripShape.pt_sequence, BusTripShape.entry_id)
+            ).all()
+        )
+
+        changed = _shape_point("S1", 1) | {"pt_lat": 53.0}
+        apply_row_diffs(
+            db_session,
+            [
+                (
+                    "shapes.txt",
+                    BusTripShape,
+                    [_shape_point("S1", 0), changed, _shape_point("S1", 3)],
+                )
+            ],
+        )
+        db_session.commit()
+
+        rows = db_session.execute(
+            select(BusTripShape.pt_sequence, BusTripShape.entry_id, BusTripShape.pt_lat)
+        ).all()
+        lats = {sequence: lat for sequence, _, lat in rows}
+        assert lats == {0: 53.35, 1: 53.0, 3: 53.35}
+        # Unchanged and updated rows keep their identity
+        entry_ids = {sequence: entry_id for sequence, entry_id, _ in rows}
+        assert entry_ids[0] == ids_before[0]
+        assert entry_ids[1] == ids_before[1]
+
+    def test_delete_missing_limits_deletes(self, db_session: Session) -> None:
+        apply_row_diffs(
+            db_session, [("agency.txt", BusAgency, [_agency(1, "A"), _agency(2, "B")])]
+        )
+
+        apply_row_diffs(
+            db_session,
+            [("agency.txt", BusAgency, [_agency(2, "B2")])],
+            delete_missing=set(),
+        )
+        db_session.commit()
+
+        names = dict(db_session.execute(select(BusAgency.id, BusAgency.name)).all())
+        assert names == {1: "A", 2: "B2"}
+
+    def test_unkeyed_file_is_replaced(self, db_session: Session) -> None:
+        apply_row_diffs(db_session, [("TII03.csv", BusAgency, [_agency(1, "A")])])
+
+        apply_row_diffs(db_session, [("TII03.csv", BusAgency, [_agency(2, "B")])])
+        db_session.commit()
+
+        assert_row_count(db_session, "bus_agencies", 1)
+        assert db_session.scalar(select(BusAgency.id)) == 2
+
+    def test_removed_trip_takes_its_stop_times(self, db_session: Session) -> None:
+        copy_rows(db_session, TramAgency, [_agency(1, "Luas")])
+        copy_rows(
+            db_session,
+            TramRoute,
+            [{"id": "R1", "agency_id": 1, "short_name": "G", "long_name": "Green"}],
+        )
+        copy_rows(
+            db_session,
+            TramStop,
+            [{"id": "ST1", "code": 1, "name": "Stop", "lat": 53.35, "lon": -6.26}],
+        )
+        copy_rows(db_session, TramTrip, [_trip("T1"), _trip("T2")])
+        copy_rows(db_session, TramStopTime, [_stop_time("T1"), _stop_time("T2")])
+        db_session.commit()
+
+        # Only trips.txt changed; stop_times.txt is not part of the diff
+        apply_row_diffs(db_session, [("trips.txt", TramTrip, [_trip("T1")])])
+        db_session.commit()
+
+        assert list(db_session.scalars(select(TramTrip.id))) == ["T1"]
+        assert list(db_session.scalars(select(TramStopTime.trip_id))) == ["T1"]
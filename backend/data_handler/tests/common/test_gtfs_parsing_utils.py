@@ -2,7 +2,11 @@ from datetime import date, time
 
 import pytest
 
-from data_handler.common.gtfs_parsing_utils import parse_gtfs_date, parse_gtfs_time
+from data_handler.common.gtfs_parsing_utils import (
+    parse_gtfs_date,
+    parse_gtfs_seconds,
+    parse_gtfs_time,
+)
 
 
 class TestParseGtfsDate:
@@ -176,3 +180,24 @@ class TestParseGtfsTime:
         """Seconds 60 raise ValueError (invalid time)."""
         with pytest.raises(ValueError):
             parse_gtfs_time("07:30:60")
+
+
+class TestParseGtfsSeconds:
+    """Tests for parse_gtfs_seconds."""
+
+    def test_valid_full_time(self) -> None:
+        assert parse_gtfs_seconds("07:20:05") == 7 * 3600 + 20 * 60 + 5
+
+    def test_valid_hh_mm_only(self) -> None:
+        assert parse_gtfs_seconds(" 12:30 ") == 12 * 3600 + 30 * 60
+
+    def test_hours_over_24_are_kept(self) -> None:
+        """Times past midnight sort after the service day's last times."""
+        assert parse_gtfs_seconds("25:10:00") == 25 * 3600 + 10 * 60
+        assert parse_gtfs_seconds("48:00:00") == 48 * 3600
+        assert parse_gtfs_seconds("24:00:00") > parse_gtfs_seconds("23:59:59")
+
+    @pytest.mark.parametrize("value", ["072000", "", "ab:30:00", "25:60:00"])
+    def test_rejects_invalid_times(self, value: str) -> None:
+        with pytest.raises(ValueError):
+            parse_gtfs_seconds(value)
@@ -0,0 +1,204 @@
+"""Tests for the bounded-concurrency HTTP fetcher."""
+
+import logging
+import threading
+import time
+from collections.abc import Generator, Iterator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from data_handler.common.http_fetcher import (
+    ConcurrentFetcher,
+    HostRateLimiter,
+    log_failures,
+)
+
+_STUB_LATENCY = 0.2  # seconds injected into every stub response
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    """Responds with the request path after a fixed delay; /fail returns 503."""
+
+    def do_GET(self) -> None:
+        time.sleep(_STUB_LATENCY)
+        status = 503 if self.path.startswith("/fail") else 200
+        body = self.path.encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        pass
+
+
+class _BarrierHandler(BaseHTTPRequestHandler):
+    """Holds each request until ``barrier`` is full; 503 if it never fills."""
+
+    barrier: threading.Barrier
+
+    def do_GET(self) -> None:
+        try:
+            self.barrier.wait()
+            status = 200
+        except threading.BrokenBarrierError:
+            status = 503
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        pass
+
+
+@contextmanager
+def _serve(handler: type[BaseHTTPRequestHandler]) -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def stub_server() -> Generator[str, None, None]:
+    with _serve(_SlowHandler) as url:
+        yield url
+
+
+class _FakeClock:
+    """Stands in for time.monotonic/time.sleep: sleeping advances the clock."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def fake_clock() -> Iterator[_FakeClock]:
+    clock = _FakeClock()
+    with (
+        patch("data_handler.common.http_fetcher.time.monotonic", clock.monotonic),
+        patch("data_handler.common.http_fetcher.time.sleep", clock.sleep),
+    ):
+        yield clock
+
+
+def _get_text(fetcher: ConcurrentFetcher, url: str) -> str:
+    response = fetcher.session.get(url, timeout=fetcher.call_timeout)
+    response.raise_for_status()
+    return response.text
+
+
+class TestConcurrentFetcher:
+    """Test ConcurrentFetcher against a local stub server with injected latency."""
+
+    def test_returns_result_per_key(self, stub_server: str) -> None:
+        with ConcurrentFetcher(max_workers=4) as fetcher:
+            results = fetcher.map(
+                lambda key: _get_text(fetcher, f"{stub_server}/{key}"), ["a", "b"]
+            )
+
+        assert list(results) == ["a", "b"]
+        assert results["a"].ok
+        assert results["a"].value == "/a"
+        assert results["b"].value == "/b"
+
+    def test_partial_failures_are_reported_per_key(self, stub_server: str) -> None:
+        with ConcurrentFetcher(max_workers=4) as fetcher:
+            results = fetcher.map(
+                lambda key: _get_text(fetcher, f"{stub_server}/{key}"),
+                ["ok1", "fail", "ok2"],
+            )
+
+        assert results["ok1"].ok
+        assert results["ok2"].ok
+        assert not results["fail"].ok
+        assert "503" in str(results["fail"].error)
+
+    def test_batch_deadline_marks_stragglers_as_timed_out(
+        self, stub_server: str
+    ) -> None:
+        with ConcurrentFetcher(max_workers=1, deadline=0.05) as fetcher:
+            results = fetcher.map(
+                lambda key: _get_text(fetcher, f"{stub_server}/{key}"), ["a", "b"]
+            )
+
+        assert isinstance(results["b"].error, TimeoutError)
+
+    def test_no_deadline_waits_for_every_call(self, stub_server: str) -> None:
+        with ConcurrentFetcher(max_workers=1, deadline=None) as fetcher:
+            results = fetcher.map(
+                lambda key: _get_text(fetcher, f"{stub_server}/{key}"), ["a", "b"]
+            )
+
+        assert results["a"].ok
+        assert results["b"].ok
+
+    def test_empty_keys_returns_empty_dict(self) -> None:
+        with ConcurrentFetcher() as fetcher:
+            assert fetcher.map(lambda key: key, []) == {}
+
+    def test_calls_overlap_up_to_max_workers(self) -> None:
+        """Every request waits for 8 to be in flight, so they must overlap."""
+        _BarrierHandler.barrier = threading.Barrier(8, timeout=5)
+        keys = [f"s{i}" for i in range(16)]
+
+        with (
+            _serve(_BarrierHandler) as url,
+            ConcurrentFetcher(max_workers=8, max_requests_per_second=1000.0) as fetcher,
+        ):
+            results = fetcher.map(lambda key: _get_text(fetcher, f"{url}/{key}"), keys)
+
+        assert all(r.ok for r in results.values())
+
+
+class TestHostRateLimiter:
+    """Test per-host request spacing."""
+
+    def test_spaces_requests_to_same_host(self, fake_clock: _FakeClock) -> None:
+        limiter = HostRateLimiter(max_per_second=20.0)
+
+        for _ in range(5):
+            limiter.acquire("http://example.com/a")
+
+        # 5 slots, 50 ms apart: the first is immediate, the last 200 ms in.
+        assert fake_clock.sleeps == pytest.approx([0.05] * 4)
+        assert fake_clock.now == pytest.approx(0.2)
+
+    def test_hosts_are_limited_independently(self, fake_clock: _FakeClock) -> None:
+        limiter = HostRateLimiter(max_per_second=1.0)
+
+        limiter.acquire("http://a.example.com/x")
+        limiter.acquire("http://b.example.com/x")
+
+        assert fake_clock.sleeps == []
+
+    def test_rejects_non_positive_rate(self) -> None:
+        with pytest.raises(ValueError):
+            HostRateLimiter(max_per_second=0)
+
+
+class TestLogFailures:
+    """Test failure reporting helper."""
+
+    def test_returns_failed_keys(self) -> None:
+        with ConcurrentFetcher() as fetcher:
+            results = fetcher.map(lambda key: 1 / key, [1, 0])
+
+        failed = log_failures(results, "numbers", logging.getLogger(__name__))
+
+        assert failed == [0]
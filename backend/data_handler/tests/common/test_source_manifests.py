@@ -0,0 +1,58 @@
+from pathlib import Path
+
+from sqlalchemy.orm import Session
+
+from data_handler.common.source_manifests import (
+    changed_files,
+    hash_files,
+    load_manifest,
+    save_manifest,
+)
+
+
+class TestFileHashes:
+    """Test hashing source files and comparing them with a manifest."""
+
+    def test_hash_files_maps_missing_files_to_none(self, tmp_path: Path) -> None:
+        (tmp_path / "stops.txt").write_text("stop_id\n1\n")
+
+        hashes = hash_files(tmp_path, ["stops.txt", "calendar_dates.txt"])
+
+        assert len(hashes["stops.txt"]) == 64
+        assert hashes["calendar_dates.txt"] is None
+
+    def test_hash_files_without_directory(self) -> None:
+        assert hash_files(None, ["TII03.csv"]) == {"TII03.csv": None}
+
+    def test_changed_files_keeps_hash_order(self) -> None:
+        manifest = {"agency.txt": "a", "stops.txt": "s", "trips.txt": "t"}
+        hashes = {
+            "agency.txt": "a",
+            "stops.txt": "s2",
+            "trips.txt": None,
+            "calendar_dates.txt": "c",
+        }
+
+        assert changed_files(manifest, hashes) == [
+            "stops.txt",
+            "trips.txt",
+            "calendar_dates.txt",
+        ]
+
+    def test_missing_file_absent_from_manifest_is_unchanged(self) -> None:
+        assert changed_files({}, {"calendar_dates.txt": None}) == []
+
+
+class TestManifest:
+    """Integration tests for the stored file manifest."""
+
+    def test_save_replaces_previous_manifest(self, db_session: Session) -> None:
+        save_manifest(db_session, "bus", {"agency.txt": "a", "stops.txt": "s"})
+        save_manifest(db_session, "train", {"agency.txt": "x"})
+        db_session.commit()
+
+        save_manifest(db_session, "bus", {"agency.txt": "a2", "stops.txt": None})
+        db_session.commit()
+
+        assert load_manifest(db_session, "bus") == {"agency.txt": "a2"}
+        assert load_manifest(db_session, "train") == {"agency.txt": "x"}
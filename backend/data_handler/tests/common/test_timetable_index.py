@@ -0,0 +1,191 @@
+"""Tests for the per-stop timetable index."""
+
+from datetime import date, time
+from unittest.mock import Mock, patch
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from data_handler.common.gtfs_parsing_utils import SECONDS_PER_DAY
+from data_handler.common.models import SourceFileManifest
+from data_handler.common.timetable_index import (
+    TimetableFeed,
+    TimetableIndex,
+    active_service_ids,
+    build_timetable_index,
+    get_timetable_index,
+)
+from data_handler.tram.models import (
+    TramAgency,
+    TramCalendarDate,
+    TramCalendarSchedule,
+    TramRoute,
+    TramStop,
+    TramStopTime,
+    TramTrip,
+)
+
+_FEED = TimetableFeed(
+    name="tram",
+    stop_time=TramStopTime,
+    trip=TramTrip,
+    calendar=TramCalendarSchedule,
+    calendar_date=TramCalendarDate,
+)
+_MONDAY = date(2025, 6, 16)
+
+
+def _index(arrivals: dict[str, list[int]]) -> TimetableIndex:
+    stop_ids = sorted(arrivals)
+    lengths = [len(arrivals[s]) for s in stop_ids]
+    return TimetableIndex(
+        feed="tram",
+        service_date=_MONDAY,
+        data_version="v1",
+        stop_ids=stop_ids,
+        offsets=np.concatenate(([0], np.cumsum(lengths))).astype(np.int64),
+        arrivals=np.array(
+            [t for s in stop_ids for t in sorted(arrivals[s])], dtype=np.int32
+        ),
+    )
+
+
+# ── TimetableIndex lookups ───────────────────────────────────────────
+
+
+def test_stop_arrivals_returns_each_stops_run() -> None:
+    index = _index({"A": [600, 60], "B": [300]})
+    assert index.stop_arrivals("A").tolist() == [60, 600]
+    assert index.stop_arrivals("B").tolist() == [300]
+    assert index.stop_arrivals("missing").tolist() == []
+
+
+def test_next_arrivals_merges_stops_and_limits_to_k() -> None:
+    index = _index({"A": [100, 400, 700], "B": [200, 500]})
+    assert index.next_arrivals(["A", "B"], after=150, k=3).tolist() == [200, 400, 500]
+    assert index.next_arrivals(["A"], after=400, k=2).tolist() == [400, 700]
+    assert index.next_arrivals(["A", "missing"], after=800).tolist() == []
+
+
+def test_next_arrival_respects_until() -> None:
+    index = _index({"A": [100, 400]})
+    assert index.next_arrival(["A"], after=101) == 400
+    assert index.next_arrival(["A"], after=101, until=399) is None
+    assert index.next_arrival([], after=0) is None
+
+
+# ── build_timetable_index ───────────────────────────────────────────
+
+
+def test_build_includes_previous_days_trips_past_midnight() -> None:
+    arrivals = {
+        _MONDAY: (
+            np.array(["A", "B", "A"], dtype=object),
+            np.array([36_000, 36_300, 86_700]),
+        ),
+        date(2025, 6, 15): (
+            np.array(["A", "B"], dtype=object),
+            np.array([80_000, SECONDS_PER_DAY + 600]),
+        ),
+    }
+    with patch(
+        "data_handler.common.timetable_index._service_day_arrivals",
+        side_effect=lambda _session, _feed, day: arrivals[day],
+    ):
+        index = build_timetable_index(Mock(), _FEED, _MONDAY, "v1")
+
+    assert index.stop_ids == ["A", "B"]
+    assert index.offsets.tolist() == [0, 2, 4]
+    assert index.stop_arrivals("A").tolist() == [36_000, 86_700]
+    assert index.stop_arrivals("B").tolist() == [600, 36_300]
+    assert index.arrivals.dtype == np.int32
+
+
+# ── Integration: calendar and storage ───────────────────────────────
+
+
+def _calendar(
+    service_id: int, *, weekdays: bool, weekend: bool
+) -> TramCalendarSchedule:
+    return TramCalendarSchedule(
+        service_id=service_id,
+        monday=weekdays,
+        tuesday=weekdays,
+        wednesday=weekdays,
+        thursday=weekdays,
+        friday=weekdays,
+        saturday=weekend,
+        sunday=weekend,
+        start_date=date(2025, 1, 1),
+        end_date=date(2025, 12, 31),
+    )
+
+
+def _seed(db_session: Session) -> None:
+    """Weekday service 1 and weekend service 2, one trip each through stop A."""
+    db_session.add(
+        TramAgency(id=1, name="Luas", url="https://luas.ie", timezone="Europe/Dublin")
+    )
+    db_session.add(TramRoute(id="R1", agency_id=1, short_name="G", long_name="Green"))
+    db_session.add(TramStop(id="A", code=1, name="A", lat=53.3, lon=-6.2))
+    db_session.add(_calendar(1, weekdays=True, weekend=False))
+    db_session.add(_calendar(2, weekdays=False, weekend=True))
+    db_session.flush()
+    for service_id, arrival in ((1, time(8, 0)), (2, time(9, 0))):
+        trip_id = f"T{service_id}"
+        db_session.add(
+            TramTrip(
+                id=trip_id,
+                route_id="R1",
+                service_id=service_id,
+                headsign="Broombridge",
+                short_name="G",
+                direction_id=0,
+                shape_id="S1",
+            )
+        )
+        db_session.flush()
+        db_session.add(
+            TramStopTime(
+                trip_id=trip_id,
+                stop_id="A",
+                arrival_time=arrival,
+                departure_time=arrival,
+                arrival_seconds=arrival.hour * 3600 + arrival.minute * 60,
+                departure_seconds=arrival.hour * 3600 + arrival.minute * 60,
+                sequence=1,
+            )
+        )
+    db_session.commit()
+
+
+def test_active_service_ids_apply_calendar_dates(db_session: Session) -> None:
+    _seed(db_session)
+    # A bank holiday Monday runs the weekend service
+    db_session.add(TramCalendarDate(service_id=1, date=_MONDAY, exception_type=2))
+    db_session.add(TramCalendarDate(service_id=2, date=_MONDAY, exception_type=1))
+    db_session.commit()
+
+    assert active_service_ids(db_session, _FEED, _MONDAY) == {2}
+    assert active_service_ids(db_session, _FEED, date(2025, 6, 17)) == {1}
+
+
+def test_get_timetable_index_is_rebuilt_only_when_stale(db_session: Session) -> None:
+    _seed(db_session)
+    db_session.add(SourceFileManifest(source="tram", filename="stops.txt", sha256="0"))
+    db_session.commit()
+
+    index = get_timetable_index(db_session, _FEED, _MONDAY)
+    db_session.commit()
+    assert index.stop_arrivals("A").tolist() == [8 * 3600]
+
+    with patch("data_handler.common.timetable_index.build_timetable_index") as build:
+        stored = get_timetable_index(db_session, _FEED, _MONDAY)
+        build.assert_not_called()
+    assert stored.stop_ids == index.stop_ids
+    assert stored.arrivals.tolist() == index.arrivals.tolist()
+
+    # A new service day, and the weekend trip
+    saturday = get_timetable_index(db_session, _FEED, date(2025, 6, 21))
+    db_session.commit()
+    assert saturday.stop_arrivals("A").tolist() == [9 * 3600]
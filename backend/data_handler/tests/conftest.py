@@ -78,6 +78,7 @@ def db_session(db_engine: Engine) -> Generator[Session, None, None]:
     """
 
     from data_handler.db import Base, SessionLocal  # noqa: PLC0415
+    from data_handler.settings.database_settings import get_db_settings  # noqa: PLC0415
 
     Base.metadata.create_all(bind=db_engine)
 
@@ -85,6 +86,12 @@ def db_session(db_engine: Engine) -> Generator[Session, None, None]:
     yield session
     session.close()
 
+    # Tables kept by shadow-table swaps still use the live schema's enum types
+    schema = get_db_settings().postgres_schema
+    with db_engine.begin() as conn:
+        conn.execute(
+            text(f"DROP SCHEMA IF EXISTS {schema}_shadow, {schema}_previous CASCADE")
+        )
     Base.metadata.drop_all(bind=db_engine)
 
 
@@ -1,14 +1,27 @@
+import io
+import threading
+import time
+from collections.abc import Iterator
 from datetime import UTC, datetime, timedelta, timezone
 from pathlib import Path
+from unittest.mock import MagicMock, Mock, call, patch
 
+import pytest
+import requests
 from sqlalchemy.orm import Session
 
 from data_handler.pedestrians.live_data_handler import (
+    _poll_and_process_batch_result,
     process_batch_job_result,
     process_pedestrian_channel_data,
+    process_pedestrian_live_data,
     process_pedestrian_measures_data,
     process_pedestrian_sites,
 )
+from data_handler.pedestrians.models import (
+    PedestrianCounterMeasure,
+    PedestrianGranularity,
+)
 from tests.utils import ANY, assert_row_count, assert_rows
 
 
@@ -401,6 +414,36 @@ def test_process_pedestrian_measures_data_upsert(
     )
 
 
+def test_process_pedestrian_measures_data_duplicate_row(
+    db_session: Session, tests_data_dir: Path
+) -> None:
+    """A measure repeated within one export is stored once, with its last values."""
+    sites_json_path = tests_data_dir / "pedestrians" / "sites.json"
+    with sites_json_path.open() as f:
+        process_pedestrian_sites(f.read())
+
+    channels_csv_path = tests_data_dir / "pedestrians" / "channels.csv"
+    with channels_csv_path.open(encoding="utf-8") as f:
+        process_pedestrian_channel_data(f)
+
+    measures_csv_path = tests_data_dir / "pedestrians" / "measures.csv"
+    measures = measures_csv_path.read_text(encoding="utf-8")
+    duplicate = '101000425,"REPEATED",2026-02-08T13:00:00Z,2026-02-08T14:00:00Z,42\n'
+    process_pedestrian_measures_data(io.StringIO(measures + duplicate))
+
+    assert_row_count(db_session, "pedestrian_counter_measures", 4)
+    measure = (
+        db_session.query(PedestrianCounterMeasure)
+        .filter_by(
+            channel_id=101000425,
+            start_datetime=datetime(2026, 2, 8, 13, 0, 0, tzinfo=UTC),
+        )
+        .one()
+    )
+    assert measure.counter_id == "REPEATED"
+    assert measure.count == 42
+
+
 def test_process_batch_job_result(db_session: Session, tests_data_dir: Path) -> None:
     sites_json_path = tests_data_dir / "pedestrians" / "sites.json"
     with sites_json_path.open() as f:
@@ -551,3 +594,237 @@ def test_process_batch_job_result(db_session: Session, tests_data_dir: Path) ->
             },
         ],
     )
+
+
+_MEASURES_HEADER = "channel_id,counter_id,start_datetime,end_datetime,count\n"
+_CHANNEL_IDS = [101000425, 102000425, 103000425, 104000425]
+
+
+def _measures_csv(days: int) -> str:
+    """A 15-minute export of the four test channels over ``days`` days."""
+    start = datetime(2026, 1, 1, tzinfo=UTC)
+    lines = [_MEASURES_HEADER]
+    for i in range(days * 96):
+        begin = start + timedelta(minutes=15 * i)
+        end = begin + timedelta(minutes=15)
+        lines.extend(
+            f"{channel_id},X2H23070904,{begin:%Y-%m-%dT%H:%M:%SZ},"
+            f"{end:%Y-%m-%dT%H:%M:%SZ},{i % 50}\n"
+            for channel_id in _CHANNEL_IDS
+        )
+    return "".join(lines)
+
+
+@patch("data_handler.pedestrians.live_data_handler.copy_rows")
+@patch("data_handler.pedestrians.live_data_handler.SessionLocal")
+def test_process_pedestrian_measures_data_streams_rows(
+    mock_session_local: Mock, mock_copy_rows: Mock
+) -> None:
+    """Rows are parsed lazily as COPY consumes them, not collected first."""
+    session = MagicMock()
+    mock_session_local.return_value.__enter__.return_value = session
+    csv_text = io.StringIO(_measures_csv(days=1))
+    consumed: list[dict] = []
+
+    def copy(*args: object) -> int:
+        rows = args[2]
+        assert isinstance(rows, Iterator)
+        first = next(rows)
+        # Only the header and the first data row have been read
+        assert csv_text.readline().startswith("102000425,")
+        consumed.extend([first, *rows])
+        return len(consumed)
+
+    mock_copy_rows.side_effect = copy
+
+    process_pedestrian_measures_data(csv_text)
+
+    _, target, _, conflict, update_cols = mock_copy_rows.call_args.args
+    assert target is PedestrianCounterMeasure
+    assert conflict == "uq_pedestrian_counter_measures_channel_start_end"
+    assert update_cols == ["counter_id", "count"]
+    assert consumed[0]["channel_id"] == 101000425
+    assert consumed[0]["start_datetime"] == datetime(2026, 1, 1, tzinfo=UTC)
+    session.commit.assert_called_once()
+
+
+# ── Export job polling ───────────────────────────────────────────────
+
+_HANDLER = "data_handler.pedestrians.live_data_handler"
+
+
+def _response(status: int, content: bytes = b"") -> Mock:
+    response = Mock(status_code=status, content=content)
+    if status >= 400:
+        response.raise_for_status.side_effect = requests.HTTPError(response=response)
+    return response
+
+
+@patch(f"{_HANDLER}.process_batch_job_result")
+@patch(f"{_HANDLER}.time.sleep")
+def test_poll_backs_off_exponentially_until_ready(
+    mock_sleep: Mock, mock_process: Mock
+) -> None:
+    session = Mock()
+    session.get.side_effect = [_response(404)] * 4 + [_response(200, b"zip")]
+
+    _poll_and_process_batch_result(
+        7, "https://api/exports/7/data", session, poll_interval=5, max_poll_interval=20
+    )
+
+    assert mock_sleep.call_args_list == [
+        call(15),
+        call(5),
+        call(10),
+        call(20),
+        call(20),
+    ]
+    mock_process.assert_called_once_with(b"zip")
+
+
+@patch(f"{_HANDLER}.process_batch_job_result")
+@patch(f"{_HANDLER}.time.sleep")
+def test_poll_gives_up_after_max_wait(mock_sleep: Mock, mock_process: Mock) -> None:
+    session = Mock()
+    session.get.return_value = _response(404)
+
+    with pytest.raises(requests.HTTPError):
+        _poll_and_process_batch_result(
+            7, "https://api/exports/7/data", session, initial_wait=10, max_wait=30
+        )
+
+    # 10 initial, then 5 and 10, then only the 5 s left of the budget
+    assert mock_sleep.call_args_list == [call(10), call(5), call(10), call(5)]
+    mock_process.assert_not_called()
+
+
+@patch(f"{_HANDLER}.process_batch_job_result")
+@patch(f"{_HANDLER}.time.monotonic", return_value=100.0)
+@patch(f"{_HANDLER}.time.sleep")
+def test_poll_stops_before_passing_the_deadline(
+    mock_sleep: Mock, mock_monotonic: Mock, mock_process: Mock
+) -> None:
+    session = Mock()
+    session.get.return_value = _response(404)
+
+    with pytest.raises(TimeoutError):
+        _poll_and_process_batch_result(
+            7, "https://api/exports/7/data", session, initial_wait=0, stop_at=104.0
+        )
+
+    # The 5 s retry would end past the deadline, so it is not waited out
+    mock_sleep.assert_called_once_with(0)
+    session.get.assert_called_once()
+    mock_process.assert_not_called()
+
+
+@patch(f"{_HANDLER}.process_batch_job_result")
+@patch(f"{_HANDLER}.time.monotonic", return_value=100.0)
+@patch(f"{_HANDLER}.time.sleep")
+def test_poll_does_not_process_a_result_after_the_deadline(
+    mock_sleep: Mock, mock_monotonic: Mock, mock_process: Mock
+) -> None:
+    session = Mock()
+    session.get.return_value = _response(200, b"zip")
+
+    with pytest.raises(TimeoutError):
+        _poll_and_process_batch_result(
+            7, "https://api/exports/7/data", session, initial_wait=0, stop_at=99.0
+        )
+
+    mock_process.assert_not_called()
+
+
+@patch(f"{_HANDLER}.time.sleep")
+def test_poll_raises_other_http_errors_immediately(mock_sleep: Mock) -> None:
+    session = Mock()
+    session.get.return_value = _response(500)
+
+    with pytest.raises(requests.HTTPError):
+        _poll_and_process_batch_result(7, "https://api/exports/7/data", session)
+
+    session.get.assert_called_once()
+    mock_sleep.assert_called_once_with(15)
+
+
+@pytest.fixture
+def two_export_jobs() -> Iterator[Mock]:
+    """Sites of two granularities, whose export jobs are 11 (PT15M) and 22 (PT1H)."""
+    with (
+        patch(f"{_HANDLER}.get_api_settings") as settings,
+        patch(f"{_HANDLER}.requests.get"),
+        patch(
+            f"{_HANDLER}.process_pedestrian_sites",
+            return_value={
+                1: PedestrianGranularity.PT15M,
+                2: PedestrianGranularity.PT1H,
+                3: PedestrianGranularity.PT15M,
+            },
+        ),
+        patch(f"{_HANDLER}.send_batch_job_request", side_effect=[11, 22]) as send,
+    ):
+        settings.return_value.eco_counter_api_base_url = "https://api"
+        settings.return_value.eco_counter_api_key = "key"
+        yield send
+
+
+def test_live_data_polls_export_jobs_concurrently(two_export_jobs: Mock) -> None:
+    """Job 22 is only ready once job 11 has been processed, while 22 is polled."""
+    job_11_done = threading.Event()
+    processed: list[int] = []
+
+    def poll(job_id: int, url: str, session: object, **_: object) -> None:
+        assert url == f"https://api/exports/{job_id}/data"
+        assert session.headers["x-api-key"] == "key"
+        if job_id == 22:
+            assert job_11_done.wait(timeout=5)
+        processed.append(job_id)
+        if job_id == 11:
+            job_11_done.set()
+
+    with patch(f"{_HANDLER}._poll_and_process_batch_result", side_effect=poll):
+        process_pedestrian_live_data()
+
+    assert [c.args[0] for c in two_export_jobs.call_args_list] == [[1, 3], [2]]
+    assert processed == [11, 22]
+
+
+def test_live_data_raises_after_other_jobs_finish(two_export_jobs: Mock) -> None:
+    processed: list[int] = []
+
+    def poll(job_id: int, *_: object, **__: object) -> None:
+        if job_id == 11:
+            msg = "bad zip"
+            raise ValueError(msg)
+        processed.append(job_id)
+
+    with (
+        patch(f"{_HANDLER}._poll_and_process_batch_result", side_effect=poll),
+        pytest.raises(ValueError, match="bad zip"),
+    ):
+        process_pedestrian_live_data()
+
+    assert two_export_jobs.call_count == 2
+    assert processed == [22]
+
+
+def test_live_data_waits_for_jobs_under_a_shared_deadline(
+    two_export_jobs: Mock,
+) -> None:
+    """Jobs stop themselves at the deadline, so none outlives the run."""
+    stop_ats: list[float] = []
+    finished = threading.Event()
+
+    def poll(job_id: int, *_: object, stop_at: float, **__: object) -> None:
+        stop_ats.append(stop_at)
+        if job_id == 22:
+            time.sleep(0.2)
+            finished.set()
+
+    with patch(f"{_HANDLER}._poll_and_process_batch_result", side_effect=poll):
+        process_pedestrian_live_data()
+
+    assert finished.is_set()
+    assert len(stop_ats) == 2
+    assert stop_ats[0] == stop_ats[1] > time.monotonic()
+    assert two_export_jobs.call_count == 2
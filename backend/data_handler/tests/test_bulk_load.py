@@ -0,0 +1,165 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from data_handler.bulk_load import copy_rows, model_to_row
+from data_handler.bus.models import BusAgency, BusTripShape
+from data_handler.train.models import RouteType, TrainAgency, TrainRoute
+from tests.utils import assert_row_count
+
+
+def _agency(agency_id: int, name: str) -> dict[str, object]:
+    return {
+        "id": agency_id,
+        "name": name,
+        "url": "https://example.com",
+        "timezone": "Europe/Dublin",
+    }
+
+
+def _shape_rows(n: int) -> list[dict[str, object]]:
+    return [
+        {
+            "shape_id": f"shape_{i // 100}",
+            "pt_sequence": i % 100,
+            "pt_lat": 53.3 + i * 1e-6,
+            "pt_lon": -6.2 - i * 1e-6,
+            "dist_traveled": float(i),
+        }
+        for i in range(n)
+    ]
+
+
+def test_model_to_row_returns_only_set_columns() -> None:
+    route = TrainRoute(id="R1", agency_id=1, route_type=RouteType.RAIL)
+
+    assert model_to_row(route) == {
+        "id": "R1",
+        "agency_id": 1,
+        "route_type": RouteType.RAIL,
+    }
+
+
+class TestCopyRows:
+    """Integration tests for copy_rows."""
+
+    def test_empty_rows_is_a_no_op(self, db_session: Session) -> None:
+        assert copy_rows(db_session, BusAgency, []) == 0
+        assert_row_count(db_session, "bus_agencies", 0)
+
+    def test_plain_copy_inserts_rows(self, db_session: Session) -> None:
+        count = copy_rows(db_session, BusAgency, [_agency(1, "A"), _agency(2, "B")])
+        db_session.commit()
+
+        assert count == 2
+        assert_row_count(db_session, "bus_agencies", 2)
+
+    def test_enum_columns_are_stored_by_name(self, db_session: Session) -> None:
+        copy_rows(db_session, TrainAgency, [_agency(1, "Irish Rail")])
+        copy_rows(
+            db_session,
+            TrainRoute,
+            [
+                model_to_row(
+                    TrainRoute(
+                        id="R1",
+                        agency_id=1,
+                        short_name="DART",
+                        long_name="Dublin Area Rapid Transit",
+                        route_type=RouteType.RAIL,
+                        route_color=None,
+                        route_text_color=None,
+                    )
+                )
+            ],
+        )
+        db_session.commit()
+
+        assert db_session.scalar(select(TrainRoute.route_type)) is RouteType.RAIL
+
+    def test_merge_on_index_columns_updates_existing(self, db_session: Session) -> None:
+        copy_rows(db_session, BusAgency, [_agency(1, "Old")])
+
+        copy_rows(
+            db_session,
+            BusAgency,
+            [_agency(1, "New"), _agency(2, "Other")],
+            ["id"],
+            ["name"],
+        )
+        db_session.commit()
+
+        names = dict(db_session.execute(select(BusAgency.id, BusAgency.name)).all())
+        assert names == {1: "New", 2: "Other"}
+
+    def test_merge_on_constraint_name(self, db_session: Session) -> None:
+        rows = _shape_rows(3)
+        copy_rows(db_session, BusTripShape, rows)
+        for row in rows:
+            row["dist_traveled"] = -1.0
+
+        copy_rows(
+            db_session, BusTripShape, rows, "uq_shape_sequence", ["dist_traveled"]
+        )
+        db_session.commit()
+
+        assert_row_count(db_session, "bus_trip_shapes", 3)
+        assert set(db_session.scalars(select(BusTripShape.dist_traveled))) == {-1.0}
+
+    def test_merge_keeps_last_of_duplicate_keys(self, db_session: Session) -> None:
+        copy_rows(db_session, BusAgency, [_agency(1, "Old")])
+
+        copy_rows(
+            db_session,
+            BusAgency,
+            [_agency(1, "First"), _agency(2, "Other"), _agency(1, "Last")],
+            ["id"],
+            ["name"],
+        )
+        db_session.commit()
+
+        names = dict(db_session.execute(select(BusAgency.id, BusAgency.name)).all())
+        assert names == {1: "Last", 2: "Other"}
+
+    def test_merge_on_constraint_name_keeps_last_of_duplicate_keys(
+        self, db_session: Session
+    ) -> None:
+        rows = _shape_rows(2)
+        repeated = {**rows[0], "dist_traveled": -1.0}
+
+        copy_rows(
+            db_session,
+            BusTripShape,
+            [*rows, repeated],
+            "uq_shape_sequence",
+            ["dist_traveled"],
+        )
+        db_session.commit()
+
+        assert_row_count(db_session, "bus_trip_shapes", 2)
+        assert (
+            db_session.scalar(
+                select(BusTripShape.dist_traveled).where(
+                    BusTripShape.pt_sequence == rows[0]["pt_sequence"]
+                )
+            )
+            == -1.0
+        )
+
+    def test_copy_stores_every_row_unchanged(self, db_session: Session) -> None:
+        rows = _shape_rows(50_000)
+
+        count = copy_rows(db_session, BusTripShape, iter(rows))
+        db_session.commit()
+
+        assert count == len(rows)
+        assert_row_count(db_session, "bus_trip_shapes", len(rows))
+        last = db_session.execute(
+            select(
+                BusTripShape.shape_id,
+                BusTripShape.pt_sequence,
+                BusTripShape.pt_lat,
+                BusTripShape.pt_lon,
+                BusTripShape.dist_traveled,
+            ).where(BusTripShape.dist_traveled == rows[-1]["dist_traveled"])
+        ).one()
+        assert last._asdict() == rows[-1]
@@ -0,0 +1,195 @@
+from datetime import time
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from data_handler.bulk_load import copy_rows
+from data_handler.bus.models import (
+    BusAgency,
+    BusRoute,
+    BusStop,
+    BusStopTime,
+    BusTrip,
+    BusTripShape,
+)
+from data_handler.common.source_manifests import load_manifest, save_manifest
+from data_handler.shadow_tables import ShadowTables
+from data_handler.train.models import TrainAgency, TrainRoute
+from tests.utils import assert_row_count
+
+
+def _agency(agency_id: int, name: str) -> dict[str, object]:
+    return {
+        "id": agency_id,
+        "name": name,
+        "url": "https://example.com",
+        "timezone": "Europe/Dublin",
+    }
+
+
+def _shape_point(shape_id: str) -> dict[str, object]:
+    return {
+        "shape_id": shape_id,
+        "pt_sequence": 1,
+        "pt_lat": 53.35,
+        "pt_lon": -6.26,
+        "dist_traveled": 0.0,
+    }
+
+
+def _foreign_key_count(session: Session, table: str) -> int:
+    return session.scalar(
+        text(
+            "SELECT COUNT(*) FROM pg_constraint "
+            "WHERE contype = 'f' AND conrelid = CAST(:table AS regclass)"
+        ),
+        {"table": table},
+    )
+
+
+class TestShadowTableDefinitions:
+    """Test the shadow copies built from the live table metadata."""
+
+    def test_copies_live_in_shadow_schema(self) -> None:
+        shadow = ShadowTables([TrainAgency, TrainRoute])
+
+        route = shadow[TrainRoute]
+        assert route.schema == shadow.shadow_schema == f"{shadow.schema}_shadow"
+        assert shadow.previous_schema == f"{shadow.schema}_previous"
+        assert [c.name for c in route.columns] == [
+            c.name for c in TrainRoute.__table__.columns
+        ]
+
+    def test_foreign_keys_within_group_point_at_shadow(self) -> None:
+        shadow = ShadowTables([TrainRoute, TrainAgency])
+
+        (fk,) = shadow[TrainRoute].foreign_keys
+        assert fk.column.table is shadow[TrainAgency]
+
+    def test_foreign_keys_outside_group_point_at_live(self) -> None:
+        shadow = ShadowTables([BusStopTime])
+
+        referred = {fk.column.table.fullname for fk in shadow[BusStopTime].foreign_keys}
+        assert referred == {BusTrip.__table__.fullname, BusStop.__table__.fullname}
+
+    def test_keeps_live_enum_type_and_index_names(self) -> None:
+        route = ShadowTables([TrainRoute])[TrainRoute]
+        stop_times = ShadowTables([BusStopTime])[BusStopTime]
+
+        assert route.c.route_type.type is TrainRoute.__table__.c.route_type.type
+        assert {i.name for i in stop_times.indexes} == {
+            i.name for i in BusStopTime.__table__.indexes
+        }
+
+
+class TestShadowTableSwap:
+    """Integration tests for creating, swapping and restoring shadow tables."""
+
+    def test_swap_replaces_live_rows_and_keeps_previous(
+        self, db_session: Session
+    ) -> None:
+        copy_rows(db_session, BusTripShape, [_shape_point("old")])
+        db_session.commit()
+        shadow = ShadowTables([BusTripShape])
+
+        shadow.create(db_session)
+        copy_rows(db_session, shadow[BusTripShape], [_shape_point("new")])
+        db_session.commit()
+        assert_row_count(db_session, "bus_trip_shapes", 1)  # untouched until swap
+        shadow.swap(db_session)
+
+        assert list(db_session.scalars(select(BusTripShape.shape_id))) == ["new"]
+        previous = db_session.scalar(
+            text(f'SELECT shape_id FROM "{shadow.previous_schema}".bus_trip_shapes')  # noqa: S608
+        )
+        assert previous == "old"
+
+    def test_on_swap_is_committed_with_the_swap(self, db_session: Session) -> None:
+        shadow = ShadowTables([BusTripShape])
+        shadow.create(db_session)
+        copy_rows(db_session, shadow[BusTripShape], [_shape_point("new")])
+        db_session.commit()
+
+        shadow.swap(
+            db_session,
+            lambda session: save_manifest(session, "bus", {"shapes.txt": "s"}),
+        )
+
+        assert load_manifest(db_session, "bus") == {"shapes.txt": "s"}
+        assert list(db_session.scalars(select(BusTripShape.shape_id))) == ["new"]
+
+    def test_restore_previous_swaps_back(self, db_session: Session) -> None:
+        copy_rows(db_session, BusTripShape, [_shape_point("old")])
+        db_session.commit()
+        shadow = ShadowTables([BusTripShape])
+        shadow.create(db_session)
+        copy_rows(db_session, shadow[BusTripShape], [_shape_point("new")])
+        db_session.commit()
+        shadow.swap(db_session)
+
+        shadow.restore_previous(db_session)
+
+        assert list(db_session.scalars(select(BusTripShape.shape_id))) == ["old"]
+
+    def test_external_foreign_keys_follow_live_table(self, db_session: Session) -> None:
+        copy_rows(db_session, BusAgency, [_agency(1, "Dublin Bus")])
+        copy_rows(
+            db_session,
+            BusRoute,
+            [{"id": "R1", "agency_id": 1, "short_name": "1", "long_name": "Route 1"}],
+        )
+        copy_rows(
+            db_session,
+            BusTrip,
+            [
+                {
+                    "id": "T1",
+                    "route_id": "R1",
+                    "service_id": 1,
+                    "headsign": "City Centre",
+                    "short_name": "1",
+                    "direction_id": 0,
+                    "shape_id": "S1",
+                }
+            ],
+        )
+        copy_rows(
+            db_session,
+            BusStop,
+            [
+                {
+                    "id": "ST1",
+                    "code": 1,
+                    "name": "Stop",
+                    "description": None,
+                    "lat": 53.35,
+                    "lon": -6.26,
+                }
+            ],
+        )
+        stop_time = {
+            "trip_id": "T1",
+            "stop_id": "ST1",
+            "arrival_time": time(8, 0),
+            "departure_time": time(8, 1),
+            "arrival_seconds": 8 * 3600,
+            "departure_seconds": 8 * 3600 + 60,
+            "sequence": 1,
+            "headsign": None,
+        }
+        copy_rows(db_session, BusStopTime, [stop_time])
+        db_session.commit()
+        shadow = ShadowTables([BusStopTime])
+        shadow.create(db_session)
+        copy_rows(db_session, shadow[BusStopTime], [stop_time])
+        db_session.commit()
+
+        shadow.swap(db_session)
+        live = BusStopTime.__table__.fullname
+        previous = f"{shadow.previous_schema}.bus_stop_times"
+        assert _foreign_key_count(db_session, live) == 2
+        assert _foreign_key_count(db_session, previous) == 0
+
+        shadow.restore_previous(db_session)
+        assert _foreign_key_count(db_session, live) == 2
+        assert_row_count(db_session, "bus_stop_times", 1)
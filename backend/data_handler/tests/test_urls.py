@@ -0,0 +1,79 @@
+import io
+import threading
+import zipfile
+from collections.abc import Generator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from data_handler.csv_utils import read_csv_file
+from data_handler.urls import CacheValidators, download_zip
+
+_ETAG = '"v1"'
+_LAST_MODIFIED = "Wed, 14 Oct 2026 08:00:00 GMT"
+
+
+def _zip_bytes() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("stops.txt", "\ufeffstop_id,stop_name\nCNLLY,Connolly\n")
+    return buffer.getvalue()
+
+
+class _ZipHandler(BaseHTTPRequestHandler):
+    """Serves a GTFS zip with an ETag, answering 304 to a matching If-None-Match."""
+
+    def do_GET(self) -> None:
+        if self.headers.get("If-None-Match") == _ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = _zip_bytes()
+        self.send_response(200)
+        self.send_header("ETag", _ETAG)
+        self.send_header("Last-Modified", _LAST_MODIFIED)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        pass
+
+
+@pytest.fixture
+def zip_server() -> Generator[str, None, None]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ZipHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/gtfs.zip"
+    server.shutdown()
+    server.server_close()
+
+
+class TestDownloadZip:
+    """Test downloading ZIP archives into memory."""
+
+    def test_members_are_read_from_memory(self, zip_server: str) -> None:
+        result = download_zip(zip_server)
+
+        assert result is not None
+        archive, validators = result
+        with archive:
+            root = zipfile.Path(archive)
+            assert (root / "stops.txt").exists()
+            assert not (root / "calendar_dates.txt").exists()
+            rows = list(read_csv_file(root / "stops.txt", ["stop_id"]))
+        assert rows == [{"stop_id": "CNLLY", "stop_name": "Connolly"}]
+        assert validators == CacheValidators(_ETAG, _LAST_MODIFIED)
+
+    def test_unchanged_file_is_not_downloaded(self, zip_server: str) -> None:
+        assert download_zip(zip_server, CacheValidators(_ETAG, _LAST_MODIFIED)) is None
+
+    def test_stale_validators_download_again(self, zip_server: str) -> None:
+        assert download_zip(zip_server, CacheValidators('"v0"')) is not None
+
+
+def test_request_headers_only_include_known_validators() -> None:
+    assert CacheValidators(last_modified=_LAST_MODIFIED).request_headers() == {
+        "If-Modified-Since": _LAST_MODIFIED
+    }
@@ -13,12 +13,14 @@ from data_handler.train.models import (
 )
 from data_handler.train.realtime_handler import (
     _ensure_list,
+    _get_station_data,
+    _get_train_movements,
     _safe_float,
     _safe_int,
     fetch_all_stations,
     fetch_current_trains,
-    fetch_station_data,
-    fetch_train_movements,
+    fetch_station_data_concurrently,
+    fetch_train_movements_concurrently,
     irish_rail_current_trains_to_db,
     irish_rail_station_data_to_db,
     irish_rail_train_movements_to_db,
@@ -279,10 +281,10 @@ class TestFetchCurrentTrains:
         assert trains == []
 
 
-# ── fetch_station_data unit tests ────────────────────────────────────
+# ── _get_station_data unit tests ─────────────────────────────────────
 
 
-class TestFetchStationData:
+class TestGetStationData:
     """Test parsing of station arrival/departure data XML."""
 
     @patch("data_handler.train.realtime_handler.requests.get")
@@ -292,7 +294,7 @@ class TestFetchStationData:
         mock_response.raise_for_status = Mock()
         mock_get.return_value = mock_response
 
-        data = fetch_station_data("CNLLY", num_mins=90)
+        data = _get_station_data("CNLLY", num_mins=90)
 
         assert len(data) == 1
         assert data[0]["Traincode"] == "E109"
@@ -307,15 +309,63 @@ class TestFetchStationData:
         mock_response.raise_for_status = Mock()
         mock_get.return_value = mock_response
 
-        data = fetch_station_data("BYSDE", num_mins=90)
+        data = _get_station_data("BYSDE", num_mins=90)
 
         assert data == []
 
 
-# ── fetch_train_movements unit tests ─────────────────────────────────
+class TestFetchStationDataConcurrently:
+    """Test the pooled, concurrent station data fetch."""
 
+    @patch("data_handler.common.http_fetcher.requests.Session.get")
+    def test_returns_data_per_station(self, mock_get: Mock) -> None:
+        mock_response = Mock()
+        mock_response.text = STATION_DATA_XML_RESPONSE
+        mock_response.raise_for_status = Mock()
+        mock_get.return_value = mock_response
+
+        data, failed = fetch_station_data_concurrently(["CNLLY", "TARA"])
+
+        assert set(data) == {"CNLLY", "TARA"}
+        assert data["CNLLY"][0]["Traincode"] == "E109"
+        assert failed == []
+        assert mock_get.call_count == 2
+
+    @patch("data_handler.common.http_fetcher.requests.Session.get")
+    def test_reports_failures_per_station(self, mock_get: Mock) -> None:
+        def side_effect_get(url: str, **kwargs: object) -> Mock:
+            if "StationCode=TARA" in url:
+                msg = "reset"
+                raise requests.ConnectionError(msg)
+            resp = Mock()
+            resp.raise_for_status = Mock()
+            resp.text = STATION_DATA_XML_RESPONSE
+            return resp
+
+        mock_get.side_effect = side_effect_get
+
+        data, failed = fetch_station_data_concurrently(["CNLLY", "TARA"])
 
-class TestFetchTrainMovements:
+        assert list(data) == ["CNLLY"]
+        assert failed == ["TARA"]
+
+    @patch("data_handler.common.http_fetcher.requests.Session.get")
+    def test_empty_stations_are_omitted(self, mock_get: Mock) -> None:
+        mock_response = Mock()
+        mock_response.text = STATION_DATA_EMPTY_XML_RESPONSE
+        mock_response.raise_for_status = Mock()
+        mock_get.return_value = mock_response
+
+        data, failed = fetch_station_data_concurrently(["BYSDE"])
+
+        assert data == {}
+        assert failed == []
+
+
+# ── _get_train_movements unit tests ──────────────────────────────────
+
+
+class TestGetTrainMovements:
     """Test parsing of train movements XML."""
 
     @patch("data_handler.train.realtime_handler.requests.get")
@@ -325,7 +375,7 @@ class TestFetchTrainMovements:
         mock_response.raise_for_status = Mock()
         mock_get.return_value = mock_response
 
-        movements = fetch_train_movements("E109", "22 Jan 2026")
+        movements = _get_train_movements("E109", "22 Jan 2026")
 
         assert len(movements) == 2
         assert movements[0]["LocationCode"] == "GSTON"
@@ -334,6 +384,29 @@ class TestFetchTrainMovements:
         assert movements[1]["LocationOrder"] == "5"
 
 
+class TestFetchTrainMovementsConcurrently:
+    """Test the pooled, concurrent train movements fetch."""
+
+    @patch("data_handler.common.http_fetcher.requests.Session.get")
+    def test_reports_failures_per_train(self, mock_get: Mock) -> None:
+        def side_effect_get(url: str, **kwargs: object) -> Mock:
+            resp = Mock()
+            if "TrainId=A200" in url:
+                resp.raise_for_status.side_effect = requests.HTTPError("503")
+            else:
+                resp.raise_for_status = Mock()
+                resp.text = TRAIN_MOVEMENTS_XML_RESPONSE
+            return resp
+
+        mock_get.side_effect = side_effect_get
+        trains = [("E109", "22 Jan 2026"), ("A200", "22 Jan 2026")]
+
+        data, failed = fetch_train_movements_concurrently(trains)
+
+        assert len(data[("E109", "22 Jan 2026")]) == 2
+        assert failed == [("A200", "22 Jan 2026")]
+
+
 # ── process_train_station_info integration tests ──────────────────────
 
 
@@ -461,7 +534,7 @@ class TestIrishRailCurrentTrainsToDb:
 class TestIrishRailStationDataToDb:
     """Integration tests for irish_rail_station_data_to_db."""
 
-    @patch("data_handler.train.realtime_handler.requests.get")
+    @patch("data_handler.common.http_fetcher.requests.Session.get")
     def test_inserts_station_data_for_known_stations(
         self,
         mock_get: Mock,
@@ -503,7 +576,7 @@ class TestIrishRailStationDataToDb:
         assert result.due_in_minutes == 5
         assert result.late_minutes == 1
 
-    @patch("data_handler.train.realtime_handler.requests.get")
+    @patch("data_handler.common.http_fetcher.requests.Session.get")
     def test_no_stations_returns_early(
         self, mock_get: Mock, db_session: Session
     ) -> None:
@@ -513,7 +586,7 @@ class TestIrishRailStationDataToDb:
         # Only the initial query to get station codes, no API calls for data
         assert_row_count(db_session, "irish_rail_station_data", 0)
 
-    @patch("data_handler.train.realtime_handler.requests.get")
+    @patch("data_handler.common.http_fetcher.requests.Session.get")
     def test_clears_old_data_before_inserting(
         self,
         mock_get: Mock,
@@ -547,6 +620,88 @@ class TestIrishRailStationDataToDb:
         irish_rail_station_data_to_db()
         assert_row_count(db_session, "irish_rail_station_data", 1)
 
+    @patch("data_handler.common.http_fetcher.requests.Session.get")
+    def test_failed_station_keeps_previous_data(
+        self,
+        mock_get: Mock,
+        db_session: Session,
+    ) -> None:
+        """A station whose fetch fails keeps its rows; the others are replaced."""
+        db_session.add_all(
+            [
+                IrishRailStation(
+                    station_id=100,
+                    station_code="CNLLY",
+                    station_desc="Connolly",
+                    lat=53.352925,
+                    lon=-6.249463,
+                ),
+                IrishRailStation(
+                    station_id=101,
+                    station_code="TARA",
+                    station_desc="Tara Street",
+                    lat=53.347778,
+                    lon=-6.254444,
+                ),
+            ]
+        )
+        db_session.commit()
+
+        resp = Mock()
+        resp.raise_for_status = Mock()
+        resp.text = STATION_DATA_XML_RESPONSE
+        mock_get.return_value = resp
+
+        irish_rail_station_data_to_db()
+        assert_row_count(db_session, "irish_rail_station_data", 2)
+
+        def side_effect_get(url: str, **kwargs: object) -> Mock:
+            if "StationCode=TARA" in url:
+                msg = "connection reset"
+                raise requests.ConnectionError(msg)
+            empty = Mock()
+            empty.raise_for_status = Mock()
+            empty.text = STATION_DATA_EMPTY_XML_RESPONSE
+            return empty
+
+        mock_get.side_effect = side_effect_get
+
+        irish_rail_station_data_to_db()
+
+        db_session.expire_all()
+        remaining = db_session.query(IrishRailStationData).all()
+        assert [r.station_code for r in remaining] == ["TARA"]
+
+    @patch("data_handler.common.http_fetcher.requests.Session.get")
+    def test_all_fetches_failed_keeps_previous_data(
+        self,
+        mock_get: Mock,
+        db_session: Session,
+    ) -> None:
+        db_session.add(
+            IrishRailStation(
+                station_id=100,
+                station_code="CNLLY",
+                station_desc="Connolly",
+                lat=53.352925,
+                lon=-6.249463,
+            )
+        )
+        db_session.commit()
+
+        resp = Mock()
+        resp.raise_for_status = Mock()
+        resp.text = STATION_DATA_XML_RESPONSE
+        mock_get.return_value = resp
+
+        irish_rail_station_data_to_db()
+        assert_row_count(db_session, "irish_rail_station_data", 1)
+
+        mock_get.side_effect = requests.ConnectionError("connection reset")
+
+        irish_rail_station_data_to_db()
+        assert_row_count(db_session, "irish_rail_station_data", 1)
+
 
 # ── irish_rail_train_movements_to_db integration tests ───────────────
 
@@ -554,7 +709,7 @@ class TestIrishRailStationDataToDb:
 class TestIrishRailTrainMovementsToDb:
     """Integration tests for irish_rail_train_movements_to_db."""
 
-    @patch("data_handler.train.realtime_handler.requests.get")
+    @patch("data_handler.common.http_fetcher.requests.Session.get")
     def test_inserts_movements_for_current_trains(
         self,
         mock_get: Mock,
@@ -591,13 +746,13 @@ class TestIrishRailTrainMovementsToDb:
         assert "GSTON" in codes
         assert "CNLLY" in codes
 
-    @patch("data_handler.train.realtime_handler.requests.get")
+    @patch("data_handler.common.http_fetcher.requests.Session.get")
     def test_no_trains_returns_early(self, mock_get: Mock, db_session: Session) -> None:
         irish_rail_train_movements_to_db()
 
         assert_row_count(db_session, "irish_rail_train_movements", 0)
 
-    @patch("data_handler.train.realtime_handler.requests.get")
+    @patch("data_handler.common.http_fetcher.requests.Session.get")
     def test_clears_old_movements_before_inserting(
         self,
         mock_get: Mock,
@@ -627,3 +782,36 @@ class TestIrishRailTrainMovementsToDb:
 
         irish_rail_train_movements_to_db()
         assert_row_count(db_session, "irish_rail_train_movements", 2)
+
+    @patch("data_handler.common.http_fetcher.requests.Session.get")
+    def test_failed_train_keeps_previous_movements(
+        self,
+        mock_get: Mock,
+        db_session: Session,
+    ) -> None:
+        db_session.add(
+            IrishRailCurrentTrain(
+                train_code="E109",
+                train_date=date(2026, 1, 22),
+                train_status=TrainStatus.RUNNING,
+                train_type="DART",
+                direction="Northbound",
+                lat=53.352,
+                lon=-6.249,
+                fetched_at=datetime(2026, 1, 22, 10, 0, 0),
+            )
+        )
+        db_session.commit()
+
+        mock_response = Mock()
+        mock_response.text = TRAIN_MOVEMENTS_XML_RESPONSE
+        mock_response.raise_for_status = Mock()
+        mock_get.return_value = mock_response
+
+        irish_rail_train_movements_to_db()
+        assert_row_count(db_session, "irish_rail_train_movements", 2)
+
+        mock_get.side_effect = requests.ConnectionError("connection reset")
+
+        irish_rail_train_movements_to_db()
+        assert_row_count(db_session, "irish_rail_train_movements", 2)
@@ -1,9 +1,12 @@
 import shutil
+import zipfile
 from pathlib import Path
 
 import pytest
+from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
 
+from data_handler.train.models import TrainStop, TrainTripShape
 from data_handler.train.static_data_handler import process_train_static_data
 from tests.utils import assert_row_count, assert_rows
 
@@ -142,3 +145,69 @@ class TestProcessTrainStaticData:
 
         process_train_static_data(train_data_dir)
         assert_row_count(db_session, "train_stops", 4)
+
+    def test_unchanged_feed_is_skipped(
+        self,
+        db_session: Session,
+        tests_data_dir: Path,
+    ) -> None:
+        """A second import of the same files writes nothing."""
+        train_data_dir = tests_data_dir / "train" / "gtfs"
+        process_train_static_data(train_data_dir)
+        db_session.execute(delete(TrainTripShape))
+        db_session.commit()
+
+        process_train_static_data(train_data_dir)
+
+        assert_row_count(db_session, "train_trip_shapes", 0)
+
+    def test_changed_file_is_diffed_by_key(
+        self,
+        db_session: Session,
+        tests_data_dir: Path,
+        tmp_path: Path,
+    ) -> None:
+        """Only rows of changed files are updated, inserted or deleted."""
+        gtfs_dir = tmp_path / "gtfs"
+        shutil.copytree(tests_data_dir / "train" / "gtfs", gtfs_dir)
+        process_train_static_data(gtfs_dir)
+        stops = gtfs_dir / "stops.txt"
+        lines = stops.read_text().splitlines()
+        stops.write_text(
+            "\n".join(
+                [
+                    *(line.replace("Pearse", "Pearse Street") for line in lines[:-1]),
+                    "HWTH,9005,Howth,,53.388,-6.074",
+                ]
+            )
+            + "\n"
+        )
+
+        process_train_static_data(gtfs_dir)
+
+        names = dict(db_session.execute(select(TrainStop.id, TrainStop.name)).all())
+        assert names == {
+            "CNLLY": "Connolly",
+            "TARA": "Tara Street",
+            "PEARSE": "Pearse Street",
+            "HWTH": "Howth",
+        }
+        assert_row_count(db_session, "train_stop_times", 4)
+
+    def test_reads_gtfs_from_zip_archive(
+        self,
+        db_session: Session,
+        tests_data_dir: Path,
+        tmp_path: Path,
+    ) -> None:
+        """A ZIP archive root can be processed in place of a directory."""
+        zip_path = tmp_path / "gtfs.zip"
+        with zipfile.ZipFile(zip_path, "w") as zf:
+            for file_path in (tests_data_dir / "train" / "gtfs").iterdir():
+                zf.write(file_path, file_path.name)
+
+        with zipfile.ZipFile(zip_path) as zf:
+            process_train_static_data(zipfile.Path(zf))
+
+        assert_row_count(db_session, "train_stops", 4)
+        assert_row_count(db_session, "train_stop_times", 4)
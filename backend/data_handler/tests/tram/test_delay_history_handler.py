@@ -1,48 +1,56 @@
 """Tests for tram delay history handler."""
 
-from datetime import datetime, time
-from unittest.mock import MagicMock, Mock, patch
+from collections.abc import Generator
+from datetime import UTC, date, datetime, time
+from types import SimpleNamespace
+from unittest.mock import ANY, MagicMock, Mock, patch
 
+import numpy as np
 import pytest
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from data_handler.common.timetable_index import TimetableIndex
 from data_handler.tram.delay_history_handler import (
     _build_name_to_gtfs_ids,
+    _delay_records,
     _find_gtfs_ids,
-    _find_next_scheduled,
-    _get_dublin_time,
+    _get_dublin_now,
+    refresh_luas_gtfs_stops,
     store_delay_snapshot,
 )
-from data_handler.tram.models import TramStop
+from data_handler.tram.models import (
+    TramAgency,
+    TramCalendarSchedule,
+    TramDelayHistory,
+    TramLuasForecast,
+    TramLuasGtfsStop,
+    TramLuasStop,
+    TramRoute,
+    TramStop,
+    TramStopTime,
+    TramTrip,
+)
 
-# ── _get_dublin_time unit tests ──────────────────────────────────────
+# ── _get_dublin_now unit tests ───────────────────────────────────────
 
 
-class TestGetDublinTime:
+class TestGetDublinNow:
     """Test retrieval of current Dublin time from DB."""
 
-    def test_returns_time_from_db_datetime(self) -> None:
-        """When DB returns a datetime, extract its .time() component."""
+    def test_returns_datetime_from_db(self) -> None:
         session = MagicMock()
         db_now = datetime(2025, 6, 15, 14, 30, 0)
         session.execute.return_value.scalar.return_value = db_now
-        result = _get_dublin_time(session)
-        assert result == time(14, 30, 0)
-
-    def test_returns_time_object_directly(self) -> None:
-        """When DB returns a time object directly, use it as-is."""
-        session = MagicMock()
-        db_time = time(9, 15, 0)
-        session.execute.return_value.scalar.return_value = db_time
-        result = _get_dublin_time(session)
-        assert result == time(9, 15, 0)
+        assert _get_dublin_now(session) == db_now
 
-    def test_falls_back_to_utc_when_db_returns_none(self) -> None:
-        """When DB returns None, fall back to UTC now."""
+    def test_falls_back_to_local_clock_when_db_returns_none(self) -> None:
+        """When DB returns None, fall back to the process clock in Dublin."""
         session = MagicMock()
         session.execute.return_value.scalar.return_value = None
-        result = _get_dublin_time(session)
-        assert isinstance(result, time)
+        result = _get_dublin_now(session)
+        assert isinstance(result, datetime)
+        assert result.tzinfo is None
 
 
 # ── _build_name_to_gtfs_ids unit tests ───────────────────────────────
@@ -105,260 +113,223 @@ class TestFindGtfsIds:
         assert _find_gtfs_ids("ABBEY STREET", mapping) == ["S3"]
 
 
-# ── _find_next_scheduled unit tests (mocked DB) ─────────────────────
+# ── _delay_records unit tests ────────────────────────────────────────
 
+_RECORDED_AT = datetime(2025, 6, 16, 9, tzinfo=UTC)
 
-class TestFindNextScheduled:
-    """Test finding the next scheduled arrival time."""
 
-    def test_returns_nearest_arrival(self) -> None:
-        session = MagicMock()
-        session.execute.return_value.scalar.return_value = time(10, 15)
-        result = _find_next_scheduled(session, ["STOP1"], time(10, 0))
-        assert result == time(10, 15)
+def _timetable(arrivals: dict[str, list[time]]) -> TimetableIndex:
+    stop_ids = sorted(arrivals)
+    seconds = [
+        sorted(t.hour * 3600 + t.minute * 60 for t in arrivals[s]) for s in stop_ids
+    ]
+    return TimetableIndex(
+        feed="tram",
+        service_date=date(2025, 6, 16),
+        data_version="v1",
+        stop_ids=stop_ids,
+        offsets=np.cumsum([0, *map(len, seconds)]).astype(np.int64),
+        arrivals=np.array([t for run in seconds for t in run], dtype=np.int32),
+    )
 
-    def test_returns_none_when_no_arrivals(self) -> None:
-        session = MagicMock()
-        session.execute.return_value.scalar.return_value = None
-        result = _find_next_scheduled(session, ["STOP1"], time(10, 0))
-        assert result is None
 
-    def test_picks_earliest_across_multiple_stops(self) -> None:
-        session = MagicMock()
-        # Return different times for two sequential calls
-        session.execute.return_value.scalar.side_effect = [
-            time(10, 30),
-            time(10, 15),
-        ]
-        result = _find_next_scheduled(session, ["S1", "S2"], time(10, 0))
-        assert result == time(10, 15)
+def _forecast(due_mins: int, stop_id: str = "STG") -> SimpleNamespace:
+    return SimpleNamespace(
+        stop_id=stop_id,
+        stop_name="St. Stephen's Green",
+        line="green",
+        direction="Inbound",
+        destination="Broombridge",
+        due_mins=due_mins,
+    )
 
-    def test_skips_none_results(self) -> None:
-        session = MagicMock()
-        session.execute.return_value.scalar.side_effect = [None, time(10, 20)]
-        result = _find_next_scheduled(session, ["S1", "S2"], time(10, 0))
-        assert result == time(10, 20)
 
+class TestDelayRecords:
+    """Test comparing forecasts against the timetable index."""
 
-# ── store_delay_snapshot tests (fully mocked session) ────────────────
+    def test_uses_next_arrival_across_matched_stops(self) -> None:
+        timetable = _timetable({"G1": [time(10, 20)], "G2": [time(10, 10)]})
 
+        (record,) = _delay_records(
+            [_forecast(15)],
+            {"STG": ["G1", "G2"]},
+            timetable,
+            time(10, 0, 30),
+            _RECORDED_AT,
+        )
 
-class TestStoreDelaySnapshot:
-    """Tests for store_delay_snapshot with fully mocked DB session."""
+        assert record["scheduled_time"] == "10:10"
+        assert record["due_mins"] == 15
+        assert record["delay_mins"] == 5
+        assert record["recorded_at"] == _RECORDED_AT
+
+    def test_window_is_ninety_minutes(self) -> None:
+        timetable = _timetable({"G1": [time(11, 31)]})
+        assert (
+            _delay_records(
+                [_forecast(100)], {"STG": ["G1"]}, timetable, time(10, 0), _RECORDED_AT
+            )
+            == []
+        )
 
-    @patch("data_handler.tram.delay_history_handler.SessionLocal")
-    def test_no_forecasts_stores_nothing(self, mock_session_local: Mock) -> None:
-        """When no forecasts exist, nothing is stored."""
-        mock_session = MagicMock()
-        mock_session_local.return_value = mock_session
+        timetable = _timetable({"G1": [time(11, 30)]})
+        (record,) = _delay_records(
+            [_forecast(100)], {"STG": ["G1"]}, timetable, time(10, 0), _RECORDED_AT
+        )
+        assert record["delay_mins"] == 10
+
+    def test_window_runs_past_midnight(self) -> None:
+        # A previous-day-style 24:10 arrival, as stored by the index
+        timetable = TimetableIndex(
+            feed="tram",
+            service_date=date(2025, 6, 16),
+            data_version="v1",
+            stop_ids=["G1"],
+            offsets=np.array([0, 1], dtype=np.int64),
+            arrivals=np.array([24 * 3600 + 600], dtype=np.int32),
+        )
 
-        # _get_dublin_time query
-        dublin_time_result = MagicMock()
-        dublin_time_result.scalar.return_value = time(10, 0)
-        # forecasts query
-        forecasts_result = MagicMock()
-        forecasts_result.all.return_value = []
+        (record,) = _delay_records(
+            [_forecast(20)], {"STG": ["G1"]}, timetable, time(23, 55), _RECORDED_AT
+        )
 
-        mock_session.execute.side_effect = [dublin_time_result, forecasts_result]
+        assert record["scheduled_time"] == "00:10"
+        assert record["delay_mins"] == 5
+
+    def test_skips_on_time_and_unmatched_stops(self) -> None:
+        timetable = _timetable({"G1": [time(10, 10)]})
+        assert (
+            _delay_records(
+                [_forecast(10), _forecast(5), _forecast(30, stop_id="XXX")],
+                {"STG": ["G1"]},
+                timetable,
+                time(10, 0),
+                _RECORDED_AT,
+            )
+            == []
+        )
 
-        store_delay_snapshot()
 
-        mock_session.commit.assert_not_called()
-        mock_session.close.assert_called_once()
+# ── refresh_luas_gtfs_stops integration tests ────────────────────────
 
-    @patch("data_handler.tram.delay_history_handler.SessionLocal")
-    def test_stores_delay_when_tram_is_late(self, mock_session_local: Mock) -> None:
-        """A delayed tram produces a TramDelayHistory record via session.add."""
-        mock_session = MagicMock()
-        mock_session_local.return_value = mock_session
 
-        mock_forecast = MagicMock()
-        mock_forecast.stop_id = "STG"
-        mock_forecast.direction = "Inbound"
-        mock_forecast.due_mins = 15
-        mock_forecast.line = "green"
-        mock_forecast.destination = "Broombridge"
-
-        # 1) _get_dublin_time
-        dublin_time_result = MagicMock()
-        dublin_time_result.scalar.return_value = time(10, 0)
-        # 2) forecasts join query
-        forecasts_result = MagicMock()
-        forecasts_result.all.return_value = [
-            (mock_forecast, "St. Stephen's Green"),
-        ]
-        # 3) _build_name_to_gtfs_ids query
-        gtfs_stops_result = MagicMock()
-        gtfs_stops_result.all.return_value = [
-            ("GTFS_STG", "St. Stephen's Green"),
-        ]
-        # 4) _find_next_scheduled query — scheduled at 10:10
-        #    predicted = 10:00 + 15 = 10:15, delay = 10:15 - 10:10 = 5 min
-        scheduled_result = MagicMock()
-        scheduled_result.scalar.return_value = time(10, 10)
-
-        mock_session.execute.side_effect = [
-            dublin_time_result,
-            forecasts_result,
-            gtfs_stops_result,
-            scheduled_result,
-        ]
+def _add_luas_stop(session: Session, stop_id: str, name: str) -> None:
+    session.add(
+        TramLuasStop(
+            stop_id=stop_id,
+            line="green",
+            name=name,
+            pronunciation=name,
+            lat=53.33,
+            lon=-6.26,
+        )
+    )
 
-        store_delay_snapshot()
 
-        mock_session.add.assert_called_once()
-        added_record = mock_session.add.call_args[0][0]
-        assert added_record.delay_mins == 5
-        assert added_record.stop_id == "STG"
-        assert added_record.direction == "Inbound"
-        assert added_record.due_mins == 15
-        mock_session.commit.assert_called_once()
+class TestRefreshLuasGtfsStops:
+    """Test precomputing the Luas → GTFS stop matches."""
 
-    @patch("data_handler.tram.delay_history_handler.SessionLocal")
-    def test_no_delay_when_tram_is_on_time(self, mock_session_local: Mock) -> None:
-        """A tram arriving on time or early does not produce a delay record."""
-        mock_session = MagicMock()
-        mock_session_local.return_value = mock_session
+    def test_matches_exact_and_partial_names(self, db_session: Session) -> None:
+        db_session.add(TramStop(id="H1", code=1, name="Harcourt", lat=53.3, lon=-6.2))
+        db_session.add(TramStop(id="H2", code=2, name="Harcourt", lat=53.3, lon=-6.2))
+        db_session.add(
+            TramStop(id="S1", code=3, name="Sandyford Luas", lat=53.2, lon=-6.2)
+        )
+        _add_luas_stop(db_session, "HAR", "Harcourt")
+        _add_luas_stop(db_session, "SAN", "Sandyford")
+        _add_luas_stop(db_session, "XXX", "Nowhere")
+        db_session.commit()
 
-        mock_forecast = MagicMock()
-        mock_forecast.stop_id = "STG"
-        mock_forecast.direction = "Inbound"
-        mock_forecast.due_mins = 5
-        mock_forecast.line = "green"
-        mock_forecast.destination = "Broombridge"
-
-        # predicted = 10:00 + 5 = 10:05, scheduled = 10:10 → delay = -5 → skipped
-        dublin_time_result = MagicMock()
-        dublin_time_result.scalar.return_value = time(10, 0)
-        forecasts_result = MagicMock()
-        forecasts_result.all.return_value = [
-            (mock_forecast, "St. Stephen's Green"),
-        ]
-        gtfs_stops_result = MagicMock()
-        gtfs_stops_result.all.return_value = [
-            ("GTFS_STG", "St. Stephen's Green"),
-        ]
-        scheduled_result = MagicMock()
-        scheduled_result.scalar.return_value = time(10, 10)
-
-        mock_session.execute.side_effect = [
-            dublin_time_result,
-            forecasts_result,
-            gtfs_stops_result,
-            scheduled_result,
-        ]
+        matched = refresh_luas_gtfs_stops(db_session)
+        db_session.commit()
 
-        store_delay_snapshot()
+        assert matched == 2
+        rows = db_session.execute(
+            select(TramLuasGtfsStop.luas_stop_id, TramLuasGtfsStop.gtfs_stop_id)
+        ).all()
+        assert sorted(rows) == [("HAR", "H1"), ("HAR", "H2"), ("SAN", "S1")]
 
-        mock_session.add.assert_not_called()
-        mock_session.commit.assert_called_once()
+    def test_replaces_previous_matches(self, db_session: Session) -> None:
+        db_session.add(TramStop(id="H1", code=1, name="Harcourt", lat=53.3, lon=-6.2))
+        _add_luas_stop(db_session, "HAR", "Harcourt")
+        db_session.commit()
+        refresh_luas_gtfs_stops(db_session)
+        db_session.commit()
 
-    @patch("data_handler.tram.delay_history_handler.SessionLocal")
-    def test_skips_forecast_with_no_gtfs_match(self, mock_session_local: Mock) -> None:
-        """Forecasts for stops without GTFS matches are skipped."""
-        mock_session = MagicMock()
-        mock_session_local.return_value = mock_session
+        db_session.get(TramLuasStop, "HAR").name = "Renamed"
+        refresh_luas_gtfs_stops(db_session)
+        db_session.commit()
 
-        mock_forecast = MagicMock()
-        mock_forecast.stop_id = "STG"
-        mock_forecast.direction = "Inbound"
-        mock_forecast.due_mins = 15
-        mock_forecast.line = "green"
-        mock_forecast.destination = "Broombridge"
-
-        dublin_time_result = MagicMock()
-        dublin_time_result.scalar.return_value = time(10, 0)
-        forecasts_result = MagicMock()
-        forecasts_result.all.return_value = [
-            (mock_forecast, "Unknown Stop Name"),
-        ]
-        # Empty GTFS mapping — no match
-        gtfs_stops_result = MagicMock()
-        gtfs_stops_result.all.return_value = []
-
-        mock_session.execute.side_effect = [
-            dublin_time_result,
-            forecasts_result,
-            gtfs_stops_result,
-        ]
+        assert db_session.scalars(select(TramLuasGtfsStop)).all() == []
 
-        store_delay_snapshot()
 
-        mock_session.add.assert_not_called()
-        mock_session.commit.assert_called_once()
+# ── store_delay_snapshot tests (mocked session) ──────────────────────
 
-    @patch("data_handler.tram.delay_history_handler.SessionLocal")
-    def test_skips_forecast_with_none_due_mins(self, mock_session_local: Mock) -> None:
-        """Forecasts with due_mins=None are skipped during grouping."""
-        mock_session = MagicMock()
-        mock_session_local.return_value = mock_session
+_HANDLER = "data_handler.tram.delay_history_handler"
 
-        mock_forecast = MagicMock()
-        mock_forecast.stop_id = "STG"
-        mock_forecast.direction = "Inbound"
-        mock_forecast.due_mins = None
 
-        dublin_time_result = MagicMock()
-        dublin_time_result.scalar.return_value = time(10, 0)
-        forecasts_result = MagicMock()
-        forecasts_result.all.return_value = [
-            (mock_forecast, "St. Stephen's Green"),
-        ]
-        # soonest dict will be empty → still runs GTFS lookup but no iterations
-        gtfs_stops_result = MagicMock()
-        gtfs_stops_result.all.return_value = []
-
-        mock_session.execute.side_effect = [
-            dublin_time_result,
-            forecasts_result,
-            gtfs_stops_result,
+@pytest.fixture
+def mocked_snapshot_inputs() -> Generator[dict[str, Mock], None, None]:
+    with (
+        patch(
+            f"{_HANDLER}._get_dublin_now",
+            return_value=datetime(2025, 6, 16, 10, 0),
+        ) as now,
+        patch(
+            f"{_HANDLER}._load_luas_gtfs_ids", return_value={"STG": ["G1"]}
+        ) as mapping,
+        patch(
+            f"{_HANDLER}.get_timetable_index",
+            return_value=_timetable({"G1": [time(10, 10)]}),
+        ) as timetable,
+    ):
+        yield {"now": now, "mapping": mapping, "timetable": timetable}
+
+
+class TestStoreDelaySnapshotStatements:
+    """store_delay_snapshot issues a fixed number of statements."""
+
+    @patch(f"{_HANDLER}.SessionLocal")
+    def test_inserts_all_records_in_one_statement(
+        self, mock_session_local: Mock, mocked_snapshot_inputs: dict[str, Mock]
+    ) -> None:
+        mock_session = MagicMock()
+        mock_session_local.return_value = mock_session
+        mock_session.execute.return_value.all.return_value = [
+            _forecast(15),
+            _forecast(20, stop_id="XXX"),
         ]
 
         store_delay_snapshot()
 
-        mock_session.add.assert_not_called()
+        mocked_snapshot_inputs["timetable"].assert_called_once_with(
+            mock_session, ANY, date(2025, 6, 16)
+        )
+        # The forecasts query, then one insert
+        assert mock_session.execute.call_count == 2
+        records = mock_session.execute.call_args_list[1].args[1]
+        assert [r["delay_mins"] for r in records] == [5]
         mock_session.commit.assert_called_once()
+        mock_session.close.assert_called_once()
 
-    @patch("data_handler.tram.delay_history_handler.SessionLocal")
-    def test_skips_when_no_scheduled_arrival(self, mock_session_local: Mock) -> None:
-        """When no next scheduled arrival is found, the forecast is skipped."""
+    @patch(f"{_HANDLER}.refresh_luas_gtfs_stops")
+    @patch(f"{_HANDLER}.SessionLocal")
+    def test_builds_missing_stop_matches(
+        self,
+        mock_session_local: Mock,
+        mock_refresh: Mock,
+        mocked_snapshot_inputs: dict[str, Mock],
+    ) -> None:
         mock_session = MagicMock()
         mock_session_local.return_value = mock_session
-
-        mock_forecast = MagicMock()
-        mock_forecast.stop_id = "STG"
-        mock_forecast.direction = "Inbound"
-        mock_forecast.due_mins = 15
-        mock_forecast.line = "green"
-        mock_forecast.destination = "Broombridge"
-
-        dublin_time_result = MagicMock()
-        dublin_time_result.scalar.return_value = time(10, 0)
-        forecasts_result = MagicMock()
-        forecasts_result.all.return_value = [
-            (mock_forecast, "St. Stephen's Green"),
-        ]
-        gtfs_stops_result = MagicMock()
-        gtfs_stops_result.all.return_value = [
-            ("GTFS_STG", "St. Stephen's Green"),
-        ]
-        # No scheduled arrival found
-        scheduled_result = MagicMock()
-        scheduled_result.scalar.return_value = None
-
-        mock_session.execute.side_effect = [
-            dublin_time_result,
-            forecasts_result,
-            gtfs_stops_result,
-            scheduled_result,
-        ]
+        mocked_snapshot_inputs["mapping"].side_effect = [{}, {}]
 
         store_delay_snapshot()
 
-        mock_session.add.assert_not_called()
+        mock_refresh.assert_called_once_with(mock_session)
         mock_session.commit.assert_called_once()
 
-    @patch("data_handler.tram.delay_history_handler.SessionLocal")
+    @patch(f"{_HANDLER}.SessionLocal")
     def test_exception_triggers_rollback(self, mock_session_local: Mock) -> None:
         """On exception, session is rolled back and exception re-raised."""
         mock_session = MagicMock()
@@ -371,53 +342,151 @@ class TestStoreDelaySnapshot:
         mock_session.rollback.assert_called_once()
         mock_session.close.assert_called_once()
 
-    @patch("data_handler.tram.delay_history_handler.SessionLocal")
+
+# ── store_delay_snapshot integration tests ───────────────────────────
+
+
+def _seed_schedule(session: Session, arrivals: list[time]) -> None:
+    """St. Stephen's Green (Luas STG, GTFS G1/G2) with one trip per arrival."""
+    session.add(
+        TramAgency(id=1, name="Luas", url="https://luas.ie", timezone="Europe/Dublin")
+    )
+    session.add(TramRoute(id="R1", agency_id=1, short_name="G", long_name="Green"))
+    session.add(
+        TramStop(id="G1", code=1, name="St. Stephen's Green", lat=53.3, lon=-6.2)
+    )
+    session.add(
+        TramStop(id="G2", code=2, name="St. Stephen's Green", lat=53.3, lon=-6.2)
+    )
+    _add_luas_stop(session, "STG", "St. Stephen's Green")
+    session.add(
+        TramCalendarSchedule(
+            service_id=1,
+            monday=True,
+            tuesday=True,
+            wednesday=True,
+            thursday=True,
+            friday=True,
+            saturday=True,
+            sunday=True,
+            start_date=date(2025, 1, 1),
+            end_date=date(2025, 12, 31),
+        )
+    )
+    session.flush()
+    for i, arrival in enumerate(arrivals):
+        session.add(
+            TramTrip(
+                id=f"T{i}",
+                route_id="R1",
+                service_id=1,
+                headsign="Broombridge",
+                short_name="G",
+                direction_id=i % 2,
+                shape_id="S1",
+            )
+        )
+        session.flush()
+        session.add(
+            TramStopTime(
+                trip_id=f"T{i}",
+                stop_id=f"G{i % 2 + 1}",
+                arrival_time=arrival,
+                departure_time=arrival,
+                arrival_seconds=arrival.hour * 3600 + arrival.minute * 60,
+                departure_seconds=arrival.hour * 3600 + arrival.minute * 60,
+                sequence=1,
+            )
+        )
+    session.commit()
+    refresh_luas_gtfs_stops(session)
+    session.commit()
+
+
+def _add_forecast(session: Session, due_mins: int | None, stop_id: str = "STG") -> None:
+    session.add(
+        TramLuasForecast(
+            stop_id=stop_id,
+            line="green",
+            direction="Inbound",
+            destination="Broombridge",
+            due_mins=due_mins,
+        )
+    )
+    session.commit()
+
+
+def _delays(session: Session) -> list[TramDelayHistory]:
+    return list(session.scalars(select(TramDelayHistory)).all())
+
+
+@pytest.fixture
+def dublin_ten_am() -> Generator[None, None, None]:
+    with patch(
+        f"{_HANDLER}._get_dublin_now",
+        return_value=datetime(2025, 6, 16, 10, 0),
+    ):
+        yield
+
+
+@pytest.mark.usefixtures("dublin_ten_am")
+class TestStoreDelaySnapshot:
+    """store_delay_snapshot against a real database, at Dublin time 10:00."""
+
+    def test_stores_delay_when_tram_is_late(self, db_session: Session) -> None:
+        """Predicted 10:15 against the 10:10 arrival is 5 minutes late."""
+        _seed_schedule(db_session, [time(9, 50), time(10, 10), time(10, 20)])
+        _add_forecast(db_session, 15)
+
+        store_delay_snapshot()
+
+        (delay,) = _delays(db_session)
+        assert delay.stop_id == "STG"
+        assert delay.stop_name == "St. Stephen's Green"
+        assert delay.direction == "Inbound"
+        assert delay.scheduled_time == "10:10"
+        assert delay.due_mins == 15
+        assert delay.delay_mins == 5
+        assert delay.estimated_affected_passengers == 0.0
+
+    def test_no_delay_when_tram_is_on_time(self, db_session: Session) -> None:
+        _seed_schedule(db_session, [time(10, 10)])
+        _add_forecast(db_session, 5)
+
+        store_delay_snapshot()
+
+        assert _delays(db_session) == []
+
     def test_keeps_soonest_forecast_per_stop_direction(
-        self, mock_session_local: Mock
+        self, db_session: Session
     ) -> None:
-        """When multiple forecasts exist for same stop+direction, keep soonest."""
-        mock_session = MagicMock()
-        mock_session_local.return_value = mock_session
+        _seed_schedule(db_session, [time(10, 10)])
+        _add_forecast(db_session, 20)
+        _add_forecast(db_session, 15)
+        _add_forecast(db_session, None)
 
-        forecast_far = MagicMock()
-        forecast_far.stop_id = "STG"
-        forecast_far.direction = "Inbound"
-        forecast_far.due_mins = 20
-        forecast_far.line = "green"
-        forecast_far.destination = "Broombridge"
-
-        forecast_near = MagicMock()
-        forecast_near.stop_id = "STG"
-        forecast_near.direction = "Inbound"
-        forecast_near.due_mins = 15
-        forecast_near.line = "green"
-        forecast_near.destination = "Broombridge"
-
-        dublin_time_result = MagicMock()
-        dublin_time_result.scalar.return_value = time(10, 0)
-        forecasts_result = MagicMock()
-        forecasts_result.all.return_value = [
-            (forecast_far, "St. Stephen's Green"),
-            (forecast_near, "St. Stephen's Green"),
-        ]
-        gtfs_stops_result = MagicMock()
-        gtfs_stops_result.all.return_value = [
-            ("GTFS_STG", "St. Stephen's Green"),
-        ]
-        # scheduled at 10:10, soonest predicted = 10:15 → delay = 5
-        scheduled_result = MagicMock()
-        scheduled_result.scalar.return_value = time(10, 10)
-
-        mock_session.execute.side_effect = [
-            dublin_time_result,
-            forecasts_result,
-            gtfs_stops_result,
-            scheduled_result,
-        ]
+        store_delay_snapshot()
+
+        (delay,) = _delays(db_session)
+        assert delay.due_mins == 15
+        assert delay.delay_mins == 5
+
+    def test_skips_when_no_arrival_within_window(self, db_session: Session) -> None:
+        _seed_schedule(db_session, [time(9, 59), time(11, 31)])
+        _add_forecast(db_session, 15)
+
+        store_delay_snapshot()
+
+        assert _delays(db_session) == []
+
+    def test_skips_stop_without_gtfs_match(self, db_session: Session) -> None:
+        _seed_schedule(db_session, [time(10, 10)])
+        _add_luas_stop(db_session, "XXX", "Unknown Stop Name")
+        db_session.commit()
+        refresh_luas_gtfs_stops(db_session)
+        db_session.commit()
+        _add_forecast(db_session, 15, stop_id="XXX")
 
         store_delay_snapshot()
 
-        mock_session.add.assert_called_once()
-        added = mock_session.add.call_args[0][0]
-        assert added.due_mins == 15  # soonest was kept
-        assert added.delay_mins == 5
+        assert _delays(db_session) == []
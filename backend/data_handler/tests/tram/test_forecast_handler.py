@@ -1,16 +1,19 @@
+from datetime import UTC, datetime, timedelta
 from unittest.mock import Mock, patch
 
 import pytest
 import requests
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from data_handler.tram.forecast_handler import (
     fetch_forecast_for_stop,
+    fetch_forecasts_concurrently,
     fetch_luas_stops,
     process_tram_live_data,
     process_tram_stop_info,
 )
-from data_handler.tram.models import TramLuasStop
+from data_handler.tram.models import TramLuasForecast, TramLuasStop
 from tests.utils import assert_row_count, assert_rows
 
 # ── Sample XML responses ─────────────────────────────────────────────
@@ -177,6 +180,47 @@ class TestFetchForecastForStop:
             fetch_forecast_for_stop("STG")
 
 
+class TestFetchForecastsConcurrently:
+    """Test the pooled, concurrent forecast sweep."""
+
+    @patch("data_handler.common.http_fetcher.requests.Session.get")
+    def test_returns_parsed_rows_per_stop(self, mock_get: Mock) -> None:
+        def side_effect_get(url: str, **kwargs: object) -> Mock:
+            resp = Mock()
+            resp.raise_for_status = Mock()
+            if "stop=STG" in url:
+                resp.text = FORECAST_XML_RESPONSE
+            else:
+                resp.text = FORECAST_EMPTY_XML_RESPONSE
+            return resp
+
+        mock_get.side_effect = side_effect_get
+
+        forecasts, failed = fetch_forecasts_concurrently(["STG", "HAR"])
+
+        assert len(forecasts["STG"]) == 3
+        assert forecasts["HAR"] == []
+        assert failed == []
+
+    @patch("data_handler.common.http_fetcher.requests.Session.get")
+    def test_failed_stops_are_reported(self, mock_get: Mock) -> None:
+        def side_effect_get(url: str, **kwargs: object) -> Mock:
+            resp = Mock()
+            if "stop=HAR" in url:
+                resp.raise_for_status.side_effect = requests.HTTPError("503")
+            else:
+                resp.raise_for_status = Mock()
+                resp.text = FORECAST_XML_RESPONSE
+            return resp
+
+        mock_get.side_effect = side_effect_get
+
+        forecasts, failed = fetch_forecasts_concurrently(["STG", "HAR"])
+
+        assert list(forecasts) == ["STG"]
+        assert failed == ["HAR"]
+
+
 # ── process_tram_stop_info integration tests ───────────────────────────────
 
 
@@ -262,7 +306,7 @@ class TestLuasStopsToDb:
 class TestLuasForecastsToDb:
     """Integration tests for process_tram_live_data (mocked API, real DB)."""
 
-    @patch("data_handler.tram.forecast_handler.requests.get")
+    @patch("data_handler.common.http_fetcher.requests.Session.get")
     def test_inserts_forecasts_for_all_stops(
         self,
         mock_get: Mock,
@@ -315,7 +359,7 @@ class TestLuasForecastsToDb:
         # STG has 3 forecast entries, HAR has 0
         assert_row_count(db_session, "tram_luas_forecasts", 3)
 
-    @patch("data_handler.tram.forecast_handler.requests.get")
+    @patch("data_handler.common.http_fetcher.requests.Session.get")
     def test_clears_old_forecasts_before_inserting(
         self,
         mock_get: Mock,
@@ -350,7 +394,93 @@ class TestLuasForecastsToDb:
         # Should still be 3 — old ones deleted, new ones inserted
         assert_row_count(db_session, "tram_luas_forecasts", 3)
 
-    @patch("data_handler.tram.forecast_handler.requests.get")
+    @patch("data_handler.common.http_fetcher.requests.Session.get")
+    def test_failed_stop_keeps_previous_forecasts(
+        self,
+        mock_get: Mock,
+        db_session: Session,
+    ) -> None:
+        """A stop whose fetch fails keeps its forecasts; the others are replaced."""
+        for stop_id, name in [("STG", "St. Stephen's Green"), ("HAR", "Harcourt")]:
+            db_session.add(
+                TramLuasStop(
+                    stop_id=stop_id,
+                    line="green",
+                    name=name,
+                    pronunciation="",
+                    park_ride=False,
+                    cycle_ride=False,
+                    lat=53.33,
+                    lon=-6.26,
+                )
+            )
+        db_session.commit()
+
+        mock_response = Mock()
+        mock_response.text = FORECAST_XML_RESPONSE
+        mock_response.raise_for_status = Mock()
+        mock_get.return_value = mock_response
+        process_tram_live_data()
+
+        def side_effect_get(url: str, **kwargs: object) -> Mock:
+            if "stop=HAR" in url:
+                msg = "timed out"
+                raise requests.ConnectionError(msg)
+            resp = Mock()
+            resp.raise_for_status = Mock()
+            resp.text = FORECAST_EMPTY_XML_RESPONSE
+            return resp
+
+        mock_get.side_effect = side_effect_get
+        db_session.expire_all()
+        process_tram_live_data()
+
+        counts = dict(
+            db_session.execute(
+                select(TramLuasForecast.stop_id, func.count()).group_by(
+                    TramLuasForecast.stop_id
+                )
+            ).all()
+        )
+        assert counts == {"HAR": 3}
+
+    @patch("data_handler.common.http_fetcher.requests.Session.get")
+    def test_failed_stop_drops_expired_forecasts(
+        self,
+        mock_get: Mock,
+        db_session: Session,
+    ) -> None:
+        """Forecasts past the max age are dropped even if the stop's fetch fails."""
+        db_session.add(
+            TramLuasStop(
+                stop_id="HAR",
+                line="green",
+                name="Harcourt",
+                pronunciation="",
+                park_ride=False,
+                cycle_ride=False,
+                lat=53.33,
+                lon=-6.26,
+            )
+        )
+        db_session.add(
+            TramLuasForecast(
+                stop_id="HAR",
+                line="green",
+                direction="Inbound",
+                destination="Broombridge",
+                due_mins=3,
+                fetched_at=datetime.now(UTC) - timedelta(minutes=10),
+            )
+        )
+        db_session.commit()
+
+        mock_get.side_effect = requests.ConnectionError("timed out")
+        process_tram_live_data()
+
+        assert_row_count(db_session, "tram_luas_forecasts", 0)
+
+    @patch("data_handler.common.http_fetcher.requests.Session.get")
     def test_no_stops_in_db_returns_early(
         self,
         mock_get: Mock,
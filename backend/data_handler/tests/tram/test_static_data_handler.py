@@ -1,10 +1,14 @@
 import shutil
+from datetime import time
 from pathlib import Path
 
 import pytest
 from sqlalchemy.orm import Session
 
-from data_handler.tram.static_data_handler import process_tram_static_data
+from data_handler.tram.static_data_handler import (
+    parse_stop_time_row,
+    process_tram_static_data,
+)
 from tests.utils import assert_row_count, assert_rows
 
 
@@ -161,3 +165,25 @@ class TestProcessTramStaticData:
 
         process_tram_static_data(tram_gtfs_dir)
         assert_row_count(db_session, "tram_stops", 4)
+
+
+class TestParseStopTimeRow:
+    """Unit tests for parse_stop_time_row."""
+
+    def test_keeps_service_day_seconds_past_midnight(self) -> None:
+        stop_time = parse_stop_time_row(
+            {
+                "trip_id": "TRIP_G1",
+                "stop_id": "LUAS1",
+                "arrival_time": "24:58:00",
+                "departure_time": "25:00:30",
+                "stop_sequence": "7",
+                "stop_headsign": "",
+            }
+        )
+
+        assert stop_time.arrival_time == time(0, 58)
+        assert stop_time.arrival_seconds == 24 * 3600 + 58 * 60
+        assert stop_time.departure_time == time(1, 0, 30)
+        assert stop_time.departure_seconds == 25 * 3600 + 30
+        assert stop_time.headsign is None
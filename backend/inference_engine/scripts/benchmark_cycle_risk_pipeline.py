@@ -0,0 +1,147 @@
+# ruff: noqa: INP001
+"""
+Benchmark of the cycle risk training frame over all stations.
+
+Compares ``build_training_frame`` (labels and flow features computed for all
+stations at once) with the previous per-station loops: a row-by-row horizon
+scan for the labels and row-wise delta clipping for the flow rates. The loops
+scale linearly with rows, so they are timed on a sample of one station and
+scaled up; their output on the sample is checked to match:
+
+    python scripts/benchmark_cycle_risk_pipeline.py --stations 115 --days 30
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from inference_engine.indicators.cycle.risk_engine import (
+    EMPTY_THRESHOLD,
+    FULL_RATIO,
+    HORIZON_H,
+    build_training_frame,
+)
+
+# ── Synthetic snapshots ───────────────────────────────────────────
+
+
+def synthetic_snapshots(
+    stations: int, days: int, seed: int = 0
+) -> tuple[pd.DataFrame, pd.Series]:
+    """Random-walk snapshots at 1-minute cadence up to today, ~5% of them missing."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp.now(tz="UTC").floor("D") - pd.Timedelta(days=days)
+    ts = pd.date_range(start, periods=days * 24 * 60, freq="1min")
+    frames = []
+    for sid in range(1, stations + 1):
+        cap = int(rng.integers(15, 40))
+        walk = np.clip(np.cumsum(rng.integers(-2, 3, len(ts))) + cap // 2, 0, cap)
+        keep = rng.random(len(ts)) > 0.05
+        frames.append(
+            pd.DataFrame(
+                {
+                    "station_id": sid,
+                    "timestamp": ts[keep],
+                    "available_bikes": walk[keep],
+                    "capacity": cap,
+                }
+            )
+        )
+    hourly_risk = pd.DataFrame(
+        [
+            (sid, hour, rng.random())
+            for sid in range(1, stations + 1)
+            for hour in range(24)
+        ],
+        columns=["station_id", "hour_of_day", "empty_risk"],
+    ).set_index(["station_id", "hour_of_day"])["empty_risk"]
+    return pd.concat(frames, ignore_index=True), hourly_risk
+
+
+# ── Previous implementation (per-station loops) ───────────────────
+
+
+def legacy_labels(sdf: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    ts = sdf["timestamp"].to_numpy()
+    bikes = sdf["available_bikes"].to_numpy()
+    cap = sdf["capacity"].to_numpy()
+    horizon = np.timedelta64(HORIZON_H, "h")
+    empty = np.zeros(len(sdf), dtype=np.int8)
+    full = np.zeros(len(sdf), dtype=np.int8)
+    for i in range(len(sdf)):
+        for k in range(i + 1, len(sdf)):
+            if ts[k] - ts[i] > horizon:
+                break
+            if ts[k] == ts[i]:
+                continue
+            empty[i] |= bikes[k] <= EMPTY_THRESHOLD
+            full[i] |= cap[k] > 0 and bikes[k] / cap[k] >= FULL_RATIO
+    return empty, full
+
+
+def legacy_flow(sdf: pd.DataFrame) -> pd.DataFrame:
+    sdf = sdf.set_index("timestamp")
+    delta = sdf["available_bikes"].diff()
+    dep = delta.apply(lambda d: -d if pd.notna(d) and -5 <= d <= -1 else 0.0)
+    arr = delta.apply(lambda d: d if pd.notna(d) and 1 <= d <= 5 else 0.0)
+    return pd.DataFrame(
+        {
+            "departure_rate_30m": dep.rolling("30min").mean().fillna(0.0),
+            "arrival_rate_30m": arr.rolling("30min").mean().fillna(0.0),
+        }
+    ).reset_index(drop=True)
+
+
+# ── Benchmark ─────────────────────────────────────────────────────
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--stations", type=int, default=115)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--sample-days", type=int, default=3)
+    args = parser.parse_args()
+
+    df_all, hourly_risk = synthetic_snapshots(args.stations, args.days)
+    print(f"{len(df_all):,} snapshots, {args.stations} stations, {args.days} days")
+
+    started = time.perf_counter()
+    frame = build_training_frame(df_all, hourly_risk)
+    batched_s = time.perf_counter() - started
+
+    # Only a sample's own labels are comparable: the batched ones look past
+    # its end into the rest of the station's history
+    station = frame[frame["station_id"] == 1]
+    sample = station[
+        station["timestamp"]
+        < station["timestamp"].iloc[0] + pd.Timedelta(days=args.sample_days)
+    ]
+    started = time.perf_counter()
+    flow = legacy_flow(sample)
+    empty, full = legacy_labels(sample)
+    sample_s = time.perf_counter() - started
+    per_station_s = sample_s * len(frame) / len(sample)
+
+    pd.testing.assert_frame_equal(
+        sample[["departure_rate_30m", "arrival_rate_30m"]].reset_index(drop=True),
+        flow,
+    )
+    labelled = sample["timestamp"] <= sample["timestamp"].iloc[-1] - pd.Timedelta(
+        hours=HORIZON_H
+    )
+    np.testing.assert_array_equal(
+        sample["will_be_empty_2h"].to_numpy()[labelled], empty[labelled]
+    )
+    np.testing.assert_array_equal(
+        sample["will_be_full_2h"].to_numpy()[labelled], full[labelled]
+    )
+
+    print(f"per-station loops (previous): ~{per_station_s:8.1f} s (scaled up)")
+    print(f"batched:                       {batched_s:8.1f} s")
+    print(f"speed-up:                      {per_station_s / batched_s:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
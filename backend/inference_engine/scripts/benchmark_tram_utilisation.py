@@ -0,0 +1,272 @@
+# ruff: noqa: INP001
+"""
+Benchmark of the tram utilisation metrics over all time periods.
+
+Compares ``compute_period_metrics`` (one pass over all periods) with the
+previous implementation, which recomputed the name map, re-parsed every
+arrival time and walked the inputs row by row once per period. Both run on
+the same synthetic network, and their metrics are checked to agree:
+
+    python scripts/benchmark_tram_utilisation.py --trips-per-hour 12 --repeat 5
+"""
+
+import argparse
+import math
+import random
+import statistics
+import time
+from dataclasses import astuple
+
+import pandas as pd
+
+from inference_engine.indicators.tram.tram_utilisation import (
+    TIME_PERIODS,
+    TRAM_CAPACITY,
+    StopMetrics,
+    TramData,
+    _expand_hours,
+    _match_stop_names,
+    compute_period_metrics,
+)
+
+_LINES = {"red": 32, "green": 35}
+
+
+# ── Synthetic network ─────────────────────────────────────────────
+
+
+def synthetic_data(trips_per_hour: int, seed: int = 0) -> TramData:
+    """A two-line network with a weekday timetable from 05:00 to 01:00."""
+    rng = random.Random(seed)  # noqa: S311
+    luas, gtfs, stop_times, delays = [], [], [], []
+    for line, n_stops in _LINES.items():
+        for i in range(n_stops):
+            sid = f"{line[0].upper()}{i:02d}"
+            name = f"{line.capitalize()} Stop {i}"
+            luas.append({"stop_id": sid, "name": name, "line": line})
+            # GTFS names one platform per direction, some with a " - " variant
+            gtfs_name = f"{line.capitalize()} - Stop {i}" if i % 5 == 0 else name
+            gtfs.extend({"id": f"{sid}{d}", "name": gtfs_name} for d in ("in", "out"))
+            delays.append(
+                {
+                    "stop_id": sid,
+                    "stop_name": name,
+                    "line": line,
+                    "avg_delay": round(rng.uniform(0, 4), 1),
+                    "delay_count": rng.randint(1, 500),
+                }
+            )
+        for direction, platform in ((0, "out"), (1, "in")):
+            order = range(n_stops) if direction == 0 else range(n_stops - 1, -1, -1)
+            for hour in range(5, 25):
+                for k in range(trips_per_hour):
+                    trip_id = f"{line}-{direction}-{hour}-{k}"
+                    minute = k * 60 // trips_per_hour
+                    for seq, i in enumerate(order):
+                        t = hour * 3600 + minute * 60 + seq * 90
+                        stop_times.append(
+                            {
+                                "trip_id": trip_id,
+                                "stop_id": f"{line[0].upper()}{i:02d}{platform}",
+                                "arrival_time": (
+                                    f"{t // 3600:02d}:{t // 60 % 60:02d}:{t % 60:02d}"
+                                ),
+                                "sequence": seq + 1,
+                                "direction_id": direction,
+                            }
+                        )
+    hourly = [
+        {
+            "line_code": code,
+            "line_label": label,
+            "time_code": hour,
+            "time_label": f"{hour:02d}:00 - {hour + 1:02d}:00",
+            "value": rng.uniform(1, 9),
+        }
+        for code, label in (("R", "Red line"), ("G", "Green line"), ("A", "All"))
+        for hour in range(5, 24)
+    ]
+    return TramData(
+        luas_stops=pd.DataFrame(luas),
+        gtfs_stops=pd.DataFrame(gtfs),
+        stop_times=pd.DataFrame(stop_times),
+        hourly_dist=pd.DataFrame(hourly),
+        delay_df=pd.DataFrame(delays),
+        daily_passengers={"red": 86_000.0, "green": 84_000.0},
+    )
+
+
+# ── Previous implementation (one call per period) ─────────────────
+
+
+def _legacy_name_map(luas_stops: pd.DataFrame, gtfs_stops: pd.DataFrame) -> dict:
+    gtfs_names = set(gtfs_stops["name"].str.lower().unique())
+    normalised = {n.replace(" - ", " ").replace("  ", " "): n for n in gtfs_names}
+    mapping = {}
+    for _, row in luas_stops.iterrows():
+        ln = row["name"].lower()
+        sid = row["stop_id"]
+        if ln in gtfs_names:
+            mapping[sid] = ln
+        elif ln.replace(" - ", " ").replace("  ", " ") in normalised:
+            mapping[sid] = normalised[ln.replace(" - ", " ").replace("  ", " ")]
+        else:
+            for gn in gtfs_names:
+                if gn in ln or ln in gn:
+                    mapping[sid] = gn
+                    break
+    return mapping
+
+
+def _legacy_parse_hour(label: str) -> int:
+    try:
+        return int(label[:2].strip())
+    except (ValueError, IndexError):
+        return -1
+
+
+def _legacy_stop_metrics(
+    data: TramData, start_hour: int, end_hour: int
+) -> list[StopMetrics]:
+    luas_stops = data.luas_stops
+    luas_to_gtfs = _legacy_name_map(luas_stops, data.gtfs_stops)
+    name_to_ids: dict[str, list] = {}
+    for _, row in data.gtfs_stops.iterrows():
+        name_to_ids.setdefault(row["name"].lower(), []).append(row["id"])
+    gtfs_id_to_name = {gid: name for name, ids in name_to_ids.items() for gid in ids}
+
+    hour_set = set(_expand_hours(start_hour, end_hour))
+    st = data.stop_times.copy()
+    st["hour"] = pd.to_datetime(
+        st["arrival_time"].astype(str), format="%H:%M:%S", errors="coerce"
+    ).dt.hour
+    st = st[st["hour"].isin(hour_set)]
+    st["gtfs_name"] = st["stop_id"].map(gtfs_id_to_name)
+    st = st.dropna(subset=["gtfs_name"])
+    gtfs_name_to_line = {}
+    for _, row in luas_stops.iterrows():
+        gname = luas_to_gtfs.get(row["stop_id"])
+        if gname:
+            gtfs_name_to_line[gname] = row["line"]
+    st["line"] = st["gtfs_name"].map(gtfs_name_to_line)
+
+    trip_counts = (
+        st.groupby(["gtfs_name", "direction_id"])["trip_id"]
+        .nunique()
+        .unstack(fill_value=0)
+        .rename(columns={0: "outbound", 1: "inbound"})
+    )
+    line_totals = st.groupby("line")["trip_id"].nunique().to_dict()
+    avg_seq = st.groupby("gtfs_name")["sequence"].mean()
+
+    hourly_pct: dict[str, float] = {}
+    for _, row in data.hourly_dist.iterrows():
+        h = _legacy_parse_hour(row["time_label"])
+        if h in hour_set and row["value"] is not None:
+            lk = str(row.get("line_label", row["line_code"])).strip().lower()
+            key = "red" if "red" in lk else "green" if "green" in lk else "_all"
+            hourly_pct[key] = hourly_pct.get(key, 0.0) + row["value"]
+    delay_lookup = {
+        row["stop_id"]: (
+            float(row["avg_delay"]) if row["avg_delay"] else 0.0,
+            int(row["delay_count"]) if row["delay_count"] else 0,
+        )
+        for _, row in data.delay_df.iterrows()
+    }
+
+    metrics = []
+    for _, luas_row in luas_stops.iterrows():
+        sid, line = luas_row["stop_id"], luas_row["line"]
+        gname = luas_to_gtfs.get(sid)
+        if gname is None:
+            continue
+        tc = trip_counts.loc[gname] if gname in trip_counts.index else {}
+        out_trips, in_trips = int(tc.get("outbound", 0)), int(tc.get("inbound", 0))
+        lt = line_totals.get(line, 1)
+        pct = hourly_pct.get(line, hourly_pct.get("_all", 0.0)) / 100.0
+        daily = data.daily_passengers.get(line, 80_000.0)
+        est_in = (in_trips / max(1, lt)) * pct * daily
+        est_out = (out_trips / max(1, lt)) * pct * daily
+        capacity = (out_trips + in_trips) * TRAM_CAPACITY.get(line, 200)
+        d_avg, d_count = delay_lookup.get(sid, (0.0, 0))
+        metrics.append(
+            StopMetrics(
+                stop_id=sid,
+                stop_name=luas_row["name"],
+                line=line,
+                sequence=float(avg_seq.get(gname, 0.0)),
+                inbound_trips=in_trips,
+                outbound_trips=out_trips,
+                total_trips=out_trips + in_trips,
+                est_inbound_pax=round(est_in, 1),
+                est_outbound_pax=round(est_out, 1),
+                est_total_pax=round(est_in + est_out, 1),
+                capacity=round(capacity, 1),
+                utilisation=round(
+                    (est_in + est_out) / capacity if capacity > 0 else 0.0, 4
+                ),
+                avg_delay_mins=d_avg,
+                delay_count=d_count,
+            )
+        )
+    return metrics
+
+
+def legacy_period_metrics(data: TramData) -> dict[str, list[StopMetrics]]:
+    return {
+        p["key"]: _legacy_stop_metrics(data, p["start"], p["end"]) for p in TIME_PERIODS
+    }
+
+
+# ── Benchmark ─────────────────────────────────────────────────────
+
+
+def _assert_same(
+    expected: dict[str, list[StopMetrics]], actual: dict[str, list[StopMetrics]]
+) -> None:
+    assert expected.keys() == actual.keys()
+    for key, metrics in expected.items():
+        assert len(metrics) == len(actual[key]), key
+        for a, b in zip(metrics, actual[key], strict=True):
+            for x, y in zip(astuple(a), astuple(b), strict=True):
+                same = (
+                    math.isclose(x, y, rel_tol=1e-9, abs_tol=1e-9)
+                    if isinstance(x, float)
+                    else x == y
+                )
+                assert same, (key, a, b)
+
+
+def _time(fn: object, data: TramData, repeat: int) -> tuple[float, object]:
+    timings, result = [], None
+    for _ in range(repeat):
+        _match_stop_names.cache_clear()
+        started = time.perf_counter()
+        result = fn(data)  # type: ignore[operator]
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trips-per-hour", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    data = synthetic_data(args.trips_per_hour)
+    print(
+        f"{len(data.stop_times):,} stop times, {len(data.luas_stops)} Luas stops, "
+        f"{len(TIME_PERIODS)} periods"
+    )
+
+    legacy_s, expected = _time(legacy_period_metrics, data, args.repeat)
+    one_pass_s, actual = _time(compute_period_metrics, data, args.repeat)
+    _assert_same(expected, actual)  # type: ignore[arg-type]
+
+    print(f"per period (previous): {legacy_s * 1000:8.1f} ms")
+    print(f"one pass:              {one_pass_s * 1000:8.1f} ms")
+    print(f"speed-up:              {legacy_s / one_pass_s:8.1f}x  (metrics identical)")
+
+
+if __name__ == "__main__":
+    main()
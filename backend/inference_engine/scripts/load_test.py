@@ -0,0 +1,71 @@
+# ruff: noqa: INP001
+"""
+Closed-loop load test for the inference engine's read endpoints.
+
+Runs ``--concurrency`` clients against each endpoint for ``--duration``
+seconds and reports throughput and latency percentiles:
+
+    python scripts/load_test.py --base-url http://localhost:8000 \\
+        --concurrency 50 --duration 30 /ev/charging-stations /train/demand
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+_DEFAULT_PATHS = ["/ev/charging-stations", "/train/demand"]
+
+
+async def _client(
+    client: httpx.AsyncClient, path: str, deadline: float, latencies: list[float]
+) -> int:
+    errors = 0
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.get(path)
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            errors += 1
+    return errors
+
+
+async def _run(base_url: str, path: str, concurrency: int, duration: float) -> None:
+    latencies: list[float] = []
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=60
+    ) as client:
+        await client.get(path)  # warm the route's caches and the pool
+        deadline = time.perf_counter() + duration
+        errors = sum(
+            await asyncio.gather(
+                *(
+                    _client(client, path, deadline, latencies)
+                    for _ in range(concurrency)
+                )
+            )
+        )
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{path}: {len(latencies) / duration:.1f} req/s, "
+        f"p50 {quantiles[49] * 1000:.0f} ms, p95 {quantiles[94] * 1000:.0f} ms, "
+        f"p99 {quantiles[98] * 1000:.0f} ms, {errors} non-200"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("paths", nargs="*", default=_DEFAULT_PATHS)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0)
+    args = parser.parse_args()
+    for path in args.paths:
+        asyncio.run(_run(args.base_url, path, args.concurrency, args.duration))
+
+
+if __name__ == "__main__":
+    main()
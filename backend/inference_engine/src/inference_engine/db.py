@@ -1,4 +1,9 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
 from inference_engine.settings.database_settings import get_db_settings
@@ -13,3 +18,34 @@ engine = create_engine(
     pool_pre_ping=True,
 )
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+# Pool shared by the async request handlers of all routers. Background jobs
+# and CPU-bound handlers keep using the sync engine above.
+_settings = get_db_settings()
+async_engine = create_async_engine(
+    str(_settings.dsn),
+    pool_size=_settings.pool_size,
+    max_overflow=_settings.pool_max_overflow,
+    pool_timeout=_settings.pool_timeout_s,
+    pool_pre_ping=True,
+    connect_args={
+        "prepare_threshold": _settings.prepare_threshold,
+        "options": f"-c statement_timeout={int(_settings.request_timeout_s * 1000)}",
+    },
+)
+
+
+@asynccontextmanager
+async def request_connection() -> AsyncIterator[AsyncConnection]:
+    """
+    Yield a pooled async connection for one request's queries.
+
+    The block is cancelled after DB_REQUEST_TIMEOUT_S seconds (raising
+    TimeoutError), including the wait for a free connection; the same limit
+    is set as the server-side statement_timeout.
+    """
+    async with (
+        asyncio.timeout(_settings.request_timeout_s),
+        async_engine.connect() as conn,
+    ):
+        yield conn
@@ -1,34 +1,48 @@
 """EV Charging API endpoints."""
 
-from fastapi import APIRouter, HTTPException
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 
 from inference_engine import ev_service
+from inference_engine.response_cache import encoded_json_response
 
 router = APIRouter(prefix="/ev", tags=["EV Charging"])
 
 
 @router.get("/areas-geojson")
-def get_areas_geojson() -> dict:
+async def get_areas_geojson(
+    request: Request,
+    zoom: Annotated[
+        int | None,
+        Query(
+            ge=0,
+            le=ev_service.MAX_AREAS_ZOOM,
+            description="Map zoom level to simplify geometries for",
+        ),
+    ] = None,
+) -> Response:
     """Return a GeoJSON FeatureCollection of Dublin electoral divisions with charging demand data."""
     try:
-        return ev_service.get_areas_geojson()
+        encoded = await ev_service.get_areas_geojson(zoom)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
+    return encoded_json_response(request, encoded)
 
 
 @router.get("/charging-stations")
-def get_charging_stations() -> dict:
+async def get_charging_stations() -> dict:
     """Return all Dublin EV charging stations with location and charger count."""
     try:
-        return ev_service.get_charging_stations()
+        return await ev_service.get_charging_stations()
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
 @router.get("/charging-demand")
-def get_charging_demand() -> dict:
+async def get_charging_demand() -> dict:
     """Return per-area EV charging demand statistics for Dublin."""
     try:
-        return ev_service.get_charging_demand()
+        return await ev_service.get_charging_demand()
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
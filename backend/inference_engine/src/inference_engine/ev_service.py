@@ -1,29 +1,46 @@
 """EV Charging service."""
 
+import asyncio
+import math
 import unicodedata
-from collections.abc import Generator
-from contextlib import contextmanager
 
-import psycopg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
 
-from inference_engine.settings.api_settings import get_db_settings
+from inference_engine.db import request_connection
+from inference_engine.response_cache import EncodedJson, encode_json
 
+MAX_AREAS_ZOOM = 18
 
-@contextmanager
-def _get_db() -> Generator[psycopg.Connection, None, None]:
-    """Yield a database connection and ensure it is closed on exit."""
-    s = get_db_settings()
-    conn = psycopg.connect(
-        host=s.db_host,
-        port=s.db_port,
-        dbname=s.db_name,
-        user=s.db_user,
-        password=s.db_password,
-    )
-    try:
-        yield conn
-    finally:
-        conn.close()
+_UNVERSIONED = "unversioned"  # no import recorded yet
+
+# Recorded by the data handler's car static data import
+_AREAS_VERSION_SQL = text(
+    "SELECT MAX(imported_at) FROM external_data.source_file_manifests"
+    " WHERE source = 'ev_areas'"
+)
+
+_DIVISIONS_SQL = text(
+    "SELECT ed_english, county_english,"
+    "       ST_AsGeoJSON(geom)::json AS geometry"
+    " FROM external_data.ev_electoral_divisions"
+)
+
+_SIMPLIFIED_DIVISIONS_SQL = text(
+    "SELECT ed_english, county_english,"
+    "       ST_AsGeoJSON(ST_SimplifyPreserveTopology(geom, :tolerance), :digits)::json"
+    "       AS geometry"
+    " FROM external_data.ev_electoral_divisions"
+)
+
+_AREAS_DEMAND_SQL = text(
+    "SELECT electoral_division, charging_demand, registered_ev"
+    " FROM external_data.ev_charging_demand"
+)
+
+# Encoded areas collection by zoom level (None: full resolution)
+_areas_cache: dict[int | None, EncodedJson] = {}
+_areas_lock = asyncio.Lock()
 
 
 def _normalize(name: str) -> str:
@@ -32,21 +49,29 @@ def _normalize(name: str) -> str:
     return "".join(c for c in nfkd if not unicodedata.combining(c)).lower().strip()
 
 
-def get_areas_geojson() -> dict:
-    """Return a GeoJSON FeatureCollection of Dublin electoral divisions with charging demand data."""
-    with _get_db() as conn, conn.cursor() as cur:
-        cur.execute(
-            "SELECT ed_english, county_english,"
-            "       ST_AsGeoJSON(geom)::json AS geometry"
-            " FROM external_data.ev_electoral_divisions"
-        )
-        division_rows = cur.fetchall()
+async def _areas_data_version(conn: AsyncConnection) -> str:
+    imported_at = (await conn.execute(_AREAS_VERSION_SQL)).scalar()
+    return imported_at.isoformat() if imported_at is not None else _UNVERSIONED
+
+
+def _simplification(zoom: int) -> tuple[float, int]:
+    """Return the (tolerance in degrees, coordinate digits) of a zoom level."""
+    degrees_per_pixel = 360 / (256 * 2**zoom)
+    digits = max(0, math.ceil(-math.log10(degrees_per_pixel))) + 1
+    return degrees_per_pixel / 2, digits
 
-        cur.execute(
-            "SELECT electoral_division, charging_demand, registered_ev"
-            " FROM external_data.ev_charging_demand"
-        )
-        demand_rows = cur.fetchall()
+
+async def _build_areas_geojson(conn: AsyncConnection, zoom: int | None) -> dict:
+    if zoom is None:
+        division_rows = (await conn.execute(_DIVISIONS_SQL)).all()
+    else:
+        tolerance, digits = _simplification(zoom)
+        division_rows = (
+            await conn.execute(
+                _SIMPLIFIED_DIVISIONS_SQL, {"tolerance": tolerance, "digits": digits}
+            )
+        ).all()
+    demand_rows = (await conn.execute(_AREAS_DEMAND_SQL)).all()
 
     demand_lookup: dict = {}
     for electoral_division, charging_demand, registered_ev in demand_rows:
@@ -76,14 +101,46 @@ def get_areas_geojson() -> dict:
     return {"type": "FeatureCollection", "features": features}
 
 
-def get_charging_stations() -> dict:
+async def get_areas_geojson(zoom: int | None = None) -> EncodedJson:
+    """
+    Return the GeoJSON FeatureCollection of Dublin electoral divisions with
+    charging demand data, encoded.
+
+    The encoded collection is cached per zoom level until the data handler
+    reloads the EV area tables. With a zoom level, geometries are simplified
+    to half a pixel at that zoom and coordinates rounded to match.
+    """
+    async with request_connection() as conn:
+        data_version = await _areas_data_version(conn)
+    cached = _areas_cache.get(zoom)
+    if cached is not None and cached.data_version == data_version:
+        return cached
+
+    # Waiters hold no connection while one request rebuilds the collection
+    async with _areas_lock:
+        cached = _areas_cache.get(zoom)
+        if cached is None or cached.data_version != data_version:
+            async with request_connection() as conn:
+                payload = await _build_areas_geojson(conn, zoom)
+            cached = encode_json(data_version, payload)
+            for key, stale in list(_areas_cache.items()):
+                if stale.data_version != data_version:
+                    del _areas_cache[key]
+            _areas_cache[zoom] = cached
+    return cached
+
+
+async def get_charging_stations() -> dict:
     """Return all Dublin EV charging stations with location and charger count."""
-    with _get_db() as conn, conn.cursor() as cur:
-        cur.execute(
-            "SELECT address, county, lat, lon, charger_count, is_24_7"
-            " FROM external_data.ev_charging_points"
-        )
-        rows = cur.fetchall()
+    async with request_connection() as conn:
+        rows = (
+            await conn.execute(
+                text(
+                    "SELECT address, county, lat, lon, charger_count, is_24_7"
+                    " FROM external_data.ev_charging_points"
+                )
+            )
+        ).all()
 
     stations = [
         {
@@ -100,18 +157,21 @@ def get_charging_stations() -> dict:
     return {"total_stations": len(stations), "stations": stations}
 
 
-def get_charging_demand() -> dict:
+async def get_charging_demand() -> dict:
     """Return per-area EV charging demand statistics for Dublin."""
-    with _get_db() as conn, conn.cursor() as cur:
-        cur.execute(
-            "SELECT electoral_division, registered_ev, charging_demand,"
-            "       home_charge_pct, charge_frequency"
-            " FROM external_data.ev_charging_demand"
-            " WHERE electoral_division ILIKE ANY"
-            "       (ARRAY['%Dublin City%', '%Fingal%', '%South Dublin%'])"
-            " ORDER BY charging_demand DESC"
-        )
-        rows = cur.fetchall()
+    async with request_connection() as conn:
+        rows = (
+            await conn.execute(
+                text(
+                    "SELECT electoral_division, registered_ev, charging_demand,"
+                    "       home_charge_pct, charge_frequency"
+                    " FROM external_data.ev_charging_demand"
+                    " WHERE electoral_division ILIKE ANY"
+                    "       (ARRAY['%Dublin City%', '%Fingal%', '%South Dublin%'])"
+                    " ORDER BY charging_demand DESC"
+                )
+            )
+        ).all()
 
     areas = [
         {
@@ -0,0 +1,130 @@
+"""
+Versioned store of trained cycle risk models.
+
+The risk engine worker publishes every trained or updated ``RiskModels`` as a
+new row of backend.cycle_risk_models; a restarted worker or a newly elected
+leader resumes from the latest version. Models are serialised as a compressed
+NumPy archive of plain arrays (no pickle), so loading a stored version never
+executes code. Only the most recent KEEP_VERSIONS versions are kept.
+"""
+
+from __future__ import annotations
+
+import io
+from dataclasses import fields
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Engine, text
+
+from inference_engine.indicators.cycle.risk_engine import RiskModels
+
+KEEP_VERSIONS = 5
+
+_PAYLOAD_FORMAT = 1
+
+_CREATE_MODELS_TABLE_SQL = text("""
+    CREATE TABLE IF NOT EXISTS backend.cycle_risk_models (
+        version     BIGSERIAL PRIMARY KEY,
+        trained_at  TIMESTAMPTZ NOT NULL,
+        created_at  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        payload     BYTEA NOT NULL
+    )
+""")
+
+_INSERT_MODELS_SQL = text("""
+    INSERT INTO backend.cycle_risk_models (trained_at, payload)
+    VALUES (:trained_at, :payload)
+    RETURNING version
+""")
+
+_PRUNE_MODELS_SQL = text("""
+    DELETE FROM backend.cycle_risk_models
+    WHERE version <= :version - :keep
+""")
+
+_LATEST_MODELS_SQL = text("""
+    SELECT version, payload
+    FROM backend.cycle_risk_models
+    ORDER BY version DESC
+    LIMIT 1
+""")
+
+_ARRAY_FIELDS = [
+    f.name for f in fields(RiskModels) if f.name not in {"hourly_risk", "trained_at"}
+]
+
+
+def serialise_models(models: RiskModels) -> bytes:
+    """Return ``models`` as a compressed ``.npz`` archive."""
+    arrays = {name: getattr(models, name) for name in _ARRAY_FIELDS}
+    hourly_risk = models.hourly_risk
+    buffer = io.BytesIO()
+    np.savez_compressed(
+        buffer,
+        format=np.array(_PAYLOAD_FORMAT),
+        trained_at=np.array(models.trained_at.isoformat()),
+        hourly_risk_station_id=hourly_risk.index.get_level_values(
+            "station_id"
+        ).to_numpy(dtype=np.int64),
+        hourly_risk_hour=hourly_risk.index.get_level_values("hour_of_day").to_numpy(
+            dtype=np.int64
+        ),
+        hourly_risk_value=hourly_risk.to_numpy(dtype=np.float64),
+        **arrays,
+    )
+    return buffer.getvalue()
+
+
+def deserialise_models(payload: bytes) -> RiskModels:
+    """
+    Rebuild ``RiskModels`` from ``serialise_models`` output.
+
+    Raises:
+        ValueError: If the payload was written in an unknown format
+    """
+    with np.load(io.BytesIO(payload), allow_pickle=False) as archive:
+        payload_format = int(archive["format"])
+        if payload_format != _PAYLOAD_FORMAT:
+            msg = f"Unsupported cycle risk model format {payload_format}"
+            raise ValueError(msg)
+        hourly_risk = pd.Series(
+            archive["hourly_risk_value"],
+            index=pd.MultiIndex.from_arrays(
+                [archive["hourly_risk_station_id"], archive["hourly_risk_hour"]],
+                names=["station_id", "hour_of_day"],
+            ),
+            name="empty_risk",
+        )
+        return RiskModels(
+            **{name: archive[name] for name in _ARRAY_FIELDS},
+            hourly_risk=hourly_risk,
+            trained_at=datetime.fromisoformat(str(archive["trained_at"])),
+        )
+
+
+def ensure_model_store(engine: Engine) -> None:
+    """Create the model store table if it does not exist."""
+    with engine.begin() as conn:
+        conn.execute(_CREATE_MODELS_TABLE_SQL)
+
+
+def save_models(engine: Engine, models: RiskModels) -> int:
+    """Publish ``models`` as a new version, prune old versions and return it."""
+    with engine.begin() as conn:
+        version = conn.execute(
+            _INSERT_MODELS_SQL,
+            {"trained_at": models.trained_at, "payload": serialise_models(models)},
+        ).scalar_one()
+        conn.execute(_PRUNE_MODELS_SQL, {"version": version, "keep": KEEP_VERSIONS})
+    return version
+
+
+def load_latest_models(engine: Engine) -> tuple[int, RiskModels] | None:
+    """Return the newest stored (version, models), or None if the store is empty."""
+    with engine.connect() as conn:
+        row = conn.execute(_LATEST_MODELS_SQL).first()
+    if row is None:
+        return None
+    return row.version, deserialise_models(bytes(row.payload))
@@ -14,15 +14,20 @@ Features used per station:
   arrival_rate_30m      avg bikes arriving per interval over last 30 min
 
 Schedule:
-  Train on startup, then once per calendar day at midnight.
-  Score every 5 minutes.
+  Train on startup and then every FULL_RETRAIN_DAYS days from the full
+  30-day history. On the other days, update the models incrementally from
+  the snapshots added since the last update (see ``update_models``).
+  The schedule is driven by the risk engine worker (see ``worker``), which
+  runs in its own process and publishes every model to the model store.
 """
 
 from __future__ import annotations
 
 import logging
-import time
-from dataclasses import dataclass
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
 from datetime import UTC, datetime
 from zoneinfo import ZoneInfo
 
@@ -44,6 +49,17 @@ FULL_RATIO = 0.95  # bikes / capacity ≥ this → station considered "full"
 HORIZON_H = 2  # predict emptiness / fullness within this many hours
 MIN_ROWS = 50  # skip station if not enough training rows
 SCORE_INTERVAL_S = 300  # score every 5 minutes
+TRAIN_WORKERS = min(4, os.cpu_count() or 1)  # processes fitting station models
+FULL_RETRAIN_DAYS = 7  # retrain from the full history this often; update in between
+
+# Incremental updates: full-batch gradient steps on each update's new rows,
+# starting from the current coefficients
+_SGD_EPOCHS = 20
+_SGD_LEARNING_RATE = 0.1
+_SGD_ALPHA = 1e-4  # L2 penalty
+# Snapshots kept before the labelled cutoff, as context for the flow features
+_BUFFER_CONTEXT = pd.Timedelta(hours=1)
+_HORIZON = pd.Timedelta(hours=HORIZON_H)
 
 FEATURES = [
     "bike_ratio",
@@ -70,16 +86,32 @@ _SNAPSHOTS_SQL = text("""
     ORDER BY s.station_id, s.timestamp
 """)
 
-_HOURLY_RISK_SQL = text("""
+_SNAPSHOTS_SINCE_SQL = text("""
+    SELECT
+        s.station_id,
+        s.timestamp,
+        s.available_bikes,
+        st.capacity
+    FROM external_data.dublin_bikes_station_snapshots s
+    JOIN external_data.dublin_bikes_stations st
+      ON s.station_id = st.station_id
+    WHERE s.timestamp > :since
+      AND s.is_installed = true
+    ORDER BY s.station_id, s.timestamp
+""")
+
+# Per-day counts, so that the 30-day window can be rolled forward in memory
+_HOURLY_COUNTS_SQL = text("""
     SELECT
         station_id,
+        (timestamp AT TIME ZONE 'Europe/Dublin')::date AS day,
         EXTRACT(HOUR FROM timestamp AT TIME ZONE 'Europe/Dublin')::int AS hour_of_day,
-        COUNT(CASE WHEN available_bikes <= 2 THEN 1 END)::float
-            / NULLIF(COUNT(*), 0) AS empty_risk
+        COUNT(CASE WHEN available_bikes <= 2 THEN 1 END) AS empty_count,
+        COUNT(*) AS total_count
     FROM external_data.dublin_bikes_station_snapshots
     WHERE timestamp >= NOW() - INTERVAL '30 days'
       AND is_installed = true
-    GROUP BY station_id, hour_of_day
+    GROUP BY station_id, day, hour_of_day
 """)
 
 _CURRENT_SNAPSHOT_SQL = text("""
@@ -125,10 +157,16 @@ _CREATE_SCORES_TABLE_SQL = text("""
     )
 """)
 
+# One statement for all stations: the scores are passed as parallel arrays
 _UPSERT_SQL = text("""
     INSERT INTO backend.cycle_station_risk_scores
         (station_id, empty_risk_2h, full_risk_2h, scored_at, model_trained_at)
-    VALUES (:station_id, :empty_risk_2h, :full_risk_2h, :scored_at, :model_trained_at)
+    SELECT s.station_id, s.empty_risk_2h, s.full_risk_2h, :scored_at, :model_trained_at
+    FROM unnest(
+        CAST(:station_ids AS integer[]),
+        CAST(:empty_risks AS double precision[]),
+        CAST(:full_risks AS double precision[])
+    ) AS s (station_id, empty_risk_2h, full_risk_2h)
     ON CONFLICT (station_id) DO UPDATE SET
         empty_risk_2h    = EXCLUDED.empty_risk_2h,
         full_risk_2h     = EXCLUDED.full_risk_2h,
@@ -147,51 +185,120 @@ def _add_time_features(df: pd.DataFrame) -> pd.DataFrame:
 
 
 def _add_flow_features(df: pd.DataFrame) -> pd.DataFrame:
-    """Rolling 30-min departure/arrival rates for a single station's dataframe."""
-    df = df.copy().set_index("timestamp").sort_index()
-    df["delta"] = df["available_bikes"].diff()
-    df["dep"] = df["delta"].apply(
-        lambda d: -d if pd.notna(d) and -5 <= d <= -1 else 0.0
+    """
+    Rolling 30-min departure/arrival rates for every station.
+
+    ``df`` must be sorted by station_id, then timestamp.
+    """
+    delta = df.groupby("station_id", sort=False)["available_bikes"].diff()
+    df["dep"] = (-delta).where(delta.between(-5, -1), 0.0)
+    df["arr"] = delta.where(delta.between(1, 5), 0.0)
+    # Groups come out in order of appearance, i.e. in df's row order
+    rates = (
+        df.groupby("station_id", sort=False)
+        .rolling("30min", on="timestamp")[["dep", "arr"]]
+        .mean()
+        .fillna(0.0)
     )
-    df["arr"] = df["delta"].apply(lambda d: d if pd.notna(d) and 1 <= d <= 5 else 0.0)
-    df["departure_rate_30m"] = df["dep"].rolling("30min").mean().fillna(0.0)
-    df["arrival_rate_30m"] = df["arr"].rolling("30min").mean().fillna(0.0)
-    return df.drop(columns=["dep", "arr", "delta"]).reset_index()
+    df["departure_rate_30m"] = rates["dep"].to_numpy()
+    df["arrival_rate_30m"] = rates["arr"].to_numpy()
+    return df.drop(columns=["dep", "arr"])
+
+
+def _hourly_counts(df: pd.DataFrame) -> pd.DataFrame:
+    """Empty/total snapshot counts per station, Dublin day and hour of day."""
+    ts = df["timestamp"].dt.tz_convert(_DUBLIN)
+    return (
+        pd.DataFrame(
+            {
+                "station_id": df["station_id"].to_numpy(),
+                "day": ts.dt.date.to_numpy(),
+                "hour_of_day": ts.dt.hour.to_numpy(),
+                "empty_count": (df["available_bikes"] <= EMPTY_THRESHOLD).to_numpy(),
+                "total_count": 1,
+            }
+        )
+        .groupby(["station_id", "day", "hour_of_day"], as_index=False)
+        .sum()
+    )
+
+
+def _hourly_risk(counts: pd.DataFrame) -> pd.Series:
+    """Historical P(empty) by (station_id, hour_of_day) from per-day counts."""
+    totals = counts.groupby(["station_id", "hour_of_day"])[
+        ["empty_count", "total_count"]
+    ].sum()
+    return (totals["empty_count"] / totals["total_count"]).rename("empty_risk")
+
+
+def _add_hourly_risk(df: pd.DataFrame, hourly_risk: pd.Series) -> pd.DataFrame:
+    """Historical P(empty) of each row's station at the row's hour of day."""
+    keys = pd.MultiIndex.from_arrays(
+        [df["station_id"], df["hour_of_day"].astype(int)],
+        names=["station_id", "hour_of_day"],
+    )
+    df["empty_risk_this_hour"] = hourly_risk.reindex(keys).fillna(0.0).to_numpy()
+    return df
 
 
 def _compute_labels(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Two-pointer O(n) scan.
-    For each row at time T, label = 1 if the station becomes empty (or full)
-    within the next HORIZON_H hours.
+    For each row at time T, label = 1 if its station becomes empty (or full)
+    within (T, T + HORIZON_H].
+
+    ``df`` must be sorted by station_id, then timestamp. Each row's horizon
+    window is located with a binary search over (station, time) keys, and a
+    window is labelled from prefix sums of the empty/full flags, so every
+    station is labelled in one O(n log n) pass.
     """
-    df = df.sort_values("timestamp").reset_index(drop=True)
-    ts = df["timestamp"].values
-    bikes = df["available_bikes"].values
-    cap = df["capacity"].values
-    n = len(df)
-    horizon = np.timedelta64(HORIZON_H, "h")
-
-    empty_labels = np.zeros(n, dtype=np.int8)
-    full_labels = np.zeros(n, dtype=np.int8)
-
-    j = 0
-    for i in range(n):
-        while j < n and ts[j] <= ts[i]:
-            j += 1
-        k = j
-        while k < n and (ts[k] - ts[i]) <= horizon:
-            if bikes[k] <= EMPTY_THRESHOLD:
-                empty_labels[i] = 1
-            if cap[k] > 0 and bikes[k] / cap[k] >= FULL_RATIO:
-                full_labels[i] = 1
-            k += 1
-
-    df["will_be_empty_2h"] = empty_labels
-    df["will_be_full_2h"] = full_labels
+    ts = df["timestamp"].dt.as_unit("ns").astype("int64").to_numpy()
+    bikes = df["available_bikes"].to_numpy(dtype=float)
+    cap = df["capacity"].to_numpy(dtype=float)
+    horizon = np.timedelta64(HORIZON_H, "h").astype("timedelta64[ns]").astype(np.int64)
+
+    # Offset each station's times so that no window crosses into the next one
+    station_codes, _ = pd.factorize(df["station_id"])
+    rel = ts - ts.min(initial=0)
+    span = rel.max(initial=0) + horizon + 1
+    keys = station_codes.astype(np.int64) * span + rel
+    window_start = np.searchsorted(keys, keys, side="right")
+    window_end = np.searchsorted(keys, keys + horizon, side="right")
+
+    ratio = np.divide(bikes, cap, out=np.zeros_like(bikes), where=cap > 0)
+    for column, flags in (
+        ("will_be_empty_2h", bikes <= EMPTY_THRESHOLD),
+        ("will_be_full_2h", (cap > 0) & (ratio >= FULL_RATIO)),
+    ):
+        counts = np.concatenate(([0], np.cumsum(flags)))
+        df[column] = (counts[window_end] > counts[window_start]).astype(np.int8)
     return df
 
 
+def build_training_frame(df_all: pd.DataFrame, hourly_risk: pd.Series) -> pd.DataFrame:
+    """
+    Build the features and labels of every station's snapshots in one pass.
+
+    Args:
+        df_all: Snapshots with station_id, timestamp (tz-aware), available_bikes
+            and capacity.
+        hourly_risk: Historical P(empty) indexed by (station_id, hour_of_day).
+
+    Returns:
+        Rows sorted by station_id and timestamp, with FEATURES and the
+        will_be_empty_2h / will_be_full_2h labels, without rows missing
+        a feature.
+    """
+    df = df_all.sort_values(["station_id", "timestamp"], kind="stable").reset_index(
+        drop=True
+    )
+    df["bike_ratio"] = df["available_bikes"] / df["capacity"].clip(lower=1)
+    df = _add_time_features(df)
+    df = _add_flow_features(df)
+    df = _add_hourly_risk(df, hourly_risk)
+    df = _compute_labels(df)
+    return df.dropna(subset=FEATURES)
+
+
 # ── model container ───────────────────────────────────────────────────────────
 
 
@@ -219,67 +326,353 @@ class StationModel:
         return empty_p, full_p
 
 
-# ── training ──────────────────────────────────────────────────────────────────
+def _probabilities(
+    x_scaled: np.ndarray, coef: np.ndarray, intercept: np.ndarray, fitted: np.ndarray
+) -> np.ndarray:
+    """Row-wise LogisticRegression.predict_proba(...)[:, 1]; 0 where not fitted."""
+    logits = np.einsum("ij,ij->i", x_scaled, coef) + intercept
+    return np.where(fitted, 1.0 / (1.0 + np.exp(-logits)), 0.0)
+
+
+def _class_counts(
+    frame: pd.DataFrame, station_ids: np.ndarray, label: str
+) -> np.ndarray:
+    """(negatives, positives) of ``label`` per station, aligned with ``station_ids``."""
+    grouped = frame.groupby("station_id")[label]
+    positives = grouped.sum().reindex(station_ids, fill_value=0).to_numpy()
+    totals = grouped.size().reindex(station_ids, fill_value=0).to_numpy()
+    return np.column_stack([totals - positives, positives]).astype(np.int64)
+
+
+def _gradient_steps(  # noqa: PLR0913, PLR0917
+    coef: np.ndarray,
+    intercept: np.ndarray,
+    rows: np.ndarray,
+    x_scaled: np.ndarray,
+    y: np.ndarray,
+    weights: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Full-batch gradient descent on each station's weighted logistic loss over
+    its new rows, starting from the current coefficients.
+
+    ``rows[i]`` is the station (row of ``coef``) that sample i belongs to.
+    Stations without samples are left unchanged.
+    """
+    coef = coef.copy()
+    intercept = intercept.copy()
+    n_stations = len(coef)
+    per_station = np.bincount(rows, minlength=n_stations)
+    active = per_station > 0
+    n = per_station.clip(min=1)
+
+    for _ in range(_SGD_EPOCHS):
+        logits = np.einsum("ij,ij->i", x_scaled, coef[rows]) + intercept[rows]
+        err = weights * (1.0 / (1.0 + np.exp(-logits)) - y)
+        grad = np.column_stack(
+            [
+                np.bincount(rows, err * x_scaled[:, j], minlength=n_stations)
+                for j in range(x_scaled.shape[1])
+            ]
+        )
+        coef[active] -= _SGD_LEARNING_RATE * (
+            grad[active] / n[active, None] + _SGD_ALPHA * coef[active]
+        )
+        intercept[active] -= (
+            _SGD_LEARNING_RATE
+            * np.bincount(rows, err, minlength=n_stations)[active]
+            / n[active]
+        )
+    return coef, intercept
 
 
-def train_models(engine: Engine) -> tuple[dict[int, StationModel], datetime]:
+@dataclass
+class RiskModels:
     """
-    Load last 30 days of snapshots, build features + labels, and fit one
-    LogisticRegression per station.  Returns (models, trained_at).
+    Every station's scaler and classifier coefficients, stacked row-wise so
+    that all stations are scored in one vectorised pass.
+
+    Row i of each matrix belongs to ``station_ids[i]`` (sorted ascending).
+    Classifiers that were not fitted (no label variance) have zero
+    coefficients and score 0.0, as in ``StationModel.predict``.
+
+    Attributes:
+        empty_class_counts: (negatives, positives) of the empty label seen
+            per station, used to balance incremental updates
+        full_class_counts: Same for the full label
+        hourly_risk: Historical P(empty) by (station_id, hour_of_day) as of
+            training, reused by every scoring tick until the next training.
     """
-    logger.info("Fetching %d days of snapshot history for training...", TRAINING_DAYS)
-    with engine.connect() as conn:
-        df_all = pd.read_sql(str(_SNAPSHOTS_SQL), conn, parse_dates=["timestamp"])
-        df_risk = pd.read_sql(str(_HOURLY_RISK_SQL), conn)
-
-    if df_all["timestamp"].dt.tz is None:
-        df_all["timestamp"] = df_all["timestamp"].dt.tz_localize("UTC")
-
-    risk_map: dict[tuple[int, int], float] = {
-        (int(r.station_id), int(r.hour_of_day)): float(r.empty_risk)
-        for r in df_risk.itertuples()
-    }
-
-    models: dict[int, StationModel] = {}
-
-    for sid in df_all["station_id"].unique():
-        sdf = df_all[df_all["station_id"] == sid].copy().sort_values("timestamp")
-        sdf["bike_ratio"] = sdf["available_bikes"] / sdf["capacity"].clip(lower=1)
-        sdf = _add_time_features(sdf)
-        sdf = _add_flow_features(sdf)
-        sdf["empty_risk_this_hour"] = sdf["hour_of_day"].map(
-            lambda h, s=sid: risk_map.get((s, int(h)), 0.0)
+
+    station_ids: np.ndarray
+    mean: np.ndarray
+    scale: np.ndarray
+    empty_coef: np.ndarray
+    empty_intercept: np.ndarray
+    has_empty_variance: np.ndarray
+    full_coef: np.ndarray
+    full_intercept: np.ndarray
+    has_full_variance: np.ndarray
+    empty_class_counts: np.ndarray
+    full_class_counts: np.ndarray
+    hourly_risk: pd.Series
+    trained_at: datetime
+
+    @classmethod
+    def stack(
+        cls,
+        models: dict[int, StationModel],
+        frame: pd.DataFrame,
+        hourly_risk: pd.Series,
+        trained_at: datetime,
+    ) -> RiskModels:
+        """Stack models fitted on ``frame`` (see ``build_training_frame``)."""
+        station_ids = np.array(sorted(models), dtype=np.int64)
+        ordered = [models[int(sid)] for sid in station_ids]
+        n_features = len(FEATURES)
+
+        def coefficients(
+            attr: str, fitted_attr: str
+        ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+            fitted = np.array([getattr(m, fitted_attr) for m in ordered], dtype=bool)
+            coef = np.zeros((len(ordered), n_features))
+            intercept = np.zeros(len(ordered))
+            for i, model in enumerate(ordered):
+                if fitted[i]:
+                    clf = getattr(model, attr)
+                    coef[i] = clf.coef_[0]
+                    intercept[i] = clf.intercept_[0]
+            return coef, intercept, fitted
+
+        empty_coef, empty_intercept, has_empty = coefficients(
+            "empty_clf", "has_empty_variance"
+        )
+        full_coef, full_intercept, has_full = coefficients(
+            "full_clf", "has_full_variance"
         )
-        sdf = _compute_labels(sdf)
-        sdf = sdf.dropna(subset=FEATURES)
+        return cls(
+            station_ids=station_ids,
+            mean=np.array([m.scaler.mean_ for m in ordered]).reshape(-1, n_features),
+            scale=np.array([m.scaler.scale_ for m in ordered]).reshape(-1, n_features),
+            empty_coef=empty_coef,
+            empty_intercept=empty_intercept,
+            has_empty_variance=has_empty,
+            full_coef=full_coef,
+            full_intercept=full_intercept,
+            has_full_variance=has_full,
+            empty_class_counts=_class_counts(frame, station_ids, "will_be_empty_2h"),
+            full_class_counts=_class_counts(frame, station_ids, "will_be_full_2h"),
+            hourly_risk=hourly_risk,
+            trained_at=trained_at,
+        )
+
+    def __len__(self) -> int:
+        return len(self.station_ids)
+
+    def predict(
+        self, station_ids: np.ndarray, x_feat: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Score many stations at once.
+
+        Args:
+            station_ids: Stations to score; all must have a model.
+            x_feat: One row of FEATURES per station.
+
+        Returns:
+            (empty_risk, full_risk) arrays aligned with ``station_ids``.
+        """
+        rows = np.searchsorted(self.station_ids, station_ids)
+        x_scaled = (x_feat - self.mean[rows]) / self.scale[rows]
+        empty_p = _probabilities(
+            x_scaled,
+            self.empty_coef[rows],
+            self.empty_intercept[rows],
+            self.has_empty_variance[rows],
+        )
+        full_p = _probabilities(
+            x_scaled,
+            self.full_coef[rows],
+            self.full_intercept[rows],
+            self.has_full_variance[rows],
+        )
+        return empty_p, full_p
+
+    def updated(
+        self, frame: pd.DataFrame, hourly_risk: pd.Series, trained_at: datetime
+    ) -> RiskModels:
+        """
+        Return a copy of the models updated with newly labelled rows.
+
+        The scalers are kept as fitted. Each classifier takes gradient steps on
+        its station's new rows, weighted to balance the classes seen so far.
+        A classifier is trained (and scored) once both classes have been seen.
+        Rows of stations without a model are ignored until the next full
+        training.
+
+        Args:
+            frame: New rows from ``build_training_frame``
+            hourly_risk: Historical P(empty) as of this update
+            trained_at: Time of this update
+        """
+        known = frame[frame["station_id"].isin(self.station_ids)]
+        rows = np.searchsorted(self.station_ids, known["station_id"].to_numpy())
+        x_scaled = (known[FEATURES].to_numpy(dtype=float) - self.mean[rows]) / (
+            self.scale[rows]
+        )
+
+        updates = {}
+        for target, label in (
+            ("empty", "will_be_empty_2h"),
+            ("full", "will_be_full_2h"),
+        ):
+            counts = getattr(self, f"{target}_class_counts") + _class_counts(
+                known, self.station_ids, label
+            )
+            fitted = (counts > 0).all(axis=1)
+            y = known[label].to_numpy(dtype=float)
+            # "balanced" class weights: n_samples / (n_classes * n_samples_of_class)
+            class_weights = counts.sum(axis=1, keepdims=True) / (2 * counts.clip(min=1))
+            weights = class_weights[rows, y.astype(int)]
+            train = fitted[rows]
+            coef, intercept = _gradient_steps(
+                getattr(self, f"{target}_coef"),
+                getattr(self, f"{target}_intercept"),
+                rows[train],
+                x_scaled[train],
+                y[train],
+                weights[train],
+            )
+            updates |= {
+                f"{target}_coef": coef,
+                f"{target}_intercept": intercept,
+                f"has_{target}_variance": fitted,
+                f"{target}_class_counts": counts,
+            }
+
+        return replace(self, **updates, hourly_risk=hourly_risk, trained_at=trained_at)
+
+
+# ── training ──────────────────────────────────────────────────────────────────
+
 
+def _fit_station(
+    x_feat: np.ndarray, y_empty: np.ndarray, y_full: np.ndarray
+) -> StationModel:
+    """Fit one station's scaler and classifiers (runs in a worker process)."""
+    scaler = StandardScaler()
+    x_scaled = scaler.fit_transform(x_feat)
+
+    has_empty_var = len(np.unique(y_empty)) > 1
+    has_full_var = len(np.unique(y_full)) > 1
+
+    empty_clf = LogisticRegression(max_iter=300, class_weight="balanced")
+    full_clf = LogisticRegression(max_iter=300, class_weight="balanced")
+
+    if has_empty_var:
+        empty_clf.fit(x_scaled, y_empty)
+    if has_full_var:
+        full_clf.fit(x_scaled, y_full)
+
+    return StationModel(scaler, empty_clf, full_clf, has_empty_var, has_full_var)
+
+
+def fit_station_models(
+    frame: pd.DataFrame, workers: int = TRAIN_WORKERS
+) -> dict[int, StationModel]:
+    """
+    Fit one model per station with at least MIN_ROWS rows of ``frame``.
+
+    Stations are fitted in parallel across ``workers`` processes. The pool
+    uses the spawn start method: the worker trains on a background thread
+    while its main thread keeps scoring, and forking a multi-threaded
+    process can deadlock the child on a lock another thread held.
+    """
+    station_ids: list[int] = []
+    inputs: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+    for sid, sdf in frame.groupby("station_id", sort=False):
         if len(sdf) < MIN_ROWS:
             logger.debug(
                 "Station %d: only %d rows (need %d) — skipping", sid, len(sdf), MIN_ROWS
             )
             continue
+        station_ids.append(int(sid))
+        inputs.append(
+            (
+                sdf[FEATURES].to_numpy(dtype=float),
+                sdf["will_be_empty_2h"].to_numpy(),
+                sdf["will_be_full_2h"].to_numpy(),
+            )
+        )
+
+    if workers <= 1 or len(inputs) <= 1:
+        fitted = [_fit_station(*args) for args in inputs]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(inputs)),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            fitted = list(pool.map(_fit_station, *zip(*inputs, strict=True)))
 
-        x_feat = sdf[FEATURES].to_numpy(dtype=float)
-        y_empty = sdf["will_be_empty_2h"].to_numpy()
-        y_full = sdf["will_be_full_2h"].to_numpy()
+    return dict(zip(station_ids, fitted, strict=True))
 
-        scaler = StandardScaler()
-        x_scaled = scaler.fit_transform(x_feat)
 
-        has_empty_var = len(np.unique(y_empty)) > 1
-        has_full_var = len(np.unique(y_full)) > 1
+@dataclass
+class TrainingState:
+    """
+    Models plus what ``update_models`` needs to carry on from the last training.
+
+    Attributes:
+        models: Models to score with
+        hourly_counts: Per-day empty/total snapshot counts of the last
+            TRAINING_DAYS days, from which the hourly empty risk is derived
+        buffer: Snapshots not yet trained on (their 2-hour horizon was still
+            open), plus _BUFFER_CONTEXT of earlier ones for the flow features
+        labelled_until: Snapshots up to this time have been trained on
+        full_trained_at: When the models were last fitted from the full history
+    """
 
-        empty_clf = LogisticRegression(max_iter=300, class_weight="balanced")
-        full_clf = LogisticRegression(max_iter=300, class_weight="balanced")
+    models: RiskModels
+    hourly_counts: pd.DataFrame
+    buffer: pd.DataFrame
+    labelled_until: pd.Timestamp
+    full_trained_at: datetime
 
-        if has_empty_var:
-            empty_clf.fit(x_scaled, y_empty)
-        if has_full_var:
-            full_clf.fit(x_scaled, y_full)
 
-        models[sid] = StationModel(
-            scaler, empty_clf, full_clf, has_empty_var, has_full_var
-        )
+def _read_snapshots(engine: Engine, since: pd.Timestamp | None = None) -> pd.DataFrame:
+    with engine.connect() as conn:
+        if since is None:
+            df = pd.read_sql(_SNAPSHOTS_SQL, conn, parse_dates=["timestamp"])
+        else:
+            df = pd.read_sql(
+                _SNAPSHOTS_SINCE_SQL,
+                conn,
+                params={"since": since.to_pydatetime()},
+                parse_dates=["timestamp"],
+            )
+    if df["timestamp"].dt.tz is None:
+        df["timestamp"] = df["timestamp"].dt.tz_localize("UTC")
+    return df
+
+
+def _carry_over(df: pd.DataFrame, labelled_until: pd.Timestamp) -> pd.DataFrame:
+    """Snapshots an incremental update still needs after ``labelled_until``."""
+    return df[df["timestamp"] > labelled_until - _BUFFER_CONTEXT].reset_index(drop=True)
+
+
+def train_models(engine: Engine) -> TrainingState:
+    """
+    Load last 30 days of snapshots, build features + labels, and fit one
+    LogisticRegression per station.  Returns the models stacked for scoring.
+    """
+    logger.info("Fetching %d days of snapshot history for training...", TRAINING_DAYS)
+    df_all = _read_snapshots(engine)
+    with engine.connect() as conn:
+        hourly_counts = pd.read_sql(_HOURLY_COUNTS_SQL, conn)
+
+    hourly_risk = _hourly_risk(hourly_counts)
+    frame = build_training_frame(df_all, hourly_risk)
+    models = fit_station_models(frame)
 
     trained_at = datetime.now(tz=UTC)
     logger.info(
@@ -287,109 +680,120 @@ def train_models(engine: Engine) -> tuple[dict[int, StationModel], datetime]:
         len(models),
         df_all["station_id"].nunique(),
     )
-    return models, trained_at
+    labelled_until = (
+        df_all["timestamp"].max() if len(df_all) else pd.Timestamp(trained_at)
+    ) - _HORIZON
+    return TrainingState(
+        models=RiskModels.stack(models, frame, hourly_risk, trained_at),
+        hourly_counts=hourly_counts,
+        buffer=_carry_over(df_all, labelled_until),
+        labelled_until=labelled_until,
+        full_trained_at=trained_at,
+    )
+
+
+def update_models(state: TrainingState, engine: Engine) -> TrainingState:
+    """
+    Update the models from the snapshots added since the last training.
+
+    Only new snapshots are read. They are appended to the carried-over
+    buffer, and the rows whose 2-hour horizon has since closed are labelled
+    and used to update the classifiers (see ``RiskModels.updated``). The
+    hourly empty risk is rolled forward from per-day counts.
+    """
+    since = (
+        state.buffer["timestamp"].max() if len(state.buffer) else state.labelled_until
+    )
+    new = _read_snapshots(engine, since=since)
+    if new.empty:
+        logger.info("No snapshots since %s — models unchanged", since)
+        return state
+
+    first_day = (datetime.now(tz=_DUBLIN) - pd.Timedelta(days=TRAINING_DAYS)).date()
+    hourly_counts = (
+        pd.concat([state.hourly_counts, _hourly_counts(new)])
+        .groupby(["station_id", "day", "hour_of_day"], as_index=False)
+        .sum()
+    )
+    hourly_counts = hourly_counts[hourly_counts["day"] >= first_day]
+    hourly_risk = _hourly_risk(hourly_counts)
+
+    snapshots = pd.concat([state.buffer, new], ignore_index=True)
+    labelled_until = snapshots["timestamp"].max() - _HORIZON
+    frame = build_training_frame(snapshots, hourly_risk)
+    labelled = frame[
+        (frame["timestamp"] > state.labelled_until)
+        & (frame["timestamp"] <= labelled_until)
+    ]
+
+    models = state.models.updated(labelled, hourly_risk, datetime.now(tz=UTC))
+    logger.info(
+        "Incremental update complete: %d new snapshots, %d rows trained on",
+        len(new),
+        len(labelled),
+    )
+    return TrainingState(
+        models=models,
+        hourly_counts=hourly_counts,
+        buffer=_carry_over(snapshots, labelled_until),
+        labelled_until=labelled_until,
+        full_trained_at=state.full_trained_at,
+    )
 
 
 # ── scoring ───────────────────────────────────────────────────────────────────
 
 
-def score_stations(
-    models: dict[int, StationModel],
-    model_trained_at: datetime,
-    engine: Engine,
-) -> int:
+def ensure_scores_table(engine: Engine) -> None:
+    """Create the output table if it does not exist."""
+    with engine.begin() as conn:
+        conn.execute(_CREATE_SCORES_TABLE_SQL)
+
+
+def score_stations(models: RiskModels, engine: Engine) -> int:
     """Score all stations and upsert results. Returns number of rows written."""
     with engine.connect() as conn:
         df_snap = pd.read_sql(str(_CURRENT_SNAPSHOT_SQL), conn)
         df_flow = pd.read_sql(str(_RECENT_FLOW_SQL), conn)
-        df_risk = pd.read_sql(str(_HOURLY_RISK_SQL), conn)
 
     now_dublin = datetime.now(tz=UTC).astimezone(_DUBLIN)
     current_hour = now_dublin.hour
     current_dow = now_dublin.weekday()
 
-    flow_map: dict[int, tuple[float, float]] = {
-        int(r.station_id): (float(r.departure_rate_30m), float(r.arrival_rate_30m))
-        for r in df_flow.itertuples()
-    }
-    risk_map: dict[tuple[int, int], float] = {
-        (int(r.station_id), int(r.hour_of_day)): float(r.empty_risk)
-        for r in df_risk.itertuples()
-    }
-
-    scored_at = datetime.now(tz=UTC)
-    rows = []
-
-    for snap in df_snap.itertuples():
-        sid = int(snap.station_id)
-        model = models.get(sid)
-        if model is None:
-            continue
-        dep, arr = flow_map.get(sid, (0.0, 0.0))
-        features = {
-            "bike_ratio": float(snap.available_bikes) / max(float(snap.capacity), 1.0),
+    df = df_snap[df_snap["station_id"].isin(models.station_ids)]
+    df = df.merge(df_flow, on="station_id", how="left")
+    station_ids = df["station_id"].to_numpy(dtype=np.int64)
+    hour_keys = pd.MultiIndex.from_arrays(
+        [station_ids, np.full(len(df), current_hour)],
+        names=["station_id", "hour_of_day"],
+    )
+    features = pd.DataFrame(
+        {
+            "bike_ratio": df["available_bikes"].to_numpy(dtype=float)
+            / df["capacity"].clip(lower=1).to_numpy(dtype=float),
             "hour_of_day": float(current_hour),
             "day_of_week": float(current_dow),
-            "empty_risk_this_hour": risk_map.get((sid, current_hour), 0.0),
-            "departure_rate_30m": dep,
-            "arrival_rate_30m": arr,
+            "empty_risk_this_hour": models.hourly_risk.reindex(hour_keys)
+            .fillna(0.0)
+            .to_numpy(),
+            "departure_rate_30m": df["departure_rate_30m"].fillna(0.0).to_numpy(),
+            "arrival_rate_30m": df["arrival_rate_30m"].fillna(0.0).to_numpy(),
         }
-        empty_p, full_p = model.predict(features)
-        rows.append(
-            {
-                "station_id": sid,
-                "empty_risk_2h": empty_p,
-                "full_risk_2h": full_p,
-                "scored_at": scored_at,
-                "model_trained_at": model_trained_at,
-            }
-        )
+    )
+    empty_p, full_p = models.predict(station_ids, features[FEATURES].to_numpy())
 
-    if rows:
+    if len(station_ids):
         with engine.begin() as conn:
-            conn.execute(_UPSERT_SQL, rows)
-
-    logger.info("Scored %d stations", len(rows))
-    return len(rows)
-
-
-# ── main loop ─────────────────────────────────────────────────────────────────
-
-
-def run(engine: Engine) -> None:
-    """
-    Entry point for the risk engine.
-
-    - Ensures the output table exists.
-    - Trains models immediately on startup, then retrains once per calendar day.
-    - Scores every SCORE_INTERVAL_S seconds.
-
-    Designed to run in a background thread (daemon=True) alongside FastAPI.
-    """
-    with engine.begin() as conn:
-        conn.execute(_CREATE_SCORES_TABLE_SQL)
-    logger.info("cycle_station_risk_scores table ready")
-
-    models: dict[int, StationModel] = {}
-    model_trained_at = datetime.now(tz=UTC)
-    last_train_day: int | None = None
-
-    while True:
-        today = datetime.now(tz=UTC).toordinal()
-
-        if last_train_day != today:
-            try:
-                models, model_trained_at = train_models(engine)
-                last_train_day = today
-            except Exception:
-                logger.exception("Training failed — keeping existing models")
-
-        if models:
-            try:
-                score_stations(models, model_trained_at, engine)
-            except Exception:
-                logger.exception("Scoring failed — will retry next interval")
-        else:
-            logger.warning("No models available yet — skipping score")
+            conn.execute(
+                _UPSERT_SQL,
+                {
+                    "station_ids": station_ids.tolist(),
+                    "empty_risks": empty_p.tolist(),
+                    "full_risks": full_p.tolist(),
+                    "scored_at": datetime.now(tz=UTC),
+                    "model_trained_at": models.trained_at,
+                },
+            )
 
-        time.sleep(SCORE_INTERVAL_S)
+    logger.info("Scored %d stations", len(station_ids))
+    return len(station_ids)
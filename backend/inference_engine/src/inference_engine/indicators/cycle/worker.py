@@ -0,0 +1,223 @@
+"""
+Cycle risk engine worker.
+
+Runs the training and scoring schedule of the risk engine in its own process,
+so that training never competes with API requests:
+
+    python -m inference_engine.indicators.cycle.worker
+
+Any number of workers can be started; only the leader works. Leadership is a
+session-level Postgres advisory lock held on a dedicated connection, so it is
+released as soon as the leader's process or connection dies and a standby
+worker takes over. Every trained or updated model is published to the model
+store (see ``model_store``), from which the next leader loads it.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
+
+import logging_loki
+from sqlalchemy import Connection, Engine, text
+from sqlalchemy.exc import DBAPIError
+
+from inference_engine.db import engine as db_engine
+from inference_engine.indicators.cycle.model_store import (
+    ensure_model_store,
+    load_latest_models,
+    save_models,
+)
+from inference_engine.indicators.cycle.risk_engine import (
+    FULL_RETRAIN_DAYS,
+    SCORE_INTERVAL_S,
+    RiskModels,
+    TrainingState,
+    ensure_scores_table,
+    score_stations,
+    train_models,
+    update_models,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+LEADER_LOCK_KEY = 0x6379636C655F726B  # arbitrary, unique to this worker
+LEADER_RETRY_S = 30
+
+
+# ── leader election ───────────────────────────────────────────────────────────
+
+
+def acquire_leadership(engine: Engine) -> Connection:
+    """
+    Block until this worker holds the leader lock.
+
+    Returns:
+        The connection holding the lock. It must stay open for as long as the
+        worker leads, and be passed to ``release_leadership`` when done.
+    """
+    while True:
+        conn = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            acquired = conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": LEADER_LOCK_KEY}
+            ).scalar_one()
+        except Exception:
+            conn.close()
+            raise
+        if acquired:
+            logger.info("Acquired cycle risk engine leader lock")
+            return conn
+        conn.close()
+        logger.info(
+            "Another worker is leading — retrying in %d seconds", LEADER_RETRY_S
+        )
+        time.sleep(LEADER_RETRY_S)
+
+
+def holds_leadership(conn: Connection) -> bool:
+    """Return whether the lock connection is still alive, and so the lock held."""
+    try:
+        conn.execute(text("SELECT 1"))
+    except DBAPIError:
+        return False
+    return True
+
+
+def release_leadership(conn: Connection) -> None:
+    """Release the leader lock and close its connection."""
+    try:
+        conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LEADER_LOCK_KEY})
+    except DBAPIError:
+        # The connection is gone, and the lock with it
+        conn.invalidate()
+    conn.close()
+
+
+# ── schedule ──────────────────────────────────────────────────────────────────
+
+
+def _publish(engine: Engine, models: RiskModels) -> None:
+    try:
+        version = save_models(engine, models)
+    except Exception:
+        logger.exception("Publishing models failed — scoring with them regardless")
+    else:
+        logger.info("Published cycle risk models version %d", version)
+
+
+def _submit_training(
+    trainer: ThreadPoolExecutor, state: TrainingState | None, engine: Engine
+) -> Future[TrainingState]:
+    """Start a full training if one is due, an incremental update otherwise."""
+    full_due = (
+        state is None
+        or (datetime.now(tz=UTC) - state.full_trained_at).days >= FULL_RETRAIN_DAYS
+    )
+    if full_due:
+        return trainer.submit(train_models, engine)
+    return trainer.submit(update_models, state, engine)
+
+
+def run(engine: Engine, is_leader: Callable[[], bool]) -> None:
+    """
+    Train, publish and score until leadership is lost.
+
+    - Ensures the output and model store tables exist.
+    - Scores with the latest published models right away, if any.
+    - Trains models immediately, then once per calendar day: from the full
+      history every FULL_RETRAIN_DAYS days, incrementally otherwise.
+      Training runs in a separate thread and each result is published.
+    - Scores every SCORE_INTERVAL_S seconds with the latest models, and as
+      soon as a training finishes.
+    """
+    ensure_scores_table(engine)
+    ensure_model_store(engine)
+    logger.info("cycle_station_risk_scores and cycle_risk_models tables ready")
+
+    models: RiskModels | None = None
+    stored = load_latest_models(engine)
+    if stored is not None:
+        version, models = stored
+        logger.info(
+            "Loaded cycle risk models version %d (trained %s)",
+            version,
+            models.trained_at,
+        )
+
+    state: TrainingState | None = None
+    pending: Future[TrainingState] | None = None
+    pending_day: int | None = None
+    last_train_day: int | None = None
+
+    with ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix="cycle-risk-train"
+    ) as trainer:
+        while is_leader():
+            if pending is not None and pending.done():
+                try:
+                    state = pending.result()
+                    last_train_day = pending_day
+                except Exception:
+                    logger.exception("Training failed — keeping existing models")
+                else:
+                    models = state.models
+                    _publish(engine, models)
+                pending = None
+
+            today = datetime.now(tz=UTC).toordinal()
+            if pending is None and last_train_day != today:
+                pending = _submit_training(trainer, state, engine)
+                pending_day = today
+
+            if models:
+                try:
+                    score_stations(models, engine)
+                except Exception:
+                    logger.exception("Scoring failed — will retry next interval")
+            else:
+                logger.warning("No models available yet — skipping score")
+
+            # Wake up early to score as soon as a training finishes
+            if pending is not None:
+                wait([pending], timeout=SCORE_INTERVAL_S)
+            else:
+                time.sleep(SCORE_INTERVAL_S)
+
+        logger.error("Lost the cycle risk engine leader lock — stopping")
+        if pending is not None:
+            pending.cancel()
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)-5s [%(name)s] %(message)s",
+    )
+    logging.getLogger().addHandler(
+        logging_loki.LokiHandler(
+            url=os.getenv("LOKI_URL", "http://localhost:3100/loki/api/v1/push"),
+            tags={
+                "app": "cycle-risk-engine",
+                "pod": os.getenv("POD_NAME", "local"),
+            },
+            version="1",
+        )
+    )
+
+    lock_conn = acquire_leadership(db_engine)
+    try:
+        run(db_engine, lambda: holds_leadership(lock_conn))
+    finally:
+        release_leadership(lock_conn)
+
+
+if __name__ == "__main__":
+    main()
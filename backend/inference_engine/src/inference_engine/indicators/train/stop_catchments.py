@@ -0,0 +1,153 @@
+"""
+Precomputed spatial signals of Dublin train stops.
+
+Demand scoring needs, per stop, the population of the CSO small areas within
+CATCHMENT_RADIUS_M and the nearest pedestrian counter within
+COUNTER_RADIUS_M. Both only change when the stops, the small areas or the
+counter sites do, so they are computed once into two tables keyed by stop:
+
+    backend.train_stop_catchments       stop_id → geom (EPSG:2157), population
+    backend.train_stop_nearest_counters stop_id → counter_site_id, distance_m
+
+Stop points are stored projected to Irish Transverse Mercator (EPSG:2157) so
+that distances are in metres. Small areas are matched through a bounding box
+test on their GiST-indexed geometry before the exact distance test.
+
+The tables are refreshed when their data version changes: the latest import
+the data handler recorded for the train and population feeds, plus a
+fingerprint of the pedestrian counter sites.
+"""
+
+import logging
+
+from sqlalchemy import Connection, text
+
+from inference_engine.db import engine
+
+logger = logging.getLogger(__name__)
+
+CATCHMENT_RADIUS_M = 800
+COUNTER_RADIUS_M = 500
+
+_REFRESH_LOCK_KEY = 0x73746F705F636174  # arbitrary, unique to this refresh
+
+_DATA_VERSION_SQL = text("""
+    SELECT concat_ws(
+        '|',
+        (SELECT MAX(imported_at)::TEXT
+         FROM external_data.source_file_manifests
+         WHERE source IN ('train', 'population')),
+        (SELECT md5(string_agg(
+                    concat_ws(',', id, lat, lon, pedestrian_sensor), ';' ORDER BY id))
+         FROM external_data.pedestrian_counter_sites)
+    )
+""")
+
+_CREATE_TABLES_SQL = [
+    text("""
+        CREATE TABLE IF NOT EXISTS backend.train_stop_catchments (
+            stop_id              TEXT PRIMARY KEY,
+            geom                 geometry(Point, 2157) NOT NULL,
+            catchment_population INTEGER NOT NULL
+        )
+    """),
+    text("""
+        CREATE TABLE IF NOT EXISTS backend.train_stop_nearest_counters (
+            stop_id          TEXT PRIMARY KEY,
+            counter_site_id  INTEGER NOT NULL,
+            distance_m       DOUBLE PRECISION NOT NULL
+        )
+    """),
+    text("""
+        CREATE TABLE IF NOT EXISTS backend.train_stop_spatial_versions (
+            data_version  TEXT PRIMARY KEY,
+            refreshed_at  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+    """),
+]
+
+_STORED_VERSION_SQL = text(
+    "SELECT data_version FROM backend.train_stop_spatial_versions"
+)
+
+_INSERT_CATCHMENTS_SQL = text("""
+    INSERT INTO backend.train_stop_catchments (stop_id, geom, catchment_population)
+    SELECT st.stop_id, st.geom, COALESCE(SUM(sa.population), 0)
+    FROM (
+        SELECT id AS stop_id,
+               ST_Transform(ST_SetSRID(ST_MakePoint(lon, lat), 4326), 2157) AS geom
+        FROM external_data.train_stops
+        WHERE lat BETWEEN :lat_min AND :lat_max
+          AND lon BETWEEN :lon_min AND :lon_max
+    ) st
+    LEFT JOIN external_data.small_areas sa
+           ON sa.geom && ST_Transform(ST_Expand(st.geom, :radius_m), 4326)
+          AND ST_DWithin(ST_Transform(sa.geom, 2157), st.geom, :radius_m)
+    GROUP BY st.stop_id, st.geom
+""")
+
+_INSERT_NEAREST_COUNTERS_SQL = text("""
+    INSERT INTO backend.train_stop_nearest_counters
+        (stop_id, counter_site_id, distance_m)
+    SELECT st.stop_id, nearest.id, nearest.distance_m
+    FROM backend.train_stop_catchments st
+    CROSS JOIN LATERAL (
+        SELECT pcs.id,
+               ST_Distance(
+                   ST_Transform(ST_SetSRID(ST_MakePoint(pcs.lon, pcs.lat), 4326), 2157),
+                   st.geom
+               ) AS distance_m
+        FROM external_data.pedestrian_counter_sites pcs
+        WHERE pcs.pedestrian_sensor = TRUE
+        ORDER BY distance_m
+        LIMIT 1
+    ) nearest
+    WHERE nearest.distance_m <= :radius_m
+""")
+
+
+def data_version() -> str:
+    """Return the version of the stops, small areas and counter sites."""
+    with engine.connect() as conn:
+        return conn.execute(_DATA_VERSION_SQL).scalar_one()
+
+
+def _refresh(conn: Connection, version: str, dublin_params: dict) -> None:
+    conn.execute(text("DELETE FROM backend.train_stop_nearest_counters"))
+    conn.execute(text("DELETE FROM backend.train_stop_catchments"))
+    conn.execute(
+        _INSERT_CATCHMENTS_SQL, {**dublin_params, "radius_m": CATCHMENT_RADIUS_M}
+    )
+    conn.execute(_INSERT_NEAREST_COUNTERS_SQL, {"radius_m": COUNTER_RADIUS_M})
+    conn.execute(text("DELETE FROM backend.train_stop_spatial_versions"))
+    conn.execute(
+        text(
+            "INSERT INTO backend.train_stop_spatial_versions (data_version)"
+            " VALUES (:data_version)"
+        ),
+        {"data_version": version},
+    )
+
+
+def refresh_stop_spatial_tables(dublin_params: dict) -> bool:
+    """
+    Bring the catchment and nearest-counter tables up to date.
+
+    Args:
+        dublin_params: lat_min/lat_max/lon_min/lon_max of the stops to keep
+
+    Returns:
+        Whether the tables were recomputed.
+    """
+    version = data_version()
+    with engine.begin() as conn:
+        conn.execute(
+            text("SELECT pg_advisory_xact_lock(:key)"), {"key": _REFRESH_LOCK_KEY}
+        )
+        for statement in _CREATE_TABLES_SQL:
+            conn.execute(statement)
+        if conn.execute(_STORED_VERSION_SQL).scalar() == version:
+            return False
+        logger.info("Refreshing train stop catchments for %s...", version)
+        _refresh(conn, version, dublin_params)
+    return True
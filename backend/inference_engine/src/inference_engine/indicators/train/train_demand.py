@@ -20,11 +20,22 @@ Simulation contract:
 from __future__ import annotations
 
 import logging
+from typing import TYPE_CHECKING
 
-import pandas as pd
 from sqlalchemy import text
 
-from inference_engine.db import engine
+from inference_engine.db import engine, request_connection
+from inference_engine.indicators.train.stop_catchments import (
+    refresh_stop_spatial_tables,
+)
+from inference_engine.lazy_imports import lazy_module
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_module("numpy")
+    pd = lazy_module("pandas")
 
 logger = logging.getLogger(__name__)
 
@@ -63,6 +74,78 @@ _DUBLIN_PARAMS = {
 }
 
 
+# Columns of backend.station_demand_scores written by the pipeline
+_SCORE_COLUMNS = [
+    "stop_id",
+    "name",
+    "lat",
+    "lon",
+    "trip_count",
+    "ridership_count",
+    "catchment_population",
+    "station_type",
+    "footfall_count",
+    "norm_ridership",
+    "norm_uptake",
+    "norm_pressure",
+    "norm_footfall",
+    "raw_pressure",
+    "max_pressure",
+    "demand_score",
+]
+
+# One statement for all stops: the scores are passed as parallel arrays
+_UPSERT_SCORES_SQL = text("""
+    INSERT INTO backend.station_demand_scores (
+        stop_id, name, lat, lon, trip_count, ridership_count, catchment_population,
+        station_type, footfall_count,
+        norm_ridership, norm_uptake, norm_pressure, norm_footfall,
+        raw_pressure, max_pressure, demand_score, computed_at
+    )
+    SELECT s.*, NOW()
+    FROM unnest(
+        CAST(:stop_id AS text[]),
+        CAST(:name AS text[]),
+        CAST(:lat AS double precision[]),
+        CAST(:lon AS double precision[]),
+        CAST(:trip_count AS integer[]),
+        CAST(:ridership_count AS integer[]),
+        CAST(:catchment_population AS integer[]),
+        CAST(:station_type AS text[]),
+        CAST(:footfall_count AS integer[]),
+        CAST(:norm_ridership AS double precision[]),
+        CAST(:norm_uptake AS double precision[]),
+        CAST(:norm_pressure AS double precision[]),
+        CAST(:norm_footfall AS double precision[]),
+        CAST(:raw_pressure AS double precision[]),
+        CAST(:max_pressure AS double precision[]),
+        CAST(:demand_score AS double precision[])
+    ) AS s (
+        stop_id, name, lat, lon, trip_count, ridership_count, catchment_population,
+        station_type, footfall_count,
+        norm_ridership, norm_uptake, norm_pressure, norm_footfall,
+        raw_pressure, max_pressure, demand_score
+    )
+    ON CONFLICT (stop_id) DO UPDATE SET
+        name                 = EXCLUDED.name,
+        lat                  = EXCLUDED.lat,
+        lon                  = EXCLUDED.lon,
+        trip_count           = EXCLUDED.trip_count,
+        ridership_count      = EXCLUDED.ridership_count,
+        catchment_population = EXCLUDED.catchment_population,
+        station_type         = EXCLUDED.station_type,
+        footfall_count       = EXCLUDED.footfall_count,
+        norm_ridership       = EXCLUDED.norm_ridership,
+        norm_uptake          = EXCLUDED.norm_uptake,
+        norm_pressure        = EXCLUDED.norm_pressure,
+        norm_footfall        = EXCLUDED.norm_footfall,
+        raw_pressure         = EXCLUDED.raw_pressure,
+        max_pressure         = EXCLUDED.max_pressure,
+        demand_score         = EXCLUDED.demand_score,
+        computed_at          = NOW()
+""")
+
+
 # ── Table bootstrap ──────────────────────────────────────────────────
 
 
@@ -102,7 +185,7 @@ def _load_stops_with_signals() -> pd.DataFrame:
     """
     Dublin GTFS stops enriched with:
       - 2024 ridership (train_station_ridership, name match)
-      - catchment population  (CSO small_areas within 0.0072° ≈ 800 m)
+      - catchment population  (CSO small_areas within 800 m, precomputed)
       - station type D/S/M    (irish_rail_stations, name match)
     """
     query = text("""
@@ -119,20 +202,8 @@ def _load_stops_with_signals() -> pd.DataFrame:
                ON LOWER(TRIM(ir.station_desc)) = LOWER(TRIM(s.name))
         LEFT JOIN external_data.train_station_ridership r
                ON LOWER(TRIM(r.station)) = LOWER(TRIM(s.name))
-        LEFT JOIN (
-            SELECT ts2.id                             AS stop_id,
-                   COALESCE(SUM(sa.population), 0)   AS catchment_population
-            FROM external_data.train_stops ts2
-            LEFT JOIN external_data.small_areas sa
-                   ON ST_DWithin(
-                          ST_Transform(ST_SetSRID(ST_MakePoint(ts2.lon, ts2.lat), 4326), 2157),
-                          ST_SetSRID(sa.geom, 2157),
-                          800
-                      )
-            WHERE ts2.lat BETWEEN :lat_min AND :lat_max
-              AND ts2.lon BETWEEN :lon_min AND :lon_max
-            GROUP BY ts2.id
-        ) pop ON pop.stop_id = s.id
+        LEFT JOIN backend.train_stop_catchments pop
+               ON pop.stop_id = s.id
         WHERE s.lat BETWEEN :lat_min AND :lat_max
           AND s.lon BETWEEN :lon_min AND :lon_max
     """)
@@ -180,33 +251,15 @@ def _load_trip_counts() -> pd.DataFrame:
 
 def _load_live_footfall() -> pd.DataFrame:
     """
-    Pedestrian count from the nearest counter site (≤ 500 m) per Dublin stop,
-    summed over the last 24 hours.  Returns only stops that have a nearby counter.
+    Pedestrian count from the nearest counter site (≤ 500 m, precomputed) per
+    Dublin stop, summed over the last 24 hours.  Returns only stops that have
+    a nearby counter.
     """
     query = text("""
         SELECT
             nearest.stop_id,
             COALESCE(SUM(m.count), 0) AS footfall_count
-        FROM (
-            SELECT DISTINCT ON (ts.id)
-                ts.id  AS stop_id,
-                pcs.id AS counter_site_id
-            FROM external_data.train_stops ts
-            JOIN external_data.pedestrian_counter_sites pcs
-                ON ST_DWithin(
-                       ST_SetSRID(ST_MakePoint(ts.lon,  ts.lat),  4326),
-                       ST_SetSRID(ST_MakePoint(pcs.lon, pcs.lat), 4326),
-                       0.005
-                   )
-               AND pcs.pedestrian_sensor = TRUE
-            WHERE ts.lat BETWEEN :lat_min AND :lat_max
-              AND ts.lon BETWEEN :lon_min AND :lon_max
-            ORDER BY ts.id,
-                ST_Distance(
-                    ST_SetSRID(ST_MakePoint(ts.lon,  ts.lat),  4326),
-                    ST_SetSRID(ST_MakePoint(pcs.lon, pcs.lat), 4326)
-                ) ASC
-        ) nearest
+        FROM backend.train_stop_nearest_counters nearest
         JOIN external_data.pedestrian_channels c
                ON c.site_id = nearest.counter_site_id
               AND c.mobility_type = 'PEDESTRIAN'
@@ -216,7 +269,7 @@ def _load_live_footfall() -> pd.DataFrame:
         GROUP BY nearest.stop_id
     """)
     with engine.connect() as conn:
-        df = pd.read_sql(query, conn, params=_DUBLIN_PARAMS)
+        df = pd.read_sql(query, conn)
     logger.info("Loaded footfall for %d stops.", len(df))
     return df
 
@@ -224,6 +277,65 @@ def _load_live_footfall() -> pd.DataFrame:
 # ── Core pipeline ─────────────────────────────────────────────────────
 
 
+def score_signals(df: pd.DataFrame) -> tuple[pd.DataFrame, float]:
+    """
+    Add the raw, normalised and weighted demand signals to ``df``.
+
+    ``df`` needs ridership_count, catchment_population, trip_count,
+    footfall_count and capacity per stop. Every signal is computed column-wise.
+
+    Returns:
+        ``df`` with the signal columns added, and the maximum raw pressure
+        (never 0) used to normalise it.
+    """
+    ridership = df["ridership_count"].to_numpy(dtype=float)
+    catchment = df["catchment_population"].to_numpy(dtype=float)
+    trips = df["trip_count"].to_numpy(dtype=float)
+    capacity = df["capacity"].to_numpy(dtype=float)
+
+    # ── Raw signals ──────────────────────────────────────────────────
+    daily_riders = ridership / 365.0
+    has_riders = daily_riders > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        raw_uptake = np.where(
+            has_riders & (catchment > 0), daily_riders / catchment, 0.0
+        )
+        raw_pressure = np.where(
+            has_riders & (trips > 0), daily_riders / (trips * capacity), 0.0
+        )
+    raw_footfall = df["footfall_count"].to_numpy(dtype=float)
+
+    # ── Global maxima (never 0) ──────────────────────────────────────
+    max_ridership = float(ridership.max(initial=0.0) or 1.0)
+    max_uptake = float(raw_uptake.max(initial=0.0) or 1.0)
+    max_pressure = float(raw_pressure.max(initial=0.0) or 1.0)
+    max_footfall = float(raw_footfall.max(initial=0.0) or 1.0)
+    max_trips = float(trips.max(initial=0.0) or 1.0)
+
+    # ── Normalised signals (0-1) ─────────────────────────────────────
+    df["daily_riders"] = daily_riders
+    df["raw_ridership"] = ridership
+    df["raw_uptake"] = raw_uptake
+    df["raw_pressure"] = raw_pressure
+    df["raw_footfall"] = raw_footfall
+    df["norm_ridership"] = ridership / max_ridership
+    df["norm_uptake"] = raw_uptake / max_uptake
+    df["norm_pressure"] = raw_pressure / max_pressure
+    df["norm_footfall"] = raw_footfall / max_footfall
+
+    # ── Weighted demand score ────────────────────────────────────────
+    # Fallback for stops without ridership: GTFS supply only, always < 0.5
+    df["demand_score"] = np.where(
+        ridership > 0,
+        W_RIDERSHIP * df["norm_ridership"]
+        + W_UPTAKE * df["norm_uptake"]
+        + W_PRESSURE * df["norm_pressure"]
+        + W_FOOTFALL * df["norm_footfall"],
+        (trips / max_trips) * 0.5,
+    )
+    return df, max_pressure
+
+
 def compute_and_save_demand_scores() -> list[dict]:
     """
     Run the full demand-scoring pipeline and persist results to
@@ -244,6 +356,7 @@ def compute_and_save_demand_scores() -> list[dict]:
       and then recalculate the weighted score in-process.
     """
     ensure_demand_scores_table()
+    refresh_stop_spatial_tables(_DUBLIN_PARAMS)
 
     stops_df = _load_stops_with_signals()
     trips_df = _load_trip_counts()
@@ -258,127 +371,36 @@ def compute_and_save_demand_scores() -> list[dict]:
         df["station_type"].map(TRAIN_TYPE_CAPACITY).fillna(DEFAULT_CAPACITY).astype(int)
     )
 
-    # ── Raw signals ──────────────────────────────────────────────────
-    df["daily_riders"] = df["ridership_count"] / 365.0
-    df["raw_ridership"] = df["ridership_count"].astype(float)
-    df["raw_uptake"] = df.apply(
-        lambda r: (
-            r["daily_riders"] / r["catchment_population"]
-            if r["catchment_population"] > 0 and r["daily_riders"] > 0
-            else 0.0
-        ),
-        axis=1,
-    )
-    df["raw_pressure"] = df.apply(
-        lambda r: (
-            r["daily_riders"] / (r["trip_count"] * r["capacity"])
-            if r["daily_riders"] > 0 and r["trip_count"] > 0
-            else 0.0
-        ),
-        axis=1,
+    df, max_pressure = score_signals(df)
+    df["max_pressure"] = max_pressure
+    df["stop_id"] = df["stop_id"].astype(str)
+    df["name"] = df["name"].astype(str)
+    df["station_type"] = (
+        df["station_type"].where(df["station_type"].astype(bool), None).astype(object)
     )
-    df["raw_footfall"] = df["footfall_count"].astype(float)
-
-    # ── Global maxima (never 0) ──────────────────────────────────────
-    max_ridership = float(df["raw_ridership"].max() or 1.0)
-    max_uptake = float(df["raw_uptake"].max() or 1.0)
-    max_pressure = float(df["raw_pressure"].max() or 1.0)
-    max_footfall = float(df["raw_footfall"].max() or 1.0)
-    max_trips = float(df["trip_count"].max() or 1.0)
 
-    # ── Normalised signals (0-1) ─────────────────────────────────────
-    df["norm_ridership"] = df["raw_ridership"] / max_ridership
-    df["norm_uptake"] = df["raw_uptake"] / max_uptake
-    df["norm_pressure"] = df["raw_pressure"] / max_pressure
-    df["norm_footfall"] = df["raw_footfall"] / max_footfall
-
-    # ── Weighted demand score ────────────────────────────────────────
-    def _score(row: pd.Series) -> float:  # type: ignore[type-arg]
-        if row["ridership_count"] > 0:
-            return (
-                W_RIDERSHIP * row["norm_ridership"]
-                + W_UPTAKE * row["norm_uptake"]
-                + W_PRESSURE * row["norm_pressure"]
-                + W_FOOTFALL * row["norm_footfall"]
-            )
-        # Fallback: GTFS supply only, always < 0.5
-        return (row["trip_count"] / max_trips) * 0.5
-
-    df["demand_score"] = df.apply(_score, axis=1)
-
-    # ── Persist ──────────────────────────────────────────────────────
-    upsert_sql = text("""
-        INSERT INTO backend.station_demand_scores (
-            stop_id, name, lat, lon, trip_count, ridership_count, catchment_population,
-            station_type, footfall_count,
-            norm_ridership, norm_uptake, norm_pressure, norm_footfall,
-            raw_pressure, max_pressure, demand_score, computed_at
-        ) VALUES (
-            :stop_id, :name, :lat, :lon, :trip_count, :ridership_count, :catchment_population,
-            :station_type, :footfall_count,
-            :norm_ridership, :norm_uptake, :norm_pressure, :norm_footfall,
-            :raw_pressure, :max_pressure, :demand_score, NOW()
-        )
-        ON CONFLICT (stop_id) DO UPDATE SET
-            name                 = EXCLUDED.name,
-            lat                  = EXCLUDED.lat,
-            lon                  = EXCLUDED.lon,
-            trip_count           = EXCLUDED.trip_count,
-            ridership_count      = EXCLUDED.ridership_count,
-            catchment_population = EXCLUDED.catchment_population,
-            station_type         = EXCLUDED.station_type,
-            footfall_count       = EXCLUDED.footfall_count,
-            norm_ridership       = EXCLUDED.norm_ridership,
-            norm_uptake          = EXCLUDED.norm_uptake,
-            norm_pressure        = EXCLUDED.norm_pressure,
-            norm_footfall        = EXCLUDED.norm_footfall,
-            raw_pressure         = EXCLUDED.raw_pressure,
-            max_pressure         = EXCLUDED.max_pressure,
-            demand_score         = EXCLUDED.demand_score,
-            computed_at          = NOW()
-    """)
-
-    rows: list[dict] = []
+    scores = df[_SCORE_COLUMNS]
     with engine.begin() as conn:
-        for _, row in df.iterrows():
-            record = {
-                "stop_id": str(row["stop_id"]),
-                "name": str(row["name"]),
-                "lat": float(row["lat"]),
-                "lon": float(row["lon"]),
-                "trip_count": int(row["trip_count"]),
-                "ridership_count": int(row["ridership_count"]),
-                "catchment_population": int(row["catchment_population"]),
-                "station_type": str(row["station_type"])
-                if row["station_type"]
-                else None,
-                "footfall_count": int(row["footfall_count"]),
-                "norm_ridership": float(row["norm_ridership"]),
-                "norm_uptake": float(row["norm_uptake"]),
-                "norm_pressure": float(row["norm_pressure"]),
-                "norm_footfall": float(row["norm_footfall"]),
-                "raw_pressure": float(row["raw_pressure"]),
-                "max_pressure": max_pressure,
-                "demand_score": float(row["demand_score"]),
-            }
-            conn.execute(upsert_sql, record)
-            rows.append(record)
+        conn.execute(
+            _UPSERT_SCORES_SQL,
+            {column: scores[column].tolist() for column in _SCORE_COLUMNS},
+        )
+    rows = scores.to_dict("records")
 
     logger.info("Upserted %d station demand scores to DB.", len(rows))
     return rows
 
 
-def load_demand_scores_from_db() -> list[dict]:
+async def load_demand_scores_from_db() -> list[dict]:
     """Read latest demand scores from DB, ordered by score descending."""
     try:
-        with engine.connect() as conn:
-            df = pd.read_sql(
+        async with request_connection() as conn:
+            result = await conn.execute(
                 text(
                     "SELECT * FROM backend.station_demand_scores ORDER BY demand_score DESC"
-                ),
-                conn,
+                )
             )
-        return df.to_dict(orient="records")
+        return [dict(row) for row in result.mappings()]
     except Exception:  # noqa: BLE001
         logger.warning(
             "Could not read demand scores from DB -- table may not exist yet."
@@ -2,7 +2,6 @@ import json
 import logging
 import os
 
-import google.generativeai as genai
 from sqlalchemy import text
 
 from inference_engine.db import engine
@@ -82,6 +81,8 @@ def run_simulation(recommendation: list) -> str:
         msg = "GEMINI_API_KEY environment variable is not set."
         raise ValueError(msg)
 
+    import google.generativeai as genai  # noqa: PLC0415
+
     genai.configure(api_key=api_key)
     model = genai.GenerativeModel(
         model_name=_GEMINI_MODEL,
@@ -1,14 +1,22 @@
+from __future__ import annotations
+
 import json
 import logging
 import re
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import numpy as np
-import pandas as pd
-from sklearn.linear_model import LinearRegression
 from sqlalchemy import text
 
 from inference_engine.db import engine
+from inference_engine.lazy_imports import lazy_module
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_module("numpy")
+    pd = lazy_module("pandas")
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -250,6 +258,8 @@ def predict_ridership_2025(ridership_df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame with columns: station, predicted_2025
     """
+    from sklearn.linear_model import LinearRegression  # noqa: PLC0415
+
     year_cols = [f"count_{y}" for y in _RIDERSHIP_YEARS]
     x = np.array(_RIDERSHIP_YEARS, dtype=float).reshape(-1, 1)
     x_2025 = np.array([[2025.0]])
@@ -0,0 +1,184 @@
+"""
+Memoised train utilisation pipeline.
+
+The pipeline (load_stop_times_with_stops → process_stop_times →
+predict_ridership_2025 → distribute_ridership_weighted → compute_utilisation)
+only depends on the train GTFS feed and the station ridership table, so its
+output is memoised by their data version: the latest import time the data
+handler recorded for the two sources in source_file_manifests.
+
+Artefacts are persisted in backend.train_utilisation_artifacts, so every
+caller and every API replica shares one computation per data version. The
+replica that computes a version holds an advisory lock while doing so, and
+is the only one that saves its recommendation.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from sqlalchemy import text
+
+from inference_engine.db import engine
+from inference_engine.indicators.train.train_utilisation import (
+    build_utilisation_json,
+    compute_utilisation,
+    distribute_ridership_weighted,
+    load_stop_times_with_stops,
+    load_train_station_ridership,
+    predict_ridership_2025,
+    process_stop_times,
+    save_recommendation_to_db,
+)
+from inference_engine.lazy_imports import lazy_module
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from sqlalchemy import Connection
+else:
+    pd = lazy_module("pandas")
+
+logger = logging.getLogger(__name__)
+
+_COMPUTE_LOCK_KEY = 0x747261696E5F7574  # arbitrary, unique to this pipeline
+_UNVERSIONED = "unversioned"  # no import recorded yet
+
+_DATA_VERSION_SQL = text("""
+    SELECT MAX(imported_at)
+    FROM external_data.source_file_manifests
+    WHERE source IN ('train', 'train_ridership')
+""")
+
+_CREATE_ARTIFACTS_TABLE_SQL = text("""
+    CREATE TABLE IF NOT EXISTS backend.train_utilisation_artifacts (
+        data_version      TEXT PRIMARY KEY,
+        result_df         JSONB NOT NULL,
+        utilisation_json  JSONB NOT NULL,
+        created_at        TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    )
+""")
+
+_SELECT_ARTIFACTS_SQL = text("""
+    SELECT result_df, utilisation_json
+    FROM backend.train_utilisation_artifacts
+    WHERE data_version = :data_version
+""")
+
+# Older versions are never read again
+_DELETE_ARTIFACTS_SQL = text("DELETE FROM backend.train_utilisation_artifacts")
+
+_INSERT_ARTIFACTS_SQL = text("""
+    INSERT INTO backend.train_utilisation_artifacts
+        (data_version, result_df, utilisation_json)
+    VALUES
+        (:data_version, CAST(:result_df AS jsonb), CAST(:utilisation_json AS jsonb))
+""")
+
+
+@dataclass(frozen=True)
+class UtilisationArtifacts:
+    """
+    Output of one run of the utilisation pipeline.
+
+    Attributes:
+        data_version: Data version the artefacts were computed from
+        result_df: Output of distribute_ridership_weighted()
+        utilisation_json: Output of build_utilisation_json()
+    """
+
+    data_version: str
+    result_df: pd.DataFrame
+    utilisation_json: list[dict]
+
+
+def compute_artifacts(data_version: str) -> UtilisationArtifacts:
+    """Run the full utilisation pipeline against the current data."""
+    stop_times_df = load_stop_times_with_stops()
+    ridership_df = load_train_station_ridership()
+    _, unique_combinations_df = process_stop_times(stop_times_df)
+    predicted_df = predict_ridership_2025(ridership_df)
+    result_df = distribute_ridership_weighted(
+        unique_combinations_df, ridership_df, predicted_df
+    )
+    utilisation_df = compute_utilisation(result_df)
+    return UtilisationArtifacts(
+        data_version=data_version,
+        result_df=result_df,
+        utilisation_json=build_utilisation_json(utilisation_df),
+    )
+
+
+def _store_artifacts(conn: Connection, artifacts: UtilisationArtifacts) -> None:
+    conn.execute(_DELETE_ARTIFACTS_SQL)
+    conn.execute(
+        _INSERT_ARTIFACTS_SQL,
+        {
+            "data_version": artifacts.data_version,
+            "result_df": artifacts.result_df.to_json(orient="split", index=False),
+            "utilisation_json": json.dumps(artifacts.utilisation_json),
+        },
+    )
+
+
+def _load_artifacts(conn: Connection, data_version: str) -> UtilisationArtifacts | None:
+    row = conn.execute(_SELECT_ARTIFACTS_SQL, {"data_version": data_version}).first()
+    if row is None:
+        return None
+    return UtilisationArtifacts(
+        data_version=data_version,
+        result_df=pd.DataFrame(row.result_df["data"], columns=row.result_df["columns"]),
+        utilisation_json=row.utilisation_json,
+    )
+
+
+class UtilisationPipeline:
+    """
+    The utilisation pipeline's latest artefacts, recomputed once per data version.
+
+    ``get`` is safe to call from several threads and several replicas at once:
+    callers for a version not yet computed wait for the one computing it.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._artifacts: UtilisationArtifacts | None = None
+
+    def data_version(self) -> str:
+        """Return the version of the pipeline's input data."""
+        with engine.connect() as conn:
+            imported_at = conn.execute(_DATA_VERSION_SQL).scalar()
+        return imported_at.isoformat() if imported_at is not None else _UNVERSIONED
+
+    def get(self) -> UtilisationArtifacts:
+        """Return the artefacts for the current data, computing them if needed."""
+        data_version = self.data_version()
+        with self._lock:
+            if self._artifacts is None or self._artifacts.data_version != data_version:
+                self._artifacts = self._load_or_compute(data_version)
+            return self._artifacts
+
+    def _load_or_compute(self, data_version: str) -> UtilisationArtifacts:
+        with engine.begin() as conn:
+            conn.execute(
+                text("SELECT pg_advisory_xact_lock(:key)"), {"key": _COMPUTE_LOCK_KEY}
+            )
+            conn.execute(_CREATE_ARTIFACTS_TABLE_SQL)
+            artifacts = _load_artifacts(conn, data_version)
+            if artifacts is not None:
+                logger.info("Loaded train utilisation artefacts for %s.", data_version)
+                return artifacts
+
+            logger.info("Computing train utilisation artefacts for %s...", data_version)
+            artifacts = compute_artifacts(data_version)
+            _store_artifacts(conn, artifacts)
+            # Within the lock, so that exactly one replica saves each version's
+            # recommendation; a failure here leaves the version to be recomputed
+            save_recommendation_to_db(artifacts.utilisation_json)
+        return artifacts
+
+
+utilisation_pipeline = UtilisationPipeline()
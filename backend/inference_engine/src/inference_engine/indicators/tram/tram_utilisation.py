@@ -7,17 +7,26 @@ against scheduled tram capacity. Filters out short depot movements
 Utilisation = estimated_passengers / (real_trams_at_stop x tram_capacity)
 """
 
+from __future__ import annotations
+
+import functools
 import json
 import logging
 from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
-import pandas as pd
 import requests
 from sqlalchemy import text
 
 from inference_engine.db import engine
+from inference_engine.lazy_imports import lazy_module
 from inference_engine.settings.api_settings import get_api_settings
 
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_module("pandas")
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -211,47 +220,86 @@ def load_delay_history() -> pd.DataFrame:
     return df
 
 
+@dataclass(frozen=True)
+class TramData:
+    """Inputs of the utilisation analysis, loaded once for all time periods."""
+
+    luas_stops: pd.DataFrame
+    gtfs_stops: pd.DataFrame
+    stop_times: pd.DataFrame
+    hourly_dist: pd.DataFrame
+    delay_df: pd.DataFrame
+    daily_passengers: dict[str, float]
+
+
+def load_tram_data() -> TramData:
+    return TramData(
+        luas_stops=load_luas_stops(),
+        gtfs_stops=load_gtfs_stops(),
+        stop_times=load_weekday_stop_times(),
+        hourly_dist=load_hourly_distribution(),
+        delay_df=load_delay_history(),
+        daily_passengers=load_daily_passengers(),
+    )
+
+
 # ── Name Matching ─────────────────────────────────────────────────
 
 
-def build_luas_to_gtfs_name_map(
-    luas_stops: pd.DataFrame,
-    gtfs_stops: pd.DataFrame,
+def _normalise_name(name: str) -> str:
+    return name.replace(" - ", " ").replace("  ", " ")
+
+
+@functools.lru_cache(maxsize=4)
+def _match_stop_names(
+    luas_names: tuple[tuple[str, str], ...],
+    gtfs_names: frozenset[str],
 ) -> dict[str, str]:
-    gtfs_names = set(gtfs_stops["name"].str.lower().unique())
-    normalised = {n.replace(" - ", " ").replace("  ", " "): n for n in gtfs_names}
+    """Map (Luas stop id, lowercased name) pairs to lowercased GTFS names."""
+    normalised = {_normalise_name(n): n for n in gtfs_names}
+    # Substring matching is the O(luas x gtfs) fallback; sorted for stable picks
+    ordered = sorted(gtfs_names)
     mapping = {}
-    for _, row in luas_stops.iterrows():
-        ln = row["name"].lower()
-        sid = row["stop_id"]
+    for sid, ln in luas_names:
         if ln in gtfs_names:
             mapping[sid] = ln
-        elif ln.replace(" - ", " ").replace("  ", " ") in normalised:
-            mapping[sid] = normalised[ln.replace(" - ", " ").replace("  ", " ")]
+        elif _normalise_name(ln) in normalised:
+            mapping[sid] = normalised[_normalise_name(ln)]
         else:
-            for gn in gtfs_names:
+            for gn in ordered:
                 if gn in ln or ln in gn:
                     mapping[sid] = gn
                     break
-    logger.info("Mapped %d / %d Luas stops to GTFS.", len(mapping), len(luas_stops))
     return mapping
 
 
-def build_gtfs_name_to_ids(gtfs_stops: pd.DataFrame) -> dict[str, list[str]]:
-    result = {}
-    for _, row in gtfs_stops.iterrows():
-        result.setdefault(row["name"].lower(), []).append(row["id"])
-    return result
+def build_luas_to_gtfs_name_map(
+    luas_stops: pd.DataFrame,
+    gtfs_stops: pd.DataFrame,
+) -> dict[str, str]:
+    """
+    Map Luas stop ids to lowercased GTFS stop names.
+
+    The matching is cached by the two stop lists, which only change with a
+    new GTFS feed.
+    """
+    mapping = _match_stop_names(
+        tuple(zip(luas_stops["stop_id"], luas_stops["name"].str.lower(), strict=True)),
+        frozenset(gtfs_stops["name"].str.lower()),
+    )
+    logger.info("Mapped %d / %d Luas stops to GTFS.", len(mapping), len(luas_stops))
+    return dict(mapping)
 
 
-# ── Core Analysis ─────────────────────────────────────────────────
+def build_gtfs_name_to_ids(gtfs_stops: pd.DataFrame) -> dict[str, list[str]]:
+    return (
+        gtfs_stops.groupby(gtfs_stops["name"].str.lower(), sort=False)["id"]
+        .agg(list)
+        .to_dict()
+    )
 
 
-def _parse_hour(label: str) -> int:
-    try:
-        return int(label[:2].strip())
-    except (ValueError, IndexError):
-        return -1
+# ── Core Analysis ─────────────────────────────────────────────────
 
 
 def _expand_hours(start: int, end: int) -> list[int]:
@@ -260,128 +308,163 @@ def _expand_hours(start: int, end: int) -> list[int]:
     return list(range(start, 25)) + list(range(end))
 
 
-def compute_stop_metrics(  # noqa: PLR0913, PLR0912, PLR0915
-    luas_stops: pd.DataFrame,
-    gtfs_stops: pd.DataFrame,
-    stop_times: pd.DataFrame,
-    hourly_dist: pd.DataFrame,
-    delay_df: pd.DataFrame,
-    daily_passengers: dict[str, float],
-    start_hour: int,
-    end_hour: int,
-) -> list[StopMetrics]:
-    luas_to_gtfs = build_luas_to_gtfs_name_map(luas_stops, gtfs_stops)
-    name_to_ids = build_gtfs_name_to_ids(gtfs_stops)
-
-    gtfs_id_to_name = {}
-    for name, ids in name_to_ids.items():
-        for gid in ids:
-            gtfs_id_to_name[gid] = name
-
-    hours = _expand_hours(start_hour, end_hour)
-    hour_set = set(hours)
-
-    st = stop_times.copy()
-    st["hour"] = pd.to_datetime(
-        st["arrival_time"].astype(str), format="%H:%M:%S", errors="coerce"
-    ).dt.hour
-    st = st[st["hour"].isin(hour_set)]
-
-    st["gtfs_name"] = st["stop_id"].map(gtfs_id_to_name)
-    st = st.dropna(subset=["gtfs_name"])
-
-    gtfs_name_to_line = {}
-    for _, row in luas_stops.iterrows():
-        gname = luas_to_gtfs.get(row["stop_id"])
-        if gname:
-            gtfs_name_to_line[gname] = row["line"]
+def _period_hours(periods: list[dict]) -> pd.DataFrame:
+    """One (period, hour) row per hour of each period."""
+    return pd.DataFrame(
+        [
+            {"period": p["key"], "hour": hour}
+            for p in periods
+            for hour in _expand_hours(p["start"], p["end"])
+        ],
+        columns=["period", "hour"],
+    )
+
+
+def _hourly_pct(hourly_dist: pd.DataFrame, period_hours: pd.DataFrame) -> pd.Series:
+    """CSO share of daily passengers per (period, line key), in percent."""
+    label = hourly_dist["time_label"].astype(str).str[:2].str.strip()
+    line_label = hourly_dist["line_label"].astype(str).str.strip().str.lower()
+    key = pd.Series("_all", index=hourly_dist.index)
+    key[line_label.str.contains("green")] = "green"
+    key[line_label.str.contains("red")] = "red"
+    dist = pd.DataFrame(
+        {
+            "hour": pd.to_numeric(label, errors="coerce"),
+            "key": key,
+            "value": hourly_dist["value"],
+        }
+    )
+    return (
+        dist.dropna(subset=["value"])
+        .merge(period_hours, on="hour")
+        .groupby(["period", "key"])["value"]
+        .sum()
+    )
+
+
+def compute_period_metrics(
+    data: TramData,
+    periods: list[dict] = TIME_PERIODS,
+) -> dict[str, list[StopMetrics]]:
+    """
+    Compute per-stop metrics for every time period in one pass.
+
+    Stop time hours are parsed once, and trips are counted with one groupby
+    over (period, stop, direction) after joining each stop time to the
+    periods its hour falls in.
+
+    Returns:
+        The metrics of each period, keyed by period key, in Luas stop order.
+    """
+    luas_stops = data.luas_stops
+    luas_to_gtfs = build_luas_to_gtfs_name_map(luas_stops, data.gtfs_stops)
+    gtfs_id_to_name = dict(
+        zip(data.gtfs_stops["id"], data.gtfs_stops["name"].str.lower(), strict=True)
+    )
+    gtfs_name_to_line = dict(
+        zip(luas_stops["stop_id"].map(luas_to_gtfs), luas_stops["line"], strict=True)
+    )
+    period_hours = _period_hours(periods)
+
+    st = pd.DataFrame(
+        {
+            "trip_id": data.stop_times["trip_id"],
+            "direction_id": data.stop_times["direction_id"],
+            "sequence": data.stop_times["sequence"],
+            "hour": pd.to_datetime(
+                data.stop_times["arrival_time"].astype(str),
+                format="%H:%M:%S",
+                errors="coerce",
+            ).dt.hour,
+            "gtfs_name": data.stop_times["stop_id"].map(gtfs_id_to_name),
+        }
+    ).dropna(subset=["hour", "gtfs_name"])
     st["line"] = st["gtfs_name"].map(gtfs_name_to_line)
+    st = st.merge(period_hours, on="hour")
 
-    # Count unique real-service trams per stop per direction
+    # Count unique real-service trams per period, stop and direction
     trip_counts = (
-        st.groupby(["gtfs_name", "direction_id"])["trip_id"]
+        st.groupby(["period", "gtfs_name", "direction_id"])["trip_id"]
         .nunique()
         .unstack(fill_value=0)
         .rename(columns={0: "outbound", 1: "inbound"})
+        .reindex(columns=["outbound", "inbound"], fill_value=0)
     )
-    for col in ("outbound", "inbound"):
-        if col not in trip_counts.columns:
-            trip_counts[col] = 0
-
-    line_totals = st.groupby("line")["trip_id"].nunique().to_dict()
-    avg_seq = st.groupby("gtfs_name")["sequence"].mean()
-
-    # Hourly % per line from CSO
-    hourly_pct = {}
-    for _, row in hourly_dist.iterrows():
-        h = _parse_hour(row["time_label"])
-        if h in hour_set and row["value"] is not None:
-            lk = str(row.get("line_label", row["line_code"])).strip().lower()
-            if "red" in lk:
-                hourly_pct["red"] = hourly_pct.get("red", 0.0) + row["value"]
-            elif "green" in lk:
-                hourly_pct["green"] = hourly_pct.get("green", 0.0) + row["value"]
-            else:
-                hourly_pct["_all"] = hourly_pct.get("_all", 0.0) + row["value"]
-
-    delay_lookup = {}
-    for _, row in delay_df.iterrows():
-        delay_lookup[row["stop_id"]] = (
-            float(row["avg_delay"]) if row["avg_delay"] else 0.0,
-            int(row["delay_count"]) if row["delay_count"] else 0,
-        )
-
-    metrics = []
-    for _, luas_row in luas_stops.iterrows():
-        sid = luas_row["stop_id"]
-        line = luas_row["line"]
-        gname = luas_to_gtfs.get(sid)
-        if gname is None:
-            continue
+    line_totals = st.groupby(["period", "line"])["trip_id"].nunique()
+    avg_seq = st.groupby(["period", "gtfs_name"])["sequence"].mean()
+    hourly_pct = _hourly_pct(data.hourly_dist, period_hours)
 
-        tc = (
-            trip_counts.loc[gname]
-            if gname in trip_counts.index
-            else pd.Series({"outbound": 0, "inbound": 0})
-        )
-        out_trips = int(tc.get("outbound", 0))
-        in_trips = int(tc.get("inbound", 0))
-        total_trips = out_trips + in_trips
-
-        lt = line_totals.get(line, 1)
-        pct = hourly_pct.get(line, hourly_pct.get("_all", 0.0)) / 100.0
-        daily = daily_passengers.get(line, 80_000.0)
+    delays = data.delay_df.drop_duplicates("stop_id", keep="last").set_index("stop_id")
 
-        est_in = (in_trips / max(1, lt)) * pct * daily
-        est_out = (out_trips / max(1, lt)) * pct * daily
-        est_total = est_in + est_out
-
-        cap = TRAM_CAPACITY.get(line, 200)
-        capacity = total_trips * cap
-        util = est_total / capacity if capacity > 0 else 0.0
+    # One row per (period, mapped Luas stop), in period then Luas stop order
+    stops = luas_stops.assign(gtfs_name=luas_stops["stop_id"].map(luas_to_gtfs))
+    stops = stops.dropna(subset=["gtfs_name"])
+    frame = pd.DataFrame(
+        {
+            "period": [p["key"] for p in periods for _ in range(len(stops))],
+            "stop_id": list(stops["stop_id"]) * len(periods),
+            "stop_name": list(stops["name"]) * len(periods),
+            "line": list(stops["line"]) * len(periods),
+            "gtfs_name": list(stops["gtfs_name"]) * len(periods),
+        }
+    )
+    period_gtfs = pd.MultiIndex.from_frame(frame[["period", "gtfs_name"]])
+    period_line = pd.MultiIndex.from_frame(frame[["period", "line"]])
+    period_all = pd.MultiIndex.from_arrays([frame["period"], ["_all"] * len(frame)])
+
+    counts = trip_counts.reindex(period_gtfs, fill_value=0)
+    frame["outbound_trips"] = counts["outbound"].to_numpy()
+    frame["inbound_trips"] = counts["inbound"].to_numpy()
+    frame["total_trips"] = frame["outbound_trips"] + frame["inbound_trips"]
+
+    lt = line_totals.reindex(period_line).fillna(1).clip(lower=1).to_numpy()
+    # A line without its own CSO distribution uses the all-lines one
+    pct = (
+        pd.Series(hourly_pct.reindex(period_line).to_numpy())
+        .fillna(pd.Series(hourly_pct.reindex(period_all).to_numpy()))
+        .fillna(0.0)
+        .to_numpy()
+        / 100.0
+    )
+    daily = frame["line"].map(data.daily_passengers).fillna(80_000.0).to_numpy()
 
-        d_avg, d_count = delay_lookup.get(sid, (0.0, 0))
-        seq = float(avg_seq.get(gname, 0.0))
+    frame["est_in"] = (frame["inbound_trips"] / lt) * pct * daily
+    frame["est_out"] = (frame["outbound_trips"] / lt) * pct * daily
+    frame["est_total"] = frame["est_in"] + frame["est_out"]
+    frame["capacity"] = frame["total_trips"] * frame["line"].map(TRAM_CAPACITY).fillna(
+        200
+    )
+    frame["utilisation"] = (
+        frame["est_total"] / frame["capacity"].where(frame["capacity"] > 0)
+    ).fillna(0.0)
+    frame["avg_delay_mins"] = (
+        frame["stop_id"].map(delays["avg_delay"]).fillna(0.0).astype(float)
+    )
+    frame["delay_count"] = (
+        frame["stop_id"].map(delays["delay_count"]).fillna(0).astype(int)
+    )
+    frame["sequence"] = avg_seq.reindex(period_gtfs).fillna(0.0).to_numpy()
 
-        metrics.append(
+    metrics: dict[str, list[StopMetrics]] = {p["key"]: [] for p in periods}
+    for row in frame.itertuples(index=False):
+        metrics[row.period].append(
             StopMetrics(
-                stop_id=sid,
-                stop_name=luas_row["name"],
-                line=line,
-                sequence=seq,
-                inbound_trips=in_trips,
-                outbound_trips=out_trips,
-                total_trips=total_trips,
-                est_inbound_pax=round(est_in, 1),
-                est_outbound_pax=round(est_out, 1),
-                est_total_pax=round(est_total, 1),
-                capacity=round(capacity, 1),
-                utilisation=round(util, 4),
-                avg_delay_mins=d_avg,
-                delay_count=d_count,
+                stop_id=row.stop_id,
+                stop_name=row.stop_name,
+                line=row.line,
+                sequence=float(row.sequence),
+                inbound_trips=int(row.inbound_trips),
+                outbound_trips=int(row.outbound_trips),
+                total_trips=int(row.total_trips),
+                est_inbound_pax=round(float(row.est_in), 1),
+                est_outbound_pax=round(float(row.est_out), 1),
+                est_total_pax=round(float(row.est_total), 1),
+                capacity=round(float(row.capacity), 1),
+                utilisation=round(float(row.utilisation), 4),
+                avg_delay_mins=float(row.avg_delay_mins),
+                delay_count=int(row.delay_count),
             )
         )
-
     return metrics
 
 
@@ -661,12 +744,7 @@ def _detect_direction_imbalance(
 def analyse_all_periods() -> list[Recommendation]:
     logger.info("Starting tram utilisation analysis...")
 
-    luas_stops = load_luas_stops()
-    gtfs_stops = load_gtfs_stops()
-    stop_times = load_weekday_stop_times()
-    hourly_dist = load_hourly_distribution()
-    delay_df = load_delay_history()
-    daily_pax = load_daily_passengers()
+    metrics_by_period = compute_period_metrics(load_tram_data())
 
     all_recs = []
 
@@ -678,16 +756,7 @@ def analyse_all_periods() -> list[Recommendation]:
             period["end"],
         )
 
-        metrics = compute_stop_metrics(
-            luas_stops,
-            gtfs_stops,
-            stop_times,
-            hourly_dist,
-            delay_df,
-            daily_pax,
-            period["start"],
-            period["end"],
-        )
+        metrics = metrics_by_period[period["key"]]
 
         for line in ("red", "green"):
             lm = [m for m in metrics if m.line == line and m.total_trips > 0]
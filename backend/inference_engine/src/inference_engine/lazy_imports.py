@@ -0,0 +1,35 @@
+"""
+Deferred imports of heavy libraries.
+
+pandas and numpy take seconds to import and are only needed once a request
+or background job actually touches data. Modules on the API's import path
+bind them through ``lazy_module`` so that the app can start serving
+(``/metrics``, health checks) before they are loaded.
+"""
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_module(name: str) -> ModuleType:
+    """
+    Return the module ``name``, executed on first attribute access.
+
+    An already imported module is returned as is.
+
+    Raises:
+        ModuleNotFoundError: If the module is not installed
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        msg = f"No module named {name!r}"
+        raise ModuleNotFoundError(msg, name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -1,8 +1,9 @@
 import asyncio
 import logging
 import os
-import threading
+import time
 from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Any
@@ -24,17 +25,11 @@ from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from prometheus_fastapi_instrumentator import Instrumentator
 from pydantic import BaseModel
 
+from inference_engine.db import async_engine
 from inference_engine.db import engine as db_engine
 from inference_engine.ev_router import router as ev_router
-from inference_engine.indicators.cycle.risk_engine import run as run_cycle_risk
-from inference_engine.indicators.train.train_utilisation import (
-    build_utilisation_json,
-    compute_utilisation,
-    distribute_ridership_weighted,
-    load_stop_times_with_stops,
-    load_train_station_ridership,
-    predict_ridership_2025,
-    process_stop_times,
+from inference_engine.indicators.train.utilisation_pipeline import (
+    utilisation_pipeline,
 )
 from inference_engine.indicators.tram.tram_utilisation import (
     analyse_all_periods,
@@ -42,6 +37,7 @@ from inference_engine.indicators.tram.tram_utilisation import (
     save_recommendation_to_db,
 )
 from inference_engine.settings.api_settings import get_api_settings
+from inference_engine.startup import readiness, record_stage, start_warmups
 from inference_engine.train_router import router as train_router
 from inference_engine.train_router import warm_demand_cache, warm_utilisation_cache
 
@@ -98,26 +94,22 @@ async def lifespan(app: FastAPI) -> Generator[None, Any, None]:
     Handle startup and shutdown events
     """
     # Startup
+    started = time.perf_counter()
     logger.info("Application starting up...")
     start_scheduler()
-
-    cycle_risk_thread = threading.Thread(
-        target=run_cycle_risk,
-        args=(db_engine,),
-        name="cycle-risk-engine",
-        daemon=True,
-    )
-    cycle_risk_thread.start()
-    logger.info("Cycle risk engine started in background thread")
-    warm_demand_cache()
-    warm_utilisation_cache()
-    logger.info("Application ready!")
+    # Warm-ups run in the background; /train/* answers 503 until they finish
+    warmup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="warmup")
+    start_warmups(warmup_executor, "train", [warm_demand_cache, warm_utilisation_cache])
+    record_stage("lifespan", started)
+    logger.info("Application serving; warm-ups running in background.")
 
     yield
 
     # Shutdown
     logger.info("Application shutting down...")
+    warmup_executor.shutdown(wait=False, cancel_futures=True)
     shutdown_scheduler()
+    await async_engine.dispose()
     tracer_provider.shutdown()
     logger.info("Application stopped!")
 
@@ -456,22 +448,14 @@ def run_tram_utilisation() -> None:
 
 async def scheduled_train_utilisation_task() -> None:
     """
-    Runs the full train utilisation pipeline daily at 8 AM and saves
-    the recommendation to the DB.
+    Runs the train utilisation pipeline daily at 1 AM. The pipeline and its
+    recommendation are only recomputed when the train data has changed since
+    the last run, on any replica (see ``utilisation_pipeline``).
     """
     logger.info("⏰ Daily train utilisation recommendation job triggered.")
     try:
-        stop_times_df = load_stop_times_with_stops()
-        ridership_df = load_train_station_ridership()
-        _, unique_combinations_df = process_stop_times(stop_times_df)
-        predicted_df = predict_ridership_2025(ridership_df)
-        result_df = distribute_ridership_weighted(
-            unique_combinations_df, ridership_df, predicted_df
-        )
-        utilisation_df = compute_utilisation(result_df)
-        utilisation_json = build_utilisation_json(utilisation_df)
-        save_recommendation_to_db(utilisation_json)
-        logger.info("✅ Train utilisation recommendation saved to DB.")
+        await asyncio.to_thread(utilisation_pipeline.get)
+        logger.info("✅ Train utilisation recommendation up to date.")
     except Exception:
         logger.exception("❌ Daily train utilisation job failed.")
 
@@ -689,6 +673,12 @@ async def mock_notification_handler(payload: dict) -> dict:
 #     return {"Hello": "World"}
 
 
+@app.get("/health")
+async def health() -> dict:
+    """Liveness and per-component readiness; always 200 once the app serves."""
+    return {"status": "ok", "ready": readiness.status()}
+
+
 @app.get("/")
 async def root() -> dict:
     """Root endpoint with API information"""
@@ -0,0 +1,84 @@
+"""
+Pre-encoded JSON responses.
+
+Large responses that only change when the data handler reloads their tables
+are encoded and gzipped once per data version and served as bytes, with an
+ETag so that clients holding the current version get a 304.
+"""
+
+import gzip
+import hashlib
+import json
+from dataclasses import dataclass
+
+from fastapi import Request, Response
+
+_GZIP_SUFFIX = "-gzip"
+
+
+@dataclass(frozen=True)
+class EncodedJson:
+    """
+    A JSON body encoded once and served many times.
+
+    Attributes:
+        data_version: Data version the body was built from
+        body: UTF-8 encoded JSON
+        gzipped: ``body`` gzip-compressed
+        etag: Strong ETag of ``body``; the gzipped body's ETag is suffixed
+    """
+
+    data_version: str
+    body: bytes
+    gzipped: bytes
+    etag: str
+
+
+def encode_json(data_version: str, payload: object) -> EncodedJson:
+    """Encode and compress ``payload`` built from ``data_version``."""
+    body = json.dumps(payload, separators=(",", ":")).encode()
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    return EncodedJson(
+        data_version=data_version,
+        body=body,
+        gzipped=gzip.compress(body, compresslevel=9, mtime=0),
+        etag=f'"{digest}"',
+    )
+
+
+def _gzip_etag(etag: str) -> str:
+    return f'{etag[:-1]}{_GZIP_SUFFIX}"'
+
+
+def _accepts_gzip(request: Request) -> bool:
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() == "gzip":
+            return params.replace(" ", "").lower() not in {"q=0", "q=0.0", "q=0.00"}
+    return False
+
+
+def _not_modified(request: Request, encoded: EncodedJson) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or bool(tags & {encoded.etag, _gzip_etag(encoded.etag)})
+
+
+def encoded_json_response(request: Request, encoded: EncodedJson) -> Response:
+    """
+    Serve ``encoded``: 304 if the client has it, gzipped if the client accepts it.
+    """
+    gzipped = _accepts_gzip(request)
+    headers = {
+        "ETag": _gzip_etag(encoded.etag) if gzipped else encoded.etag,
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "no-cache",
+    }
+    if _not_modified(request, encoded):
+        return Response(status_code=304, headers=headers)
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+        return Response(encoded.gzipped, media_type="application/json", headers=headers)
+    return Response(encoded.body, media_type="application/json", headers=headers)
@@ -17,6 +17,13 @@ class DatabaseSettings(BaseSettings):
         user: Database user for inference engine (from DB_INFERENCE_ENGINE_USER environment variable)
         password: Database password for inference engine (from DB_INFERENCE_ENGINE_PASSWORD environment variable)
         postgres_schema: Database schema (from DB_INFERENCE_ENGINE_SCHEMA environment variable)
+        pool_size: Connections kept open by the async request pool (from DB_POOL_SIZE)
+        pool_max_overflow: Extra connections opened under load (from DB_POOL_MAX_OVERFLOW)
+        pool_timeout_s: Seconds a request waits for a pooled connection (from DB_POOL_TIMEOUT_S)
+        prepare_threshold: Executions of a query before psycopg prepares it
+            server-side, i.e. caches its plan (from DB_PREPARE_THRESHOLD)
+        request_timeout_s: Time budget of a request's database work, enforced
+            client-side and as the statement_timeout (from DB_REQUEST_TIMEOUT_S)
         dsn: Full Postgres DSN for the database (derived from the other settings)
     """
 
@@ -26,6 +33,11 @@ class DatabaseSettings(BaseSettings):
     user: str = Field(..., alias="DB_USER")
     password: str = Field(..., alias="DB_PASSWORD")
     postgres_schema: str = Field("backend", alias="DB_INFERENCE_ENGINE_SCHEMA")
+    pool_size: int = Field(10, alias="DB_POOL_SIZE")
+    pool_max_overflow: int = Field(10, alias="DB_POOL_MAX_OVERFLOW")
+    pool_timeout_s: float = Field(5.0, alias="DB_POOL_TIMEOUT_S")
+    prepare_threshold: int = Field(5, alias="DB_PREPARE_THRESHOLD")
+    request_timeout_s: float = Field(15.0, alias="DB_REQUEST_TIMEOUT_S")
 
     @computed_field
     @property
@@ -0,0 +1,117 @@
+"""
+Staged application startup.
+
+The app serves requests (``/metrics``, health checks) as soon as the scheduler
+is up; cache warm-ups run afterwards in a background executor. Each warm-up
+belongs to a component, and routers that depend on a component depend on
+``readiness.require(component)``: until its warm-ups have finished they answer
+503 with a Retry-After header. Durations and readiness are exported as
+Prometheus metrics.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import Executor, Future
+
+from fastapi import HTTPException
+from prometheus_client import Gauge
+
+logger = logging.getLogger(__name__)
+
+RETRY_AFTER_S = 10
+
+STARTUP_SECONDS = Gauge(
+    "inference_engine_startup_seconds",
+    "Duration of each startup stage, in seconds",
+    ["stage"],
+)
+COMPONENT_READY = Gauge(
+    "inference_engine_component_ready",
+    "1 once a component's warm-ups have finished, 0 while they are running",
+    ["component"],
+)
+
+
+class Readiness:
+    """Components whose warm-ups are still running."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: set[str] = set()
+        self._components: set[str] = set()
+
+    def start(self, component: str) -> None:
+        """Mark ``component`` as warming up."""
+        with self._lock:
+            self._pending.add(component)
+            self._components.add(component)
+        COMPONENT_READY.labels(component=component).set(0)
+
+    def finish(self, component: str) -> None:
+        """Mark ``component`` as ready."""
+        with self._lock:
+            self._pending.discard(component)
+        COMPONENT_READY.labels(component=component).set(1)
+
+    def is_ready(self, component: str) -> bool:
+        """Return whether ``component`` is ready; components never started are."""
+        with self._lock:
+            return component not in self._pending
+
+    def status(self) -> dict[str, bool]:
+        """Return the readiness of every component started so far."""
+        with self._lock:
+            return {c: c not in self._pending for c in sorted(self._components)}
+
+    def require(self, component: str) -> Callable[[], None]:
+        """Return a FastAPI dependency answering 503 until ``component`` is ready."""
+
+        def dependency() -> None:
+            if not self.is_ready(component):
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"{component} is warming up",
+                    headers={"Retry-After": str(RETRY_AFTER_S)},
+                )
+
+        return dependency
+
+
+readiness = Readiness()
+
+
+def record_stage(stage: str, started: float) -> None:
+    """Export the duration of a startup stage begun at ``started`` (perf_counter)."""
+    elapsed = time.perf_counter() - started
+    STARTUP_SECONDS.labels(stage=stage).set(elapsed)
+    logger.info("Startup stage %s took %.2f s", stage, elapsed)
+
+
+def start_warmups(
+    executor: Executor,
+    component: str,
+    warmups: Sequence[Callable[[], None]],
+) -> Future[None]:
+    """
+    Run ``warmups`` in order on ``executor``, then mark ``component`` ready.
+
+    A failing warm-up is logged and does not hold the component back: its
+    routes then compute on demand, as they would after a cache expiry.
+    """
+    readiness.start(component)
+
+    def run() -> None:
+        try:
+            for warmup in warmups:
+                started = time.perf_counter()
+                try:
+                    warmup()
+                except Exception:
+                    logger.exception("Warm-up %s failed", warmup.__name__)
+                record_stage(warmup.__name__, started)
+        finally:
+            readiness.finish(component)
+
+    return executor.submit(run)
@@ -1,23 +1,22 @@
 """Train utilisation, demand scoring, and simulation API endpoints."""
 
-import json  # noqa: I001
+import json
 import logging
-import math
-import time
 from typing import Any
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
 from sqlalchemy import text
 
 from inference_engine.db import engine
+from inference_engine.indicators.train.demand_simulation import (
+    MAX_TRAIN_COUNT,
+    demand_simulator,
+    extra_trips,
+    simulate,
+    sweep,
+)
 from inference_engine.indicators.train.train_demand import (
-    W_FOOTFALL,
-    W_PRESSURE,
-    W_RIDERSHIP,
-    W_UPTAKE,
-    TRAIN_TYPE_CAPACITY,
-    DEFAULT_CAPACITY,
     compute_and_save_demand_scores,
     load_demand_scores_from_db,
 )
@@ -26,44 +25,40 @@ from inference_engine.indicators.train.train_simulation import (
     run_simulation,
     store_simulation,
 )
-from inference_engine.indicators.train.train_utilisation import (
-    _TOTAL_CAPACITY,
-    build_utilisation_json,
-    compute_utilisation,
-    distribute_ridership_weighted,
-    load_stop_times_with_stops,
-    load_train_station_ridership,
-    predict_ridership_2025,
-    process_stop_times,
-    save_recommendation_to_db,
+from inference_engine.indicators.train.train_utilisation import _TOTAL_CAPACITY
+from inference_engine.indicators.train.utilisation_pipeline import (
+    utilisation_pipeline,
 )
+from inference_engine.startup import readiness
 
-router = APIRouter(prefix="/train", tags=["Train"])
+router = APIRouter(
+    prefix="/train",
+    tags=["Train"],
+    dependencies=[Depends(readiness.require("train"))],
+)
 logger = logging.getLogger(__name__)
 
-# ── Utilisation cache (headsign pipeline — expensive, annual data) ────
-_UTILISATION_CACHE: dict = {"headsigns": None, "timestamp": 0.0}
-_CACHE_TTL_SECONDS = 6 * 60 * 60  # 6 hours
+# ── Utilisation cache (headsigns built from the memoised pipeline) ────
+_UTILISATION_CACHE: dict = {"headsigns": None, "data_version": None}
 
-# ── Simulation sensitivity ────────────────────────────────────────────
-# Controls how aggressively added trains reduce pressure in simulation.
-# relief_ratio = extra / trip_count  (fractional service increase, no cap)
-# pressure_factor = exp(-relief_ratio * SENSITIVITY)
-# At SENSITIVITY=13: adding 20 trains to a 509-trip corridor → ~10% score improvement.
-# Smaller corridors benefit more per added train (appropriate for planning).
-_PRESSURE_SENSITIVITY = 13.0
+# ── Simulation limits ─────────────────────────────────────────────────
+MAX_CORRIDORS = 50
+MAX_SWEEP_CORRIDORS = 500
 
 # ── Simulation request/response models ───────────────────────────────
 
 
-class CorridorInput(BaseModel):
+class CorridorEndpoints(BaseModel):
     origin_stop_id: str
     destination_stop_id: str
+
+
+class CorridorInput(CorridorEndpoints):
     train_count: int = 1  # 1-20 extra services to add
 
 
 class SimulateRequest(BaseModel):
-    corridors: list[CorridorInput]  # max 3
+    corridors: list[CorridorInput]  # max MAX_CORRIDORS
 
 
 class StationDemandOut(BaseModel):
@@ -91,42 +86,27 @@ class SimulateResponse(BaseModel):
     affected_stop_ids: list[str]
 
 
-def _simulate_stop(s: dict, extra: int) -> dict:
-    """
-    Recompute demand score for one stop after adding `extra` daily services.
+class SweepRequest(BaseModel):
+    # Default: every route, end to end
+    corridors: list[CorridorEndpoints] | None = Field(
+        default=None, max_length=MAX_SWEEP_CORRIDORS
+    )
+    train_counts: list[int] = list(range(1, MAX_TRAIN_COUNT + 1))
+    top: int = 20
+
+
+class SweepResult(BaseModel):
+    origin_stop_id: str
+    destination_stop_id: str
+    train_count: int
+    affected_stop_count: int
+    score_reduction: float
+    mean_score_reduction: float
 
-    Pressure decays exponentially with relief_ratio = extra / trip_count.
-    Smaller corridors benefit more per added train; adding 20 trains to a
-    509-trip corridor gives ~10% score improvement (SENSITIVITY = 13).
-    """
-    capacity = TRAIN_TYPE_CAPACITY.get(s.get("station_type") or "", DEFAULT_CAPACITY)
-    new_trips = s["trip_count"] + extra
-    daily_riders = s["ridership_count"] / 365.0
-    # relief_ratio = fractional service increase (no cap — avoids all stations
-    # hitting the same maximum when daily_riders << extra_capacity)
-    relief_ratio = extra / max(s["trip_count"], 1)
-    pressure_factor = math.exp(-relief_ratio * _PRESSURE_SENSITIVITY)
-    new_norm_pres = s["norm_pressure"] * pressure_factor
-
-    if s["ridership_count"] > 0:
-        new_score = (
-            W_RIDERSHIP * s["norm_ridership"]
-            + W_UPTAKE * s["norm_uptake"]
-            + W_PRESSURE * new_norm_pres
-            + W_FOOTFALL * s["norm_footfall"]
-        )
-        new_raw = daily_riders / (new_trips * capacity) if new_trips > 0 else 0.0
-    else:
-        new_score = s["demand_score"] * pressure_factor
-        new_raw = 0.0
 
-    return {
-        **s,
-        "trip_count": new_trips,
-        "norm_pressure": round(new_norm_pres, 6),
-        "raw_pressure": round(new_raw, 6),
-        "demand_score": round(new_score, 6),
-    }
+class SweepResponse(BaseModel):
+    scenario_count: int
+    results: list[SweepResult]
 
 
 def _load_stop_coords() -> dict[str, dict]:
@@ -279,22 +259,22 @@ def warm_demand_cache() -> None:
 
 
 @router.get("/demand")
-def get_demand() -> list[dict]:
+async def get_demand() -> list[dict]:
     """
     Return per-station demand scores for all Dublin train stops.
     Reads directly from the pre-computed backend.station_demand_scores table.
     """
     try:
-        return load_demand_scores_from_db()
+        return await load_demand_scores_from_db()
     except Exception as e:
         logger.exception("Error in get_demand")
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
 @router.post("/demand/simulate")
-def simulate_demand(request: SimulateRequest) -> SimulateResponse:
+async def simulate_demand(request: SimulateRequest) -> SimulateResponse:
     """
-    Simulate adding extra train services on up to 3 corridors.
+    Simulate adding extra train services on up to MAX_CORRIDORS corridors.
 
     Only capacity pressure changes when you add trains — ridership, local uptake,
     and footfall are assumed unchanged (riders don't instantly shift routes).
@@ -304,73 +284,22 @@ def simulate_demand(request: SimulateRequest) -> SimulateResponse:
     A lower score on affected stops = better (trains are less full).
     """
     try:
-        base: list[dict] = load_demand_scores_from_db()
-        if not request.corridors:
-            return SimulateResponse(
-                base_demand=[StationDemandOut(**s) for s in base],
-                simulated_demand=[StationDemandOut(**s) for s in base],
-                affected_stop_ids=[],
-            )
-
-        # Build route-stop index: routeId → ordered list of stopIds
-        route_stop_sql = text("""
-            SELECT r.id AS route_id, s.id AS stop_id, st.sequence AS seq
-            FROM (
-                SELECT DISTINCT ON (route_id) id, route_id
-                FROM external_data.train_trips
-                WHERE direction_id = 0
-                ORDER BY route_id, id
-            ) t
-            JOIN external_data.train_routes r  ON r.id  = t.route_id
-            JOIN external_data.train_stop_times st ON st.trip_id = t.id
-            JOIN external_data.train_stops      s  ON s.id  = st.stop_id
-            ORDER BY r.id, st.sequence
-        """)
-        with engine.connect() as conn:
-            rows = conn.execute(route_stop_sql).fetchall()
-
-        # route_id → sorted list of stop_ids
-        route_stops: dict[str, list[str]] = {}
-        for row in rows:
-            route_stops.setdefault(row.route_id, []).append(row.stop_id)
-
-        # extra trips per stop accumulated across corridors
-        extra_trips: dict[str, int] = {}
-        max_corridors = min(3, len(request.corridors))
-        for corridor in request.corridors[:max_corridors]:
-            origin = corridor.origin_stop_id
-            dest = corridor.destination_stop_id
-            count = max(1, min(20, corridor.train_count))
-
-            corridor_stops: set[str] = set()
-            for stop_list in route_stops.values():
-                try:
-                    i = stop_list.index(origin)
-                    j = stop_list.index(dest)
-                    from_idx, to_idx = min(i, j), max(i, j)
-                    corridor_stops.update(stop_list[from_idx : to_idx + 1])
-                except ValueError:
-                    pass
-            # fallback: mark at least the two endpoints
-            if not corridor_stops:
-                corridor_stops = {origin, dest}
-
-            for stop_id in corridor_stops:
-                extra_trips[stop_id] = extra_trips.get(stop_id, 0) + count
-
-        # Recompute scores for affected stops only; everything else unchanged
-        stop_map = {s["stop_id"]: dict(s) for s in base}
-        affected_ids = list(extra_trips.keys())
-
-        for stop_id, extra in extra_trips.items():
-            if stop_id not in stop_map:
-                continue
-            stop_map[stop_id] = _simulate_stop(stop_map[stop_id], extra)
-
-        simulated = list(stop_map.values())
+        model = await demand_simulator.get()
+        extra = extra_trips(
+            model,
+            (
+                (
+                    c.origin_stop_id,
+                    c.destination_stop_id,
+                    max(1, min(MAX_TRAIN_COUNT, c.train_count)),
+                )
+                for c in request.corridors[:MAX_CORRIDORS]
+            ),
+        )
+        simulated, affected_ids = simulate(model, extra)
 
         return SimulateResponse(
-            base_demand=[StationDemandOut(**s) for s in base],
+            base_demand=[StationDemandOut(**s) for s in model.base],
             simulated_demand=[StationDemandOut(**s) for s in simulated],
             affected_stop_ids=affected_ids,
         )
@@ -380,6 +309,51 @@ def simulate_demand(request: SimulateRequest) -> SimulateResponse:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
+@router.post("/demand/simulate/sweep")
+async def sweep_demand(request: SweepRequest) -> SweepResponse:
+    """
+    Simulate every corridor with every train count and rank the scenarios.
+
+    Scenarios are ranked by the total demand score reduction over the stops
+    of the corridor; the ``top`` best are returned. Without corridors, every
+    route is swept end to end.
+    """
+    try:
+        model = await demand_simulator.get()
+        if request.corridors is None:
+            corridors = list(dict.fromkeys(model.route_ends))
+        else:
+            corridors = [
+                (c.origin_stop_id, c.destination_stop_id) for c in request.corridors
+            ]
+        train_counts = sorted(
+            {max(1, min(MAX_TRAIN_COUNT, k)) for k in request.train_counts}
+        )
+        results = sweep(model, corridors, train_counts)
+    except Exception as e:
+        logger.exception("Error in sweep_demand")
+        raise HTTPException(status_code=500, detail=str(e)) from e
+    else:
+        return SweepResponse(
+            scenario_count=len(results),
+            results=[SweepResult(**r) for r in results[: max(request.top, 0)]],
+        )
+
+
+def _utilisation_headsigns() -> list:
+    """
+    Return the headsigns response for the current data version.
+    Rebuilt only when the memoised pipeline's data version changes.
+    """
+    artifacts = utilisation_pipeline.get()
+    if _UTILISATION_CACHE["data_version"] != artifacts.data_version:
+        _UTILISATION_CACHE["headsigns"] = _build_headsigns_response(
+            artifacts.utilisation_json, artifacts.result_df
+        )
+        _UTILISATION_CACHE["data_version"] = artifacts.data_version
+    return _UTILISATION_CACHE["headsigns"]
+
+
 def warm_utilisation_cache() -> None:
     """
     Pre-compute and cache the utilisation pipeline result.
@@ -387,20 +361,7 @@ def warm_utilisation_cache() -> None:
     """
     try:
         logger.info("Pre-warming train utilisation cache...")
-        stop_times_df = load_stop_times_with_stops()
-        ridership_df = load_train_station_ridership()
-        _, unique_combinations_df = process_stop_times(stop_times_df)
-        predicted_df = predict_ridership_2025(ridership_df)
-        result_df = distribute_ridership_weighted(
-            unique_combinations_df, ridership_df, predicted_df
-        )
-        utilisation_df = compute_utilisation(result_df)
-        utilisation_json = build_utilisation_json(utilisation_df)
-        save_recommendation_to_db(utilisation_json)
-
-        headsigns = _build_headsigns_response(utilisation_json, result_df)
-        _UTILISATION_CACHE["headsigns"] = headsigns
-        _UTILISATION_CACHE["timestamp"] = time.time()
+        headsigns = _utilisation_headsigns()
         logger.info("Train utilisation cache warmed with %d headsigns.", len(headsigns))
     except Exception:
         logger.exception(
@@ -412,37 +373,10 @@ def warm_utilisation_cache() -> None:
 def get_train_utilisation() -> dict:
     """
     Return headsign utilisation data with per-station corridor info.
-    In-process cache (6 hours) avoids re-running the heavy pipeline on every request.
+    The pipeline runs once per data version (see ``utilisation_pipeline``).
     """
     try:
-        now = time.time()
-        if (
-            _UTILISATION_CACHE["headsigns"] is not None
-            and (now - _UTILISATION_CACHE["timestamp"]) < _CACHE_TTL_SECONDS
-        ):
-            logger.info("Returning in-process cached utilisation data.")
-            simulation = _fetch_latest_simulation()
-            return {
-                "headsigns": _UTILISATION_CACHE["headsigns"],
-                "simulation": simulation,
-            }
-
-        logger.info("Cache miss — running utilisation pipeline.")
-        stop_times_df = load_stop_times_with_stops()
-        ridership_df = load_train_station_ridership()
-        _, unique_combinations_df = process_stop_times(stop_times_df)
-        predicted_df = predict_ridership_2025(ridership_df)
-        result_df = distribute_ridership_weighted(
-            unique_combinations_df, ridership_df, predicted_df
-        )
-        utilisation_df = compute_utilisation(result_df)
-        utilisation_json = build_utilisation_json(utilisation_df)
-        save_recommendation_to_db(utilisation_json)
-
-        headsigns = _build_headsigns_response(utilisation_json, result_df)
-        _UTILISATION_CACHE["headsigns"] = headsigns
-        _UTILISATION_CACHE["timestamp"] = now
-
+        headsigns = _utilisation_headsigns()
         simulation = _fetch_latest_simulation()
     except Exception as e:
         logger.exception("Error in get_train_utilisation")
@@ -1,9 +1,15 @@
 # test_app.py
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
 from fastapi.testclient import TestClient
 
 from inference_engine.main import (
     app,  # Assuming your FastAPI app is named `app` in `main.py`
 )
+from inference_engine.startup import RETRY_AFTER_S, readiness, start_warmups
 
 client = TestClient(app)  # Initialize the FastAPI test client
 
@@ -50,3 +56,66 @@ def test_get_scheduler_status() -> None:
     assert "scheduler_running" in response.json()
     assert "fetch_interval_hours" in response.json()
     assert "data_indicators" in response.json()
+
+
+# Test health endpoint reports component readiness
+def test_health_reports_readiness() -> None:
+    readiness.start("health-test")
+    try:
+        response = client.get("/health")
+    finally:
+        readiness.finish("health-test")
+    assert response.status_code == 200
+    assert response.json()["ready"]["health-test"] is False
+
+
+# Test /train/* answers 503 with Retry-After while its warm-ups run
+def test_train_routes_unavailable_until_warm() -> None:
+    readiness.start("train")
+    try:
+        response = client.get("/train/demand")
+    finally:
+        readiness.finish("train")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(RETRY_AFTER_S)
+
+    with patch(
+        "inference_engine.train_router.load_demand_scores_from_db", return_value=[]
+    ):
+        assert client.get("/train/demand").status_code == 200
+
+
+# Test a failing warm-up still marks its component ready
+def test_failed_warmup_marks_component_ready() -> None:
+    calls = []
+
+    def failing_warmup() -> None:
+        raise RuntimeError
+
+    def next_warmup() -> None:
+        calls.append("next")
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = start_warmups(executor, "warmup-test", [failing_warmup, next_warmup])
+        future.result()
+
+    assert calls == ["next"]
+    assert readiness.is_ready("warmup-test")
+
+
+# Test heavy libraries are not imported with the app
+def test_app_import_defers_heavy_libraries() -> None:
+    script = (
+        "import sys, types, inference_engine.main\n"
+        "loaded = [m for m in ('pandas', 'numpy', 'sklearn', 'google.generativeai')\n"
+        "          if type(sys.modules.get(m)) is types.ModuleType]\n"
+        "print(','.join(loaded))"
+    )
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=120,
+    )
+    assert result.stdout.strip() == ""
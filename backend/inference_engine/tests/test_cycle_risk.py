@@ -0,0 +1,429 @@
+"""Tests for the cycle station risk engine, its model store and worker."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from inference_engine.indicators.cycle import worker
+from inference_engine.indicators.cycle.model_store import (
+    deserialise_models,
+    save_models,
+    serialise_models,
+)
+from inference_engine.indicators.cycle.risk_engine import (
+    EMPTY_THRESHOLD,
+    FEATURES,
+    FULL_RATIO,
+    HORIZON_H,
+    MIN_ROWS,
+    RiskModels,
+    StationModel,
+    TrainingState,
+    build_training_frame,
+    fit_station_models,
+    score_stations,
+    train_models,
+    update_models,
+)
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+
+
+def _snapshots(
+    stations: int, days: int, seed: int = 0
+) -> tuple[pd.DataFrame, pd.Series]:
+    """Random-walk snapshots at 1-minute cadence up to today, ~5% of them missing."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp.now(tz="UTC").floor("D") - pd.Timedelta(days=days)
+    ts = pd.date_range(start, periods=days * 24 * 60, freq="1min")
+    frames = []
+    for sid in range(1, stations + 1):
+        cap = int(rng.integers(15, 40))
+        walk = np.clip(np.cumsum(rng.integers(-2, 3, len(ts))) + cap // 2, 0, cap)
+        keep = rng.random(len(ts)) > 0.05
+        frames.append(
+            pd.DataFrame(
+                {
+                    "station_id": sid,
+                    "timestamp": ts[keep],
+                    "available_bikes": walk[keep],
+                    "capacity": cap,
+                }
+            )
+        )
+    hourly_risk = pd.DataFrame(
+        [
+            (sid, hour, rng.random())
+            for sid in range(1, stations + 1)
+            for hour in range(24)
+        ],
+        columns=["station_id", "hour_of_day", "empty_risk"],
+    ).set_index(["station_id", "hour_of_day"])["empty_risk"]
+    return pd.concat(frames, ignore_index=True), hourly_risk
+
+
+def _reference_labels(sdf: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """Row-by-row horizon scan of one station, as labels were first computed."""
+    ts = sdf["timestamp"].to_numpy()
+    bikes = sdf["available_bikes"].to_numpy()
+    cap = sdf["capacity"].to_numpy()
+    horizon = np.timedelta64(HORIZON_H, "h")
+    empty = np.zeros(len(sdf), dtype=np.int8)
+    full = np.zeros(len(sdf), dtype=np.int8)
+    for i in range(len(sdf)):
+        for k in range(i + 1, len(sdf)):
+            if ts[k] - ts[i] > horizon:
+                break
+            if ts[k] == ts[i]:
+                continue
+            empty[i] |= bikes[k] <= EMPTY_THRESHOLD
+            full[i] |= cap[k] > 0 and bikes[k] / cap[k] >= FULL_RATIO
+    return empty, full
+
+
+def _reference_flow(sdf: pd.DataFrame) -> pd.DataFrame:
+    """Per-station flow rates with row-wise delta clipping."""
+    sdf = sdf.set_index("timestamp")
+    delta = sdf["available_bikes"].diff()
+    dep = delta.apply(lambda d: -d if pd.notna(d) and -5 <= d <= -1 else 0.0)
+    arr = delta.apply(lambda d: d if pd.notna(d) and 1 <= d <= 5 else 0.0)
+    return pd.DataFrame(
+        {
+            "departure_rate_30m": dep.rolling("30min").mean().fillna(0.0),
+            "arrival_rate_30m": arr.rolling("30min").mean().fillna(0.0),
+        }
+    ).reset_index(drop=True)
+
+
+# ── Unit: build_training_frame ────────────────────────────────────────────────
+
+
+def test_labels_match_row_by_row_scan() -> None:
+    df_all, hourly_risk = _snapshots(stations=3, days=1)
+
+    frame = build_training_frame(df_all, hourly_risk)
+
+    for _, sdf in frame.groupby("station_id"):
+        empty, full = _reference_labels(sdf)
+        np.testing.assert_array_equal(sdf["will_be_empty_2h"].to_numpy(), empty)
+        np.testing.assert_array_equal(sdf["will_be_full_2h"].to_numpy(), full)
+
+
+def test_flow_features_match_per_station_rolling() -> None:
+    df_all, hourly_risk = _snapshots(stations=3, days=1)
+
+    frame = build_training_frame(df_all, hourly_risk)
+
+    for _, sdf in frame.groupby("station_id"):
+        pd.testing.assert_frame_equal(
+            sdf[["departure_rate_30m", "arrival_rate_30m"]].reset_index(drop=True),
+            _reference_flow(sdf),
+        )
+
+
+def test_labels_do_not_cross_stations() -> None:
+    ts = pd.Timestamp("2026-09-01 08:00", tz="UTC")
+    df_all = pd.DataFrame(
+        {
+            "station_id": [1, 2],
+            "timestamp": [ts, ts + pd.Timedelta(minutes=5)],
+            "available_bikes": [10, 0],
+            "capacity": [20, 20],
+        }
+    )
+    hourly_risk = pd.Series(
+        [],
+        index=pd.MultiIndex.from_arrays([[], []], names=["station_id", "hour_of_day"]),
+        dtype=float,
+    )
+
+    frame = build_training_frame(df_all, hourly_risk)
+
+    assert frame["will_be_empty_2h"].tolist() == [0, 0]
+    assert frame["empty_risk_this_hour"].tolist() == [0.0, 0.0]
+
+
+def test_hourly_risk_is_looked_up_per_station_and_hour() -> None:
+    df_all, hourly_risk = _snapshots(stations=2, days=1)
+
+    frame = build_training_frame(df_all, hourly_risk)
+
+    row = frame.iloc[-1]
+    key = (row["station_id"], row["hour_of_day"])
+    assert row["empty_risk_this_hour"] == hourly_risk[key]
+
+
+# ── Unit: fit_station_models ──────────────────────────────────────────────────
+
+
+def test_fit_station_models_skips_short_histories() -> None:
+    df_all, hourly_risk = _snapshots(stations=2, days=1)
+    frame = build_training_frame(df_all, hourly_risk)
+    frame = pd.concat(
+        [
+            frame[frame["station_id"] == 1],
+            frame[frame["station_id"] == 2].head(MIN_ROWS // 2),
+        ]
+    )
+
+    models = fit_station_models(frame, workers=1)
+
+    assert list(models) == [1]
+    empty_p, full_p = models[1].predict(dict.fromkeys(FEATURES, 0.5))
+    assert 0.0 <= empty_p <= 1.0
+    assert 0.0 <= full_p <= 1.0
+
+
+def test_fit_station_models_in_process_pool() -> None:
+    df_all, hourly_risk = _snapshots(stations=2, days=1)
+    frame = build_training_frame(df_all, hourly_risk)
+
+    models = fit_station_models(frame, workers=2)
+
+    assert sorted(models) == [1, 2]
+
+
+# ── Unit: RiskModels ──────────────────────────────────────────────────────────
+
+
+def _risk_models(stations: int) -> tuple[RiskModels, dict[int, StationModel]]:
+    df_all, hourly_risk = _snapshots(stations=stations, days=1)
+    frame = build_training_frame(df_all, hourly_risk)
+    models = fit_station_models(frame, workers=1)
+    # A station whose history never empties gets no empty classifier
+    models[1].has_empty_variance = False
+    return RiskModels.stack(models, frame, hourly_risk, datetime.now(tz=UTC)), models
+
+
+def test_stacked_predict_matches_per_station_models() -> None:
+    stacked, models = _risk_models(stations=3)
+    rng = np.random.default_rng(1)
+    station_ids = np.array([3, 1, 2, 3])
+    x_feat = rng.random((len(station_ids), len(FEATURES)))
+
+    empty_p, full_p = stacked.predict(station_ids, x_feat)
+
+    for i, sid in enumerate(station_ids):
+        expected = models[int(sid)].predict(dict(zip(FEATURES, x_feat[i], strict=True)))
+        np.testing.assert_allclose((empty_p[i], full_p[i]), expected)
+    assert empty_p[1] == 0.0
+
+
+def test_score_stations_upserts_all_stations_in_one_statement() -> None:
+    stacked, _ = _risk_models(stations=2)
+    df_snap = pd.DataFrame(
+        {
+            "station_id": [1, 2, 99],
+            "available_bikes": [5, 0, 3],
+            "capacity": [20, 0, 10],
+        }
+    )
+    df_flow = pd.DataFrame(
+        {"station_id": [2], "departure_rate_30m": [1.5], "arrival_rate_30m": [0.5]}
+    )
+    engine = MagicMock()
+    conn = engine.begin.return_value.__enter__.return_value
+
+    with patch("pandas.read_sql", side_effect=[df_snap, df_flow]):
+        written = score_stations(stacked, engine)
+
+    assert written == 2
+    conn.execute.assert_called_once()
+    params = conn.execute.call_args.args[1]
+    assert params["station_ids"] == [1, 2]
+    assert params["model_trained_at"] == stacked.trained_at
+    assert all(0.0 <= p <= 1.0 for p in params["empty_risks"] + params["full_risks"])
+
+
+# ── Unit: model store ─────────────────────────────────────────────────────────
+
+
+def test_serialised_models_round_trip_without_pickle() -> None:
+    stacked, _ = _risk_models(stations=3)
+
+    restored = deserialise_models(serialise_models(stacked))
+
+    for name in ("station_ids", "mean", "scale", "empty_coef", "full_class_counts"):
+        np.testing.assert_array_equal(getattr(restored, name), getattr(stacked, name))
+    pd.testing.assert_series_equal(restored.hourly_risk, stacked.hourly_risk)
+    assert restored.trained_at == stacked.trained_at
+    x_feat = np.random.default_rng(2).random((3, len(FEATURES)))
+    np.testing.assert_allclose(
+        restored.predict(stacked.station_ids, x_feat),
+        stacked.predict(stacked.station_ids, x_feat),
+    )
+
+
+def test_unknown_payload_format_is_rejected() -> None:
+    stacked, _ = _risk_models(stations=1)
+    with patch("inference_engine.indicators.cycle.model_store._PAYLOAD_FORMAT", 99):
+        payload = serialise_models(stacked)
+
+    with pytest.raises(ValueError, match="format 99"):
+        deserialise_models(payload)
+
+
+def test_save_models_publishes_a_version_and_prunes_old_ones() -> None:
+    stacked, _ = _risk_models(stations=1)
+    engine = MagicMock()
+    conn = engine.begin.return_value.__enter__.return_value
+    conn.execute.return_value.scalar_one.return_value = 12
+
+    assert save_models(engine, stacked) == 12
+    insert, prune = conn.execute.call_args_list
+    assert (
+        deserialise_models(insert.args[1]["payload"]).trained_at == stacked.trained_at
+    )
+    assert prune.args[1]["version"] == 12
+
+
+# ── Unit: worker ──────────────────────────────────────────────────────────────
+
+
+def test_acquire_leadership_waits_for_the_lock() -> None:
+    engine = MagicMock()
+    standby, leader = MagicMock(), MagicMock()
+    engine.connect.return_value.execution_options.side_effect = [standby, leader]
+    standby.execute.return_value.scalar_one.return_value = False
+    leader.execute.return_value.scalar_one.return_value = True
+
+    with patch.object(worker.time, "sleep") as sleep:
+        conn = worker.acquire_leadership(engine)
+
+    assert conn is leader
+    standby.close.assert_called_once()
+    leader.close.assert_not_called()
+    sleep.assert_called_once_with(worker.LEADER_RETRY_S)
+
+
+def test_leadership_is_lost_with_the_lock_connection() -> None:
+    conn = MagicMock()
+    assert worker.holds_leadership(conn)
+
+    conn.execute.side_effect = DBAPIError("SELECT 1", {}, Exception("closed"))
+    assert not worker.holds_leadership(conn)
+
+
+def test_worker_scores_with_stored_models_and_publishes_trained_ones() -> None:
+    stored, _ = _risk_models(stations=1)
+    trained = MagicMock(spec=TrainingState)
+    trained.models = MagicMock(spec=RiskModels)
+    trained.models.__len__.return_value = 1
+    leader = iter([True, True, False])
+
+    with (
+        patch.object(worker, "ensure_scores_table"),
+        patch.object(worker, "ensure_model_store"),
+        patch.object(worker, "load_latest_models", return_value=(3, stored)),
+        patch.object(worker, "train_models", return_value=trained),
+        patch.object(worker, "save_models", return_value=4) as save,
+        patch.object(worker, "score_stations") as score,
+        patch.object(worker, "SCORE_INTERVAL_S", 5),
+    ):
+        worker.run(MagicMock(), lambda: next(leader))
+
+    assert score.call_args_list[0].args[0] is stored
+    assert score.call_args_list[1].args[0] is trained.models
+    save.assert_called_once()
+    assert save.call_args.args[1] is trained.models
+
+
+# ── Unit: incremental updates ─────────────────────────────────────────────────
+
+
+def _hourly_count_rows(df_all: pd.DataFrame) -> pd.DataFrame:
+    ts = df_all["timestamp"].dt.tz_convert("Europe/Dublin")
+    return (
+        df_all.assign(
+            day=ts.dt.date,
+            hour_of_day=ts.dt.hour,
+            empty_count=df_all["available_bikes"] <= EMPTY_THRESHOLD,
+            total_count=1,
+        )
+        .groupby(["station_id", "day", "hour_of_day"], as_index=False)[
+            ["empty_count", "total_count"]
+        ]
+        .sum()
+    )
+
+
+def _train_then_update() -> tuple[TrainingState, TrainingState, pd.DataFrame]:
+    """Train on the first two days of three, then update with the third."""
+    df_all, _ = _snapshots(stations=2, days=3)
+    now = df_all["timestamp"].max()
+    history = df_all[df_all["timestamp"] <= now - pd.Timedelta(days=1)]
+    new = df_all[df_all["timestamp"] > history["timestamp"].max()]
+    engine = MagicMock()
+
+    with (
+        patch("pandas.read_sql", side_effect=[history, _hourly_count_rows(history)]),
+        patch(
+            "inference_engine.indicators.cycle.risk_engine.fit_station_models",
+            side_effect=lambda frame: fit_station_models(frame, workers=1),
+        ),
+    ):
+        state = train_models(engine)
+    with patch("pandas.read_sql", return_value=new) as read_sql:
+        updated = update_models(state, engine)
+
+    assert read_sql.call_args.kwargs["params"] == {
+        "since": history["timestamp"].max().to_pydatetime()
+    }
+    return state, updated, new
+
+
+def test_update_trains_on_rows_whose_horizon_closed() -> None:
+    state, updated, new = _train_then_update()
+
+    assert updated.labelled_until == new["timestamp"].max() - pd.Timedelta(
+        hours=HORIZON_H
+    )
+    assert updated.buffer["timestamp"].min() > updated.labelled_until - pd.Timedelta(
+        hours=1, minutes=1
+    )
+    assert updated.full_trained_at == state.full_trained_at
+    # Every newly labelled row is counted once per label
+    trained = new[
+        (new["timestamp"] > state.labelled_until)
+        & (new["timestamp"] <= updated.labelled_until)
+    ]
+    grown = (
+        updated.models.empty_class_counts.sum() - state.models.empty_class_counts.sum()
+    )
+    assert grown == len(trained) + (
+        len(state.buffer[state.buffer["timestamp"] > state.labelled_until])
+    )
+    assert not np.array_equal(updated.models.full_coef, state.models.full_coef)
+
+
+def test_update_rolls_hourly_counts_forward() -> None:
+    state, updated, new = _train_then_update()
+
+    total = updated.hourly_counts["total_count"].sum()
+    assert total == state.hourly_counts["total_count"].sum() + len(new)
+    assert updated.models.hourly_risk.between(0, 1).all()
+
+
+def test_gradient_update_reduces_loss_on_new_rows() -> None:
+    stacked, _ = _risk_models(stations=2)
+    df_all, hourly_risk = _snapshots(stations=2, days=1, seed=5)
+    frame = build_training_frame(df_all, hourly_risk)
+
+    updated = stacked.updated(frame, hourly_risk, datetime.now(tz=UTC))
+
+    def log_loss(models: RiskModels) -> float:
+        p, _ = models.predict(
+            frame["station_id"].to_numpy(), frame[FEATURES].to_numpy(dtype=float)
+        )
+        y = frame["will_be_empty_2h"].to_numpy()
+        fitted = models.has_empty_variance[frame["station_id"].to_numpy() - 1]
+        p = np.clip(p[fitted], 1e-9, 1 - 1e-9)
+        return float(-np.mean(y[fitted] * np.log(p) + (1 - y[fitted]) * np.log(1 - p)))
+
+    assert log_loss(updated) < log_loss(stacked)
@@ -2,14 +2,30 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import math
-from typing import Any
-from unittest.mock import MagicMock, patch
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import numpy as np
 import pandas as pd
 from fastapi.testclient import TestClient
 
+from inference_engine.indicators.train.demand_simulation import (
+    DemandModel,
+    DemandSimulator,
+    build_model,
+    corridor_mask,
+    extra_trips,
+    simulate,
+    sweep,
+)
+from inference_engine.indicators.train.stop_catchments import (
+    refresh_stop_spatial_tables,
+)
 from inference_engine.indicators.train.train_demand import (
     DEFAULT_CAPACITY,
     TRAIN_TYPE_CAPACITY,
@@ -17,10 +33,17 @@ from inference_engine.indicators.train.train_demand import (
     W_PRESSURE,
     W_RIDERSHIP,
     W_UPTAKE,
+    compute_and_save_demand_scores,
     ensure_demand_scores_table,
     load_demand_scores_from_db,
+    score_signals,
+)
+from inference_engine.indicators.train.utilisation_pipeline import (
+    UtilisationArtifacts,
+    UtilisationPipeline,
 )
 from inference_engine.main import app
+from inference_engine.response_cache import encode_json
 from inference_engine.train_router import (
     _UTILISATION_CACHE,
     _fetch_latest_simulation,
@@ -31,8 +54,16 @@ from inference_engine.train_router import (
     warm_utilisation_cache,
 )
 
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
 client = TestClient(app)
 
+_PIPELINE = "inference_engine.indicators.train.utilisation_pipeline"
+_CATCHMENTS = "inference_engine.indicators.train.stop_catchments"
+_DEMAND = "inference_engine.indicators.train.train_demand"
+_SIMULATION = "inference_engine.indicators.train.demand_simulation"
+
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
 _SAMPLE_STOP: dict[str, Any] = {
@@ -63,13 +94,52 @@ _SAMPLE_STOP_2: dict[str, Any] = {
 }
 
 
-# ── Unit: _simulate_stop ──────────────────────────────────────────────────────
+def _request_connection(rows: list) -> Any:  # noqa: ANN401
+    """Stand-in for ``request_connection`` whose queries all return ``rows``."""
+    conn = MagicMock()
+    result = MagicMock()
+    result.all.return_value = rows
+    result.mappings.return_value = rows
+    conn.execute = AsyncMock(return_value=result)
 
+    @asynccontextmanager
+    async def connection() -> AsyncIterator[MagicMock]:
+        yield conn
+
+    return connection
+
+
+# ── Unit: demand simulation ───────────────────────────────────────────────────
+
+
+def _route_row(route_id: str, stop_id: str) -> MagicMock:
+    row = MagicMock()
+    row.route_id = route_id
+    row.stop_id = stop_id
+    return row
+
+
+def _model(
+    base: list[dict] | None = None, routes: dict[str, list[str]] | None = None
+) -> DemandModel:
+    route_rows = [
+        _route_row(route_id, stop_id)
+        for route_id, stop_ids in (routes or {}).items()
+        for stop_id in stop_ids
+    ]
+    return build_model(
+        "v1", [_SAMPLE_STOP, _SAMPLE_STOP_2] if base is None else base, route_rows
+    )
 
-def test_simulate_stop_with_ridership() -> None:
-    from inference_engine.train_router import _simulate_stop  # noqa: PLC0415
 
-    result = _simulate_stop(_SAMPLE_STOP, extra=20)
+def _simulate_one(stop: dict, extra: int) -> dict:
+    model = _model([stop])
+    simulated, _ = simulate(model, extra_trips(model, [("stop_1", "stop_1", extra)]))
+    return simulated[0]
+
+
+def test_simulate_stop_with_ridership() -> None:
+    result = _simulate_one(_SAMPLE_STOP, extra=20)
 
     assert result["trip_count"] == 120
     assert result["demand_score"] < _SAMPLE_STOP["demand_score"]
@@ -78,58 +148,248 @@ def test_simulate_stop_with_ridership() -> None:
 
 
 def test_simulate_stop_no_ridership_decays_score() -> None:
-    from inference_engine.train_router import _simulate_stop  # noqa: PLC0415
-
-    result = _simulate_stop(_SAMPLE_STOP_2, extra=10)
+    stop = {**_SAMPLE_STOP_2, "stop_id": "stop_1"}
+    result = _simulate_one(stop, extra=10)
 
-    relief = 10 / max(_SAMPLE_STOP_2["trip_count"], 1)
+    relief = 10 / max(stop["trip_count"], 1)
     expected_factor = math.exp(-relief * 13.0)
-    assert (
-        abs(result["demand_score"] - _SAMPLE_STOP_2["demand_score"] * expected_factor)
-        < 1e-6
-    )
+    assert abs(result["demand_score"] - stop["demand_score"] * expected_factor) < 1e-6
 
 
 def test_simulate_stop_zero_trips_guard() -> None:
-    from inference_engine.train_router import _simulate_stop  # noqa: PLC0415
-
     stop = {**_SAMPLE_STOP, "trip_count": 0}
-    result = _simulate_stop(stop, extra=5)
+    result = _simulate_one(stop, extra=5)
     assert result["trip_count"] == 5
 
 
 def test_simulate_stop_unknown_station_type_uses_default() -> None:
-    from inference_engine.train_router import _simulate_stop  # noqa: PLC0415
-
     stop = {**_SAMPLE_STOP, "station_type": None}
-    result = _simulate_stop(stop, extra=10)
+    result = _simulate_one(stop, extra=10)
     assert result["trip_count"] == 110
+    assert result["raw_pressure"] == round(
+        stop["ridership_count"] / 365.0 / (110 * DEFAULT_CAPACITY), 6
+    )
+
+
+def test_corridor_mask_spans_every_serving_route() -> None:
+    model = _model(
+        routes={
+            "R1": ["stop_1", "stop_a", "stop_2", "stop_b"],
+            "R2": ["stop_2", "stop_c", "stop_1"],
+            "R3": ["stop_1", "stop_d"],
+        }
+    )
+
+    mask = corridor_mask(model, "stop_1", "stop_2")
+
+    affected = {model.stop_ids[i] for i in np.flatnonzero(mask)}
+    assert affected == {"stop_1", "stop_a", "stop_2", "stop_c"}
+
+
+def test_corridor_mask_falls_back_to_known_endpoints() -> None:
+    model = _model(routes={"R1": ["stop_1", "stop_a"]})
+
+    mask = corridor_mask(model, "stop_1", "stop_x")
+
+    assert [model.stop_ids[i] for i in np.flatnonzero(mask)] == ["stop_1"]
+
+
+def test_extra_trips_accumulates_corridors() -> None:
+    model = _model(routes={"R1": ["stop_1", "stop_a", "stop_2"]})
+
+    extra = extra_trips(model, [("stop_1", "stop_a", 3), ("stop_a", "stop_2", 2)])
+
+    assert dict(zip(model.stop_ids, extra.tolist(), strict=True)) == {
+        "stop_1": 3,
+        "stop_2": 2,
+        "stop_a": 5,
+    }
+
+
+def test_sweep_ranks_scenarios_by_total_reduction() -> None:
+    model = _model(routes={"R1": ["stop_1", "stop_2"], "R2": ["stop_2", "stop_x"]})
+
+    results = sweep(model, [("stop_1", "stop_2"), ("stop_2", "stop_x")], [1, 5])
+
+    assert len(results) == 4
+    reductions = [r["score_reduction"] for r in results]
+    assert reductions == sorted(reductions, reverse=True)
+    best = results[0]
+    assert (best["origin_stop_id"], best["train_count"]) == ("stop_1", 5)
+    assert best["affected_stop_count"] == 2
+    # Each scenario matches the single-batch simulation
+    simulated, _ = simulate(model, extra_trips(model, [("stop_1", "stop_2", 5)]))
+    expected = sum(
+        b["demand_score"] - s["demand_score"]
+        for b, s in zip(model.base, simulated, strict=True)
+    )
+    assert math.isclose(best["score_reduction"], expected, abs_tol=1e-5)
+
+
+def test_demand_simulator_loads_once_per_data_version() -> None:
+    conn = MagicMock()
+    version = MagicMock()
+    version.scalar_one.side_effect = ["v1", "v1", "v2"]
+    scores = MagicMock()
+    scores.mappings.return_value = [_SAMPLE_STOP]
+    routes = MagicMock()
+    routes.all.return_value = [_route_row("R1", "stop_1")]
+    conn.execute = AsyncMock(
+        side_effect=[version, scores, routes, version, version, scores, routes]
+    )
+
+    @asynccontextmanager
+    async def connection() -> AsyncIterator[MagicMock]:
+        yield conn
+
+    simulator = DemandSimulator()
+    with patch(f"{_SIMULATION}.request_connection", connection):
+        first = asyncio.run(simulator.get())
+        second = asyncio.run(simulator.get())
+        third = asyncio.run(simulator.get())
+
+    assert second is first
+    assert third.data_version == "v2"
+    assert first.stop_ids == ["stop_1"]
+    assert conn.execute.await_count == 7
 
 
 # ── Unit: load_demand_scores_from_db ─────────────────────────────────────────
 
 
 def test_load_demand_scores_from_db_success() -> None:
-    mock_df = pd.DataFrame([_SAMPLE_STOP])
-    with patch("inference_engine.indicators.train.train_demand.engine") as mock_engine:
-        mock_conn = MagicMock()
-        mock_engine.connect.return_value.__enter__ = MagicMock(return_value=mock_conn)
-        mock_engine.connect.return_value.__exit__ = MagicMock(return_value=False)
-        with patch("pandas.read_sql", return_value=mock_df):
-            result = load_demand_scores_from_db()
+    with patch(
+        "inference_engine.indicators.train.train_demand.request_connection",
+        _request_connection([_SAMPLE_STOP]),
+    ):
+        result = asyncio.run(load_demand_scores_from_db())
 
     assert len(result) == 1
     assert result[0]["stop_id"] == "stop_1"
 
 
 def test_load_demand_scores_from_db_returns_empty_on_error() -> None:
-    with patch("inference_engine.indicators.train.train_demand.engine") as mock_engine:
-        mock_engine.connect.side_effect = Exception("DB unavailable")
-        result = load_demand_scores_from_db()
+    @asynccontextmanager
+    async def unavailable() -> AsyncIterator[MagicMock]:
+        raise ConnectionError
+        yield MagicMock()
+
+    with patch(
+        "inference_engine.indicators.train.train_demand.request_connection",
+        unavailable,
+    ):
+        result = asyncio.run(load_demand_scores_from_db())
 
     assert result == []
 
 
+# ── Unit: score_signals / compute_and_save_demand_scores ─────────────────────
+
+
+def _signals_df() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "stop_id": ["stop_1", "stop_2", "stop_3"],
+            "name": ["Connolly", "Tara Street", "Sandymount"],
+            "lat": [53.35, 53.347, 53.33],
+            "lon": [-6.25, -6.254, -6.22],
+            "station_type": ["D", "S", "D"],
+            "ridership_count": [3_650_000, 730_000, 0],
+            "catchment_population": [10_000, 0, 4_000],
+        }
+    )
+
+
+def test_score_signals_matches_weighted_formula() -> None:
+    df = _signals_df()
+    df["trip_count"] = [100, 0, 40]
+    df["footfall_count"] = [500, 250, 0]
+    df["capacity"] = [350, 300, 350]
+
+    scored, max_pressure = score_signals(df)
+
+    # stop_1: 10 000 riders/day, the maximum of every signal but footfall
+    assert max_pressure == 10_000 / (100 * 350)
+    assert scored.loc[0, "demand_score"] == W_RIDERSHIP + W_UPTAKE + W_PRESSURE + (
+        W_FOOTFALL * 1.0
+    )
+    # stop_2: no catchment and no trips, so no uptake or pressure
+    assert scored.loc[1, "raw_uptake"] == 0.0
+    assert scored.loc[1, "raw_pressure"] == 0.0
+    assert math.isclose(
+        scored.loc[1, "demand_score"], W_RIDERSHIP * 0.2 + W_FOOTFALL * 0.5
+    )
+    # stop_3: no ridership, GTFS supply fallback
+    assert scored.loc[2, "demand_score"] == 0.4 * 0.5
+
+
+def test_compute_and_save_demand_scores_upserts_in_one_statement() -> None:
+    trips_df = pd.DataFrame({"stop_id": ["stop_1", "stop_2"], "trip_count": [100, 50]})
+    footfall_df = pd.DataFrame({"stop_id": ["stop_1"], "footfall_count": [500]})
+    with (
+        patch(f"{_DEMAND}.ensure_demand_scores_table"),
+        patch(f"{_DEMAND}.refresh_stop_spatial_tables"),
+        patch(f"{_DEMAND}._load_stops_with_signals", return_value=_signals_df()),
+        patch(f"{_DEMAND}._load_trip_counts", return_value=trips_df),
+        patch(f"{_DEMAND}._load_live_footfall", return_value=footfall_df),
+        patch(f"{_DEMAND}.engine") as mock_engine,
+    ):
+        rows = compute_and_save_demand_scores()
+
+    conn = mock_engine.begin.return_value.__enter__.return_value
+    conn.execute.assert_called_once()
+    params = conn.execute.call_args.args[1]
+    assert params["stop_id"] == ["stop_1", "stop_2", "stop_3"]
+    assert params["trip_count"] == [100, 50, 0]
+    assert params["footfall_count"] == [500, 0, 0]
+    assert len(set(params["max_pressure"])) == 1
+    assert [r["stop_id"] for r in rows] == ["stop_1", "stop_2", "stop_3"]
+    assert isinstance(rows[0]["trip_count"], int)
+    assert isinstance(rows[0]["demand_score"], float)
+
+
+# ── Unit: refresh_stop_spatial_tables ────────────────────────────────────────
+
+
+def _catchments_engine(stored_version: str | None) -> tuple[MagicMock, MagicMock]:
+    engine = MagicMock()
+    conn = engine.begin.return_value.__enter__.return_value
+    conn.execute.return_value.scalar.return_value = stored_version
+    return engine, conn
+
+
+def test_refresh_stop_spatial_tables_recomputes_new_version() -> None:
+    engine, conn = _catchments_engine("v1")
+    with (
+        patch(f"{_CATCHMENTS}.engine", engine),
+        patch(f"{_CATCHMENTS}.data_version", return_value="v2"),
+    ):
+        assert refresh_stop_spatial_tables({}) is True
+
+    statements = [str(c.args[0]) for c in conn.execute.call_args_list]
+    assert "pg_advisory_xact_lock" in statements[0]
+    assert any(
+        "INSERT INTO backend.train_stop_catchments" in s and "small_areas" in s
+        for s in statements
+    )
+    assert any(
+        "INSERT INTO backend.train_stop_nearest_counters" in s for s in statements
+    )
+    assert conn.execute.call_args_list[-1].args[1] == {"data_version": "v2"}
+
+
+def test_refresh_stop_spatial_tables_skips_current_version() -> None:
+    engine, conn = _catchments_engine("v1")
+    with (
+        patch(f"{_CATCHMENTS}.engine", engine),
+        patch(f"{_CATCHMENTS}.data_version", return_value="v1"),
+    ):
+        assert refresh_stop_spatial_tables({}) is False
+
+    statements = [str(c.args[0]) for c in conn.execute.call_args_list]
+    assert not any("INSERT" in s for s in statements)
+
+
 # ── Unit: ensure_demand_scores_table ─────────────────────────────────────────
 
 
@@ -215,19 +475,15 @@ def test_get_demand_returns_500_on_error() -> None:
 # ── Endpoint: POST /train/demand/simulate ─────────────────────────────────────
 
 
-def _make_route_row(route_id: str, stop_id: str, seq: int) -> MagicMock:
-    row = MagicMock()
-    row.route_id = route_id
-    row.stop_id = stop_id
-    row.seq = seq
-    return row
+def _patch_model(model: DemandModel | None = None) -> Any:  # noqa: ANN401
+    return patch(
+        "inference_engine.train_router.demand_simulator.get",
+        return_value=model if model is not None else _model(),
+    )
 
 
 def test_simulate_demand_empty_corridors() -> None:
-    with patch(
-        "inference_engine.train_router.load_demand_scores_from_db",
-        return_value=[_SAMPLE_STOP],
-    ):
+    with _patch_model(_model([_SAMPLE_STOP])):
         response = client.post("/train/demand/simulate", json={"corridors": []})
 
     assert response.status_code == 200
@@ -238,23 +494,7 @@ def test_simulate_demand_empty_corridors() -> None:
 
 
 def test_simulate_demand_with_corridor() -> None:
-    route_rows = [
-        _make_route_row("R1", "stop_1", 0),
-        _make_route_row("R1", "stop_2", 1),
-    ]
-
-    with (
-        patch(
-            "inference_engine.train_router.load_demand_scores_from_db",
-            return_value=[_SAMPLE_STOP, _SAMPLE_STOP_2],
-        ),
-        patch("inference_engine.train_router.engine") as mock_engine,
-    ):
-        mock_conn = MagicMock()
-        mock_conn.execute.return_value.fetchall.return_value = route_rows
-        mock_engine.connect.return_value.__enter__ = MagicMock(return_value=mock_conn)
-        mock_engine.connect.return_value.__exit__ = MagicMock(return_value=False)
-
+    with _patch_model(_model(routes={"R1": ["stop_1", "stop_2"]})):
         response = client.post(
             "/train/demand/simulate",
             json={
@@ -270,25 +510,14 @@ def test_simulate_demand_with_corridor() -> None:
 
     assert response.status_code == 200
     body = response.json()
-    assert (
-        "stop_1" in body["affected_stop_ids"] or "stop_2" in body["affected_stop_ids"]
-    )
+    assert set(body["affected_stop_ids"]) == {"stop_1", "stop_2"}
+    simulated = {s["stop_id"]: s for s in body["simulated_demand"]}
+    assert simulated["stop_1"]["trip_count"] == _SAMPLE_STOP["trip_count"] + 10
 
 
 def test_simulate_demand_corridor_fallback_to_endpoints() -> None:
     """When no route contains both stops, fallback marks just the endpoints."""
-    with (
-        patch(
-            "inference_engine.train_router.load_demand_scores_from_db",
-            return_value=[_SAMPLE_STOP, _SAMPLE_STOP_2],
-        ),
-        patch("inference_engine.train_router.engine") as mock_engine,
-    ):
-        mock_conn = MagicMock()
-        mock_conn.execute.return_value.fetchall.return_value = []
-        mock_engine.connect.return_value.__enter__ = MagicMock(return_value=mock_conn)
-        mock_engine.connect.return_value.__exit__ = MagicMock(return_value=False)
-
+    with _patch_model():
         response = client.post(
             "/train/demand/simulate",
             json={
@@ -308,18 +537,7 @@ def test_simulate_demand_corridor_fallback_to_endpoints() -> None:
 
 
 def test_simulate_demand_caps_train_count() -> None:
-    with (
-        patch(
-            "inference_engine.train_router.load_demand_scores_from_db",
-            return_value=[_SAMPLE_STOP],
-        ),
-        patch("inference_engine.train_router.engine") as mock_engine,
-    ):
-        mock_conn = MagicMock()
-        mock_conn.execute.return_value.fetchall.return_value = []
-        mock_engine.connect.return_value.__enter__ = MagicMock(return_value=mock_conn)
-        mock_engine.connect.return_value.__exit__ = MagicMock(return_value=False)
-
+    with _patch_model(_model([_SAMPLE_STOP])):
         response = client.post(
             "/train/demand/simulate",
             json={
@@ -334,37 +552,28 @@ def test_simulate_demand_caps_train_count() -> None:
         )
 
     assert response.status_code == 200
+    assert response.json()["simulated_demand"][0]["trip_count"] == 120
 
 
-def test_simulate_demand_max_3_corridors() -> None:
-    with (
-        patch(
-            "inference_engine.train_router.load_demand_scores_from_db",
-            return_value=[_SAMPLE_STOP],
-        ),
-        patch("inference_engine.train_router.engine") as mock_engine,
-    ):
-        mock_conn = MagicMock()
-        mock_conn.execute.return_value.fetchall.return_value = []
-        mock_engine.connect.return_value.__enter__ = MagicMock(return_value=mock_conn)
-        mock_engine.connect.return_value.__exit__ = MagicMock(return_value=False)
-
-        corridors = [
-            {
-                "origin_stop_id": f"a{i}",
-                "destination_stop_id": f"b{i}",
-                "train_count": 1,
-            }
-            for i in range(5)
-        ]
+def test_simulate_demand_applies_batches_of_corridors() -> None:
+    corridors = [
+        {
+            "origin_stop_id": "stop_1",
+            "destination_stop_id": f"b{i}",
+            "train_count": 1,
+        }
+        for i in range(5)
+    ]
+    with _patch_model(_model([_SAMPLE_STOP])):
         response = client.post("/train/demand/simulate", json={"corridors": corridors})
 
     assert response.status_code == 200
+    assert response.json()["simulated_demand"][0]["trip_count"] == 105
 
 
 def test_simulate_demand_returns_500_on_error() -> None:
     with patch(
-        "inference_engine.train_router.load_demand_scores_from_db",
+        "inference_engine.train_router.demand_simulator.get",
         side_effect=Exception("boom"),
     ):
         response = client.post(
@@ -383,17 +592,70 @@ def test_simulate_demand_returns_500_on_error() -> None:
     assert response.status_code == 500
 
 
+# ── Endpoint: POST /train/demand/simulate/sweep ───────────────────────────────
+
+
+def test_sweep_demand_defaults_to_every_route() -> None:
+    model = _model(routes={"R1": ["stop_1", "stop_2"], "R2": ["stop_2", "stop_x"]})
+    with _patch_model(model):
+        response = client.post("/train/demand/simulate/sweep", json={"top": 3})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["scenario_count"] == 2 * 20
+    assert len(body["results"]) == 3
+    assert body["results"][0]["origin_stop_id"] == "stop_1"
+    assert body["results"][0]["train_count"] == 20
+
+
+def test_sweep_demand_given_corridors_and_counts() -> None:
+    with _patch_model():
+        response = client.post(
+            "/train/demand/simulate/sweep",
+            json={
+                "corridors": [
+                    {"origin_stop_id": "stop_1", "destination_stop_id": "stop_2"}
+                ],
+                "train_counts": [2, 2, 50],
+            },
+        )
+
+    assert response.status_code == 200
+    counts = [r["train_count"] for r in response.json()["results"]]
+    assert sorted(counts) == [2, 20]
+
+
+def test_sweep_demand_returns_500_on_error() -> None:
+    with patch(
+        "inference_engine.train_router.demand_simulator.get",
+        side_effect=Exception("boom"),
+    ):
+        response = client.post("/train/demand/simulate/sweep", json={})
+
+    assert response.status_code == 500
+
+
 # ── Endpoint: GET /train/utilisation ─────────────────────────────────────────
 
 
+def _artifacts(data_version: str = "v1") -> UtilisationArtifacts:
+    return UtilisationArtifacts(
+        data_version=data_version, result_df=pd.DataFrame(), utilisation_json=[]
+    )
+
+
 def test_get_utilisation_from_cache() -> None:
     import inference_engine.train_router as tr  # noqa: PLC0415
 
     tr._UTILISATION_CACHE["headsigns"] = [{"headsign": "Connolly", "stations": []}]  # noqa: SLF001
-    tr._UTILISATION_CACHE["timestamp"] = 1e18  # noqa: SLF001
+    tr._UTILISATION_CACHE["data_version"] = "v1"  # noqa: SLF001
 
-    with patch(
-        "inference_engine.train_router._fetch_latest_simulation", return_value=None
+    with (
+        patch.object(tr.utilisation_pipeline, "get", return_value=_artifacts("v1")),
+        patch(
+            "inference_engine.train_router._fetch_latest_simulation", return_value=None
+        ),
+        patch("inference_engine.train_router._build_headsigns_response") as build,
     ):
         response = client.get("/train/utilisation")
 
@@ -401,44 +663,20 @@ def test_get_utilisation_from_cache() -> None:
     body = response.json()
     assert "headsigns" in body
     assert len(body["headsigns"]) == 1
+    build.assert_not_called()
 
     tr._UTILISATION_CACHE["headsigns"] = None  # noqa: SLF001
-    tr._UTILISATION_CACHE["timestamp"] = 0.0  # noqa: SLF001
+    tr._UTILISATION_CACHE["data_version"] = None  # noqa: SLF001
 
 
-def test_get_utilisation_cache_miss_runs_pipeline() -> None:
+def test_get_utilisation_rebuilds_headsigns_for_new_data_version() -> None:
     import inference_engine.train_router as tr  # noqa: PLC0415
 
-    tr._UTILISATION_CACHE["headsigns"] = None  # noqa: SLF001
-    tr._UTILISATION_CACHE["timestamp"] = 0.0  # noqa: SLF001
-
-    mock_df = pd.DataFrame()
+    tr._UTILISATION_CACHE["headsigns"] = [{"headsign": "Old", "stations": []}]  # noqa: SLF001
+    tr._UTILISATION_CACHE["data_version"] = "v1"  # noqa: SLF001
 
     with (
-        patch(
-            "inference_engine.train_router.load_stop_times_with_stops",
-            return_value=mock_df,
-        ),
-        patch(
-            "inference_engine.train_router.load_train_station_ridership",
-            return_value=mock_df,
-        ),
-        patch(
-            "inference_engine.train_router.process_stop_times",
-            return_value=(mock_df, mock_df),
-        ),
-        patch(
-            "inference_engine.train_router.predict_ridership_2025", return_value=mock_df
-        ),
-        patch(
-            "inference_engine.train_router.distribute_ridership_weighted",
-            return_value=mock_df,
-        ),
-        patch(
-            "inference_engine.train_router.compute_utilisation", return_value=mock_df
-        ),
-        patch("inference_engine.train_router.build_utilisation_json", return_value=[]),
-        patch("inference_engine.train_router.save_recommendation_to_db"),
+        patch.object(tr.utilisation_pipeline, "get", return_value=_artifacts("v2")),
         patch(
             "inference_engine.train_router._build_headsigns_response", return_value=[]
         ),
@@ -450,17 +688,17 @@ def test_get_utilisation_cache_miss_runs_pipeline() -> None:
 
     assert response.status_code == 200
     assert response.json() == {"headsigns": [], "simulation": None}
+    assert tr._UTILISATION_CACHE["data_version"] == "v2"  # noqa: SLF001
+
+    tr._UTILISATION_CACHE["headsigns"] = None  # noqa: SLF001
+    tr._UTILISATION_CACHE["data_version"] = None  # noqa: SLF001
 
 
 def test_get_utilisation_returns_500_on_pipeline_error() -> None:
     import inference_engine.train_router as tr  # noqa: PLC0415
 
-    tr._UTILISATION_CACHE["headsigns"] = None  # noqa: SLF001
-    tr._UTILISATION_CACHE["timestamp"] = 0.0  # noqa: SLF001
-
-    with patch(
-        "inference_engine.train_router.load_stop_times_with_stops",
-        side_effect=Exception("pipeline fail"),
+    with patch.object(
+        tr.utilisation_pipeline, "get", side_effect=Exception("pipeline fail")
     ):
         response = client.get("/train/utilisation")
 
@@ -557,58 +795,147 @@ def test_warm_demand_cache_handles_exception() -> None:
 
 
 def test_warm_utilisation_cache_success() -> None:
-    mock_df = pd.DataFrame()
+    import inference_engine.train_router as tr  # noqa: PLC0415
+
     with (
-        patch(
-            "inference_engine.train_router.load_stop_times_with_stops",
-            return_value=mock_df,
-        ),
-        patch(
-            "inference_engine.train_router.load_train_station_ridership",
-            return_value=mock_df,
-        ),
-        patch(
-            "inference_engine.train_router.process_stop_times",
-            return_value=(mock_df, mock_df),
-        ),
-        patch(
-            "inference_engine.train_router.predict_ridership_2025", return_value=mock_df
-        ),
-        patch(
-            "inference_engine.train_router.distribute_ridership_weighted",
-            return_value=mock_df,
-        ),
-        patch(
-            "inference_engine.train_router.compute_utilisation", return_value=mock_df
-        ),
-        patch("inference_engine.train_router.build_utilisation_json", return_value=[]),
-        patch("inference_engine.train_router.save_recommendation_to_db"),
+        patch.object(tr.utilisation_pipeline, "get", return_value=_artifacts("warm")),
         patch(
             "inference_engine.train_router._build_headsigns_response", return_value=[]
         ),
     ):
         warm_utilisation_cache()
 
+    assert tr._UTILISATION_CACHE["data_version"] == "warm"  # noqa: SLF001
+    tr._UTILISATION_CACHE["headsigns"] = None  # noqa: SLF001
+    tr._UTILISATION_CACHE["data_version"] = None  # noqa: SLF001
+
 
 def test_warm_utilisation_cache_handles_exception() -> None:
-    with patch(
-        "inference_engine.train_router.load_stop_times_with_stops",
-        side_effect=Exception("no DB"),
-    ):
+    import inference_engine.train_router as tr  # noqa: PLC0415
+
+    with patch.object(tr.utilisation_pipeline, "get", side_effect=Exception("no DB")):
         warm_utilisation_cache()
 
 
+# ── Unit: UtilisationPipeline ─────────────────────────────────────────────────
+
+
+def _pipeline_engine(stored_row: Any = None) -> tuple[MagicMock, MagicMock]:  # noqa: ANN401
+    engine = MagicMock()
+    conn = engine.begin.return_value.__enter__.return_value
+    conn.execute.return_value.first.return_value = stored_row
+    return engine, conn
+
+
+def test_pipeline_computes_once_per_data_version() -> None:
+    engine, conn = _pipeline_engine()
+    pipeline = UtilisationPipeline()
+    with (
+        patch(f"{_PIPELINE}.engine", engine),
+        patch.object(pipeline, "data_version", return_value="v1"),
+        patch(f"{_PIPELINE}.compute_artifacts", return_value=_artifacts("v1")) as run,
+        patch(f"{_PIPELINE}.save_recommendation_to_db") as save,
+    ):
+        first = pipeline.get()
+        second = pipeline.get()
+
+    assert first is second
+    run.assert_called_once_with("v1")
+    save.assert_called_once_with([])
+    statements = [str(c.args[0]) for c in conn.execute.call_args_list]
+    assert "pg_advisory_xact_lock" in statements[0]
+    assert any(
+        "INSERT INTO backend.train_utilisation_artifacts" in s for s in statements
+    )
+
+
+def test_pipeline_loads_artefacts_computed_by_another_replica() -> None:
+    result_df = pd.DataFrame({"headsign": ["Bray"], "count_2024": [None]})
+    stored = MagicMock()
+    stored.result_df = json.loads(result_df.to_json(orient="split", index=False))
+    stored.utilisation_json = [{"Train Name": "Bray"}]
+    engine, _ = _pipeline_engine(stored)
+    pipeline = UtilisationPipeline()
+    with (
+        patch(f"{_PIPELINE}.engine", engine),
+        patch.object(pipeline, "data_version", return_value="v1"),
+        patch(f"{_PIPELINE}.compute_artifacts") as run,
+        patch(f"{_PIPELINE}.save_recommendation_to_db") as save,
+    ):
+        artifacts = pipeline.get()
+
+    run.assert_not_called()
+    save.assert_not_called()
+    pd.testing.assert_frame_equal(artifacts.result_df, result_df)
+    assert artifacts.utilisation_json == [{"Train Name": "Bray"}]
+
+
+def test_pipeline_recomputes_when_data_version_changes() -> None:
+    engine, _ = _pipeline_engine()
+    pipeline = UtilisationPipeline()
+    with (
+        patch(f"{_PIPELINE}.engine", engine),
+        patch.object(pipeline, "data_version", side_effect=["v1", "v2"]),
+        patch(
+            f"{_PIPELINE}.compute_artifacts",
+            side_effect=_artifacts,
+        ) as run,
+        patch(f"{_PIPELINE}.save_recommendation_to_db"),
+    ):
+        pipeline.get()
+        artifacts = pipeline.get()
+
+    assert run.call_count == 2
+    assert artifacts.data_version == "v2"
+
+
 # ── EV router coverage ────────────────────────────────────────────────────────
 
 
+_EMPTY_AREAS = encode_json("v1", {"type": "FeatureCollection", "features": []})
+
+
 def test_ev_areas_geojson_success() -> None:
-    mock_data = {"type": "FeatureCollection", "features": []}
-    with patch("inference_engine.ev_service.get_areas_geojson", return_value=mock_data):
+    with patch(
+        "inference_engine.ev_service.get_areas_geojson", return_value=_EMPTY_AREAS
+    ):
         response = client.get("/ev/areas-geojson")
     assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
     assert response.json()["type"] == "FeatureCollection"
 
 
+def test_ev_areas_geojson_uncompressed() -> None:
+    with patch(
+        "inference_engine.ev_service.get_areas_geojson", return_value=_EMPTY_AREAS
+    ):
+        response = client.get(
+            "/ev/areas-geojson", headers={"Accept-Encoding": "identity"}
+        )
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == _EMPTY_AREAS.etag
+    assert response.content == _EMPTY_AREAS.body
+
+
+def test_ev_areas_geojson_not_modified() -> None:
+    with patch(
+        "inference_engine.ev_service.get_areas_geojson", return_value=_EMPTY_AREAS
+    ):
+        etag = client.get("/ev/areas-geojson").headers["etag"]
+        response = client.get("/ev/areas-geojson", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_ev_areas_geojson_passes_zoom() -> None:
+    with patch(
+        "inference_engine.ev_service.get_areas_geojson", return_value=_EMPTY_AREAS
+    ) as mock_get:
+        assert client.get("/ev/areas-geojson?zoom=12").status_code == 200
+        assert client.get("/ev/areas-geojson?zoom=30").status_code == 422
+    mock_get.assert_called_once_with(12)
+
+
 def test_ev_areas_geojson_error() -> None:
     with patch(
         "inference_engine.ev_service.get_areas_geojson", side_effect=Exception("fail")
@@ -652,6 +979,80 @@ def test_ev_charging_demand_error() -> None:
     assert response.status_code == 500
 
 
+def test_ev_charging_stations_reads_from_request_pool() -> None:
+    from inference_engine import ev_service  # noqa: PLC0415
+
+    rows = [("1 Main St", "Dublin", 53.3, -6.2, 2, True)]
+    with patch(
+        "inference_engine.ev_service.request_connection", _request_connection(rows)
+    ):
+        result = asyncio.run(ev_service.get_charging_stations())
+
+    assert result["total_stations"] == 1
+    assert result["stations"][0]["open_hours"] == "24 x 7"
+
+
+def _areas_connection(versions: list[str]) -> tuple[Any, MagicMock]:
+    """Stand-in for ``request_connection`` over the EV area tables."""
+    version_iter = iter(versions)
+    conn = MagicMock()
+
+    def execute(statement: Any, _params: Any = None) -> MagicMock:  # noqa: ANN401
+        result = MagicMock()
+        sql = str(statement)
+        if "source_file_manifests" in sql:
+            result.scalar.return_value = datetime.fromisoformat(next(version_iter))
+        elif "ev_electoral_divisions" in sql:
+            result.all.return_value = [
+                ("Arran Quay A", "DUBLIN CITY", {"type": "MultiPolygon"})
+            ]
+        else:
+            result.all.return_value = [("Arran Quay A, Dublin City", 4.0, 217.0)]
+        return result
+
+    conn.execute = AsyncMock(side_effect=execute)
+
+    @asynccontextmanager
+    async def connection() -> AsyncIterator[MagicMock]:
+        yield conn
+
+    return connection, conn
+
+
+def test_ev_areas_geojson_cached_per_data_version() -> None:
+    from inference_engine import ev_service  # noqa: PLC0415
+
+    connection, conn = _areas_connection(
+        ["2026-01-01T00:00:00", "2026-01-01T00:00:00", "2026-02-01T00:00:00"]
+    )
+    with (
+        patch("inference_engine.ev_service.request_connection", connection),
+        patch.dict(ev_service._areas_cache, clear=True),  # noqa: SLF001
+    ):
+        first = asyncio.run(ev_service.get_areas_geojson())
+        second = asyncio.run(ev_service.get_areas_geojson())
+        reloaded = asyncio.run(ev_service.get_areas_geojson())
+
+    assert second is first
+    assert reloaded is not first
+    assert reloaded.data_version == "2026-02-01T00:00:00"
+    # One version query per call, two build queries per data version
+    assert conn.execute.await_count == 3 + 2 * 2
+    feature = json.loads(first.body)["features"][0]
+    assert feature["properties"]["display_name"] == "Arran Quay A"
+    assert feature["properties"]["charging_demand"] == 4.0
+
+
+def test_ev_areas_simplification_shrinks_with_zoom() -> None:
+    from inference_engine.ev_service import _simplification  # noqa: PLC0415
+
+    coarse_tolerance, coarse_digits = _simplification(8)
+    fine_tolerance, fine_digits = _simplification(16)
+
+    assert coarse_tolerance > fine_tolerance > 0
+    assert coarse_digits < fine_digits
+
+
 # ── Unit: _load_stop_coords ───────────────────────────────────────────────────
 
 
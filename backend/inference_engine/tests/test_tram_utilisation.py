@@ -0,0 +1,177 @@
+"""Tests for the tram utilisation metrics."""
+
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from inference_engine.indicators.tram.tram_utilisation import (
+    TIME_PERIODS,
+    TramData,
+    _match_stop_names,
+    build_gtfs_name_to_ids,
+    build_luas_to_gtfs_name_map,
+    compute_period_metrics,
+)
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+
+_AM_PEAK = {"key": "am_peak", "label": "AM Peak", "start": 7, "end": 9}
+_LATE = {"key": "late", "label": "Late", "start": 23, "end": 1}
+
+
+def _stop_times(rows: list[tuple[str, str, str, int, int]]) -> pd.DataFrame:
+    return pd.DataFrame(
+        rows, columns=["trip_id", "stop_id", "arrival_time", "sequence", "direction_id"]
+    )
+
+
+def _data(stop_times: pd.DataFrame, hourly: list[tuple[str, int, float]]) -> TramData:
+    return TramData(
+        luas_stops=pd.DataFrame(
+            {
+                "stop_id": ["ABB", "JER", "XXX"],
+                "name": ["Abbey Street", "Jervis", "Nowhere"],
+                "line": ["red", "red", "green"],
+            }
+        ),
+        gtfs_stops=pd.DataFrame(
+            {
+                "id": ["g1", "g2", "g3", "g4"],
+                "name": ["Abbey Street", "Abbey Street", "Jervis", "Jervis"],
+            }
+        ),
+        stop_times=stop_times,
+        hourly_dist=pd.DataFrame(
+            [(label, f"{h:02d}:00 - {h:02d}:59", value) for label, h, value in hourly],
+            columns=["line_label", "time_label", "value"],
+        ).assign(line_code="L"),
+        delay_df=pd.DataFrame(
+            {
+                "stop_id": ["JER"],
+                "stop_name": ["Jervis"],
+                "line": ["red"],
+                "avg_delay": [2.5],
+                "delay_count": [4],
+            }
+        ),
+        daily_passengers={"red": 10_000.0},
+    )
+
+
+# ── Unit: name mapping ───────────────────────────────────────────────────────
+
+
+def test_name_map_matches_exact_normalised_and_substring_names() -> None:
+    luas = pd.DataFrame(
+        {
+            "stop_id": ["A", "B", "C", "D"],
+            "name": ["Abbey Street", "Trinity - College", "Stillorgan", "Nowhere"],
+        }
+    )
+    gtfs = pd.DataFrame(
+        {
+            "id": ["1", "2", "3"],
+            "name": ["Abbey Street", "Trinity College", "Stillorgan Luas"],
+        }
+    )
+
+    mapping = build_luas_to_gtfs_name_map(luas, gtfs)
+
+    assert mapping == {
+        "A": "abbey street",
+        "B": "trinity college",
+        "C": "stillorgan luas",
+    }
+
+
+def test_name_map_is_cached_by_stop_lists() -> None:
+    luas = pd.DataFrame({"stop_id": ["A"], "name": ["Abbey Street"]})
+    gtfs = pd.DataFrame({"id": ["1"], "name": ["Abbey Street"]})
+    _match_stop_names.cache_clear()
+
+    first = build_luas_to_gtfs_name_map(luas, gtfs)
+    first["A"] = "mutated"
+    second = build_luas_to_gtfs_name_map(luas.copy(), gtfs.copy())
+
+    assert second == {"A": "abbey street"}
+    assert _match_stop_names.cache_info().hits == 1
+
+
+def test_gtfs_name_to_ids_groups_platforms_by_lowercased_name() -> None:
+    gtfs = pd.DataFrame({"id": ["1", "2", "3"], "name": ["Jervis", "JERVIS", "Abbey"]})
+
+    assert build_gtfs_name_to_ids(gtfs) == {"jervis": ["1", "2"], "abbey": ["3"]}
+
+
+# ── Unit: compute_period_metrics ─────────────────────────────────────────────
+
+
+def test_period_metrics_hand_computed() -> None:
+    stop_times = _stop_times(
+        [
+            ("t1", "g1", "07:10:00", 1, 0),
+            ("t1", "g3", "07:15:00", 2, 0),
+            ("t2", "g2", "08:05:00", 3, 1),
+            ("t2", "g4", "08:00:00", 2, 1),
+            ("t3", "g1", "12:00:00", 1, 0),  # outside the period
+            ("t4", "g1", "25:10:00", 1, 0),  # past midnight, not parsed
+        ]
+    )
+    data = _data(stop_times, [("Red line", 7, 6.0), ("Red line", 8, 4.0)])
+
+    metrics = compute_period_metrics(data, [_AM_PEAK])["am_peak"]
+
+    # The green stop has no GTFS match and is left out
+    assert [m.stop_id for m in metrics] == ["ABB", "JER"]
+    abbey, jervis = metrics
+    assert (abbey.outbound_trips, abbey.inbound_trips, abbey.total_trips) == (1, 1, 2)
+    assert abbey.sequence == 2.0
+    # 1 of the line's 2 trips, 10% of 10,000 daily passengers
+    assert abbey.est_outbound_pax == 500.0
+    assert abbey.est_total_pax == 1000.0
+    assert abbey.capacity == 400.0
+    assert abbey.utilisation == 2.5
+    assert (abbey.avg_delay_mins, abbey.delay_count) == (0.0, 0)
+    assert (jervis.avg_delay_mins, jervis.delay_count) == (2.5, 4)
+
+
+def test_period_metrics_fall_back_to_all_lines_distribution() -> None:
+    stop_times = _stop_times([("t1", "g1", "07:10:00", 1, 0)])
+    data = _data(stop_times, [("All lines", 7, 20.0), ("Green line", 7, 99.0)])
+
+    abbey = compute_period_metrics(data, [_AM_PEAK])["am_peak"][0]
+
+    assert abbey.est_outbound_pax == 2000.0
+
+
+def test_period_metrics_match_single_period_calls() -> None:
+    stop_times = _stop_times(
+        [
+            (f"t{h}-{d}", stop, f"{h:02d}:{m:02d}:00", seq, d)
+            for h in range(24)
+            for d in (0, 1)
+            for m, (stop, seq) in enumerate([("g1", 1), ("g3", 2)])
+        ]
+    )
+    data = _data(stop_times, [("Red line", h, 100 / 24) for h in range(24)])
+
+    together = compute_period_metrics(data, [*TIME_PERIODS, _LATE])
+
+    for period in [*TIME_PERIODS, _LATE]:
+        alone = compute_period_metrics(data, [period])
+        assert together[period["key"]] == alone[period["key"]]
+    # 23:00-01:00 wraps midnight: the 23:00 and 00:00 trips in each direction
+    assert [m.total_trips for m in together["late"]] == [4, 4]
+
+
+@pytest.mark.parametrize("empty", ["stop_times", "hourly_dist"])
+def test_period_metrics_with_no_data_are_zero(empty: str) -> None:
+    stop_times = _stop_times([("t1", "g1", "07:10:00", 1, 0)])
+    data = _data(stop_times, [("Red line", 7, 6.0)])
+    data = TramData(**{**data.__dict__, empty: getattr(data, empty).iloc[0:0]})
+
+    metrics = compute_period_metrics(data, [_AM_PEAK])["am_peak"]
+
+    assert [m.stop_id for m in metrics] == ["ABB", "JER"]
+    assert all(m.est_total_pax == 0.0 and m.utilisation == 0.0 for m in metrics)
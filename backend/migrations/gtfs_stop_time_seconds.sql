@@ -0,0 +1,75 @@
+-- gtfs_stop_time_seconds.sql
+-- Add arrival_seconds/departure_seconds (seconds since the start of the service
+-- day) and the per-stop arrival index to the bus, tram and train stop_times
+-- tables created before these columns existed. create_all does not alter
+-- existing tables, and the incremental GTFS import skips unchanged feeds.
+--
+-- The backfill is only a stopgap: arrival_time/departure_time cannot hold
+-- GTFS times past midnight (e.g. 25:10:00), so the feeds' manifests and HTTP
+-- cache validators are cleared to force a full reload on the next run, which
+-- writes the correct values. Run source_file_manifests.sql first if the
+-- manifests are still in gtfs_file_manifests.
+--
+-- CREATE INDEX CONCURRENTLY cannot run inside a transaction block, so run the
+-- file as is (psql autocommits each statement), not wrapped in BEGIN/COMMIT:
+--   psql -h <host> -U app_owner -d smart_enough_city -f gtfs_stop_time_seconds.sql
+
+-- ── Bus ────────────────────────────────────────────────────────────────────────
+ALTER TABLE external_data.bus_stop_times
+    ADD COLUMN IF NOT EXISTS arrival_seconds INTEGER,
+    ADD COLUMN IF NOT EXISTS departure_seconds INTEGER;
+UPDATE external_data.bus_stop_times
+    SET arrival_seconds = EXTRACT(EPOCH FROM arrival_time)::int,
+        departure_seconds = EXTRACT(EPOCH FROM departure_time)::int
+    WHERE arrival_seconds IS NULL OR departure_seconds IS NULL;
+ALTER TABLE external_data.bus_stop_times
+    ALTER COLUMN arrival_seconds SET NOT NULL,
+    ALTER COLUMN departure_seconds SET NOT NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_bus_stop_times_stop_arrival
+    ON external_data.bus_stop_times (stop_id, arrival_seconds);
+
+-- ── Tram ───────────────────────────────────────────────────────────────────────
+ALTER TABLE external_data.tram_stop_times
+    ADD COLUMN IF NOT EXISTS arrival_seconds INTEGER,
+    ADD COLUMN IF NOT EXISTS departure_seconds INTEGER;
+UPDATE external_data.tram_stop_times
+    SET arrival_seconds = EXTRACT(EPOCH FROM arrival_time)::int,
+        departure_seconds = EXTRACT(EPOCH FROM departure_time)::int
+    WHERE arrival_seconds IS NULL OR departure_seconds IS NULL;
+ALTER TABLE external_data.tram_stop_times
+    ALTER COLUMN arrival_seconds SET NOT NULL,
+    ALTER COLUMN departure_seconds SET NOT NULL;
+-- An earlier (stop_id, arrival_time) index of the same name was only ever
+-- created by hand, never by create_all on an existing table; drop it so the
+-- IF NOT EXISTS below does not keep it in place of the seconds index.
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_indexes
+        WHERE schemaname = 'external_data'
+          AND indexname = 'ix_tram_stop_times_stop_arrival'
+          AND indexdef LIKE '%arrival_time%'
+    ) THEN
+        DROP INDEX external_data.ix_tram_stop_times_stop_arrival;
+    END IF;
+END $$;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tram_stop_times_stop_arrival
+    ON external_data.tram_stop_times (stop_id, arrival_seconds);
+
+-- ── Train ──────────────────────────────────────────────────────────────────────
+ALTER TABLE external_data.train_stop_times
+    ADD COLUMN IF NOT EXISTS arrival_seconds INTEGER,
+    ADD COLUMN IF NOT EXISTS departure_seconds INTEGER;
+UPDATE external_data.train_stop_times
+    SET arrival_seconds = EXTRACT(EPOCH FROM arrival_time)::int,
+        departure_seconds = EXTRACT(EPOCH FROM departure_time)::int
+    WHERE arrival_seconds IS NULL OR departure_seconds IS NULL;
+ALTER TABLE external_data.train_stop_times
+    ALTER COLUMN arrival_seconds SET NOT NULL,
+    ALTER COLUMN departure_seconds SET NOT NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_train_stop_times_stop_arrival
+    ON external_data.train_stop_times (stop_id, arrival_seconds);
+
+-- ── Force a full reload of the GTFS feeds ─────────────────────────────────────
+DELETE FROM external_data.source_file_manifests WHERE source IN ('bus', 'tram', 'train');
+DELETE FROM external_data.http_cache_validators;
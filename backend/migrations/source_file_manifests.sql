@@ -0,0 +1,23 @@
+-- source_file_manifests.sql
+-- Rename gtfs_file_manifests to source_file_manifests, and its feed column to
+-- source. Besides the GTFS feeds the table records the imports of the EV
+-- areas, the population census and the train ridership data. create_all does
+-- not rename tables, and would otherwise create an empty source_file_manifests
+-- next to the old one, forcing a full reload of every source.
+--
+-- Safe to re-run: does nothing once the table has been renamed. Run it before
+-- gtfs_stop_time_seconds.sql on a database that still has the old table:
+--   psql -h <host> -U app_owner -d smart_enough_city -f source_file_manifests.sql
+
+DO $$
+BEGIN
+    IF to_regclass('external_data.gtfs_file_manifests') IS NOT NULL
+       AND to_regclass('external_data.source_file_manifests') IS NULL THEN
+        ALTER TABLE external_data.gtfs_file_manifests
+            RENAME TO source_file_manifests;
+        ALTER TABLE external_data.source_file_manifests
+            RENAME COLUMN feed TO source;
+        ALTER TABLE external_data.source_file_manifests
+            RENAME CONSTRAINT gtfs_file_manifests_pkey TO source_file_manifests_pkey;
+    END IF;
+END $$;
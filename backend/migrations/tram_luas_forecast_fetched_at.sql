@@ -0,0 +1,11 @@
+-- tram_luas_forecast_fetched_at.sql
+-- Add fetched_at to tram_luas_forecasts, created before the column existed.
+-- create_all does not alter existing tables. The live forecast job drops the
+-- forecasts of a stop whose fetch keeps failing once they pass a max age, so
+-- existing rows are stamped with the time of the migration.
+--
+-- Safe to re-run. Run with:
+--   psql -h <host> -U app_owner -d smart_enough_city -f tram_luas_forecast_fetched_at.sql
+
+ALTER TABLE external_data.tram_luas_forecasts
+    ADD COLUMN IF NOT EXISTS fetched_at TIMESTAMPTZ NOT NULL DEFAULT now();